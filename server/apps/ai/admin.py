@@ -0,0 +1,116 @@
+"""
+Admin configuration for AI app
+"""
+from django.contrib import admin
+from .models import ChatMessage, ChatSession, LLMCallLog, RequestAbort
+
+
+@admin.register(LLMCallLog)
+class LLMCallLogAdmin(admin.ModelAdmin):
+    """
+    Admin interface for recorded LLM calls
+    """
+    list_display = [
+        'id',
+        'endpoint',
+        'operation',
+        'llm_model',
+        'outcome',
+        'total_tokens',
+        'estimated_cost',
+        'wall_time_ms',
+        'time_to_first_token_ms',
+        'created_at',
+    ]
+    list_filter = [
+        'outcome',
+        'llm_model',
+        'operation',
+        'streamed',
+        'created_at',
+    ]
+    search_fields = [
+        'endpoint',
+        'user__email',
+        'error',
+    ]
+    readonly_fields = [
+        'endpoint',
+        'operation',
+        'user',
+        'provider',
+        'llm_model',
+        'streamed',
+        'outcome',
+        'error',
+        'estimated_prompt_tokens',
+        'prompt_tokens',
+        'completion_tokens',
+        'total_tokens',
+        'estimated_cost',
+        'wall_time_ms',
+        'time_to_first_token_ms',
+        'created_at',
+    ]
+    ordering = ['-created_at']
+
+    def has_add_permission(self, request):
+        """Calls are only recorded by the usage callback handler"""
+        return False
+
+
+class ChatMessageInline(admin.TabularInline):
+    model = ChatMessage
+    fields = ['role', 'content', 'tokens', 'summarized', 'created_at']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(ChatSession)
+class ChatSessionAdmin(admin.ModelAdmin):
+    """
+    Admin interface for advisor chat sessions
+    """
+    list_display = ['id', 'user', 'kind', 'subject_id', 'summary_tokens', 'updated_at']
+    list_filter = ['kind', 'updated_at']
+    search_fields = ['user__email', 'summary']
+    readonly_fields = ['context_generation', 'summary_tokens', 'created_at', 'updated_at']
+    inlines = [ChatMessageInline]
+
+
+@admin.register(RequestAbort)
+class RequestAbortAdmin(admin.ModelAdmin):
+    """
+    Admin interface for abandoned requests
+    """
+    list_display = [
+        'id',
+        'endpoint',
+        'reason',
+        'stage',
+        'elapsed_ms',
+        'created_at',
+    ]
+    list_filter = [
+        'reason',
+        'endpoint',
+        'created_at',
+    ]
+    search_fields = [
+        'endpoint',
+        'user__email',
+    ]
+    readonly_fields = [
+        'endpoint',
+        'user',
+        'reason',
+        'stage',
+        'elapsed_ms',
+        'created_at',
+    ]
+    ordering = ['-created_at']
+
+    def has_add_permission(self, request):
+        """Aborts are only recorded by the cancellation middleware"""
+        return False
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class AiConfig(AppConfig):
+    name = 'apps.ai'
+
+    def ready(self):
+        from .timing import install_query_recorder
+
+        connection_created.connect(install_query_recorder, dispatch_uid='ai.request_timing')
@@ -0,0 +1,105 @@
+"""
+Helpers for native async API views served under ASGI
+
+DRF views are synchronous, so the AI endpoints (which spend nearly all of
+their time waiting on the model) get plain Django async views instead.
+These helpers give them the same JWT authentication, request parsing and
+JSON rendering as the DRF endpoints they shadow.
+"""
+
+import json
+import math
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from apps.tasks.services import accepted_body
+
+from .throttling import admit
+
+
+def api_response(data, status=status.HTTP_200_OK, headers=None) -> JsonResponse:
+    """JSON response rendered with DRF's encoder (Decimal, datetime, ...)"""
+    return JsonResponse(
+        data,
+        status=status,
+        encoder=JSONEncoder,
+        safe=False,
+        headers=headers,
+    )
+
+
+def _parse_request_data(request):
+    """Parse the body the way DRF's JSON/Form/MultiPart parsers would"""
+    content_type = request.content_type or ""
+    if content_type.startswith("application/json"):
+        if not request.body:
+            return {}
+        return json.loads(request.body)
+    return request.POST
+
+
+def async_api_view(view):
+    """
+    Wrap an async view with JWT authentication and body parsing
+
+    Unauthenticated requests get the same 401 body DRF's IsAuthenticated
+    produces, and requests over the LLM limits the same 429 as LLMThrottle.
+    Inside the view, request.user is the authenticated user and
+    request.data the parsed body.
+    """
+
+    @csrf_exempt
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await sync_to_async(JWTAuthentication().authenticate)(request)
+        except APIException as e:
+            detail = e.detail if isinstance(e.detail, dict) else {"detail": e.detail}
+            return api_response(detail, status=e.status_code)
+
+        if result is None:
+            return api_response(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        request.user, request.auth = result
+
+        if settings.LLM_THROTTLE["enabled"]:
+            wait = await sync_to_async(admit)(request, str(request.user.pk))
+            if wait is not None:
+                wait = math.ceil(wait)
+                return api_response(
+                    {"detail": f"Request was throttled. Expected available in {wait} seconds."},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
+                    headers={"Retry-After": str(wait)},
+                )
+
+        try:
+            request.data = _parse_request_data(request)
+        except ValueError as e:
+            return api_response(
+                {"detail": f"JSON parse error - {str(e)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def task_accepted_response(task, **extra) -> JsonResponse:
+    """Async counterpart of apps.tasks.views.task_accepted_response"""
+    data = accepted_body(task, **extra)
+    return api_response(
+        data,
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": data["status_url"]},
+    )
@@ -0,0 +1,536 @@
+"""
+End-to-end benchmark of the AI endpoints (python manage.py benchmark)
+
+Seeds benchmark users, profiles, jobs and analyses, then drives the real
+endpoints through the full middleware stack with Django's test client,
+with the offline model stand-in (apps.ai.stand_in) in place of the model
+APIs. Each scenario reports latency percentiles, throughput, database
+queries per request and peak RSS; results are JSON so a run can be
+compared with a stored baseline.
+"""
+
+import io
+import json
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+import django
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import Max
+from django.test import Client
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.ai.timing import current_timing, start_request_timing
+from apps.users.models import User
+from apps.profiles.models import (
+    Certification,
+    Education,
+    Skill,
+    UserProfile,
+    UserSkill,
+    WorkExperience,
+)
+from apps.jobs.models import Job, JobEligibilityAnalysis, JobSkillRequirement
+
+
+BENCHMARK_EMAIL_DOMAIN = "benchmark.local"
+BENCHMARK_JOB_URL = "https://benchmark.local/jobs/"
+
+BENCHMARK_SKILLS = [
+    ("Python", "TECHNICAL"),
+    ("Django", "FRAMEWORK"),
+    ("PostgreSQL", "TOOL"),
+    ("Docker", "TOOL"),
+    ("Kubernetes", "TOOL"),
+    ("AWS", "TOOL"),
+    ("React", "FRAMEWORK"),
+    ("TypeScript", "TECHNICAL"),
+    ("Redis", "TOOL"),
+    ("GraphQL", "TECHNICAL"),
+    ("Machine Learning", "TECHNICAL"),
+    ("Communication", "SOFT"),
+    ("Leadership", "SOFT"),
+    ("System Design", "TECHNICAL"),
+    ("CI/CD", "TECHNICAL"),
+]
+_LEVELS = ["BEGINNER", "INTERMEDIATE", "ADVANCED", "EXPERT"]
+_ELIGIBILITY = ["EXCELLENT", "GOOD", "FAIR", "POOR"]
+
+_ROLE_DESCRIPTION = (
+    "Designed and operated backend services handling several million requests a day. "
+    "Owned the data model, API design and on-call rotation for the team, and worked "
+    "closely with product to plan quarterly roadmaps. Migrated legacy batch jobs to "
+    "event-driven pipelines and introduced load testing to the release process. "
+)
+
+
+# ----------------------------------------------------------------------
+# Seed data
+# ----------------------------------------------------------------------
+
+def benchmark_users() -> List[User]:
+    """Seeded benchmark users (excluding per-request onboarding users)"""
+    return list(
+        User.objects.filter(
+            email__endswith=f"@{BENCHMARK_EMAIL_DOMAIN}", email__startswith="bench-user-"
+        ).order_by("id")
+    )
+
+
+def benchmark_jobs() -> List[Job]:
+    return list(Job.objects.filter(source_url__startswith=BENCHMARK_JOB_URL).order_by("id"))
+
+
+def seed_benchmark_data(users: int, jobs: int, analyses_per_user: int, rng: np.random.Generator):
+    """
+    Create benchmark users with full profiles, jobs and past analyses
+
+    Existing benchmark data is kept, so repeated runs only top it up.
+    """
+    skills = []
+    for name, skill_type in BENCHMARK_SKILLS:
+        skill, _ = Skill.objects.get_or_create(name=name, defaults={"skill_type": skill_type})
+        skills.append(skill)
+
+    existing_jobs = Job.objects.filter(source_url__startswith=BENCHMARK_JOB_URL).count()
+    for index in range(existing_jobs, jobs):
+        _seed_job(index, skills, rng)
+
+    all_jobs = benchmark_jobs()
+    for index in range(users):
+        email = f"bench-user-{index}@{BENCHMARK_EMAIL_DOMAIN}"
+        user = User.objects.filter(email=email).first()
+        if user is None:
+            user = _create_user(email)
+            _seed_profile(user, skills, rng)
+        missing = analyses_per_user - JobEligibilityAnalysis.objects.filter(user=user).count()
+        if missing > 0:
+            _seed_analyses(user, all_jobs, missing, rng)
+
+
+def delete_benchmark_data():
+    """Delete every benchmark user (with their profiles and analyses) and job"""
+    bench_users = User.objects.filter(email__endswith=f"@{BENCHMARK_EMAIL_DOMAIN}")
+    Job.objects.filter(added_by__in=bench_users).delete()
+    Job.objects.filter(source_url__startswith=BENCHMARK_JOB_URL).delete()
+    _delete_users(bench_users)
+
+
+def _delete_users(users):
+    """Delete users along with their uploaded resume files"""
+    for profile in UserProfile.objects.filter(user__in=users).exclude(resume=""):
+        if profile.resume:
+            profile.resume.delete(save=False)
+    users.delete()
+
+
+def _create_user(email: str) -> User:
+    user = User(email=email, username=email.split("@")[0])
+    user.set_unusable_password()
+    user.save()
+    return user
+
+
+def _seed_profile(user: User, skills: List[Skill], rng: np.random.Generator):
+    profile, _ = UserProfile.objects.get_or_create(user=user)
+    profile.bio = "Backend engineer who enjoys distributed systems and mentoring."
+    profile.current_title = "Senior Software Engineer"
+    profile.current_company = "Benchmark Corp"
+    profile.years_of_experience = Decimal("8.0")
+    profile.career_goal = "Lead the platform team of a growing product company."
+    profile.target_roles = ["Staff Engineer", "Engineering Manager"]
+    profile.industry = "Technology"
+    profile.save()
+
+    UserSkill.objects.bulk_create([
+        UserSkill(
+            profile=profile,
+            skill=skill,
+            proficiency_level=_LEVELS[int(rng.integers(len(_LEVELS)))],
+            years_of_experience=Decimal(int(rng.integers(1, 9))),
+        )
+        for skill in rng.choice(skills, size=10, replace=False)
+    ])
+    today = date.today()
+    WorkExperience.objects.bulk_create([
+        WorkExperience(
+            profile=profile,
+            job_title=f"Software Engineer {level}",
+            company=f"Company {level}",
+            start_date=today - timedelta(days=365 * (2 * level + 2)),
+            end_date=None if level == 0 else today - timedelta(days=365 * (2 * level)),
+            is_current=level == 0,
+            description=_ROLE_DESCRIPTION * 2,
+            achievements=["Cut p95 latency by 40%", "Led a migration to Kubernetes"],
+        )
+        for level in range(5)
+    ])
+    Education.objects.create(
+        profile=profile,
+        institution="State University",
+        degree="BSc Computer Science",
+        degree_level="BACHELOR",
+        field_of_study="Computer Science",
+        start_date=today - timedelta(days=365 * 16),
+        end_date=today - timedelta(days=365 * 12),
+    )
+    Certification.objects.create(
+        profile=profile,
+        name="Cloud Practitioner",
+        issuing_organization="AWS",
+        issue_date=today - timedelta(days=400),
+    )
+
+
+def _seed_job(index: int, skills: List[Skill], rng: np.random.Generator):
+    job = Job.objects.create(
+        title=f"Backend Engineer {index}",
+        company_name=f"Employer {index % 50}",
+        company_description="A product company building developer tools.",
+        description=_ROLE_DESCRIPTION * 3,
+        requirements="5+ years building web services.\nExperience with cloud platforms.",
+        location="Remote",
+        is_remote=True,
+        source_url=f"{BENCHMARK_JOB_URL}{index}",
+    )
+    JobSkillRequirement.objects.bulk_create([
+        JobSkillRequirement(
+            job=job,
+            skill=skill,
+            requirement_type="MUST_HAVE" if position < 4 else "NICE_TO_HAVE",
+            minimum_proficiency=_LEVELS[int(rng.integers(1, len(_LEVELS)))],
+        )
+        for position, skill in enumerate(rng.choice(skills, size=6, replace=False))
+    ])
+
+
+def _seed_analyses(user: User, jobs: List[Job], count: int, rng: np.random.Generator):
+    JobEligibilityAnalysis.objects.bulk_create([
+        JobEligibilityAnalysis(
+            user=user,
+            job=jobs[int(rng.integers(len(jobs)))],
+            eligibility_level=_ELIGIBILITY[int(rng.integers(len(_ELIGIBILITY)))],
+            match_score=int(rng.integers(20, 100)),
+            analysis_summary="Seeded benchmark analysis.",
+            full_analysis="{}",
+            strengths=["Python"],
+            gaps=["Kubernetes"],
+        )
+        for _ in range(count)
+    ])
+
+
+def resume_upload(iteration: int) -> SimpleUploadedFile:
+    """A DOCX resume, unique per iteration so the parse cache is not hit"""
+    from docx import Document
+
+    document = Document()
+    document.add_heading(f"Benchmark Candidate {iteration}", level=1)
+    document.add_paragraph(f"Run {uuid.uuid4()}")
+    document.add_paragraph("Senior Software Engineer, Benchmark Corp (2019 - present)")
+    document.add_paragraph(_ROLE_DESCRIPTION * 3)
+    document.add_paragraph("Skills: " + ", ".join(name for name, _ in BENCHMARK_SKILLS))
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return SimpleUploadedFile(
+        "resume.docx",
+        buffer.getvalue(),
+        content_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    )
+
+
+# ----------------------------------------------------------------------
+# Scenarios
+# ----------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    One endpoint under test
+
+    Attributes:
+        name: Scenario name used on the command line and in results
+        method: HTTP method
+        path: URL path
+        body: Builds the request body from (iteration, job ids), or None
+        multipart: Send the body as multipart form data instead of JSON
+        fresh_user: Use a new user per request (onboarding creates records)
+    """
+
+    name: str
+    method: str
+    path: str
+    body: Optional[Callable[[int, List[int]], Dict[str, Any]]] = None
+    multipart: bool = False
+    fresh_user: bool = False
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario(
+            "onboard",
+            "post",
+            "/api/profiles/profile/onboard/",
+            body=lambda i, job_ids: {"resume": resume_upload(i)},
+            multipart=True,
+            fresh_user=True,
+        ),
+        Scenario(
+            "analyze",
+            "post",
+            "/api/jobs/analyses/analyze/",
+            body=lambda i, job_ids: {"job_id": job_ids[i % len(job_ids)], "force": True},
+        ),
+        Scenario(
+            "stream_analyze_dream_job",
+            "post",
+            "/api/jobs/analyses/stream_analyze_dream_job/",
+            # Temporary (unsaved) jobs cannot be analyzed: save the job
+            body=lambda i, job_ids: {
+                "job_description": f"Staff Backend Engineer {i}\n{_ROLE_DESCRIPTION}",
+                "save_job": True,
+            },
+        ),
+        Scenario("analyzed", "get", "/api/jobs/analyzed/"),
+        Scenario("stats", "get", "/api/jobs/analyses/stats/"),
+        Scenario("complete_profile", "get", "/api/profiles/profile/complete/"),
+    ]
+}
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+
+def _client_for(user: User) -> Client:
+    token = RefreshToken.for_user(user).access_token
+    return Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+
+def _request(client: Client, scenario: Scenario, iteration: int, job_ids: List[int]) -> Dict[str, Any]:
+    """Perform one request, consuming streamed bodies, and measure it"""
+    kwargs = {}
+    if scenario.body is not None:
+        body = scenario.body(iteration, job_ids)
+        kwargs = {"data": body} if scenario.multipart else {
+            "data": json.dumps(body), "content_type": "application/json"
+        }
+
+    # Queries are counted by apps.ai.timing, which also sees the ones made
+    # in threads working for the request (coalesced streams). The request
+    # timing middleware replaces this timing with its own, if enabled.
+    start_request_timing()
+    started = time.perf_counter()
+    first_byte = None
+    response = getattr(client, scenario.method)(scenario.path, **kwargs)
+    if response.streaming:
+        chunks = []
+        for chunk in response.streaming_content:
+            if first_byte is None:
+                first_byte = time.perf_counter()
+            chunks.append(chunk)
+        content = b"".join(chunks)
+    else:
+        content = response.content
+    finished = time.perf_counter()
+    timing = current_timing()
+
+    failed = response.status_code >= 400 or (
+        response.streaming and b'"type": "error"' in content
+    )
+    return {
+        "latency": finished - started,
+        "ttfb": (first_byte or finished) - started,
+        "queries": timing.db_queries,
+        "query_time": timing.db_ms / 1000,
+        "failed": failed,
+        "status": response.status_code,
+    }
+
+
+def run_scenario(
+    scenario: Scenario,
+    users: List[User],
+    job_ids: List[int],
+    iterations: int,
+    concurrency: int = 1,
+    warmup: int = 1,
+) -> Dict[str, Any]:
+    """
+    Run a scenario and summarize it
+
+    Args:
+        scenario: Scenario to run
+        users: Seeded users the requests rotate through
+        job_ids: Seeded job ids used by request bodies
+        iterations: Measured requests
+        concurrency: Requests in flight at once (one client per thread)
+        warmup: Unmeasured requests made first
+
+    Returns:
+        Summary dict (see summarize())
+    """
+    local = threading.local()
+    onboarding_users = []
+    lock = threading.Lock()
+
+    def client_for(index: int) -> Client:
+        if scenario.fresh_user:
+            user = _create_user(f"bench-onboard-{uuid.uuid4().hex[:12]}@{BENCHMARK_EMAIL_DOMAIN}")
+            with lock:
+                onboarding_users.append(user.pk)
+            return _client_for(user)
+        if not hasattr(local, "clients"):
+            local.clients = {}
+        user = users[index % len(users)]
+        if user.pk not in local.clients:
+            local.clients[user.pk] = _client_for(user)
+        return local.clients[user.pk]
+
+    def one(index: int) -> Dict[str, Any]:
+        try:
+            return _request(client_for(index), scenario, index, job_ids)
+        finally:
+            connection.close()
+
+    # Everything the scenario writes is removed afterwards so that runs
+    # (and the scenarios after this one) see the same seeded data
+    last_analysis_id = JobEligibilityAnalysis.objects.aggregate(last=Max("id"))["last"] or 0
+
+    for index in range(warmup):
+        _request(client_for(index), scenario, index, job_ids)
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(one, range(warmup, warmup + iterations)))
+    else:
+        samples = [
+            _request(client_for(index), scenario, index, job_ids)
+            for index in range(warmup, warmup + iterations)
+        ]
+    elapsed = time.perf_counter() - started
+
+    JobEligibilityAnalysis.objects.filter(id__gt=last_analysis_id, user__in=users).delete()
+    Job.objects.filter(added_by__in=users).delete()
+    _delete_users(User.objects.filter(pk__in=onboarding_users))
+    return summarize(samples, elapsed, concurrency)
+
+
+def summarize(samples: List[Dict[str, Any]], elapsed: float, concurrency: int) -> Dict[str, Any]:
+    """Latency percentiles (ms), throughput, queries and errors of a run"""
+    latency = np.array([sample["latency"] for sample in samples]) * 1000
+    ttfb = np.array([sample["ttfb"] for sample in samples]) * 1000
+    queries = np.array([sample["queries"] for sample in samples])
+    query_time = np.array([sample["query_time"] for sample in samples]) * 1000
+    return {
+        "requests": len(samples),
+        "concurrency": concurrency,
+        "errors": sum(sample["failed"] for sample in samples),
+        "statuses": sorted({sample["status"] for sample in samples}),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+        "latency_ms": _percentiles(latency),
+        "ttfb_ms": _percentiles(ttfb),
+        "queries_per_request": {
+            "mean": round(float(queries.mean()), 2),
+            "max": int(queries.max()),
+        },
+        "query_time_ms": _percentiles(query_time),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _percentiles(values: np.ndarray) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "mean": round(float(values.mean()), 2),
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2),
+        "max": round(float(values.max()), 2),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_metadata(**options) -> Dict[str, Any]:
+    """Environment of a run, stored next to its results"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "created_at": timezone.now().isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        **options,
+    }
+
+
+# ----------------------------------------------------------------------
+# Baseline comparison
+# ----------------------------------------------------------------------
+
+# Latency changes smaller than this are noise whatever the ratio
+MIN_LATENCY_REGRESSION_MS = 5.0
+
+
+def compare_results(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    Regressions of a run against a baseline run
+
+    Latency percentiles and peak RSS regress when they grow by more than
+    tolerance (a fraction); query counts and errors regress on any increase.
+
+    Returns:
+        One message per regression (empty if none)
+    """
+    regressions = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+
+        for percentile in ("p50", "p95", "p99"):
+            now, before = current["latency_ms"][percentile], base["latency_ms"][percentile]
+            if now > before * (1 + tolerance) and now - before > MIN_LATENCY_REGRESSION_MS:
+                regressions.append(
+                    f"{name}: latency {percentile} {before:.1f}ms -> {now:.1f}ms"
+                )
+
+        now, before = current["queries_per_request"]["mean"], base["queries_per_request"]["mean"]
+        if now > before:
+            regressions.append(f"{name}: queries per request {before} -> {now}")
+
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {current['errors']}")
+
+        now, before = current["peak_rss_mb"], base["peak_rss_mb"]
+        if now > before * (1 + tolerance):
+            regressions.append(f"{name}: peak RSS {before}MB -> {now}MB")
+    return regressions
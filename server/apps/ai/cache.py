@@ -0,0 +1,155 @@
+"""
+Content-addressed caching helpers for LLM results
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from asgiref.sync import sync_to_async
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and fold case so trivially different pastes share a key"""
+    return _WHITESPACE_RE.sub(" ", text or "").strip().casefold()
+
+
+def content_hash(*parts: Any) -> str:
+    """SHA-256 hex digest of the given parts joined with a separator"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class TieredCache:
+    """
+    In-process LRU with TTL eviction in front of a persistent store
+
+    Args:
+        max_entries: Maximum number of entries kept in memory
+        ttl: Seconds an in-memory entry stays valid
+        load: Callable returning the stored value for a key, or None
+        store: Callable persisting a freshly computed value
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        load: Optional[Callable[[str], Any]] = None,
+        store: Optional[Callable[[str, Any], None]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._load = load
+        self._store = store
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+
+    def _get_memory(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_memory(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._stats[counter] += 1
+
+    def _get_store(self, key: str):
+        if self._load is not None:
+            value = self._load(key)
+            if value is not None:
+                self._count("store_hits")
+                self._set_memory(key, value)
+                return value
+
+        self._count("misses")
+        return None
+
+    def get(self, key: str):
+        """Return the cached value from memory or the store, or None"""
+        value = self._get_memory(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+        return self._get_store(key)
+
+    async def aget(self, key: str):
+        """Async get(); only a memory miss pays for a hop to the store thread"""
+        value = self._get_memory(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+        return await sync_to_async(self._get_store)(key)
+
+    def set(self, key: str, value: Any):
+        """Cache a value in memory and persist it to the store"""
+        if self._store is not None:
+            self._store(key, value)
+        self._set_memory(key, value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]):
+        """Return the cached value, computing and caching it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    async def aset(self, key: str, value: Any):
+        """Async set()"""
+        if self._store is not None:
+            await sync_to_async(self._store)(key, value)
+        self._set_memory(key, value)
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]):
+        """Async get_or_compute() taking a coroutine function"""
+        value = await self.aget(key)
+        if value is None:
+            value = await compute()
+            await self.aset(key, value)
+        return value
+
+    def invalidate(self, key: str = None):
+        """Drop one key (or everything) from memory; the store is left alone"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["memory_hits"] + stats["store_hits"] + stats["misses"]
+        stats["hit_rate"] = (
+            round((stats["memory_hits"] + stats["store_hits"]) / lookups, 4)
+            if lookups
+            else 0
+        )
+        return stats
@@ -0,0 +1,255 @@
+"""
+Per-request deadlines and cancellation of AI work
+
+RequestCancellationMiddleware gives every request a CancelToken carrying
+its deadline (REQUEST_DEADLINE, or shorter if the client asks with the
+X-Request-Timeout header). The token is cancelled when the server sees
+the client go away: a streaming body closed before its end, or an async
+view cancelled by the ASGI handler.
+
+The pipelines check the token:
+
+- in every LLM call, through CancellationCallbackHandler, which pooled
+  clients carry first: a call does not start once the request is dead,
+  and a stream stops at the next token (closing the upstream response)
+- at checkpoint() calls before each step and before database writes, so
+  an abandoned analysis is never stored
+- around awaited model calls (within_deadline()), which a deadline
+  interrupts even while no token arrives
+
+Aborted requests are recorded as RequestAbort rows and reported next to
+the LLM usage rollup.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import Count
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+DISCONNECTED, DEADLINE = "DISCONNECTED", "DEADLINE"
+
+
+class Cancelled(Exception):
+    """The work was abandoned: its client disconnected"""
+
+    reason = DISCONNECTED
+
+    def __init__(self, stage: str = ""):
+        self.stage = stage
+        super().__init__(f"Request {self.reason.lower()} during {stage or 'processing'}")
+
+
+class DeadlineExceeded(Cancelled):
+    """The request ran past its deadline"""
+
+    reason = DEADLINE
+
+
+class CancelToken:
+    """
+    Cancellation state and deadline of one request (or one shared flight)
+
+    Attributes:
+        deadline: time.monotonic() value after which the work is abandoned,
+            None for no deadline
+        reason: DISCONNECTED or DEADLINE once cancelled, else None
+        stage: Checkpoint at which the cancellation was noticed
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.deadline = deadline
+        self.started = time.monotonic()
+        self.reason: Optional[str] = None
+        self.stage = ""
+        self._event = threading.Event()
+
+    @classmethod
+    def with_timeout(cls, timeout: Optional[float]) -> "CancelToken":
+        return cls(time.monotonic() + timeout if timeout else None)
+
+    def cancel(self, reason: str = DISCONNECTED):
+        """Cancel the token; the first reason wins"""
+        if self.reason is None:
+            self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline (None without one)"""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def elapsed_ms(self) -> int:
+        return int((time.monotonic() - self.started) * 1000)
+
+    def check(self, stage: str = ""):
+        """
+        Raise if the work should stop
+
+        Raises:
+            Cancelled: The token was cancelled
+            DeadlineExceeded: The deadline has passed
+        """
+        if not self.cancelled and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(DEADLINE)
+        if self.cancelled:
+            self.stage = self.stage or stage
+            raise DeadlineExceeded(stage) if self.reason == DEADLINE else Cancelled(stage)
+
+
+_current: contextvars.ContextVar[Optional[CancelToken]] = contextvars.ContextVar(
+    "cancel_token", default=None
+)
+
+
+def current_token() -> Optional[CancelToken]:
+    """Token of the current request, if any"""
+    return _current.get()
+
+
+def bind_token(token: Optional[CancelToken]):
+    """
+    Make a token the current one in this context
+
+    Like the call context of apps.ai.usage it is not reset when the view
+    returns, so streaming bodies keep checking their request's token.
+    """
+    _current.set(token)
+
+
+def start_request_token(timeout: Optional[float]) -> CancelToken:
+    """Bind a new token for a request with the given timeout (seconds)"""
+    token = CancelToken.with_timeout(timeout)
+    bind_token(token)
+    return token
+
+
+def request_timeout(request) -> float:
+    """
+    Deadline of a request in seconds: REQUEST_DEADLINE["default"], or the
+    client's X-Request-Timeout capped at REQUEST_DEADLINE["max"]
+    """
+    config = settings.REQUEST_DEADLINE
+    try:
+        requested = float(request.headers.get(config["header"], ""))
+    except ValueError:
+        return config["default"]
+    return min(max(requested, 1.0), config["max"])
+
+
+def checkpoint(stage: str = ""):
+    """Raise Cancelled if the current request is dead (no-op without a token)"""
+    token = _current.get()
+    if token is not None:
+        token.check(stage)
+
+
+async def within_deadline(awaitable: Awaitable[Any], stage: str = "") -> Any:
+    """
+    Await the awaitable, abandoning it at the current request's deadline
+
+    Raises:
+        DeadlineExceeded: The deadline passed first
+    """
+    token = _current.get()
+    remaining = token.remaining() if token is not None else None
+    if remaining is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    except asyncio.TimeoutError:
+        token.cancel(DEADLINE)
+        token.check(stage)
+
+
+async def iterate_within_deadline(iterator: AsyncIterator[Any], stage: str = "") -> AsyncIterator[Any]:
+    """
+    Items of an async iterator (such as a model's astream), abandoning it
+    at the current request's deadline even while no item arrives
+
+    Raises:
+        DeadlineExceeded: The deadline passed first
+    """
+    iterator = aiter(iterator)
+    try:
+        while True:
+            try:
+                item = await within_deadline(anext(iterator), stage)
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "aclose", None)
+        if close is not None:
+            await close()
+
+
+class CancellationCallbackHandler(BaseCallbackHandler):
+    """
+    Stops LLM calls of dead requests
+
+    Raising from a callback with raise_error set aborts the run: before
+    the call is sent, or at the next streamed token (the model's stream
+    is closed, ending the upstream request).
+    """
+
+    raise_error = True
+    run_inline = True
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        checkpoint("llm_call")
+
+    def on_llm_new_token(self, token, **kwargs):
+        checkpoint("llm_stream")
+
+
+cancellation_handler = CancellationCallbackHandler()
+
+
+# ----------------------------------------------------------------------
+# Recording
+# ----------------------------------------------------------------------
+
+def record_abort(endpoint: str, user_id: Optional[int], token: CancelToken):
+    """Store a RequestAbort row for a cancelled token"""
+    from .models import RequestAbort
+
+    try:
+        RequestAbort.objects.create(
+            endpoint=endpoint,
+            user_id=user_id,
+            reason=token.reason,
+            stage=token.stage,
+            elapsed_ms=token.elapsed_ms(),
+        )
+    except Exception:
+        logger.exception("Could not record request abort")
+
+
+def abort_rollup(since) -> List[Dict[str, Any]]:
+    """
+    Count aborted requests per endpoint and reason
+
+    Args:
+        since: Only include aborts at or after this datetime
+    """
+    from .models import RequestAbort
+
+    return list(
+        RequestAbort.objects.filter(created_at__gte=since)
+        .values("endpoint", "reason")
+        .annotate(aborts=Count("id"))
+        .order_by("-aborts")
+    )
@@ -0,0 +1,323 @@
+"""
+Persistent chat sessions with rolling summarization
+
+The analysis and profile advisors (AnalysisChatService, ProfileChatService)
+keep each conversation in a ChatSession:
+
+- The formatted analysis/profile context is built once per session and
+  cached on it. Signal handlers clear it when the underlying data changes
+  (invalidate_context()).
+- Earlier turns are sent back verbatim while they fit
+  CHAT_SESSIONS["history_token_budget"] together with the running summary
+  and the new message. Once they do not, the oldest turns are folded into
+  the summary by one extra LLM call, down to half the budget so that not
+  every turn pays for a summary. The summary itself is capped at
+  CHAT_SESSIONS["summary_max_tokens"], so the conversation part of the
+  prompt stays bounded however long the session runs.
+- Streamed answers fold after the answer instead (compact()), so the
+  summary call delays neither the first token nor the complete event.
+"""
+
+import logging
+from typing import Callable, Iterable, List, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+from .cancellation import checkpoint
+from .models import ChatMessage, ChatSession
+from .tokens import estimate_tokens, truncate_text
+from .usage import operation_config
+
+logger = logging.getLogger(__name__)
+
+# Characters per token used to cap the summary's length
+_CHARS_PER_TOKEN = 4
+
+
+def open_session(user, kind: str, subject_id: int, session_id=None) -> ChatSession:
+    """
+    The user's session to continue, or a new one
+
+    Args:
+        user: Session owner
+        kind: ChatSession.Kind
+        subject_id: Analysis or profile id the session is about
+        session_id: Id sent by the client; None starts a new session
+
+    Raises:
+        ChatSession.DoesNotExist: No such session for this user and subject
+    """
+    if session_id in (None, ""):
+        return ChatSession.objects.create(user=user, kind=kind, subject_id=subject_id)
+    try:
+        session_id = int(session_id)
+    except (TypeError, ValueError):
+        raise ChatSession.DoesNotExist("Invalid chat session id")
+    return ChatSession.objects.get(pk=session_id, user=user, kind=kind, subject_id=subject_id)
+
+
+def session_context(session: ChatSession, build: Callable[[], str]) -> str:
+    """
+    The session's prompt context, building and caching it if stale
+
+    Args:
+        session: Chat session
+        build: Formats the context from the database
+    """
+    if session.context:
+        return session.context
+    generation = session.context_generation
+    session.context = build()
+    # Not stored if the data changed while it was being built
+    ChatSession.objects.filter(pk=session.pk, context_generation=generation).update(
+        context=session.context
+    )
+    return session.context
+
+
+def invalidate_context(kind: str, subject_ids: Iterable[int] = None, user_id: int = None):
+    """Clear the cached context of the sessions about the given subjects or user"""
+    sessions = ChatSession.objects.filter(kind=kind)
+    if subject_ids is not None:
+        sessions = sessions.filter(subject_id__in=subject_ids)
+    if user_id is not None:
+        sessions = sessions.filter(user_id=user_id)
+    sessions.update(context="", context_generation=F("context_generation") + 1)
+
+
+# ----------------------------------------------------------------------
+# History
+# ----------------------------------------------------------------------
+
+def conversation(session: ChatSession, message: str, llm) -> List[BaseMessage]:
+    """
+    Prompt messages for the session's history before a new message
+
+    Folds the oldest turns into the summary first if the history is over
+    budget.
+
+    Args:
+        session: Chat session
+        message: The user's new message
+        llm: Chat model used to update the summary
+
+    Returns:
+        Summary (as a system message) and the recent turns
+    """
+    recent, older = split_history(session, message)
+    if older:
+        fold(session, older, llm)
+    return history_messages(session, recent)
+
+
+async def aconversation(session: ChatSession, message: str, llm) -> List[BaseMessage]:
+    """Async conversation() using the model's ainvoke"""
+    recent, older = await sync_to_async(split_history)(session, message)
+    if older:
+        await afold(session, older, llm)
+    return history_messages(session, recent)
+
+
+def fold(session: ChatSession, turns: List[ChatMessage], llm):
+    """
+    Fold turns into the session's running summary
+
+    A failed summary call is logged; the turns stay unsummarized and are
+    folded on a later turn.
+    """
+    try:
+        result = (_summary_prompt() | llm).invoke(
+            _summary_inputs(session, turns), config=operation_config("chat_summary")
+        )
+    except Exception as e:
+        logger.warning("Chat session %s summary failed: %s", session.pk, e)
+        return
+    _store_summary(session, turns, result.content)
+
+
+async def afold(session: ChatSession, turns: List[ChatMessage], llm):
+    """Async fold() using the model's ainvoke"""
+    try:
+        result = await (_summary_prompt() | llm).ainvoke(
+            _summary_inputs(session, turns), config=operation_config("chat_summary")
+        )
+    except Exception as e:
+        logger.warning("Chat session %s summary failed: %s", session.pk, e)
+        return
+    await sync_to_async(_store_summary)(session, turns, result.content)
+
+
+def record_turn(session: ChatSession, message: str, response: str):
+    """
+    Append a user message and the advisor's response to the session
+
+    Raises:
+        Cancelled: The request was abandoned; the turn is not stored
+    """
+    checkpoint("saving_chat")
+    ChatMessage.objects.bulk_create([
+        ChatMessage(
+            session=session, role=ChatMessage.Role.USER,
+            content=message, tokens=estimate_tokens(message),
+        ),
+        ChatMessage(
+            session=session, role=ChatMessage.Role.ASSISTANT,
+            content=response, tokens=estimate_tokens(response),
+        ),
+    ])
+    ChatSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+
+
+async def arecord_turn(session: ChatSession, message: str, response: str):
+    await sync_to_async(record_turn)(session, message, response)
+
+
+def split_history(session: ChatSession, message: str) -> Tuple[List[ChatMessage], List[ChatMessage]]:
+    """
+    Unsummarized turns to send verbatim, and the older ones to fold
+
+    While the turns fit CHAT_SESSIONS["history_token_budget"] together
+    with the summary and the new message, all of them are recent. Once
+    they do not, the oldest are split off down to half the budget.
+    """
+    budget = _history_budget(session, message)
+    turns = list(session.messages.filter(summarized=False).only("role", "content", "tokens"))
+    total = sum(turn.tokens for turn in turns)
+    if total <= budget:
+        return turns, []
+
+    target = max(budget, 0) // 2
+    split = 0
+    while split < len(turns) and total > target:
+        total -= turns[split].tokens
+        split += 1
+    return turns[split:], turns[:split]
+
+
+def _history_budget(session: ChatSession, message: str) -> int:
+    """Tokens left for the unsummarized turns"""
+    return (
+        settings.CHAT_SESSIONS["history_token_budget"]
+        - session.summary_tokens
+        - estimate_tokens(message)
+    )
+
+
+def streaming_history(session: ChatSession, message: str, llm) -> List[BaseMessage]:
+    """
+    Prompt messages for the session's history before a streamed answer
+
+    Unlike conversation(), turns split_history() would fold are still sent
+    verbatim as far as the budget allows, and compact() folds them after
+    the answer. Only turns beyond the budget (left over when the history
+    grew past it since the last compact(), or a summary call failed) are
+    folded first. If that fold fails too they are left out of this prompt
+    and stay unsummarized for the next try, so the verbatim turns never
+    exceed the budget.
+    """
+    recent, older = split_history(session, message)
+    split = _overflow(session, message, recent, older)
+    if split:
+        fold(session, older[:split], llm)
+    return history_messages(session, older[split:] + recent)
+
+
+async def astreaming_history(session: ChatSession, message: str, llm) -> List[BaseMessage]:
+    """Async streaming_history() using the model's ainvoke"""
+    recent, older = await sync_to_async(split_history)(session, message)
+    split = _overflow(session, message, recent, older)
+    if split:
+        await afold(session, older[:split], llm)
+    return history_messages(session, older[split:] + recent)
+
+
+def _overflow(session: ChatSession, message: str, recent, older) -> int:
+    """How many of the older turns do not fit the budget next to the recent ones"""
+    budget = _history_budget(session, message) - sum(turn.tokens for turn in recent)
+    split = len(older)
+    while split > 0 and older[split - 1].tokens <= budget:
+        split -= 1
+        budget -= older[split].tokens
+    return split
+
+
+def compact(session: ChatSession, llm):
+    """
+    Fold the oldest turns into the summary if the history is over budget
+
+    Run after a streamed answer has been sent, so the next turn usually
+    finds the history within budget and folds nothing before answering.
+    """
+    _, older = split_history(session, "")
+    if older:
+        fold(session, older, llm)
+
+
+async def acompact(session: ChatSession, llm):
+    """Async compact() using the model's ainvoke"""
+    _, older = await sync_to_async(split_history)(session, "")
+    if older:
+        await afold(session, older, llm)
+
+
+def _summary_inputs(session: ChatSession, turns: List[ChatMessage]):
+    return {
+        "summary": session.summary or "(none yet)",
+        "turns": "\n\n".join(f"{turn.get_role_display()}: {turn.content}" for turn in turns),
+        "max_words": int(settings.CHAT_SESSIONS["summary_max_tokens"] * 0.75),
+    }
+
+
+def _store_summary(session: ChatSession, turns: List[ChatMessage], summary: str):
+    """Replace the session summary and mark the folded turns"""
+    max_tokens = settings.CHAT_SESSIONS["summary_max_tokens"]
+    summary = summary.strip()
+    max_chars = max_tokens * _CHARS_PER_TOKEN
+    while estimate_tokens(summary) > max_tokens:
+        summary = truncate_text(summary, max_chars)
+        max_chars = int(max_chars * 0.9)
+    with transaction.atomic():
+        folded = ChatMessage.objects.filter(
+            pk__in=[turn.pk for turn in turns], summarized=False
+        ).update(summarized=True)
+        if folded != len(turns):
+            # A concurrent turn of this session folded them already
+            transaction.set_rollback(True)
+            return
+        session.summary = summary
+        session.summary_tokens = estimate_tokens(summary)
+        ChatSession.objects.filter(pk=session.pk).update(
+            summary=session.summary, summary_tokens=session.summary_tokens
+        )
+
+
+def history_messages(session: ChatSession, turns: List[ChatMessage]) -> List[BaseMessage]:
+    """Prompt messages for the summary and the given turns"""
+    messages: List[BaseMessage] = []
+    if session.summary:
+        messages.append(SystemMessage(f"Summary of the earlier conversation:\n{session.summary}"))
+    for turn in turns:
+        cls = HumanMessage if turn.role == ChatMessage.Role.USER else AIMessage
+        messages.append(cls(turn.content))
+    return messages
+
+
+def _summary_prompt() -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages([
+        ("system", """You maintain the running summary of a conversation between a user and a career advisor.
+
+Update the summary with the new turns. Keep the facts the user shared about themselves, their goals and constraints, the advice already given and any open questions. Drop pleasantries.
+
+Write at most {max_words} words of plain prose."""),
+        ("human", """Current summary:
+{summary}
+
+New turns:
+{turns}"""),
+    ])
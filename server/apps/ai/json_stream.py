@@ -0,0 +1,237 @@
+"""
+Incremental JSON parsing for streamed model responses
+
+StreamingJSONParser consumes a model's output chunk by chunk, looking at
+every character once, and reports each value the moment it closes. It
+builds the final object as it goes, so no second pass over the full
+response is needed.
+"""
+
+import re
+from json.decoder import scanstring
+from typing import Any, List, Optional, Tuple
+
+
+_WHITESPACE = " \t\r\n"
+_SCALAR_END = re.compile(r"[,\]}\s]")
+_STRING_SPECIAL = re.compile(r'["\\]')
+_LITERALS = {"true": True, "false": False, "null": None}
+
+# What the parser expects next outside of strings and scalars
+_PREAMBLE = "preamble"
+_VALUE = "value"
+_KEY = "key"
+_KEY_OR_END = "key_or_end"
+_VALUE_OR_END = "value_or_end"
+_COLON = "colon"
+_COMMA_OR_END = "comma_or_end"
+
+
+class JSONStreamError(ValueError):
+    """The streamed text is not a valid JSON object"""
+
+
+class StreamingJSONParser:
+    """
+    Resumable parser for one JSON object arriving in chunks
+
+    Text before the first "{" (such as a Markdown code fence) and anything
+    after the object closes are ignored. Parsing stops at the first syntax
+    error; values closed before it are still reported.
+
+    Args:
+        max_depth: Report closed values whose path is at most this long:
+            1 reports top-level fields, 2 also the items of top-level lists
+            and the fields of top-level objects
+
+    Example:
+        parser = StreamingJSONParser()
+        for chunk in chunks:
+            for path, value in parser.feed(chunk):
+                ...  # ("match_score",), 85 / ("skill_gaps", 0), {...}
+        result = parser.close()
+    """
+
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self.done = False
+        self.error: Optional[JSONStreamError] = None
+        self._result = None
+        self._offset = 0
+        self._expect = _PREAMBLE
+        # Open containers: [container, path, pending key]
+        self._stack: List[list] = []
+        self._string: List[str] = []
+        self._in_string = False
+        self._string_is_key = False
+        self._escaped = False
+        self._scalar: List[str] = []
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple[Any, ...], Any]]:
+        """
+        Consume the next chunk of text
+
+        Returns:
+            (path, value) pairs for the values closed by this chunk, in order
+        """
+        events = []
+        if self.error is None:
+            try:
+                self._consume(chunk, events)
+            except JSONStreamError as e:
+                self.error = e
+        self._offset += len(chunk)
+        return events
+
+    def close(self) -> Any:
+        """
+        Finish parsing
+
+        Returns:
+            The complete top-level object
+
+        Raises:
+            JSONStreamError: If the text was not a valid JSON object or the
+                object never closed
+        """
+        if self.error is not None:
+            raise self.error
+        if not self.done:
+            raise JSONStreamError("Incomplete JSON object")
+        return self._result
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _consume(self, chunk: str, events: list):
+        i, n = 0, len(chunk)
+        while i < n and not self.done:
+            if self._in_string:
+                i = self._read_string(chunk, i, events)
+                continue
+            if self._scalar:
+                match = _SCALAR_END.search(chunk, i)
+                end = match.start() if match else n
+                self._scalar.append(chunk[i:end])
+                i = end
+                if match:
+                    self._finish_scalar(events, self._offset + i)
+                continue
+
+            char = chunk[i]
+            if self._expect == _PREAMBLE:
+                start = chunk.find("{", i)
+                if start == -1:
+                    break
+                i = start
+                self._expect = _VALUE
+                continue
+            if char in _WHITESPACE:
+                i += 1
+                continue
+
+            expect = self._expect
+            if char == '"' and expect in (_KEY, _KEY_OR_END, _VALUE, _VALUE_OR_END):
+                self._in_string = True
+                self._string_is_key = expect in (_KEY, _KEY_OR_END)
+            elif char == "{" and expect in (_VALUE, _VALUE_OR_END):
+                self._open({}, _KEY_OR_END)
+            elif char == "[" and expect in (_VALUE, _VALUE_OR_END):
+                self._open([], _VALUE_OR_END)
+            elif char == "}" and expect in (_KEY_OR_END, _COMMA_OR_END) and self._top_is(dict):
+                self._close(events)
+            elif char == "]" and expect in (_VALUE_OR_END, _COMMA_OR_END) and self._top_is(list):
+                self._close(events)
+            elif char == "," and expect == _COMMA_OR_END:
+                self._expect = _KEY if self._top_is(dict) else _VALUE
+            elif char == ":" and expect == _COLON:
+                self._expect = _VALUE
+            elif char in "-0123456789tfn" and expect in (_VALUE, _VALUE_OR_END):
+                self._scalar.append(char)
+            else:
+                raise JSONStreamError(f"Unexpected {char!r} at offset {self._offset + i}")
+            i += 1
+
+    def _top_is(self, container_type) -> bool:
+        return bool(self._stack) and isinstance(self._stack[-1][0], container_type)
+
+    def _child_path(self) -> Tuple[Any, ...]:
+        if not self._stack:
+            return ()
+        container, path, key = self._stack[-1]
+        return path + ((key,) if isinstance(container, dict) else (len(container),))
+
+    def _open(self, container, expect):
+        self._stack.append([container, self._child_path(), None])
+        self._expect = expect
+
+    def _close(self, events):
+        container = self._stack.pop()[0]
+        self._add_value(container, events)
+
+    def _add_value(self, value, events):
+        """Attach a closed value to its parent and report it"""
+        if not self._stack:
+            self._result = value
+            self.done = True
+            return
+
+        path = self._child_path()
+        container, _, key = self._stack[-1]
+        if isinstance(container, dict):
+            container[key] = value
+        else:
+            container.append(value)
+        if len(path) <= self.max_depth:
+            events.append((path, value))
+        self._expect = _COMMA_OR_END
+
+    def _read_string(self, chunk, i, events) -> int:
+        n = len(chunk)
+        while i < n:
+            if self._escaped:
+                # Character after a backslash, possibly in a later chunk
+                self._string.append(chunk[i])
+                self._escaped = False
+                i += 1
+                continue
+            match = _STRING_SPECIAL.search(chunk, i)
+            if match is None:
+                self._string.append(chunk[i:])
+                return n
+            end = match.start()
+            self._string.append(chunk[i:end])
+            if chunk[end] == "\\":
+                self._string.append("\\")
+                self._escaped = True
+                i = end + 1
+                continue
+
+            # Closing quote: decode escapes of this one string
+            raw = "".join(self._string)
+            self._string = []
+            self._in_string = False
+            try:
+                value = scanstring(raw + '"', 0, False)[0]
+            except ValueError as e:
+                raise JSONStreamError(f"Invalid string at offset {self._offset + end}: {e}")
+            if self._string_is_key:
+                self._stack[-1][2] = value
+                self._expect = _COLON
+            else:
+                self._add_value(value, events)
+            return end + 1
+        return i
+
+    def _finish_scalar(self, events, offset):
+        text = "".join(self._scalar)
+        self._scalar = []
+        if text in _LITERALS:
+            value = _LITERALS[text]
+        else:
+            try:
+                value = float(text) if any(c in text for c in ".eE") else int(text)
+            except ValueError:
+                raise JSONStreamError(f"Invalid value {text!r} before offset {offset}")
+        self._add_value(value, events)
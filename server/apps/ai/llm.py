@@ -0,0 +1,313 @@
+"""
+Process-wide registry of pooled LLM clients
+
+Services ask for a client by role ("parser", "analyzer", "chat") instead of
+building their own ChatOpenAI / ChatGoogleGenerativeAI instance per request.
+Clients are cached by (provider, model, temperature) and share keep-alive
+HTTP connection pools, so a request reuses an already warm connection
+instead of paying for client setup and a TLS handshake every time. Every
+client records its calls through apps.ai.usage and stops the calls of
+cancelled requests (apps.ai.cancellation).
+
+With both OpenAI and Gemini keys configured, roles are served by a
+RoutedChatModel (apps.ai.routing) that hedges and fails over between the
+two providers' pooled clients.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+from django.conf import settings
+
+from .cancellation import cancellation_handler
+from .usage import usage_handler
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LLMSpec:
+    """
+    Resolved client configuration for a role
+    """
+
+    provider: str
+    model: str
+    temperature: Optional[float] = None
+    # Routed specs build one client per provider from the role's config
+    role: Optional[str] = None
+
+    @property
+    def key(self):
+        if self.provider == "routed":
+            return (self.provider, self.role, self.model, self.temperature)
+        return (self.provider, self.model, self.temperature)
+
+
+class LoopLocalTransport(httpx.AsyncBaseTransport):
+    """
+    Async transport keeping one connection pool per event loop
+
+    An httpx async pool is bound to the loop that opened its connections,
+    and the shared async client is used from several: the ASGI server's,
+    the ones async_to_sync starts and the task worker's. Each loop gets its
+    own pool; pools of loops that are gone are dropped with them.
+    """
+
+    def __init__(self, limits: httpx.Limits):
+        self._limits = limits
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _pool(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._pools.get(loop)
+            if pool is None:
+                pool = httpx.AsyncHTTPTransport(limits=self._limits)
+                self._pools[loop] = pool
+        return pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool().handle_async_request(request)
+
+    async def aclose(self):
+        """Close the current loop's pool (the others belong to their loops)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._pools.pop(loop, None)
+        if pool is not None:
+            await pool.aclose()
+
+
+class LLMClientRegistry:
+    """
+    Thread-safe cache of chat model clients keyed by (provider, model, temperature)
+    """
+
+    def __init__(self):
+        self._clients: Dict[tuple, Any] = {}
+        # Reentrant: building a routed client builds its providers' clients
+        self._lock = threading.RLock()
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def provider(self) -> str:
+        """
+        Active provider from settings
+
+        "gemini", the offline stand-ins "fake" and "replay" (apps.ai.stand_in),
+        or "openai" for anything else.
+        """
+        if settings.MODEL_PROVIDER in ("gemini", "fake", "replay"):
+            return settings.MODEL_PROVIDER
+        return "openai"
+
+    @property
+    def routed_providers(self) -> List[str]:
+        """
+        Providers a routed client tries, preferred first
+
+        Empty (no routing) unless routing is enabled, the active provider
+        is a real one and both providers have an API key.
+        """
+        if not settings.LLM_ROUTING["enabled"] or self.provider not in ("openai", "gemini"):
+            return []
+        if not (settings.OPENAI_API_KEY and settings.GEMINI_API_KEY):
+            return []
+        return [self.provider, "gemini" if self.provider == "openai" else "openai"]
+
+    def spec_for(self, role: str, model: str = None) -> LLMSpec:
+        """
+        Resolve the client configuration for a role
+
+        Args:
+            role: Role name from settings.LLM_ROLES
+            model: Optional model override (only honoured for OpenAI, as before)
+
+        Returns:
+            LLMSpec for the active provider, or a routed spec whose model
+            and temperature are the preferred provider's
+        """
+        spec = self._provider_spec(role, self.provider, model)
+        if self.routed_providers:
+            return LLMSpec(
+                provider="routed",
+                model=spec.model,
+                temperature=spec.temperature,
+                role=role,
+            )
+        return spec
+
+    def _provider_spec(self, role: str, provider: str, model: str = None) -> LLMSpec:
+        """Client configuration for a role on one provider"""
+        # Stand-ins report the OpenAI model of the role
+        config_provider = "gemini" if provider == "gemini" else "openai"
+        try:
+            config = settings.LLM_ROLES[role][config_provider]
+        except KeyError:
+            raise ValueError(f"No LLM configured for role '{role}' ({provider})")
+
+        model_name = config["model"]
+        if model and provider != "gemini":
+            model_name = model
+        return LLMSpec(
+            provider=provider,
+            model=model_name,
+            temperature=config.get("temperature"),
+        )
+
+    def get(self, role: str, model: str = None):
+        """
+        Get the pooled client for a role, creating it on first use
+
+        Args:
+            role: Role name ("parser", "analyzer", "chat")
+            model: Optional model override
+
+        Returns:
+            LangChain chat model instance shared across requests
+        """
+        return self.get_for_spec(self.spec_for(role, model))
+
+    def get_for_spec(self, spec: LLMSpec):
+        """Get (or lazily build) the client for a resolved spec"""
+        client = self._clients.get(spec.key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(spec.key)
+            if client is None:
+                client = self._build(spec)
+                self._clients[spec.key] = client
+        return client
+
+    def warm_up(self, roles=None):
+        """
+        Build the clients for the given roles ahead of the first request
+
+        Missing API keys are logged instead of raised so that a worker can
+        still boot (and serve non-AI endpoints) without credentials.
+        """
+        for role in roles or settings.LLM_WARM_ROLES:
+            try:
+                self.get(role)
+            except ValueError as e:
+                logger.warning("Skipping LLM warm-up for role %s: %s", role, e)
+
+    def clear(self):
+        """Drop all cached clients (used when settings change)"""
+        with self._lock:
+            self._clients.clear()
+
+    def _http_limits(self) -> httpx.Limits:
+        pool = settings.LLM_HTTP_POOL
+        return httpx.Limits(
+            max_connections=pool["max_connections"],
+            max_keepalive_connections=pool["max_keepalive_connections"],
+            keepalive_expiry=pool["keepalive_expiry"],
+        )
+
+    def _shared_http_clients(self):
+        """
+        Keep-alive HTTP clients shared by every OpenAI client in the process
+
+        The async one pools connections per event loop (LoopLocalTransport).
+        """
+        if self._http_client is None:
+            timeout = settings.LLM_HTTP_POOL["timeout"]
+            self._http_client = httpx.Client(
+                limits=self._http_limits(), timeout=timeout
+            )
+            self._http_async_client = httpx.AsyncClient(
+                transport=LoopLocalTransport(self._http_limits()), timeout=timeout
+            )
+        return self._http_client, self._http_async_client
+
+    def _build(self, spec: LLMSpec):
+        """Construct a new client; called with the registry lock held"""
+        if spec.provider == "routed":
+            from .routing import Backend, RoutedChatModel
+
+            # spec.model is the OpenAI model (override included) when
+            # OpenAI is preferred; Gemini ignores overrides anyway
+            override = spec.model if self.provider == "openai" else None
+            backends = []
+            for provider in self.routed_providers:
+                provider_spec = self._provider_spec(spec.role, provider, override)
+                backends.append(Backend(
+                    name=f"{provider}:{provider_spec.model}",
+                    client=self.get_for_spec(provider_spec),
+                    model=provider_spec.model,
+                ))
+            return RoutedChatModel(backends=backends, hedge=settings.LLM_ROUTING["hedge"])
+
+        if spec.provider in ("fake", "replay"):
+            from .stand_in import StandInChatModel
+
+            return StandInChatModel(
+                mode=spec.provider,
+                model_name=spec.model,
+                callbacks=[cancellation_handler, usage_handler],
+            )
+
+        # Cancellation first: a dead request's call stops before anything else runs
+        callbacks = [cancellation_handler, usage_handler]
+        if settings.LLM_STAND_IN["record"]:
+            from .stand_in import response_recorder
+
+            callbacks.append(response_recorder)
+
+        if spec.provider == "gemini":
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
+            if not settings.GEMINI_API_KEY:
+                raise ValueError("GEMINI_API_KEY environment variable not set")
+            kwargs = {
+                "model": spec.model,
+                "api_key": settings.GEMINI_API_KEY,
+                "callbacks": callbacks,
+            }
+            if spec.temperature is not None:
+                kwargs["temperature"] = spec.temperature
+            return ChatGoogleGenerativeAI(**kwargs)
+
+        from langchain_openai import ChatOpenAI
+
+        if not settings.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY environment variable not set")
+        http_client, http_async_client = self._shared_http_clients()
+        kwargs = {
+            "model": spec.model,
+            "api_key": settings.OPENAI_API_KEY,
+            "http_client": http_client,
+            "http_async_client": http_async_client,
+            # Report token usage on streamed responses too
+            "stream_usage": True,
+            "callbacks": callbacks,
+        }
+        if spec.temperature is not None:
+            kwargs["temperature"] = spec.temperature
+        return ChatOpenAI(**kwargs)
+
+
+registry = LLMClientRegistry()
+
+
+def get_llm(role: str, model: str = None):
+    """Shortcut for registry.get()"""
+    return registry.get(role, model)
+
+
+def warm_up_llm_clients():
+    """Warm the pooled clients at worker start (see core/wsgi.py, core/asgi.py)"""
+    registry.warm_up()
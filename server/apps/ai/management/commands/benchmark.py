@@ -0,0 +1,241 @@
+"""
+Management command that benchmarks the AI endpoints end to end
+
+Runs against a throwaway copy of the schema unless --allow-writes is
+given, so the seeded users, jobs and analyses never reach the configured
+database by accident.
+"""
+import json
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from apps.ai.benchmark import (
+    SCENARIOS,
+    benchmark_jobs,
+    benchmark_users,
+    compare_results,
+    delete_benchmark_data,
+    run_metadata,
+    run_scenario,
+    seed_benchmark_data,
+)
+from apps.ai.llm import registry as llm_registry
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the AI endpoints against the offline model stand-in and '
+        'optionally compare the results with a baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios',
+            type=str,
+            default=','.join(SCENARIOS),
+            help=f'Comma-separated scenarios to run (default: all of {", ".join(SCENARIOS)})',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Measured requests per scenario',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=2,
+            help='Unmeasured requests per scenario, made first',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Requests in flight at once',
+        )
+        parser.add_argument(
+            '--provider',
+            choices=['fake', 'replay'],
+            default='fake',
+            help='Model stand-in to use (replay serves recorded responses)',
+        )
+        parser.add_argument(
+            '--llm-latency',
+            choices=['none', 'simulated'],
+            default='none',
+            help='none measures only the Django side; simulated waits like a real model',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=5,
+            help='Benchmark users to seed',
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=200,
+            help='Benchmark jobs to seed',
+        )
+        parser.add_argument(
+            '--analyses',
+            type=int,
+            default=50,
+            help='Past analyses to seed per user (for analyzed and stats)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for the seeded data',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write the results as JSON to this file',
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            help='Compare with the results in this file and fail on regressions',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.2,
+            help='Allowed relative growth of latency and RSS over the baseline',
+        )
+        parser.add_argument(
+            '--allow-writes',
+            action='store_true',
+            help=(
+                'Seed and run against the configured database instead of a '
+                'throwaway one (the data is kept for later runs)'
+            ),
+        )
+        parser.add_argument(
+            '--cleanup',
+            action='store_true',
+            help='With --allow-writes, delete the benchmark users and jobs afterwards',
+        )
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(unknown)}')
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+
+        if options['allow_writes']:
+            self._benchmark(names, baseline, options)
+            return
+
+        self.stdout.write('Creating a throwaway benchmark database...')
+        connection = connections[DEFAULT_DB_ALIAS]
+        test_settings = connection.settings_dict['TEST']
+        if connection.vendor == 'sqlite' and not test_settings['NAME']:
+            # The default in-memory SQLite test database is not usable from
+            # the concurrent request threads
+            test_settings['NAME'] = f'{connection.settings_dict["NAME"]}.benchmark'
+        old_config = setup_databases(
+            verbosity=0, interactive=False, aliases={DEFAULT_DB_ALIAS}, serialized_aliases=set()
+        )
+        try:
+            # Cleaning up also deletes the uploaded resume files, which the
+            # throwaway database does not take with it
+            self._benchmark(names, baseline, {**options, 'cleanup': True})
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def _benchmark(self, names, baseline, options):
+        self.stdout.write('Seeding benchmark data...')
+        seed_benchmark_data(
+            options['users'],
+            options['jobs'],
+            options['analyses'],
+            np.random.default_rng(options['seed']),
+        )
+        users = benchmark_users()[:options['users']]
+        job_ids = [job.id for job in benchmark_jobs()[:options['jobs']]]
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(users)} users, {len(job_ids)} jobs'))
+
+        stand_in = {
+            **settings.LLM_STAND_IN,
+            'simulate_latency': options['llm_latency'] == 'simulated',
+        }
+        results = {
+            'meta': run_metadata(
+                provider=options['provider'],
+                llm_latency=options['llm_latency'],
+                iterations=options['iterations'],
+                concurrency=options['concurrency'],
+                users=len(users),
+                jobs=len(job_ids),
+            ),
+            'scenarios': {},
+        }
+
+        # The test client talks to the app in-process as "testserver"; the
+        # per-user LLM limits would turn most benchmark requests into 429s,
+        # and repeated requests must not be served from a finished flight
+        with override_settings(
+            MODEL_PROVIDER=options['provider'],
+            LLM_STAND_IN=stand_in,
+            LLM_THROTTLE={**settings.LLM_THROTTLE, 'enabled': False},
+            SINGLE_FLIGHT={**settings.SINGLE_FLIGHT, 'result_ttl': 0},
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        ):
+            llm_registry.clear()
+            try:
+                for name in names:
+                    self.stdout.write(f'Running {name}...')
+                    summary = run_scenario(
+                        SCENARIOS[name],
+                        users,
+                        job_ids,
+                        iterations=options['iterations'],
+                        concurrency=options['concurrency'],
+                        warmup=options['warmup'],
+                    )
+                    results['scenarios'][name] = summary
+                    self._report(name, summary)
+            finally:
+                llm_registry.clear()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'✓ Results written to {options["output"]}'))
+
+        if options['cleanup']:
+            delete_benchmark_data()
+            self.stdout.write(self.style.SUCCESS('✓ Deleted benchmark data'))
+
+        if baseline is not None:
+            regressions = compare_results(results, baseline, options['tolerance'])
+            if regressions:
+                for regression in regressions:
+                    self.stdout.write(self.style.ERROR(f'✗ {regression}'))
+                raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS(f'✓ No regressions against {options["baseline"]}'))
+
+    def _report(self, name, summary):
+        latency = summary['latency_ms']
+        line = (
+            f'  {name}: p50 {latency["p50"]:.1f}ms  p95 {latency["p95"]:.1f}ms  '
+            f'p99 {latency["p99"]:.1f}ms  {summary["throughput_rps"]} req/s  '
+            f'{summary["queries_per_request"]["mean"]} queries/req  '
+            f'peak RSS {summary["peak_rss_mb"]}MB'
+        )
+        if summary['errors']:
+            self.stdout.write(self.style.WARNING(f'{line}  ({summary["errors"]} errors)'))
+        else:
+            self.stdout.write(line)
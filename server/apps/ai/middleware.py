@@ -0,0 +1,194 @@
+"""
+AI middleware
+"""
+
+import asyncio
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from .cancellation import DISCONNECTED, record_abort, request_timeout, start_request_token
+from .throttling import release_request_leases
+from .timing import start_request_timing, store_breakdown
+from .usage import bind_request, request_identity
+
+
+@sync_and_async_middleware
+def LLMCallContextMiddleware(get_response):
+    """
+    Attribute LLM calls to the request's URL name and user
+
+    The context is deliberately not reset when the view returns: streaming
+    responses make their LLM calls while the body is being sent.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            bind_request(request)
+            return await get_response(request)
+    else:
+        def middleware(request):
+            bind_request(request)
+            return get_response(request)
+    return middleware
+
+
+@sync_and_async_middleware
+def RequestTimingMiddleware(get_response):
+    """
+    Send database, LLM, serialization and total time as Server-Timing
+
+    For streaming responses the header covers the time until the headers
+    are sent. With REQUEST_TIMING["debug"] on, the request's SQL breakdown
+    is stored once the body is complete and its id is sent as
+    X-Request-Timing-Id.
+    """
+    config = settings.REQUEST_TIMING
+    if not config["enabled"]:
+        return get_response
+
+    def finish(request, timing, response):
+        response['Server-Timing'] = timing.server_timing()
+        if timing.debug:
+            response['X-Request-Timing-Id'] = timing.id
+
+            def store():
+                store_breakdown(timing.breakdown(request.path, request.method, response.status_code))
+
+            if response.streaming:
+                _after_stream(response, store)
+            else:
+                store()
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            timing = start_request_timing(debug=config["debug"])
+            response = await get_response(request)
+            return finish(request, timing, response)
+    else:
+        def middleware(request):
+            timing = start_request_timing(debug=config["debug"])
+            response = get_response(request)
+            return finish(request, timing, response)
+    return middleware
+
+
+@sync_and_async_middleware
+def ConcurrencyLeaseMiddleware(get_response):
+    """
+    Release the in-flight slots an LLM endpoint held (apps.ai.throttling)
+
+    Streaming responses keep their slots until the body has been sent.
+    """
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = await get_response(request)
+            if getattr(request, "llm_leases", None):
+                if response.streaming:
+                    _after_stream(response, lambda: release_request_leases(request))
+                else:
+                    await sync_to_async(release_request_leases)(request)
+            return response
+    else:
+        def middleware(request):
+            response = get_response(request)
+            if getattr(request, "llm_leases", None):
+                if response.streaming:
+                    _after_stream(response, lambda: release_request_leases(request))
+                else:
+                    release_request_leases(request)
+            return response
+    return middleware
+
+
+@sync_and_async_middleware
+def RequestCancellationMiddleware(get_response):
+    """
+    Give each request a CancelToken with its deadline (apps.ai.cancellation)
+
+    The token is cancelled when the client goes away: a streaming body
+    closed before its end, or (under ASGI) the view or body cancelled on
+    disconnect. Requests that end cancelled or past their deadline are
+    recorded as RequestAbort rows.
+    """
+
+    def record(request, token):
+        if token.reason is not None:
+            record_abort(*request_identity(request), token)
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = start_request_token(request_timeout(request))
+            try:
+                response = await get_response(request)
+            except asyncio.CancelledError:
+                token.stage = token.stage or "view"
+                token.cancel(DISCONNECTED)
+                await sync_to_async(record)(request, token)
+                raise
+            if response.streaming:
+                _watch_stream(response, token, lambda: record(request, token))
+            else:
+                await sync_to_async(record)(request, token)
+            return response
+    else:
+        def middleware(request):
+            token = start_request_token(request_timeout(request))
+            response = get_response(request)
+            if response.streaming:
+                _watch_stream(response, token, lambda: record(request, token))
+            else:
+                record(request, token)
+            return response
+    return middleware
+
+
+def _watch_stream(response, token, callback):
+    """
+    Cancel the token if a streaming body is closed before its end, then
+    call callback once the body is finished either way
+    """
+    content = response.streaming_content
+    if response.is_async:
+        async def wrapped():
+            try:
+                async for chunk in content:
+                    yield chunk
+            except (GeneratorExit, asyncio.CancelledError):
+                token.stage = token.stage or "response_stream"
+                token.cancel(DISCONNECTED)
+                raise
+            finally:
+                await sync_to_async(callback)()
+    else:
+        def wrapped():
+            try:
+                yield from content
+            except GeneratorExit:
+                token.stage = token.stage or "response_stream"
+                token.cancel(DISCONNECTED)
+                raise
+            finally:
+                callback()
+    response.streaming_content = wrapped()
+
+
+def _after_stream(response, callback):
+    """Call callback once a streaming response's body has been sent"""
+    content = response.streaming_content
+    if response.is_async:
+        async def wrapped():
+            try:
+                async for chunk in content:
+                    yield chunk
+            finally:
+                await sync_to_async(callback)()
+    else:
+        def wrapped():
+            try:
+                yield from content
+            finally:
+                callback()
+    response.streaming_content = wrapped()
@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-16 23:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMCallLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(blank=True, help_text='URL name of the request (or task:<type> for background tasks)', max_length=255)),
+                ('operation', models.CharField(blank=True, help_text='Service operation that made the call', max_length=100)),
+                ('provider', models.CharField(blank=True, max_length=50)),
+                ('llm_model', models.CharField(blank=True, max_length=100)),
+                ('streamed', models.BooleanField(default=False)),
+                ('outcome', models.CharField(choices=[('SUCCESS', 'Success'), ('ERROR', 'Error'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('prompt_tokens', models.PositiveIntegerField(default=0)),
+                ('completion_tokens', models.PositiveIntegerField(default=0)),
+                ('total_tokens', models.PositiveIntegerField(default=0)),
+                ('estimated_cost', models.DecimalField(blank=True, decimal_places=6, help_text='USD, from settings.LLM_PRICING at call time', max_digits=12, null=True)),
+                ('wall_time_ms', models.PositiveIntegerField(help_text='Start to last token')),
+                ('time_to_first_token_ms', models.PositiveIntegerField(blank=True, help_text='Streaming calls only', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='llm_calls', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'LLM Call Log',
+                'verbose_name_plural': 'LLM Call Logs',
+                'db_table': 'llm_call_logs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['endpoint', 'created_at'], name='llm_call_lo_endpoin_8faf28_idx'), models.Index(fields=['llm_model', 'created_at'], name='llm_call_lo_llm_mod_dc2157_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-16 23:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='llmcalllog',
+            name='estimated_prompt_tokens',
+            field=models.PositiveIntegerField(default=0, help_text='Local estimate (apps.ai.tokens), available before the call'),
+        ),
+    ]
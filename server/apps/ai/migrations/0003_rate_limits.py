@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-16 23:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0002_llmcalllog_estimated_prompt_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('tokens', models.FloatField(help_text='Balance at updated_at; negative while in debt')),
+                ('updated_at', models.FloatField(help_text='Unix time of the last update')),
+            ],
+            options={
+                'verbose_name': 'Rate Limit Bucket',
+                'verbose_name_plural': 'Rate Limit Buckets',
+                'db_table': 'rate_limit_buckets',
+            },
+        ),
+        migrations.CreateModel(
+            name='ConcurrencyLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=100)),
+                ('slot', models.PositiveIntegerField()),
+                ('holder', models.CharField(blank=True, max_length=32)),
+                ('expires_at', models.FloatField(default=0, help_text='Unix time the lease lapses')),
+            ],
+            options={
+                'verbose_name': 'Concurrency Lease',
+                'verbose_name_plural': 'Concurrency Leases',
+                'db_table': 'concurrency_leases',
+                'indexes': [models.Index(fields=['scope', 'expires_at'], name='concurrency_scope_f6879f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'slot'), name='unique_concurrency_slot')],
+            },
+        ),
+    ]
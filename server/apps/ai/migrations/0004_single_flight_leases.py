@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-16 23:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0003_rate_limits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SingleFlightLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('holder', models.CharField(max_length=32)),
+                ('expires_at', models.FloatField(help_text='Unix time the claim lapses if the holder dies')),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('completed_at', models.FloatField(blank=True, help_text='Unix time the result was stored', null=True)),
+            ],
+            options={
+                'verbose_name': 'Single-Flight Lease',
+                'verbose_name_plural': 'Single-Flight Leases',
+                'db_table': 'single_flight_leases',
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 6.0 on 2026-10-16 23:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0004_single_flight_leases'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ANALYSIS', 'Job Analysis'), ('PROFILE', 'Profile')], max_length=20)),
+                ('subject_id', models.PositiveIntegerField(help_text='JobEligibilityAnalysis id, or UserProfile id for profile chats')),
+                ('context', models.TextField(blank=True, help_text='Cached prompt context; empty when stale')),
+                ('context_generation', models.PositiveIntegerField(default=0, help_text='Bumped on each invalidation, so a stale rebuild is not stored')),
+                ('summary', models.TextField(blank=True, help_text='Running summary of the folded turns')),
+                ('summary_tokens', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Chat Session',
+                'verbose_name_plural': 'Chat Sessions',
+                'db_table': 'chat_sessions',
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChatMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('USER', 'User'), ('ASSISTANT', 'Assistant')], max_length=20)),
+                ('content', models.TextField()),
+                ('tokens', models.PositiveIntegerField(default=0, help_text='Estimated prompt tokens (apps.ai.tokens)')),
+                ('summarized', models.BooleanField(default=False, help_text='Folded into the session summary; no longer sent verbatim')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='ai.chatsession')),
+            ],
+            options={
+                'verbose_name': 'Chat Message',
+                'verbose_name_plural': 'Chat Messages',
+                'db_table': 'chat_messages',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['kind', 'subject_id'], name='chat_sessio_kind_f1ec22_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['user', 'kind'], name='chat_sessio_user_id_6546cf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['session', 'summarized'], name='chat_messag_session_bbc9af_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-17 00:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0005_chat_sessions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestAbort',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(blank=True, help_text='URL name of the request', max_length=255)),
+                ('reason', models.CharField(choices=[('DISCONNECTED', 'Client disconnected'), ('DEADLINE', 'Deadline exceeded')], max_length=20)),
+                ('stage', models.CharField(blank=True, help_text='Checkpoint at which the work stopped', max_length=50)),
+                ('elapsed_ms', models.PositiveIntegerField(help_text='Request start to abort')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_aborts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Request Abort',
+                'verbose_name_plural': 'Request Aborts',
+                'db_table': 'request_aborts',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['endpoint', 'created_at'], name='request_abo_endpoin_e9111e_idx')],
+            },
+        ),
+    ]
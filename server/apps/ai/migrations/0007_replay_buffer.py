@@ -0,0 +1,49 @@
+# Generated by Django 6.0 on 2026-10-17 00:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0006_request_aborts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplayStream',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stream_id', models.CharField(max_length=32, unique=True)),
+                ('next_seq', models.PositiveIntegerField(default=0, help_text='Number of events appended')),
+                ('first_seq', models.PositiveIntegerField(default=0, help_text='Oldest event still buffered')),
+                ('done', models.BooleanField(default=False)),
+                ('updated_at', models.FloatField(help_text='Unix time of the last append')),
+                ('read_at', models.FloatField(default=0, help_text='Unix time a resumed client last polled')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replay_streams', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Replay Stream',
+                'verbose_name_plural': 'Replay Streams',
+                'db_table': 'replay_streams',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReplayEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveIntegerField()),
+                ('data', models.TextField()),
+                ('stream', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='ai.replaystream')),
+            ],
+            options={
+                'verbose_name': 'Replay Event',
+                'verbose_name_plural': 'Replay Events',
+                'db_table': 'replay_events',
+                'constraints': [models.UniqueConstraint(fields=('stream', 'seq'), name='unique_replay_event_seq')],
+            },
+        ),
+    ]
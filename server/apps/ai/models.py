@@ -0,0 +1,309 @@
+"""
+AI usage models
+"""
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from apps.users.models import User
+
+
+class LLMCallLog(models.Model):
+    """
+    One chat model invocation: tokens, latency and outcome
+
+    Written by apps.ai.usage.LLMUsageCallbackHandler, which every pooled
+    client carries, so every call site is recorded.
+    """
+
+    class Outcome(models.TextChoices):
+        SUCCESS = "SUCCESS", _("Success")
+        ERROR = "ERROR", _("Error")
+        CANCELLED = "CANCELLED", _("Cancelled")
+
+    endpoint = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="URL name of the request (or task:<type> for background tasks)",
+    )
+    operation = models.CharField(
+        max_length=100, blank=True, help_text="Service operation that made the call"
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="llm_calls",
+        null=True,
+        blank=True,
+    )
+
+    provider = models.CharField(max_length=50, blank=True)
+    llm_model = models.CharField(max_length=100, blank=True)
+    streamed = models.BooleanField(default=False)
+    outcome = models.CharField(max_length=20, choices=Outcome.choices)
+    error = models.TextField(blank=True)
+
+    estimated_prompt_tokens = models.PositiveIntegerField(
+        default=0, help_text="Local estimate (apps.ai.tokens), available before the call"
+    )
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    total_tokens = models.PositiveIntegerField(default=0)
+    estimated_cost = models.DecimalField(
+        max_digits=12,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        help_text="USD, from settings.LLM_PRICING at call time",
+    )
+
+    wall_time_ms = models.PositiveIntegerField(help_text="Start to last token")
+    time_to_first_token_ms = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Streaming calls only"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "llm_call_logs"
+        verbose_name = _("LLM Call Log")
+        verbose_name_plural = _("LLM Call Logs")
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["endpoint", "created_at"]),
+            models.Index(fields=["llm_model", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint or self.operation} {self.llm_model} ({self.outcome}, {self.wall_time_ms}ms)"
+
+
+class RateLimitBucket(models.Model):
+    """
+    Token bucket shared by every worker process (apps.ai.throttling)
+
+    The balance is stored as of updated_at and refilled arithmetically on
+    each read, so no process has to tick it.
+    """
+
+    key = models.CharField(max_length=100, unique=True)
+    tokens = models.FloatField(help_text="Balance at updated_at; negative while in debt")
+    updated_at = models.FloatField(help_text="Unix time of the last update")
+
+    class Meta:
+        db_table = "rate_limit_buckets"
+        verbose_name = _("Rate Limit Bucket")
+        verbose_name_plural = _("Rate Limit Buckets")
+
+    def __str__(self):
+        return f"{self.key}: {self.tokens:.1f}"
+
+
+class ConcurrencyLease(models.Model):
+    """
+    One in-flight slot of a concurrency scope ("global" or "user:<id>")
+
+    A slot is free when its lease has expired; releasing a lease expires
+    it. The expiry also frees slots held by processes that died.
+    """
+
+    scope = models.CharField(max_length=100)
+    slot = models.PositiveIntegerField()
+    holder = models.CharField(max_length=32, blank=True)
+    expires_at = models.FloatField(default=0, help_text="Unix time the lease lapses")
+
+    class Meta:
+        db_table = "concurrency_leases"
+        verbose_name = _("Concurrency Lease")
+        verbose_name_plural = _("Concurrency Leases")
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "slot"], name="unique_concurrency_slot"),
+        ]
+        indexes = [
+            models.Index(fields=["scope", "expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}#{self.slot}"
+
+
+class SingleFlightLease(models.Model):
+    """
+    Cross-process claim on an in-flight computation (apps.ai.singleflight)
+
+    The worker holding the lease computes; workers that find it held wait
+    for the result, which stays on the row for a short while afterwards.
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    holder = models.CharField(max_length=32)
+    expires_at = models.FloatField(help_text="Unix time the claim lapses if the holder dies")
+    result = models.JSONField(null=True, blank=True)
+    completed_at = models.FloatField(null=True, blank=True, help_text="Unix time the result was stored")
+
+    class Meta:
+        db_table = "single_flight_leases"
+        verbose_name = _("Single-Flight Lease")
+        verbose_name_plural = _("Single-Flight Leases")
+
+    def __str__(self):
+        return f"{self.key[:12]} ({'done' if self.completed_at else 'in flight'})"
+
+
+class ChatSession(models.Model):
+    """
+    Server-side conversation with an AI advisor (apps.ai.chat)
+
+    Turns that no longer fit the history token budget are folded into
+    summary. context caches the formatted analysis/profile data until a
+    change to it clears the cache.
+    """
+
+    class Kind(models.TextChoices):
+        ANALYSIS = "ANALYSIS", _("Job Analysis")
+        PROFILE = "PROFILE", _("Profile")
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="chat_sessions")
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    subject_id = models.PositiveIntegerField(
+        help_text="JobEligibilityAnalysis id, or UserProfile id for profile chats"
+    )
+
+    context = models.TextField(blank=True, help_text="Cached prompt context; empty when stale")
+    context_generation = models.PositiveIntegerField(
+        default=0, help_text="Bumped on each invalidation, so a stale rebuild is not stored"
+    )
+    summary = models.TextField(blank=True, help_text="Running summary of the folded turns")
+    summary_tokens = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "chat_sessions"
+        verbose_name = _("Chat Session")
+        verbose_name_plural = _("Chat Sessions")
+        ordering = ["-updated_at"]
+        indexes = [
+            models.Index(fields=["kind", "subject_id"]),
+            models.Index(fields=["user", "kind"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} chat #{self.pk} ({self.user})"
+
+
+class ChatMessage(models.Model):
+    """One message of a ChatSession"""
+
+    class Role(models.TextChoices):
+        USER = "USER", _("User")
+        ASSISTANT = "ASSISTANT", _("Assistant")
+
+    session = models.ForeignKey(ChatSession, on_delete=models.CASCADE, related_name="messages")
+    role = models.CharField(max_length=20, choices=Role.choices)
+    content = models.TextField()
+    tokens = models.PositiveIntegerField(default=0, help_text="Estimated prompt tokens (apps.ai.tokens)")
+    summarized = models.BooleanField(
+        default=False, help_text="Folded into the session summary; no longer sent verbatim"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "chat_messages"
+        verbose_name = _("Chat Message")
+        verbose_name_plural = _("Chat Messages")
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["session", "summarized"]),
+        ]
+
+    def __str__(self):
+        return f"{self.role}: {self.content[:50]}"
+
+
+class RequestAbort(models.Model):
+    """
+    A request whose AI work was abandoned (apps.ai.cancellation)
+
+    Written when the client disconnected before the response was complete
+    or the request ran past its deadline.
+    """
+
+    class Reason(models.TextChoices):
+        DISCONNECTED = "DISCONNECTED", _("Client disconnected")
+        DEADLINE = "DEADLINE", _("Deadline exceeded")
+
+    endpoint = models.CharField(max_length=255, blank=True, help_text="URL name of the request")
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="request_aborts",
+        null=True,
+        blank=True,
+    )
+    reason = models.CharField(max_length=20, choices=Reason.choices)
+    stage = models.CharField(
+        max_length=50, blank=True, help_text="Checkpoint at which the work stopped"
+    )
+    elapsed_ms = models.PositiveIntegerField(help_text="Request start to abort")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "request_aborts"
+        verbose_name = _("Request Abort")
+        verbose_name_plural = _("Request Aborts")
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["endpoint", "created_at"])]
+
+    def __str__(self):
+        return f"{self.endpoint} {self.reason} at {self.stage or '?'} ({self.elapsed_ms}ms)"
+
+
+class ReplayStream(models.Model):
+    """
+    A resumable SSE stream (apps.ai.replay)
+
+    Its newest events are kept as ReplayEvent rows so that a client that
+    lost the connection can resume from any worker process.
+    """
+
+    stream_id = models.CharField(max_length=32, unique=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="replay_streams",
+        null=True,
+        blank=True,
+    )
+    next_seq = models.PositiveIntegerField(default=0, help_text="Number of events appended")
+    first_seq = models.PositiveIntegerField(default=0, help_text="Oldest event still buffered")
+    done = models.BooleanField(default=False)
+    updated_at = models.FloatField(help_text="Unix time of the last append")
+    read_at = models.FloatField(default=0, help_text="Unix time a resumed client last polled")
+
+    class Meta:
+        db_table = "replay_streams"
+        verbose_name = _("Replay Stream")
+        verbose_name_plural = _("Replay Streams")
+
+    def __str__(self):
+        return f"{self.stream_id[:12]} ({self.next_seq} events{', done' if self.done else ''})"
+
+
+class ReplayEvent(models.Model):
+    """One buffered event of a ReplayStream"""
+
+    stream = models.ForeignKey(ReplayStream, on_delete=models.CASCADE, related_name="events")
+    seq = models.PositiveIntegerField()
+    data = models.TextField()
+
+    class Meta:
+        db_table = "replay_events"
+        verbose_name = _("Replay Event")
+        verbose_name_plural = _("Replay Events")
+        constraints = [
+            models.UniqueConstraint(fields=["stream", "seq"], name="unique_replay_event_seq"),
+        ]
+
+    def __str__(self):
+        return f"{self.stream_id}#{self.seq}"
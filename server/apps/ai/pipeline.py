@@ -0,0 +1,145 @@
+"""
+Small dependency graphs of pipeline stages
+
+A request that needs several independent pieces of work (an LLM call and
+a batch of queries, say) declares them as stages with the stages they
+depend on. StageGraph.run() starts every stage whose dependencies are
+done in a worker thread, so independent stages overlap, and reports each
+one as it finishes with its timing:
+
+    graph = StageGraph()
+    graph.add("parse", lambda: parser.parse_job_description(text))
+    graph.add("user_context", lambda: analyzer._gather_user_context(user))
+    graph.add("job", lambda parse: parser.create_saved_job(parse, user), after=["parse"])
+    for stage in graph.run():
+        ...  # stage.name, stage.duration_ms
+
+Dependent stages receive their dependencies' results as keyword
+arguments. Stages run in a copy of the caller's context, so the request's
+call context, timing and cancellation token apply to them.
+"""
+
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+from django.db import connections
+
+_workers = ThreadPoolExecutor(max_workers=16, thread_name_prefix="pipeline-stage")
+
+
+@dataclass
+class StageTiming:
+    """
+    A finished stage
+
+    Attributes:
+        name: Stage name
+        started_ms: Start, in ms since the graph started
+        duration_ms: Time the stage took
+    """
+
+    name: str
+    started_ms: float
+    duration_ms: float
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "started_ms": round(self.started_ms, 1),
+            "duration_ms": round(self.duration_ms, 1),
+        }
+
+
+class StageGraph:
+    """
+    Stages and their dependencies, run with as much overlap as they allow
+
+    Attributes:
+        results: Result of each finished stage, by name
+        timings: StageTiming of each finished stage, in finishing order
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Callable[..., Any]] = {}
+        self._after: Dict[str, Sequence[str]] = {}
+        self.results: Dict[str, Any] = {}
+        self.timings: List[StageTiming] = []
+        self._started = 0.0
+
+    def add(self, name: str, func: Callable[..., Any], after: Sequence[str] = ()):
+        """
+        Declare a stage
+
+        Args:
+            name: Stage name, also the keyword its result is passed as
+            func: Does the work; called with the results of `after`
+            after: Stages that must finish first (declared earlier)
+        """
+        unknown = [dependency for dependency in after if dependency not in self._stages]
+        if unknown:
+            raise ValueError(f"Stage {name} depends on undeclared stages: {', '.join(unknown)}")
+        self._stages[name] = func
+        self._after[name] = tuple(after)
+
+    def elapsed_ms(self) -> float:
+        """Time since run() started"""
+        return (time.perf_counter() - self._started) * 1000
+
+    def run(self) -> Iterator[StageTiming]:
+        """
+        Run the stages, yielding each one's timing as it finishes
+
+        If a stage raises, stages not yet started are dropped and the
+        exception is raised here once the running ones have finished. If
+        the caller stops iterating, running stages finish on their own and
+        their results are dropped.
+        """
+        self._started = time.perf_counter()
+        pending = dict(self._stages)
+        running: Dict[Future, str] = {}
+        error = None
+        while pending or running:
+            if error is None:
+                for name in [name for name in pending if self._ready(name)]:
+                    func = pending.pop(name)
+                    kwargs = {dependency: self.results[dependency] for dependency in self._after[name]}
+                    future = _workers.submit(
+                        contextvars.copy_context().run, self._timed, name, func, kwargs
+                    )
+                    running[future] = name
+            elif not running:
+                break
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    result, timing = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                self.results[name] = result
+                self.timings.append(timing)
+                if error is None:
+                    yield timing
+        if error is not None:
+            raise error
+
+    def _ready(self, name: str) -> bool:
+        return all(dependency in self.results for dependency in self._after[name])
+
+    def _timed(self, name: str, func: Callable[..., Any], kwargs: Dict[str, Any]):
+        started = time.perf_counter()
+        try:
+            result = func(**kwargs)
+        finally:
+            connections.close_all()
+        finished = time.perf_counter()
+        return result, StageTiming(
+            name=name,
+            started_ms=(started - self._started) * 1000,
+            duration_ms=(finished - started) * 1000,
+        )
@@ -0,0 +1,144 @@
+"""
+Replay buffer of resumable SSE streams
+
+Streams started through singleflight.stream() get a stream id, and each of
+their events a sequence number, sent as the SSE id "<stream id>:<seq>".
+The producer appends the events to a ReplayStream's ReplayEvent rows
+through a ReplayBuffer, in batches and keeping only the newest
+SSE_REPLAY["max_events"], so every worker process can serve them.
+
+A client that lost the connection sends the last id it saw as the
+Last-Event-ID header. singleflight.resume() attaches it to the computation
+if it is still running in the same process; otherwise follow() replays the
+buffered events after that id and polls for new ones until the stream is
+done. Neither starts a new computation.
+"""
+
+import logging
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from .models import ReplayEvent, ReplayStream
+
+logger = logging.getLogger(__name__)
+
+
+def event_id(stream_id: str, seq: int) -> str:
+    """SSE id of an event"""
+    return f"{stream_id}:{seq}"
+
+
+def parse_event_id(value: str) -> Optional[Tuple[str, int]]:
+    """(stream id, seq) of a Last-Event-ID header, None if malformed"""
+    stream_id, _, seq = (value or "").strip().rpartition(":")
+    if not stream_id or not seq.isdigit():
+        return None
+    return stream_id, int(seq)
+
+
+def frame(stream_id: str, seq: int, event: str) -> str:
+    """An SSE frame (event, e.g. "data: ...\\n\\n") with its id line"""
+    return f"id: {event_id(stream_id, seq)}\n{event}"
+
+
+def open_stream(stream_id: str, user_id: Optional[int]):
+    """Create the buffer of a new stream; expired streams are dropped"""
+    now = time.time()
+    ReplayStream.objects.filter(updated_at__lt=now - settings.SSE_REPLAY["retention"]).delete()
+    ReplayStream.objects.create(stream_id=stream_id, user_id=user_id, updated_at=now)
+
+
+def find_stream(stream_id: str, user_id: Optional[int]) -> Optional[ReplayStream]:
+    """The user's buffered stream with this id, if it has not expired"""
+    return ReplayStream.objects.filter(stream_id=stream_id, user_id=user_id).first()
+
+
+def read_recently(stream_id: str, within: float) -> bool:
+    """Whether a resumed client polled the stream within the last seconds"""
+    return ReplayStream.objects.filter(
+        stream_id=stream_id, read_at__gte=time.time() - within
+    ).exists()
+
+
+class ReplayBuffer:
+    """
+    Producer side of a stream's buffer
+
+    Events are written at most every SSE_REPLAY["flush_interval"] seconds
+    (and at close()), so a fast stream costs a few writes per second rather
+    than one per event.
+    """
+
+    def __init__(self, stream_id: str):
+        self.stream_id = stream_id
+        self.next_seq = 0
+        self._pending: List[str] = []
+        self._flushed_at = time.monotonic()
+
+    def append(self, event: str):
+        self._pending.append(event)
+        if time.monotonic() - self._flushed_at >= settings.SSE_REPLAY["flush_interval"]:
+            self.flush()
+
+    def flush(self, done: bool = False):
+        """Write the pending events, and mark the stream done if it is"""
+        self._flushed_at = time.monotonic()
+        if not self._pending and not done:
+            return
+        events, first = self._pending, self.next_seq
+        self._pending = []
+        self.next_seq += len(events)
+        try:
+            stream = ReplayStream.objects.filter(stream_id=self.stream_id).only("pk").first()
+            if stream is None:
+                # Expired while the producer was still running
+                return
+            ReplayEvent.objects.bulk_create([
+                ReplayEvent(stream=stream, seq=first + offset, data=event)
+                for offset, event in enumerate(events)
+            ])
+            first_seq = max(self.next_seq - settings.SSE_REPLAY["max_events"], 0)
+            ReplayEvent.objects.filter(stream=stream, seq__lt=first_seq).delete()
+            ReplayStream.objects.filter(pk=stream.pk).update(
+                next_seq=self.next_seq, first_seq=first_seq, done=done, updated_at=time.time()
+            )
+        except Exception:
+            # The live stream goes on; only resuming from other processes suffers
+            logger.exception("Could not buffer events of stream %s", self.stream_id[:12])
+
+    def close(self):
+        self.flush(done=True)
+
+
+def follow(stream: ReplayStream, after: int) -> Iterator[str]:
+    """
+    Buffered events of a stream after seq `after`, then new ones as the
+    producer (in any process) writes them, until the stream is done
+
+    Events that have already left the buffer are skipped; the ids show
+    the gap. Stops early if the producer has written nothing for
+    SSE_REPLAY["stale_after"] seconds (its process died).
+
+    Yields:
+        SSE frames with their ids
+    """
+    config = settings.SSE_REPLAY
+    seq = after
+    while True:
+        ReplayStream.objects.filter(pk=stream.pk).update(read_at=time.time())
+        # Read before the events: once done, every event is already written
+        state = ReplayStream.objects.filter(pk=stream.pk).values("done", "updated_at").first()
+        events = list(
+            ReplayEvent.objects.filter(stream_id=stream.pk, seq__gt=seq)
+            .order_by("seq")
+            .values_list("seq", "data")
+        )
+        for seq, data in events:
+            yield frame(stream.stream_id, seq, data)
+        if state is None or state["done"]:
+            return
+        if time.time() - state["updated_at"] > config["stale_after"]:
+            return
+        time.sleep(config["poll_interval"])
@@ -0,0 +1,391 @@
+"""
+Hedged, failover routing over the OpenAI and Gemini clients
+
+With both API keys configured, the registry (apps.ai.llm) hands out a
+RoutedChatModel per role instead of a single provider's client. The
+provider named by MODEL_PROVIDER is tried first:
+
+- Hedging: when a call to a backend runs past the p95 of that backend's
+  recent latencies, the same request is sent to the next backend and
+  whichever answers first wins (async losers are cancelled).
+- Failover: when a backend raises, the request goes to the next one.
+- Circuit breaking: after a run of consecutive failures a backend is
+  skipped for a cooldown period, then let through for a single probe.
+  A circuit is only asked when its backend's turn comes, so a call that
+  never reaches the backend does not use up the probe.
+
+Streams fail over only until their first chunk arrives and are never
+hedged: a half-sent answer cannot be swapped for another provider's.
+
+Each attempt is logged through the wrapped client's own callbacks
+(apps.ai.usage), so hedged losers show up in LLMCallLog too. The answering
+model is stored on the response as response_metadata["answered_by"]; see
+answered_by().
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import ConfigDict
+
+from .cancellation import Cancelled
+
+logger = logging.getLogger(__name__)
+
+
+class ProvidersUnavailable(RuntimeError):
+    """Every backend of a routed model is failing or behind an open circuit"""
+
+
+class LatencyHistogram:
+    """
+    Latencies of the most recent successful calls to a backend
+
+    Args:
+        window: Number of recent samples kept
+    """
+
+    def __init__(self, window: int):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-th percentile in seconds, or None without samples"""
+        with self._lock:
+            samples = list(self._samples)
+        if not samples:
+            return None
+        return float(np.percentile(samples, q))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Closed: calls go through. After failure_threshold consecutive failures
+    it opens and calls are refused for cooldown seconds; then it lets a
+    single probe through (half-open), which closes it again on success or
+    reopens it on failure.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go through now (claims the probe when half-open)"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at >= self.cooldown:
+                # One probe per cooldown, also if an earlier probe was
+                # claimed but never sent
+                self.state = self.HALF_OPEN
+                self._opened_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class Backend:
+    """
+    One provider's client with its latency histogram and circuit breaker
+
+    Args:
+        name: Label used in logs and answered_by, e.g. "openai:gpt-4o-mini"
+        client: LangChain chat model
+        model: Model name reported as the answering model
+    """
+
+    def __init__(self, name: str, client: Any, model: str):
+        config = settings.LLM_ROUTING
+        self.name = name
+        self.client = client
+        self.model = model
+        self.latency = LatencyHistogram(config["latency_window"])
+        self.breaker = CircuitBreaker(config["failure_threshold"], config["cooldown"])
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for this backend before hedging"""
+        config = settings.LLM_ROUTING
+        if len(self.latency) < config["min_samples"]:
+            return config["default_hedge_delay"]
+        return max(self.latency.percentile(config["hedge_percentile"]), config["min_hedge_delay"])
+
+    def record(self, started: float, error: Optional[BaseException] = None):
+        """Feed an attempt's outcome into the histogram and breaker"""
+        if error is None:
+            self.latency.record(time.monotonic() - started)
+            self.breaker.record_success()
+        elif not isinstance(error, (asyncio.CancelledError, GeneratorExit, Cancelled)):
+            logger.warning("LLM backend %s failed: %s: %s", self.name, type(error).__name__, error)
+            self.breaker.record_failure()
+
+
+# Runs sync attempts so the caller can stop waiting for a slow one
+_attempts = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+def _attempt(call: Callable[["Backend"], BaseMessage], backend: "Backend") -> BaseMessage:
+    """
+    One sync attempt in a pool thread
+
+    The usage callbacks write LLMCallLog rows from the pool thread; its
+    connection is closed afterwards so idle threads do not hold one open.
+    """
+    try:
+        return call(backend)
+    finally:
+        connections.close_all()
+
+
+def answered_by(message: Any) -> Optional[str]:
+    """Model that answered a routed call, if the response came from a router"""
+    metadata = getattr(message, "response_metadata", None) or {}
+    return metadata.get("answered_by")
+
+
+class RoutedChatModel(BaseChatModel):
+    """
+    Chat model that hedges and fails over across several backends
+
+    invoke/ainvoke/stream/astream hand the caller's config straight to the
+    chosen backend, so the operation metadata and callbacks reach it as if
+    it had been called directly.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    backends: List[Backend]
+    hedge: bool = True
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed"
+
+    # ------------------------------------------------------------------
+    # Calls
+    # ------------------------------------------------------------------
+
+    def invoke(self, input, config=None, *, stop=None, **kwargs) -> BaseMessage:
+        return self._route(lambda backend: backend.client.invoke(input, config, stop=stop, **kwargs))
+
+    async def ainvoke(self, input, config=None, *, stop=None, **kwargs) -> BaseMessage:
+        return await self._aroute(
+            lambda backend: backend.client.ainvoke(input, config, stop=stop, **kwargs)
+        )
+
+    def stream(self, input, config=None, *, stop=None, **kwargs) -> Iterator[BaseMessage]:
+        errors = []
+        for backend in self._candidates():
+            started, first = time.monotonic(), True
+            try:
+                for chunk in backend.client.stream(input, config, stop=stop, **kwargs):
+                    if first:
+                        self._tag(chunk, backend)
+                        first = False
+                    yield chunk
+            except Cancelled:
+                # The request is dead; another backend would not help
+                raise
+            except Exception as e:
+                backend.record(started, e)
+                if not first:
+                    raise
+                errors.append(e)
+                continue
+            backend.record(started)
+            return
+        raise self._unavailable(errors)
+
+    async def astream(self, input, config=None, *, stop=None, **kwargs) -> AsyncIterator[BaseMessage]:
+        errors = []
+        for backend in self._candidates():
+            started, first = time.monotonic(), True
+            try:
+                async for chunk in backend.client.astream(input, config, stop=stop, **kwargs):
+                    if first:
+                        self._tag(chunk, backend)
+                        first = False
+                    yield chunk
+            except Cancelled:
+                # The request is dead; another backend would not help
+                raise
+            except Exception as e:
+                backend.record(started, e)
+                if not first:
+                    raise
+                errors.append(e)
+                continue
+            backend.record(started)
+            return
+        raise self._unavailable(errors)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self.invoke(messages, stop=stop, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = await self.ainvoke(messages, stop=stop, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def _candidates(self) -> Iterator[Backend]:
+        """Backends whose circuit lets a call through, in preference order"""
+        for backend in self.backends:
+            if backend.breaker.allow():
+                yield backend
+
+    def _next(self, queue: List[Backend]) -> Optional[Backend]:
+        """Pop the next backend whose circuit lets a call through (claims a half-open probe)"""
+        while queue:
+            backend = queue.pop(0)
+            if backend.breaker.allow():
+                return backend
+        return None
+
+    def _route(self, call: Callable[[Backend], BaseMessage]) -> BaseMessage:
+        """Run a sync call with hedging and failover"""
+        queue = list(self.backends)
+        errors: List[BaseException] = []
+        pending = {}
+
+        def launch(hedging: bool = False):
+            backend = self._next(queue)
+            if backend is None:
+                return
+            if hedging:
+                logger.info("Hedging slow LLM call to %s", backend.name)
+            started = time.monotonic()
+            # Keep the request's call context and timing in the worker thread
+            future = _attempts.submit(contextvars.copy_context().run, _attempt, call, backend)
+            future.add_done_callback(
+                lambda f: backend.record(started, asyncio.CancelledError() if f.cancelled() else f.exception())
+            )
+            pending[future] = (backend, started)
+
+        launch()
+        try:
+            while pending:
+                timeout = self._hedge_timeout(pending, queue)
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    launch(hedging=True)
+                    continue
+                for future in done:
+                    backend, _ = pending.pop(future)
+                    if future.exception() is None:
+                        return self._tag(future.result(), backend)
+                    if isinstance(future.exception(), Cancelled):
+                        raise future.exception()
+                    errors.append(future.exception())
+                if not pending:
+                    launch()
+        finally:
+            # Losers still waiting for a pool thread are dropped; running ones
+            # cannot be interrupted, so they finish in the background, only
+            # feeding the histograms, and their results are ignored
+            for future in pending:
+                future.cancel()
+        raise self._unavailable(errors)
+
+    async def _aroute(self, call: Callable[[Backend], Any]) -> BaseMessage:
+        """Async _route(); losing attempts are cancelled"""
+        queue = list(self.backends)
+        errors: List[BaseException] = []
+        pending = {}
+
+        def launch(hedging: bool = False):
+            backend = self._next(queue)
+            if backend is None:
+                return
+            if hedging:
+                logger.info("Hedging slow LLM call to %s", backend.name)
+            started = time.monotonic()
+            task = asyncio.ensure_future(call(backend))
+            task.add_done_callback(
+                lambda t: backend.record(started, asyncio.CancelledError() if t.cancelled() else t.exception())
+            )
+            pending[task] = (backend, started)
+
+        launch()
+        try:
+            while pending:
+                timeout = self._hedge_timeout(pending, queue)
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch(hedging=True)
+                    continue
+                for task in done:
+                    backend, _ = pending.pop(task)
+                    if task.exception() is None:
+                        return self._tag(task.result(), backend)
+                    if isinstance(task.exception(), Cancelled):
+                        raise task.exception()
+                    errors.append(task.exception())
+                if not pending:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise self._unavailable(errors)
+
+    def _hedge_timeout(self, pending, queue) -> Optional[float]:
+        """Seconds until the in-flight attempt should be hedged, None for never"""
+        if not self.hedge or not queue or len(pending) != 1:
+            return None
+        backend, started = next(iter(pending.values()))
+        return max(backend.hedge_delay() - (time.monotonic() - started), 0.0)
+
+    def _tag(self, message: BaseMessage, backend: Backend) -> BaseMessage:
+        message.response_metadata["answered_by"] = backend.model
+        return message
+
+    def _unavailable(self, errors: List[BaseException]) -> Exception:
+        if len(errors) == 1:
+            return errors[0]
+        if not errors:
+            names = ", ".join(backend.name for backend in self.backends)
+            return ProvidersUnavailable(f"All LLM providers are unavailable ({names}); try again shortly")
+        summary = "; ".join(f"{type(e).__name__}: {e}" for e in errors)
+        return ProvidersUnavailable(f"All LLM providers failed: {summary}")
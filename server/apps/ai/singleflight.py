@@ -0,0 +1,477 @@
+"""
+Single-flight coalescing of identical in-flight AI requests
+
+Double-clicks, retries and double-mounted effects send the same request
+twice within a second. run(), arun() and stream() make the duplicates
+attach to the computation already in flight instead of paying for a
+second LLM call:
+
+- In a worker process, the first caller for a key (the leader) computes
+  and every concurrent caller waits for its result. Streams are produced
+  by a background thread into an event log that every subscriber (the
+  leader's own client included) replays from the start and then follows
+  live.
+- Across worker processes, a SingleFlightLease row claims the key. A
+  process that finds the key claimed waits for the holder to store its
+  result on the row (streams: the whole event log) and uses that. The
+  result is kept for SINGLE_FLIGHT["result_ttl"] seconds, so a duplicate
+  arriving just after completion is coalesced as well.
+
+Results cross the process boundary as JSON: callers pass encode/decode
+functions (e.g. a model instance to its pk and back). If the leader
+fails, in-process followers get its exception and other processes take
+over the key; if the leader's request is cancelled (apps.ai.cancellation),
+a follower takes over instead. A stream runs under a CancelToken of its
+own, cancelled when its last subscriber has been gone for
+SSE_REPLAY["reconnect_grace"] seconds.
+
+Streams are resumable: their events carry SSE ids, are written to a
+replay buffer (apps.ai.replay) and resume() attaches a reconnecting
+client (Last-Event-ID) to the stream from where it left off.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+
+from .cache import content_hash
+from .cancellation import (
+    DEADLINE, Cancelled, CancelToken, bind_token, checkpoint, current_token, within_deadline,
+)
+from . import replay
+from .models import SingleFlightLease
+
+logger = logging.getLogger(__name__)
+
+
+def flight_key(*parts: Any) -> str:
+    """Key for a computation identified by the given parts"""
+    return content_hash("single-flight", *parts)
+
+
+class _LeaderCancelled(Exception):
+    """The leader's request was cancelled before it had a result"""
+
+
+def _leader_error(error: BaseException) -> BaseException:
+    """Exception handed to the followers of a leader that failed with error"""
+    if isinstance(error, (Cancelled, asyncio.CancelledError, GeneratorExit)):
+        return _LeaderCancelled()
+    return error
+
+
+class _Flight:
+    """In-process state of one in-flight computation"""
+
+    def __init__(self):
+        # Encoded result, for run()/arun() followers
+        self.future: Future = Future()
+        # Event log, for stream() subscribers
+        self.events: List[str] = []
+        self.done = False
+        self.subscribers = 0
+        self.condition = threading.Condition()
+        # Cancellation of a stream's producer
+        self.token: Optional[CancelToken] = None
+        # Resumable streams: id, owner and replay buffer
+        self.stream_id: Optional[str] = None
+        self.user_id: Optional[int] = None
+        self.buffer: Optional[replay.ReplayBuffer] = None
+
+    def publish(self, event: str):
+        with self.condition:
+            self.events.append(event)
+            self.condition.notify_all()
+        if self.buffer is not None:
+            self.buffer.append(event)
+
+    def finish(self):
+        with self.condition:
+            self.done = True
+            self.condition.notify_all()
+
+    def subscribe(self, start: int = 0) -> Iterator[str]:
+        """
+        Every event from index start on, then each new one until the flight
+        is done; stream events are framed with their SSE ids
+
+        When the last subscriber leaves before the end and no client comes
+        back within SSE_REPLAY["reconnect_grace"] seconds, the flight's
+        token is cancelled: nobody is left to receive (or pay for) the
+        result.
+        """
+        with self.condition:
+            self.subscribers += 1
+        index = start
+        try:
+            while True:
+                with self.condition:
+                    while index >= len(self.events) and not self.done:
+                        self.condition.wait()
+                    events = self.events[index:]
+                    done = self.done
+                for offset, event in enumerate(events):
+                    yield replay.frame(self.stream_id, index + offset, event) if self.stream_id else event
+                index += len(events)
+                if done and index >= len(self.events):
+                    return
+        finally:
+            with self.condition:
+                self.subscribers -= 1
+                abandoned = self.subscribers == 0 and not self.done
+            if self.token is not None:
+                if abandoned:
+                    self._abandon_later()
+                elif self.token.reason == DEADLINE:
+                    # Count the producer's deadline against the subscribing request
+                    request_token = current_token()
+                    if request_token is not None:
+                        request_token.stage = request_token.stage or self.token.stage
+                        request_token.cancel(DEADLINE)
+
+    def _abandon_later(self):
+        """Cancel the producer unless a client resumes the stream in time"""
+        grace = settings.SSE_REPLAY["reconnect_grace"]
+
+        def check():
+            with self.condition:
+                if self.subscribers or self.done:
+                    return
+            try:
+                # A client may be following the replay buffer from another process
+                resumed = self.stream_id is not None and replay.read_recently(self.stream_id, grace)
+            finally:
+                connections.close_all()
+            if resumed:
+                self._abandon_later()
+            else:
+                self.token.cancel()
+
+        timer = threading.Timer(grace, check)
+        timer.daemon = True
+        timer.start()
+
+
+_flights: Dict[str, _Flight] = {}
+# Stream flights by stream id, for resume()
+_streams: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _join(key: str) -> Tuple[_Flight, bool]:
+    """The flight for a key and whether the caller leads it"""
+    with _flights_lock:
+        flight = _flights.get(key)
+        # A run() flight whose leader has finished, or an abandoned
+        # stream, is leaving the registry
+        if flight is not None and not flight.future.done() and not (
+            flight.token is not None and flight.token.cancelled
+        ):
+            return flight, False
+        flight = _flights[key] = _Flight()
+        return flight, True
+
+
+def _leave(key: str, flight: _Flight):
+    with _flights_lock:
+        if _flights.get(key) is flight:
+            del _flights[key]
+
+
+# ----------------------------------------------------------------------
+# Cross-process lease
+# ----------------------------------------------------------------------
+
+CLAIMED, DONE = "claimed", "done"
+
+
+def _acquire(key: str, holder: str, on_wait: Callable[[], None] = None) -> Tuple[str, Any]:
+    """
+    Claim the key's lease, waiting while another process holds it
+
+    Returns:
+        (CLAIMED, None), or (DONE, result) if another process finished it
+    """
+    config = settings.SINGLE_FLIGHT
+    waited = False
+    while True:
+        now = time.time()
+        claimable = Q(expires_at__lt=now) & (
+            Q(completed_at__isnull=True) | Q(completed_at__lt=now - config["result_ttl"])
+        )
+        claimed = SingleFlightLease.objects.filter(claimable, key=key).update(
+            holder=holder, expires_at=now + config["lease_ttl"], result=None, completed_at=None
+        )
+        if claimed:
+            return CLAIMED, None
+
+        row = SingleFlightLease.objects.filter(key=key).values("completed_at", "result").first()
+        if row is None:
+            try:
+                with transaction.atomic():
+                    SingleFlightLease.objects.create(
+                        key=key, holder=holder, expires_at=now + config["lease_ttl"]
+                    )
+                return CLAIMED, None
+            except IntegrityError:
+                continue
+        if row["completed_at"] is not None:
+            return DONE, row["result"]
+
+        if not waited and on_wait is not None:
+            on_wait()
+        waited = True
+        checkpoint("single_flight_wait")
+        time.sleep(config["poll_interval"])
+
+
+def _complete(key: str, holder: str, result: Any):
+    """Store the result on the lease and release it"""
+    now = time.time()
+    SingleFlightLease.objects.filter(key=key, holder=holder).update(
+        result=result, completed_at=now, expires_at=now
+    )
+    # Rows of long-finished (or abandoned) flights
+    SingleFlightLease.objects.filter(expires_at__lt=now - settings.SINGLE_FLIGHT["retention"]).delete()
+
+
+def _release(key: str, holder: str):
+    """Give up the lease without a result, letting another process take over"""
+    SingleFlightLease.objects.filter(key=key, holder=holder).update(expires_at=0)
+
+
+# ----------------------------------------------------------------------
+# Entry points
+# ----------------------------------------------------------------------
+
+def run(
+    key: str,
+    compute: Callable[[], Any],
+    encode: Callable[[Any], Any],
+    decode: Callable[[Any], Any],
+) -> Tuple[Any, bool]:
+    """
+    Compute a value once for all concurrent callers with the same key
+
+    Args:
+        key: Key from flight_key()
+        compute: Produces the value (only called by the leader)
+        encode: Value to JSON (stored for other callers)
+        decode: JSON back to a value (each follower gets its own copy)
+
+    Returns:
+        (value, shared): shared is True if another caller computed it
+    """
+    while True:
+        flight, leader = _join(key)
+        if leader:
+            break
+        try:
+            return decode(_wait(flight)), True
+        except _LeaderCancelled:
+            continue
+
+    holder = uuid.uuid4().hex
+    try:
+        state, result = _acquire(key, holder)
+        if state == DONE:
+            flight.future.set_result(result)
+            return decode(result), True
+        try:
+            value = compute()
+            encoded = encode(value)
+        except BaseException:
+            _release(key, holder)
+            raise
+        _complete(key, holder, encoded)
+        flight.future.set_result(encoded)
+        return value, False
+    except BaseException as e:
+        if not flight.future.done():
+            flight.future.set_exception(_leader_error(e))
+        raise
+    finally:
+        _leave(key, flight)
+
+
+def _wait(flight: _Flight) -> Any:
+    """A run() follower's wait for the leader, bounded by its own deadline"""
+    token = current_token()
+    try:
+        return flight.future.result(timeout=token.remaining() if token is not None else None)
+    except FutureTimeoutError:
+        checkpoint("single_flight_wait")
+        raise
+
+
+async def arun(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    encode: Callable[[Any], Any],
+    decode: Callable[[Any], Any],
+) -> Tuple[Any, bool]:
+    """
+    Async run(): compute is a coroutine function; encode and decode run in
+    a worker thread (they may use the ORM)
+    """
+    while True:
+        flight, leader = _join(key)
+        if leader:
+            break
+        try:
+            # Shielded: a cancelled follower must not cancel the shared future
+            encoded = await within_deadline(
+                asyncio.shield(asyncio.wrap_future(flight.future)), "single_flight_wait"
+            )
+            return await sync_to_async(decode)(encoded), True
+        except _LeaderCancelled:
+            continue
+
+    holder = uuid.uuid4().hex
+    try:
+        state, result = await sync_to_async(_acquire)(key, holder)
+        if state == DONE:
+            flight.future.set_result(result)
+            return await sync_to_async(decode)(result), True
+        try:
+            value = await compute()
+            encoded = await sync_to_async(encode)(value)
+        except BaseException:
+            await sync_to_async(_release)(key, holder)
+            raise
+        await sync_to_async(_complete)(key, holder, encoded)
+        flight.future.set_result(encoded)
+        return value, False
+    except BaseException as e:
+        if not flight.future.done():
+            flight.future.set_exception(_leader_error(e))
+        raise
+    finally:
+        _leave(key, flight)
+
+
+def stream(
+    key: str,
+    produce: Callable[[], Iterator[str]],
+    waiting_event: str = None,
+    user_id: int = None,
+) -> Iterator[str]:
+    """
+    Stream events produced once for all concurrent subscribers with the same key
+
+    The producer runs in a background thread, so it finishes (and its
+    result is stored) even if the client that started it disconnects
+    while others still subscribe or it comes back with Last-Event-ID
+    (see resume()). It has a CancelToken of its own with the starting
+    request's deadline, cancelled once every subscriber is gone for good;
+    the abandoned flight stores nothing.
+
+    Args:
+        key: Key from flight_key()
+        produce: Returns the event iterator (SSE frames without an id)
+        waiting_event: Event sent while another process holds the key
+        user_id: Owner of the stream; only they may resume it
+
+    Yields:
+        Every event of the flight, from the first, with its SSE id
+    """
+    flight, leader = _join(key)
+    if leader:
+        request_token = current_token()
+        flight.token = CancelToken(request_token.deadline if request_token is not None else None)
+        flight.stream_id = uuid.uuid4().hex
+        flight.user_id = user_id
+        replay.open_stream(flight.stream_id, user_id)
+        flight.buffer = replay.ReplayBuffer(flight.stream_id)
+        with _flights_lock:
+            _streams[flight.stream_id] = flight
+        context = contextvars.copy_context()
+        threading.Thread(
+            target=context.run,
+            args=(_produce, key, flight, produce, waiting_event),
+            name="single-flight-stream",
+            daemon=True,
+        ).start()
+    return flight.subscribe()
+
+
+def resume(last_event_id: str, user_id: int = None) -> Optional[Iterator[str]]:
+    """
+    Continue a stream after the event a reconnecting client saw last
+
+    Attaches to the flight if it is still running in this process;
+    otherwise follows the replay buffer the producer (in any process)
+    writes. No new computation is started.
+
+    Args:
+        last_event_id: The client's Last-Event-ID header
+        user_id: The requesting user, who must own the stream
+
+    Returns:
+        The events after last_event_id, or None if the stream is unknown,
+        expired or not the user's (the caller starts over)
+    """
+    parsed = replay.parse_event_id(last_event_id)
+    if parsed is None:
+        return None
+    stream_id, seq = parsed
+
+    with _flights_lock:
+        flight = _streams.get(stream_id)
+    if flight is not None and flight.user_id == user_id:
+        return flight.subscribe(start=seq + 1)
+
+    stream = replay.find_stream(stream_id, user_id)
+    if stream is None:
+        return None
+    return replay.follow(stream, seq)
+
+
+def _produce(key: str, flight: _Flight, produce: Callable[[], Iterator[str]], waiting_event: Optional[str]):
+    """Leader side of stream(), run in its own thread"""
+    bind_token(flight.token)
+    holder = uuid.uuid4().hex
+    try:
+        on_wait = (lambda: flight.publish(waiting_event)) if waiting_event else None
+        state, result = _acquire(key, holder, on_wait)
+        if state == DONE:
+            for event in result or []:
+                flight.publish(event)
+            return
+        try:
+            for event in produce():
+                flight.publish(event)
+                flight.token.check("single_flight_stream")
+        except Cancelled as e:
+            logger.info("Single-flight stream %s abandoned: %s", key[:12], e)
+            _release(key, holder)
+            return
+        except Exception:
+            logger.exception("Single-flight stream %s failed", key[:12])
+            _release(key, holder)
+            return
+        if flight.token.cancelled:
+            # The producer reported the cancellation as an event
+            _release(key, holder)
+            return
+        _complete(key, holder, flight.events)
+    except Cancelled as e:
+        logger.info("Single-flight stream %s abandoned while waiting: %s", key[:12], e)
+        _release(key, holder)
+    finally:
+        flight.buffer.close()
+        flight.finish()
+        _leave(key, flight)
+        with _flights_lock:
+            _streams.pop(flight.stream_id, None)
+        connections.close_all()
@@ -0,0 +1,515 @@
+"""
+Offline stand-in for the model APIs (MODEL_PROVIDER=fake or replay)
+
+StandInChatModel is a LangChain chat model, so services, callbacks (usage
+logging) and invoke / ainvoke / stream / batch behave exactly as with the
+real clients, without a network or API key:
+
+- "fake" generates a canned response for the operation named in the run
+  metadata (an analysis JSON, a parsed job or resume, or a chat reply),
+  seeded by the prompt so the same prompt gets the same response.
+- "replay" serves responses recorded from a real provider, looked up by a
+  hash of the prompt messages. Run with LLM_RECORD=true against OpenAI or
+  Gemini to record them.
+
+Both wait like a real model would: time to first token and tokens per
+second are drawn from the distributions in settings.LLM_STAND_IN (replays
+use the recorded timings instead).
+"""
+
+import asyncio
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from .cache import content_hash
+from .tokens import estimate_message_tokens, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+STAND_IN_PROVIDERS = ("fake", "replay")
+
+# Pieces a response is streamed in (a word with its leading whitespace,
+# or a single punctuation character), roughly one token each
+_STREAM_PIECES = re.compile(r"\s*[\w']+|\s*[^\w\s]|\s+")
+
+
+def prompt_hash(messages: List[BaseMessage]) -> str:
+    """Recording key of a prompt: its messages' roles and contents"""
+    return content_hash(*(f"{message.type}:{message.content}" for message in messages))
+
+
+def recording_path(key: str) -> Path:
+    return Path(settings.LLM_STAND_IN["recordings_dir"]) / f"{key}.json"
+
+
+def load_recording(key: str) -> Optional[Dict[str, Any]]:
+    """Recorded response for a prompt hash, or None"""
+    try:
+        with open(recording_path(key), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class StandInChatModel(BaseChatModel):
+    """
+    Chat model that answers from canned or recorded responses
+
+    Attributes:
+        mode: "fake" or "replay"
+        model_name: Model reported in responses and usage logs (the real
+            model of the role, so cost estimates stay meaningful)
+    """
+
+    mode: str = "fake"
+    model_name: str = "stand-in"
+
+    @property
+    def _llm_type(self) -> str:
+        return f"stand-in-{self.mode}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "model_name": self.model_name}
+
+    def _get_ls_params(self, stop=None, **kwargs):
+        params = super()._get_ls_params(stop=stop, **kwargs)
+        params["ls_provider"] = self.mode
+        params["ls_model_name"] = self.model_name
+        return params
+
+    # ------------------------------------------------------------------
+    # LangChain interface
+    # ------------------------------------------------------------------
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        content, usage, timing = self._respond(messages, run_manager)
+        time.sleep(timing.total)
+        return self._result(content, usage)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        content, usage, timing = self._respond(messages, run_manager)
+        await asyncio.sleep(timing.total)
+        return self._result(content, usage)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        content, usage, timing = self._respond(messages, run_manager)
+        for delay, chunk in self._chunks(content, usage, timing):
+            time.sleep(delay)
+            if run_manager and chunk.text:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        content, usage, timing = self._respond(messages, run_manager)
+        for delay, chunk in self._chunks(content, usage, timing):
+            await asyncio.sleep(delay)
+            if run_manager and chunk.text:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _respond(self, messages, run_manager) -> Tuple[str, Dict[str, int], "_Timing"]:
+        """Response text, token usage and timing for a prompt"""
+        key = prompt_hash(messages)
+        prompt_tokens = sum(estimate_message_tokens(message) for message in messages)
+
+        if self.mode == "replay":
+            recording = load_recording(key)
+            if recording is not None:
+                content = recording["content"]
+                usage = recording.get("usage") or _usage(prompt_tokens, content)
+                return content, usage, _Timing.recorded(recording, usage["output_tokens"])
+            if settings.LLM_STAND_IN["replay_miss"] == "error":
+                raise LookupError(f"No recorded response for prompt {key}")
+            logger.info("No recorded response for prompt %s, using a canned one", key)
+
+        # stream() does not hand _stream a run manager: fall back to the prompt
+        operation = (getattr(run_manager, "metadata", None) or {}).get("operation")
+        content = canned_response(
+            operation or _infer_operation(messages), messages, random.Random(key)
+        )
+        usage = _usage(prompt_tokens, content)
+        return content, usage, _Timing.sample(usage["output_tokens"])
+
+    def _result(self, content: str, usage: Dict[str, int]) -> ChatResult:
+        message = AIMessage(
+            content=content,
+            usage_metadata=usage,
+            response_metadata={"model_name": self.model_name},
+        )
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"model_name": self.model_name},
+        )
+
+    def _chunks(self, content: str, usage: Dict[str, int], timing: "_Timing"):
+        """(delay before, chunk) pairs; usage and model ride on the last chunk"""
+        pieces = _STREAM_PIECES.findall(content) or [""]
+        per_piece = timing.generation / len(pieces)
+        for index, piece in enumerate(pieces):
+            delay = timing.first_token if index == 0 else per_piece
+            yield delay, ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield 0, ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                usage_metadata=usage,
+                response_metadata={"model_name": self.model_name},
+            )
+        )
+
+
+class _Timing:
+    """Seconds to the first token and for the rest of the response"""
+
+    _random = random.Random(settings.LLM_STAND_IN["seed"])
+    _lock = threading.Lock()
+
+    def __init__(self, first_token: float, generation: float):
+        self.first_token = max(first_token, 0.0)
+        self.generation = max(generation, 0.0)
+
+    @property
+    def total(self) -> float:
+        return self.first_token + self.generation
+
+    @classmethod
+    def sample(cls, output_tokens: int) -> "_Timing":
+        config = settings.LLM_STAND_IN
+        if not config["simulate_latency"]:
+            return cls(0.0, 0.0)
+        ttft, rate = config["time_to_first_token_ms"], config["tokens_per_second"]
+        # Log-normal with the configured median and 95th percentile
+        sigma = math.log(ttft["p95"] / ttft["median"]) / 1.645
+        with cls._lock:
+            first_token = cls._random.lognormvariate(math.log(ttft["median"]), sigma) / 1000
+            tokens_per_second = max(cls._random.gauss(rate["mean"], rate["stddev"]), rate["min"])
+        return cls(first_token, output_tokens / tokens_per_second)
+
+    @classmethod
+    def recorded(cls, recording: Dict[str, Any], output_tokens: int) -> "_Timing":
+        if recording.get("wall_time_ms") is None or not settings.LLM_STAND_IN["simulate_latency"]:
+            return cls.sample(output_tokens)
+        wall_time = recording["wall_time_ms"] / 1000
+        first_token = (recording.get("time_to_first_token_ms") or 0) / 1000
+        return cls(first_token, wall_time - first_token)
+
+
+def _usage(prompt_tokens: int, content: str) -> Dict[str, int]:
+    output_tokens = estimate_tokens(content)
+    return {
+        "input_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": prompt_tokens + output_tokens,
+    }
+
+
+# ----------------------------------------------------------------------
+# Recording real responses
+# ----------------------------------------------------------------------
+
+class ResponseRecorder(BaseCallbackHandler):
+    """
+    Saves every real model response for replay (settings.LLM_STAND_IN["record"])
+
+    Each response is written to <recordings_dir>/<prompt hash>.json with
+    its token usage and timings.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._runs: Dict[Any, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        with self._lock:
+            self._runs[run_id] = {
+                "key": prompt_hash(messages[0]),
+                "operation": (metadata or {}).get("operation", ""),
+                "started": time.monotonic(),
+                "first_token": None,
+            }
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is not None and run["first_token"] is None:
+            run["first_token"] = time.monotonic()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+
+        generation = response.generations[0][0]
+        message = getattr(generation, "message", None)
+        finished = time.monotonic()
+        recording = {
+            "operation": run["operation"],
+            "model": (getattr(message, "response_metadata", None) or {}).get("model_name"),
+            "content": generation.text,
+            "usage": getattr(message, "usage_metadata", None),
+            "wall_time_ms": int((finished - run["started"]) * 1000),
+            "time_to_first_token_ms": (
+                int((run["first_token"] - run["started"]) * 1000)
+                if run["first_token"] is not None else None
+            ),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            path = recording_path(run["key"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(recording, ensure_ascii=False, indent=2), encoding="utf-8")
+        except OSError:
+            logger.exception("Could not record model response")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+
+response_recorder = ResponseRecorder()
+
+
+# ----------------------------------------------------------------------
+# Canned responses
+# ----------------------------------------------------------------------
+
+_LEVELS = ["BEGINNER", "INTERMEDIATE", "ADVANCED", "EXPERT"]
+_PRIORITIES = ["LOW", "MEDIUM", "HIGH"]
+_FALLBACK_SKILLS = ["Python", "SQL", "Communication", "Docker", "System Design"]
+
+
+def canned_response(operation: str, messages: List[BaseMessage], rng: random.Random) -> str:
+    """
+    Plausible response for an operation (see apps.ai.usage.operation_config)
+
+    Unknown operations get a chat-style reply.
+    """
+    prompt = "\n".join(str(message.content) for message in messages)
+    builders = {
+        "analyze_eligibility": _canned_analysis,
+        "parse_job_description": _canned_job,
+        "parse_resume": _canned_resume,
+    }
+    builder = builders.get(operation)
+    if builder is None:
+        return _canned_reply(messages, rng)
+    return json.dumps(builder(prompt, rng), indent=2)
+
+
+def _infer_operation(messages: List[BaseMessage]) -> str:
+    """Operation of a prompt, from the markers the service prompts contain"""
+    prompt = "\n".join(str(message.content) for message in messages)
+    if "**JOB POSTING:**" in prompt:
+        return "analyze_eligibility"
+    if "Job description:" in prompt:
+        return "parse_job_description"
+    if "Resume text:" in prompt:
+        return "parse_resume"
+    return ""
+
+
+def _posting_skills(prompt: str) -> List[str]:
+    """Skill names from the JOB POSTING JSON of an analysis prompt"""
+    match = re.search(r"\*\*JOB POSTING:\*\*\n(.+)", prompt)
+    try:
+        posting = json.loads(match.group(1)) if match else {}
+    except ValueError:
+        posting = {}
+    skills = [skill.get("name") for skill in posting.get("skills", []) if isinstance(skill, dict)]
+    return [skill for skill in skills if skill] or list(_FALLBACK_SKILLS)
+
+
+def _canned_analysis(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    skills = _posting_skills(prompt)
+    split = rng.randint(0, len(skills))
+    matching, missing = skills[:split], skills[split:]
+    score = rng.randint(35, 95)
+    level = "EXCELLENT" if score >= 85 else "GOOD" if score >= 70 else "FAIR" if score >= 50 else "POOR"
+
+    def near(value):
+        return max(0, min(100, value + rng.randint(-15, 15)))
+
+    return {
+        "eligibility_level": level,
+        "match_score": score,
+        "analysis_summary": f"The candidate matches {len(matching)} of {len(skills)} listed skills.",
+        "strengths": [f"Experience with {skill}" for skill in matching[:3]],
+        "gaps": [f"No demonstrated {skill} experience" for skill in missing[:3]],
+        "recommendations": [f"Build a small project using {skill}" for skill in missing[:3]],
+        "matching_skills": matching,
+        "missing_skills": missing,
+        "skill_gaps": [
+            {
+                "skill_name": skill,
+                "required_level": rng.choice(_LEVELS[1:]),
+                "current_level": "BEGINNER",
+                "gap_severity": rng.choice(_PRIORITIES),
+                "priority": rng.choice(_PRIORITIES),
+                "estimated_time_to_learn": f"{rng.randint(1, 6)} months",
+            }
+            for skill in missing
+        ],
+        "skills_match_score": near(score),
+        "experience_match_score": near(score),
+        "education_match_score": near(score),
+        "culture_fit_score": near(score),
+        "location_match_score": near(score),
+        "salary_match_score": near(score),
+        "technical_skills_score": near(score),
+        "soft_skills_score": near(score),
+        "domain_knowledge_score": near(score),
+        "experience_match": "Experience is broadly in line with the role.",
+        "experience_gap_years": round(rng.uniform(0, 3), 1),
+        "years_of_experience_required": float(rng.randint(1, 8)),
+        "years_of_experience_user": float(rng.randint(0, 10)),
+        "readiness_percentage": near(score),
+        "estimated_preparation_time": "Ready now" if score >= 85 else f"{rng.randint(1, 6)} months",
+        "confidence_level": rng.choice(["HIGH", "MEDIUM"]),
+        "next_steps": [f"Practice {skill}" for skill in missing[:3]] or ["Apply now"],
+        "priority_improvements": [
+            {
+                "area": skill,
+                "current_state": "Limited exposure",
+                "target_state": "Working proficiency",
+                "impact": rng.choice(_PRIORITIES),
+                "effort": rng.choice(_PRIORITIES),
+                "timeline": f"{rng.randint(1, 6)} months",
+            }
+            for skill in missing[:2]
+        ],
+        "learning_resources": [
+            {
+                "resource_type": "COURSE",
+                "title": f"{skill} fundamentals",
+                "description": f"Introductory course on {skill}",
+                "estimated_duration": f"{rng.randint(2, 8)} weeks",
+                "priority": rng.choice(_PRIORITIES),
+            }
+            for skill in missing[:2]
+        ],
+    }
+
+
+def _canned_job(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    text = prompt.split("Job description:", 1)[-1].strip()
+    title = next((line.strip() for line in text.splitlines() if line.strip()), "Software Engineer")
+    skills = rng.sample(_FALLBACK_SKILLS, 4)
+    return {
+        "job_title": title[:80],
+        "company_name": "Not Specified",
+        "job_type": "FULL_TIME",
+        "experience_level": rng.choice(["JUNIOR", "MID", "SENIOR"]),
+        "location": "Remote",
+        "is_remote": True,
+        "remote_policy": "FULLY_REMOTE",
+        "description": text[:300],
+        "responsibilities": ["Build and maintain services", "Collaborate with the team"],
+        "required_skills": [
+            {
+                "name": skill,
+                "requirement_type": "MUST_HAVE",
+                "minimum_proficiency": rng.choice(_LEVELS[1:]),
+                "years_required": rng.randint(1, 5),
+            }
+            for skill in skills[:3]
+        ],
+        "preferred_skills": [
+            {"name": skills[3], "requirement_type": "NICE_TO_HAVE", "minimum_proficiency": "BEGINNER"}
+        ],
+        "education_requirements": {
+            "degree_level": "BACHELOR",
+            "field_of_study": "Computer Science",
+            "is_required": False,
+        },
+        "min_years_experience": rng.randint(1, 5),
+        "max_years_experience": None,
+        "min_salary": None,
+        "max_salary": None,
+        "salary_currency": "USD",
+        "benefits": ["Health insurance"],
+        "company_culture": "Collaborative",
+        "industry": "Technology",
+    }
+
+
+def _canned_resume(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    start_year = rng.randint(2012, 2020)
+    return {
+        "personal_info": {"name": "Alex Morgan", "email": None, "location": "Remote"},
+        "summary": "Software engineer focused on backend services.",
+        "skills": [
+            {
+                "name": skill,
+                "category": "SOFT" if skill == "Communication" else "TECHNICAL",
+                "proficiency": rng.choice(_LEVELS),
+                "years_of_experience": float(rng.randint(1, 6)),
+            }
+            for skill in _FALLBACK_SKILLS
+        ],
+        "work_experience": [
+            {
+                "job_title": "Software Engineer",
+                "company": "Example Corp",
+                "location": "Remote",
+                "employment_type": "FULL_TIME",
+                "is_remote": True,
+                "start_date": f"{start_year}-01",
+                "end_date": None,
+                "is_current": True,
+                "description": "Backend development",
+                "responsibilities": ["Built APIs"],
+                "achievements": ["Reduced latency by 30%"],
+                "skills_used": ["Python", "SQL"],
+            }
+        ],
+        "education": [
+            {
+                "institution": "State University",
+                "degree": "BSc Computer Science",
+                "degree_level": "BACHELOR",
+                "field_of_study": "Computer Science",
+                "start_date": f"{start_year - 4}-09",
+                "end_date": f"{start_year}-06",
+                "is_current": False,
+            }
+        ],
+        "projects": [],
+        "certifications": [],
+        "total_years_experience": float(date.today().year - start_year),
+        "current_title": "Software Engineer",
+        "current_company": "Example Corp",
+        "career_level": "MID",
+    }
+
+
+def _canned_reply(messages: List[BaseMessage], rng: random.Random) -> str:
+    question = str(messages[-1].content).strip().splitlines()[-1] if messages else ""
+    sentences = [
+        "Based on your profile, focus first on the skills the role lists as must-have.",
+        "A small, finished project is the fastest way to show a new skill.",
+        "Highlight measurable results from your recent roles.",
+        "Consider a certification if the posting mentions one explicitly.",
+        "Tailor your resume summary to the job title you are targeting.",
+    ]
+    rng.shuffle(sentences)
+    return f'About "{question[:120]}": ' + " ".join(sentences[: rng.randint(2, 5)])
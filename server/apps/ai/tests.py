@@ -0,0 +1,461 @@
+import asyncio
+import contextvars
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+
+from django.conf import settings
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from langchain_core.messages import AIMessage
+from rest_framework.test import APIClient
+
+from apps.users.models import User
+from . import singleflight, throttling
+from .cache import TieredCache
+from .cancellation import Cancelled, CancelToken, DeadlineExceeded, bind_token
+from .json_stream import JSONStreamError, StreamingJSONParser
+from .models import LLMCallLog, RateLimitBucket, SingleFlightLease
+from .routing import Backend, CircuitBreaker, RoutedChatModel, answered_by
+from .usage import usage_rollup
+
+
+# ----------------------------------------------------------------------
+# Streaming JSON parser
+# ----------------------------------------------------------------------
+
+class StreamingJSONParserTests(SimpleTestCase):
+    RESPONSE = (
+        'Here is the analysis:\n```json\n'
+        '{"match_score": 85, "summary": "Say \\"hi\\"\\n\\u00e9", '
+        '"skills": ["Python", "SQL"], "gap": {"skill": "Go", "weeks": 4}, '
+        '"remote": true, "deadline": null, "delta": -1.5e2}\n```'
+    )
+    EXPECTED = {
+        "match_score": 85,
+        "summary": 'Say "hi"\né',
+        "skills": ["Python", "SQL"],
+        "gap": {"skill": "Go", "weeks": 4},
+        "remote": True,
+        "deadline": None,
+        "delta": -150.0,
+    }
+
+    def parse(self, text: str, chunk_size: int):
+        parser = StreamingJSONParser()
+        events = []
+        for start in range(0, len(text), chunk_size):
+            events.extend(parser.feed(text[start:start + chunk_size]))
+        return parser, events
+
+    def test_values_split_across_chunks(self):
+        # Chunk sizes that split keys, escapes, numbers and literals
+        for chunk_size in (1, 2, 3, 7, len(self.RESPONSE)):
+            with self.subTest(chunk_size=chunk_size):
+                parser, events = self.parse(self.RESPONSE, chunk_size)
+                self.assertEqual(parser.close(), self.EXPECTED)
+                self.assertEqual(events, [
+                    (("match_score",), 85),
+                    (("summary",), 'Say "hi"\né'),
+                    (("skills", 0), "Python"),
+                    (("skills", 1), "SQL"),
+                    (("skills",), ["Python", "SQL"]),
+                    (("gap", "skill"), "Go"),
+                    (("gap", "weeks"), 4),
+                    (("gap",), {"skill": "Go", "weeks": 4}),
+                    (("remote",), True),
+                    (("deadline",), None),
+                    (("delta",), -150.0),
+                ])
+
+    def test_values_are_reported_as_they_close(self):
+        parser = StreamingJSONParser()
+        self.assertEqual(parser.feed('{"match_score": 8'), [])
+        self.assertEqual(parser.feed('5, "summary": "Go'), [(("match_score",), 85)])
+        self.assertEqual(parser.feed('od"'), [(("summary",), "Good")])
+
+    def test_max_depth_limits_reported_paths(self):
+        parser = StreamingJSONParser(max_depth=1)
+        events = parser.feed('{"skills": ["Python"], "gap": {"weeks": 4}}')
+        self.assertEqual([path for path, _ in events], [("skills",), ("gap",)])
+
+    def test_syntax_error_keeps_values_closed_before_it(self):
+        parser = StreamingJSONParser()
+        events = parser.feed('{"match_score": 85, "skills": ["Python", }')
+        self.assertEqual(events, [(("match_score",), 85), (("skills", 0), "Python")])
+        self.assertIsNotNone(parser.error)
+        self.assertEqual(parser.feed('"more"]}'), [])
+        with self.assertRaises(JSONStreamError):
+            parser.close()
+
+    def test_invalid_literal(self):
+        parser = StreamingJSONParser()
+        parser.feed('{"remote": tru')
+        parser.feed("x}")
+        with self.assertRaisesMessage(JSONStreamError, "trux"):
+            parser.close()
+
+    def test_unclosed_object(self):
+        parser = StreamingJSONParser()
+        parser.feed('{"match_score": 85')
+        with self.assertRaisesMessage(JSONStreamError, "Incomplete JSON object"):
+            parser.close()
+
+
+# ----------------------------------------------------------------------
+# Tiered cache
+# ----------------------------------------------------------------------
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.stored = {}
+        self.cache = TieredCache(
+            max_entries=2, ttl=60, load=self.stored.get, store=self.stored.__setitem__
+        )
+
+    def test_miss_computes_and_stores(self):
+        compute = mock.Mock(return_value={"title": "Engineer"})
+
+        self.assertEqual(self.cache.get_or_compute("a", compute), {"title": "Engineer"})
+        self.assertEqual(self.cache.get_or_compute("a", compute), {"title": "Engineer"})
+
+        compute.assert_called_once()
+        self.assertEqual(self.stored, {"a": {"title": "Engineer"}})
+        stats = self.cache.stats()
+        self.assertEqual((stats["misses"], stats["memory_hits"]), (1, 1))
+
+    def test_store_hit_after_memory_is_dropped(self):
+        self.stored["a"] = {"title": "Engineer"}
+        compute = mock.Mock()
+
+        self.assertEqual(self.cache.get_or_compute("a", compute), {"title": "Engineer"})
+        self.assertEqual(self.cache.get("a"), {"title": "Engineer"})
+
+        compute.assert_not_called()
+        stats = self.cache.stats()
+        self.assertEqual((stats["store_hits"], stats["memory_hits"]), (1, 1))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TieredCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+
+    def test_expired_entry_is_reloaded(self):
+        self.cache.set("a", 1)
+        self.stored["a"] = 2
+        with mock.patch("apps.ai.cache.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertEqual(self.cache.get("a"), 2)
+
+
+# ----------------------------------------------------------------------
+# Throttling
+# ----------------------------------------------------------------------
+
+class TokenBucketTests(TestCase):
+    def test_refill(self):
+        now = time.time()
+        with mock.patch("apps.ai.throttling.time.time", return_value=now):
+            self.assertEqual(throttling.take("bucket", capacity=2, rate=1), 0)
+            self.assertEqual(throttling.take("bucket", capacity=2, rate=1), 0)
+            self.assertAlmostEqual(throttling.take("bucket", capacity=2, rate=1), 1.0)
+        with mock.patch("apps.ai.throttling.time.time", return_value=now + 1.5):
+            self.assertEqual(throttling.take("bucket", capacity=2, rate=1), 0)
+            self.assertAlmostEqual(throttling.take("bucket", capacity=2, rate=1), 0.5)
+
+    def test_refill_is_capped_at_capacity(self):
+        now = time.time()
+        with mock.patch("apps.ai.throttling.time.time", return_value=now):
+            throttling.take("bucket", capacity=2, rate=1)
+        self.assertEqual(throttling.peek("bucket", capacity=2, rate=1, now=now + 3600), 2)
+
+    def test_charge_overdraws(self):
+        now = time.time()
+        with mock.patch("apps.ai.throttling.time.time", return_value=now):
+            throttling.charge("bucket", capacity=100, rate=10, amount=150)
+        self.assertAlmostEqual(throttling.peek("bucket", capacity=100, rate=10, now=now), -50)
+        self.assertAlmostEqual(throttling.peek("bucket", capacity=100, rate=10, now=now + 5), 0)
+
+
+class ConcurrencyLeaseTests(TestCase):
+    def setUp(self):
+        # Slot rows are created once per process; each test starts empty
+        throttling._provisioned.clear()
+
+    def test_slots(self):
+        first = throttling.acquire("user:1", slots=2, ttl=60)
+        second = throttling.acquire("user:1", slots=2, ttl=60)
+
+        self.assertIsNotNone(first)
+        self.assertIsNotNone(second)
+        self.assertIsNone(throttling.acquire("user:1", slots=2, ttl=60))
+        # Other scopes have their own slots
+        self.assertIsNotNone(throttling.acquire("user:2", slots=2, ttl=60))
+
+        throttling.release(first)
+        self.assertIsNotNone(throttling.acquire("user:1", slots=2, ttl=60))
+
+    def test_unreleased_lease_lapses(self):
+        throttling.acquire("user:1", slots=1, ttl=60)
+        self.assertIsNone(throttling.acquire("user:1", slots=1, ttl=60))
+        with mock.patch("apps.ai.throttling.time.time", return_value=time.time() + 61):
+            self.assertIsNotNone(throttling.acquire("user:1", slots=1, ttl=60))
+
+
+@override_settings(
+    LLM_THROTTLE={
+        **settings.LLM_THROTTLE,
+        "enabled": True,
+        "requests": {"capacity": 1, "per_minute": 6},
+        "max_queue_wait": 0,
+    }
+)
+class LLMThrottleTests(TestCase):
+    def setUp(self):
+        throttling._provisioned.clear()
+        self.user = User.objects.create_user(
+            username="candidate", email="candidate@example.com", password="secret"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def analyze(self):
+        # Invalid body: admitted requests fail validation without calling the
+        # model. Sent in a context of its own, as the middlewares leave the
+        # request bound to the caller's context (for streamed bodies).
+        return contextvars.copy_context().run(
+            self.client.post, "/api/jobs/analyses/analyze/", {}, format="json"
+        )
+
+    def test_request_bucket_exhausted(self):
+        self.assertEqual(self.analyze().status_code, 400)
+
+        response = self.analyze()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "10")
+
+    def test_token_budget_in_debt(self):
+        throttling.charge_llm_tokens(self.user.pk, settings.LLM_THROTTLE["tokens"]["capacity"] + 5_000)
+
+        response = self.analyze()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        # Refused requests do not spend the request bucket
+        self.assertFalse(RateLimitBucket.objects.filter(key=f"llm-requests:{self.user.pk}").exists())
+
+    def test_slots_are_released_after_the_response(self):
+        with override_settings(LLM_THROTTLE={
+            **settings.LLM_THROTTLE, "user_concurrency": 1, "requests": {"capacity": 5, "per_minute": 6},
+        }):
+            self.assertEqual(self.analyze().status_code, 400)
+            self.assertEqual(self.analyze().status_code, 400)
+
+
+# ----------------------------------------------------------------------
+# Single-flight
+# ----------------------------------------------------------------------
+
+def _same(value):
+    return value
+
+
+class SingleFlightTests(TransactionTestCase):
+    def setUp(self):
+        self.key = singleflight.flight_key("test", self._testMethodName)
+        self.addCleanup(bind_token, None)
+
+    def run_flight(self, compute):
+        return singleflight.run(self.key, compute, encode=_same, decode=_same)
+
+    def run_in_thread(self, compute, results, name):
+        def target():
+            try:
+                results[name] = self.run_flight(compute)
+            except Exception as e:
+                results[name] = e
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        return thread
+
+    def test_concurrent_callers_share_one_computation(self):
+        started, finish = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            finish.wait(5)
+            return 42
+
+        results = {}
+        leader = self.run_in_thread(compute, results, "leader")
+        started.wait(5)
+        follower = self.run_in_thread(compute, results, "follower")
+        time.sleep(0.1)
+        finish.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(results, {"leader": (42, False), "follower": (42, True)})
+        self.assertEqual(len(calls), 1)
+
+    def test_completed_result_serves_duplicates_until_result_ttl(self):
+        self.assertEqual(self.run_flight(lambda: 1), (1, False))
+        self.assertEqual(self.run_flight(lambda: 2), (1, True))
+
+        SingleFlightLease.objects.filter(key=self.key).update(
+            completed_at=time.time() - settings.SINGLE_FLIGHT["result_ttl"] - 1
+        )
+        self.assertEqual(self.run_flight(lambda: 3), (3, False))
+
+    def test_lease_of_crashed_worker_expires(self):
+        SingleFlightLease.objects.create(key=self.key, holder="crashed", expires_at=time.time() - 1)
+        self.assertEqual(self.run_flight(lambda: 1), (1, False))
+
+    def test_wait_for_other_process_is_bounded_by_deadline(self):
+        SingleFlightLease.objects.create(key=self.key, holder="other", expires_at=time.time() + 60)
+        bind_token(CancelToken.with_timeout(0.3))
+        compute = mock.Mock()
+
+        with self.assertRaises(DeadlineExceeded):
+            self.run_flight(compute)
+        compute.assert_not_called()
+
+    def test_failed_leader_releases_the_key(self):
+        def fail():
+            raise ValueError("model error")
+
+        with self.assertRaisesMessage(ValueError, "model error"):
+            self.run_flight(fail)
+        self.assertEqual(self.run_flight(lambda: 2), (2, False))
+
+    def test_follower_takes_over_from_cancelled_leader(self):
+        started, proceed = threading.Event(), threading.Event()
+
+        def cancelled():
+            started.set()
+            proceed.wait(5)
+            raise Cancelled("test")
+
+        results = {}
+        leader = self.run_in_thread(cancelled, results, "leader")
+        started.wait(5)
+        follower = self.run_in_thread(lambda: 7, results, "follower")
+        time.sleep(0.1)
+        proceed.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertIsInstance(results["leader"], Cancelled)
+        self.assertEqual(results["follower"], (7, False))
+
+    def test_stream_is_produced_once_and_resumable(self):
+        produced = []
+
+        def produce():
+            produced.append(1)
+            for n in range(3):
+                yield f"data: {n}\n\n"
+
+        first = list(singleflight.stream(self.key, produce))
+        second = list(singleflight.stream(self.key, produce))
+
+        self.assertEqual(len(produced), 1)
+        self.assertEqual([frame.split("\n", 1)[1] for frame in second], [
+            "data: 0\n\n", "data: 1\n\n", "data: 2\n\n",
+        ])
+        # Resuming after the first event replays the rest from the buffer
+        last_event_id = first[0].split("\n", 1)[0][len("id: "):]
+        self.assertEqual(list(singleflight.resume(last_event_id)), first[1:])
+
+
+# ----------------------------------------------------------------------
+# Routing
+# ----------------------------------------------------------------------
+
+class AnsweringClient:
+    """Stand-in provider client answering at once, or failing"""
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+
+    def invoke(self, input, config=None, **kwargs):
+        if self.error:
+            raise self.error
+        return AIMessage("Hello")
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return self.invoke(input, config, **kwargs)
+
+
+class RoutingTests(SimpleTestCase):
+    def router(self) -> RoutedChatModel:
+        primary = Backend("primary", AnsweringClient(), "primary-model")
+        secondary = Backend("secondary", AnsweringClient(), "secondary-model")
+        # The secondary's cooldown is over: its next call is the probe
+        secondary.breaker.state = CircuitBreaker.OPEN
+        secondary.breaker._opened_at = time.monotonic() - secondary.breaker.cooldown
+        return RoutedChatModel(backends=[primary, secondary])
+
+    def test_probe_is_kept_for_a_call_that_reaches_the_backend(self):
+        for invoke in (
+            lambda router: router.invoke("Hi"),
+            lambda router: asyncio.run(router.ainvoke("Hi")),
+        ):
+            router = self.router()
+            self.assertEqual(answered_by(invoke(router)), "primary-model")
+            self.assertEqual(router.backends[1].breaker.state, CircuitBreaker.OPEN)
+
+            # A call that does reach it still gets the probe
+            router.backends[0].client.error = ConnectionError("down")
+            self.assertEqual(answered_by(invoke(router)), "secondary-model")
+
+
+# ----------------------------------------------------------------------
+# Usage rollup
+# ----------------------------------------------------------------------
+
+class UsageRollupTests(TestCase):
+    def test_percentiles_match_the_full_distribution(self):
+        wall_times = [120, 80, 950, 300, 310, 45, 2000, 500, 610, 75, 130]
+        for n, wall_time in enumerate(wall_times):
+            LLMCallLog.objects.create(
+                endpoint="jobs-analyze", llm_model="gpt-4o-mini",
+                outcome=LLMCallLog.Outcome.ERROR if n == 0 else LLMCallLog.Outcome.SUCCESS,
+                total_tokens=10, wall_time_ms=wall_time,
+                time_to_first_token_ms=wall_time // 2 if n % 2 else None,
+            )
+        LLMCallLog.objects.create(
+            endpoint="profiles-chat", llm_model="gpt-4o-mini",
+            outcome=LLMCallLog.Outcome.SUCCESS, wall_time_ms=40,
+        )
+
+        rows = usage_rollup(timezone.now() - timedelta(hours=1), "endpoint")
+        row = next(row for row in rows if row["endpoint"] == "jobs-analyze")
+        self.assertEqual((row["calls"], row["errors"], row["total_tokens"]), (11, 1, 110))
+
+        for summary, values in (
+            (row["wall_time_ms"], wall_times),
+            (row["time_to_first_token_ms"], [w // 2 for n, w in enumerate(wall_times) if n % 2]),
+        ):
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            self.assertEqual(summary, {
+                "avg": round(float(np.mean(values)), 1),
+                "p50": round(float(p50), 1),
+                "p95": round(float(p95), 1),
+                "p99": round(float(p99), 1),
+                "max": max(values),
+            })
+        other = next(row for row in rows if row["endpoint"] == "profiles-chat")
+        self.assertEqual(other["wall_time_ms"]["p95"], 40.0)
+        self.assertIsNone(other["time_to_first_token_ms"])
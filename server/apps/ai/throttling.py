@@ -0,0 +1,263 @@
+"""
+Rate limiting and concurrency governance for the LLM endpoints
+
+State lives in the database (RateLimitBucket, ConcurrencyLease), so every
+worker process enforces the same limits without Redis. Each request is
+admitted only if:
+
+1. the user's LLM token budget is not in debt: tokens are charged after
+   each call from the recorded usage (apps.ai.usage), so one expensive
+   call may overdraw the budget and the next ones wait for the refill
+2. an in-flight slot is free for the user and globally
+3. the user's request bucket has a token left
+
+A request that would get in within LLM_THROTTLE["max_queue_wait"]
+seconds waits for it; otherwise it is refused with 429 and Retry-After.
+Slots are held until the response (including a streamed body) is done:
+ConcurrencyLeaseMiddleware releases them.
+
+Wire it in with throttle_classes=[LLMThrottle] on DRF actions; native
+async views get the same check from apps.ai.async_api.
+"""
+
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional
+
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from rest_framework.throttling import BaseThrottle
+
+from .models import ConcurrencyLease, RateLimitBucket
+
+
+# ----------------------------------------------------------------------
+# Token buckets
+# ----------------------------------------------------------------------
+
+def _balance(capacity: float, rate: float, now: float):
+    """Expression for a bucket's balance at now, refilled since updated_at"""
+    return Least(
+        Value(float(capacity)),
+        F("tokens") + (Value(now) - F("updated_at")) * Value(float(rate)),
+    )
+
+
+def take(key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+    """
+    Take cost tokens from a bucket if it holds them
+
+    The check and the debit are one conditional UPDATE, so concurrent
+    processes cannot both spend the last token.
+
+    Args:
+        key: Bucket key
+        capacity: Maximum balance (burst size)
+        rate: Refill in tokens per second
+        cost: Tokens to take
+
+    Returns:
+        0 if the tokens were taken, else seconds until they will be there
+    """
+    now = time.time()
+    balance = _balance(capacity, rate, now)
+    taken = (
+        RateLimitBucket.objects.filter(key=key)
+        .alias(balance=balance)
+        .filter(balance__gte=cost)
+        .update(tokens=balance - cost, updated_at=now)
+    )
+    if taken:
+        return 0.0
+
+    current = peek(key, capacity, rate, now)
+    if current is None:
+        # New bucket: create it full (another process may win the race)
+        # and take from it like any other
+        RateLimitBucket.objects.bulk_create(
+            [RateLimitBucket(key=key, tokens=capacity, updated_at=now)],
+            ignore_conflicts=True,
+        )
+        return take(key, capacity, rate, cost)
+    return (cost - current) / rate
+
+
+def charge(key: str, capacity: float, rate: float, amount: float):
+    """Debit a bucket unconditionally; its balance may go negative"""
+    now = time.time()
+    balance = _balance(capacity, rate, now)
+    charged = RateLimitBucket.objects.filter(key=key).update(
+        tokens=balance - amount, updated_at=now
+    )
+    if not charged:
+        RateLimitBucket.objects.bulk_create(
+            [RateLimitBucket(key=key, tokens=capacity - amount, updated_at=now)],
+            ignore_conflicts=True,
+        )
+
+
+def peek(key: str, capacity: float, rate: float, now: float = None) -> Optional[float]:
+    """Current balance of a bucket, or None if it does not exist yet"""
+    now = now or time.time()
+    row = RateLimitBucket.objects.filter(key=key).values("tokens", "updated_at").first()
+    if row is None:
+        return None
+    return min(capacity, row["tokens"] + (now - row["updated_at"]) * rate)
+
+
+# ----------------------------------------------------------------------
+# Concurrency leases
+# ----------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Lease:
+    """A held in-flight slot"""
+
+    pk: int
+    holder: str
+
+
+_provisioned = set()
+
+
+def acquire(scope: str, slots: int, ttl: float) -> Optional[Lease]:
+    """
+    Claim a free slot of a scope
+
+    Args:
+        scope: Scope name ("global", "user:<id>")
+        slots: Number of slots in the scope
+        ttl: Seconds before an unreleased lease lapses
+
+    Returns:
+        Lease, or None if every slot is taken
+    """
+    if (scope, slots) not in _provisioned:
+        ConcurrencyLease.objects.bulk_create(
+            [ConcurrencyLease(scope=scope, slot=slot) for slot in range(slots)],
+            ignore_conflicts=True,
+        )
+        _provisioned.add((scope, slots))
+
+    now = time.time()
+    free = list(
+        ConcurrencyLease.objects.filter(scope=scope, slot__lt=slots, expires_at__lt=now)
+        .values_list("pk", flat=True)[:4]
+    )
+    # Spread racing processes over the free slots
+    random.shuffle(free)
+    holder = uuid.uuid4().hex
+    for pk in free:
+        claimed = ConcurrencyLease.objects.filter(pk=pk, expires_at__lt=now).update(
+            holder=holder, expires_at=now + ttl
+        )
+        if claimed:
+            return Lease(pk, holder)
+    return None
+
+
+def release(lease: Lease):
+    ConcurrencyLease.objects.filter(pk=lease.pk, holder=lease.holder).update(
+        holder="", expires_at=0
+    )
+
+
+def release_request_leases(request):
+    """Release the slots admit() attached to a request"""
+    for lease in getattr(request, "llm_leases", ()):
+        release(lease)
+    request.llm_leases = []
+
+
+# ----------------------------------------------------------------------
+# Admission
+# ----------------------------------------------------------------------
+
+def _bucket_config(name: str):
+    config = settings.LLM_THROTTLE[name]
+    return config["capacity"], config["per_minute"] / 60.0
+
+
+def charge_llm_tokens(user_id: int, tokens: int):
+    """Charge an LLM call's tokens to its user's token budget"""
+    if not settings.LLM_THROTTLE["enabled"] or not user_id or not tokens:
+        return
+    capacity, rate = _bucket_config("tokens")
+    charge(f"llm-tokens:{user_id}", capacity, rate, tokens)
+
+
+def admit(request, ident: str) -> Optional[float]:
+    """
+    Admit a request to an LLM endpoint, waiting briefly if needed
+
+    On success the held slots are added to request.llm_leases (the Django
+    request) for ConcurrencyLeaseMiddleware to release.
+
+    Args:
+        request: Django HttpRequest
+        ident: User id, or the client address for anonymous requests
+
+    Returns:
+        None if admitted, else seconds the client should wait
+    """
+    config = settings.LLM_THROTTLE
+    deadline = time.monotonic() + config["max_queue_wait"]
+
+    while True:
+        wait = _try_admit(request, ident)
+        if wait is None:
+            return None
+        if time.monotonic() + wait > deadline:
+            return wait
+        time.sleep(min(wait, config["poll_interval"]))
+
+
+def _try_admit(request, ident: str) -> Optional[float]:
+    config = settings.LLM_THROTTLE
+
+    capacity, rate = _bucket_config("tokens")
+    balance = peek(f"llm-tokens:{ident}", capacity, rate)
+    if balance is not None and balance < 0:
+        return -balance / rate
+
+    leases: List[Lease] = []
+    for scope, slots in ((f"user:{ident}", config["user_concurrency"]), ("global", config["global_concurrency"])):
+        lease = acquire(scope, slots, config["lease_ttl"])
+        if lease is None:
+            for held in leases:
+                release(held)
+            # Slots free up as calls finish; poll again shortly
+            return config["poll_interval"]
+        leases.append(lease)
+
+    capacity, rate = _bucket_config("requests")
+    wait = take(f"llm-requests:{ident}", capacity, rate)
+    if wait:
+        for held in leases:
+            release(held)
+        return wait
+
+    request.llm_leases = [*getattr(request, "llm_leases", ()), *leases]
+    return None
+
+
+class LLMThrottle(BaseThrottle):
+    """
+    DRF throttle for actions that call the LLM (see admit())
+
+    Returns 429 with Retry-After when the request cannot be admitted within
+    the queueing window.
+    """
+
+    def allow_request(self, request, view):
+        if not settings.LLM_THROTTLE["enabled"]:
+            return True
+        ident = request.user.pk if request.user and request.user.is_authenticated else self.get_ident(request)
+        self._wait = admit(request._request, str(ident))
+        return self._wait is None
+
+    def wait(self):
+        return self._wait
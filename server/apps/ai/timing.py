@@ -0,0 +1,244 @@
+"""
+Per-request timing: database, LLM, serialization and total time
+
+RequestTimingMiddleware opens a RequestTiming for each request and the
+pieces below add to it from wherever the work happens:
+
+- database queries, through an execute wrapper installed on every new
+  connection (so queries made in sync_to_async threads are counted too)
+- LLM calls, reported by LLMUsageCallbackHandler when a call finishes
+- serialization, by TimedJSONRenderer (DRF's JSON rendering)
+
+The totals are sent as a Server-Timing header. With
+REQUEST_TIMING["debug"] on, the slowest SQL statements of the request are
+kept together with the application frames that issued them and can be
+fetched from /api/ai/request-timing/<id>/ for a short while.
+"""
+
+import contextvars
+import os
+import threading
+import time
+import traceback
+import uuid
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+
+_current: contextvars.ContextVar[Optional["RequestTiming"]] = contextvars.ContextVar(
+    "request_timing", default=None
+)
+
+# Frames from these files and directories are not call sites of interest
+_SKIPPED_PATHS = (
+    os.path.join(os.path.dirname(__file__), "timing.py"),
+    os.path.join(os.path.dirname(__file__), "middleware.py"),
+    os.sep + "site-packages" + os.sep,
+    os.sep + "lib" + os.sep + "python",
+)
+
+
+class RequestTiming:
+    """
+    Time spent on one request, split by kind
+
+    Attributes:
+        id: Request id, used to look up the debug breakdown
+        debug: Whether individual SQL statements are kept
+        db_queries: Number of database queries
+        db_ms: Time spent in database queries
+        llm_calls: Number of finished LLM calls
+        llm_ms: Sum of the LLM call durations (concurrent calls overlap)
+        serialization_ms: Time spent rendering response bodies
+    """
+
+    def __init__(self, debug: bool = False):
+        self.id = uuid.uuid4().hex
+        self.debug = debug
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_ms = 0.0
+        self.llm_calls = 0
+        self.llm_ms = 0.0
+        self.serialization_ms = 0.0
+        self.statements: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def add_query(self, sql: str, duration_ms: float, many: bool, call_site: List[str] = None):
+        with self._lock:
+            self.db_queries += 1
+            self.db_ms += duration_ms
+            if self.debug:
+                self.statements.append({
+                    "sql": sql,
+                    "duration_ms": round(duration_ms, 3),
+                    "many": many,
+                    "call_site": call_site or [],
+                })
+
+    def add_llm_call(self, duration_ms: float):
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_ms += duration_ms
+
+    def add_serialization(self, duration_ms: float):
+        with self._lock:
+            self.serialization_ms += duration_ms
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value for the time spent so far
+
+        "app" is whatever is not database, LLM or serialization time.
+        """
+        total = self.elapsed_ms()
+        app = max(total - self.db_ms - self.llm_ms - self.serialization_ms, 0.0)
+        metrics = [
+            ("db", self.db_ms, f"{self.db_queries} queries"),
+            ("llm", self.llm_ms, f"{self.llm_calls} calls"),
+            ("serialize", self.serialization_ms, None),
+            ("app", app, None),
+            ("total", total, None),
+        ]
+        return ", ".join(
+            f'{name};dur={duration:.1f}' + (f';desc="{desc}"' if desc else "")
+            for name, duration, desc in metrics
+        )
+
+    def breakdown(self, path: str = "", method: str = "", status: int = None) -> Dict[str, Any]:
+        """
+        Debug breakdown: totals, the slowest statements and repeated SQL
+
+        Args:
+            path: Request path
+            method: Request method
+            status: Response status code
+
+        Returns:
+            Dict ready to be cached and returned as JSON
+        """
+        limit = settings.REQUEST_TIMING["slow_statements"]
+        with self._lock:
+            statements = list(self.statements)
+
+        repeated: Dict[str, Dict[str, Any]] = {}
+        for statement in statements:
+            entry = repeated.setdefault(statement["sql"], {"sql": statement["sql"], "count": 0, "duration_ms": 0.0})
+            entry["count"] += 1
+            entry["duration_ms"] += statement["duration_ms"]
+
+        return {
+            "id": self.id,
+            "method": method,
+            "path": path,
+            "status": status,
+            "total_ms": round(self.elapsed_ms(), 1),
+            "db": {"queries": self.db_queries, "duration_ms": round(self.db_ms, 1)},
+            "llm": {"calls": self.llm_calls, "duration_ms": round(self.llm_ms, 1)},
+            "serialization_ms": round(self.serialization_ms, 1),
+            "slowest_statements": sorted(statements, key=lambda s: s["duration_ms"], reverse=True)[:limit],
+            "repeated_statements": sorted(
+                (
+                    {**entry, "duration_ms": round(entry["duration_ms"], 3)}
+                    for entry in repeated.values()
+                    if entry["count"] > 1
+                ),
+                key=lambda entry: entry["count"],
+                reverse=True,
+            )[:limit],
+        }
+
+
+def current_timing() -> Optional[RequestTiming]:
+    """The RequestTiming of the request being handled, if any"""
+    return _current.get()
+
+
+def start_request_timing(debug: bool = False) -> RequestTiming:
+    """
+    Start collecting timings for the current request
+
+    Like the LLM call context, the timing is deliberately left in place
+    when the view returns so that streaming bodies are still counted.
+
+    Returns:
+        RequestTiming
+    """
+    timing = RequestTiming(debug=debug)
+    _current.set(timing)
+    return timing
+
+
+def record_llm_call(duration_ms: float):
+    """Add a finished LLM call to the current request's timing"""
+    timing = _current.get()
+    if timing is not None:
+        timing.add_llm_call(duration_ms)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper that adds each query to the current request
+
+    Installed on every connection by install_query_recorder().
+    """
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        timing.add_query(sql, duration_ms, many, _call_site() if timing.debug else None)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver that adds record_query to the connection"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def store_breakdown(breakdown: Dict[str, Any]):
+    cache.set(_cache_key(breakdown["id"]), breakdown, settings.REQUEST_TIMING["debug_ttl"])
+
+
+def get_breakdown(timing_id: str) -> Optional[Dict[str, Any]]:
+    return cache.get(_cache_key(timing_id))
+
+
+def _cache_key(timing_id: str) -> str:
+    return f"request-timing:{timing_id}"
+
+
+def _call_site() -> List[str]:
+    """The innermost application frames of the current stack, innermost first"""
+    depth = settings.REQUEST_TIMING["call_site_depth"]
+    frames = []
+    for frame in reversed(traceback.extract_stack()):
+        if any(part in frame.filename for part in _SKIPPED_PATHS):
+            continue
+        frames.append(f"{os.path.relpath(frame.filename, settings.BASE_DIR)}:{frame.lineno} in {frame.name}")
+        if len(frames) >= depth:
+            break
+    return frames
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that adds its rendering time to the request's serialization time"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            timing = _current.get()
+            if timing is not None:
+                timing.add_serialization((time.perf_counter() - started) * 1000)
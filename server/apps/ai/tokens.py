@@ -0,0 +1,101 @@
+"""
+Prompt size helpers: a local token estimator and a compact JSON encoder
+
+The estimator needs no tokenizer download or network access (tiktoken
+fetches its vocabularies on first use), so it is cheap enough to run on
+every prompt. It approximates BPE tokenizers such as cl100k/o200k to
+within roughly 10% on English prose and JSON.
+"""
+
+import json
+import re
+from typing import Any
+
+# Pre-tokenizer pieces: words (with a leading space), digit runs, single
+# punctuation characters and whitespace runs
+_PIECES = re.compile(r" ?[^\W\d_]+| ?\d+| ?[^\s\w]|\s+", re.UNICODE)
+
+# Characters per token of the pieces above
+_CHARS_PER_WORD_TOKEN = 4
+_DIGITS_PER_TOKEN = 3
+
+# Tokens a chat message costs on top of its content (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many tokens a text costs
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        stripped = piece.lstrip(" ")
+        if not stripped:
+            # Whitespace runs: newlines and indentation mostly merge
+            tokens += 1 if "\n" in piece or len(piece) > 1 else 0
+        elif stripped[0].isdigit():
+            tokens += -(-len(stripped) // _DIGITS_PER_TOKEN)
+        elif stripped[0].isalpha():
+            tokens += -(-len(stripped) // _CHARS_PER_WORD_TOKEN)
+        else:
+            tokens += 1
+    return tokens
+
+
+def estimate_message_tokens(message) -> int:
+    """estimate_tokens() of a chat message, plus its role framing"""
+    content = message.content
+    if not isinstance(content, str):
+        content = " ".join(
+            part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+        )
+    return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def compact(value: Any) -> Any:
+    """
+    Drop None, empty strings and empty containers, recursively
+
+    False and 0 are kept: they carry information.
+    """
+    if isinstance(value, dict):
+        items = ((key, compact(item)) for key, item in value.items())
+        return {key: item for key, item in items if not _is_empty(item)}
+    if isinstance(value, (list, tuple)):
+        items = (compact(item) for item in value)
+        return [item for item in items if not _is_empty(item)]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def compact_json(value: Any) -> str:
+    """Serialize without indentation, separator spaces or ASCII escapes"""
+    return json.dumps(
+        compact(value), separators=(",", ":"), ensure_ascii=False, default=str
+    )
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """
+    Shorten a text to at most max_chars, cutting at a word boundary
+
+    Returns:
+        The text itself if short enough, else its start followed by "…"
+    """
+    if not isinstance(text, str) or len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(None, 1)[0] if max_chars > 0 else ""
+    return cut.rstrip(" ,;:.-") + "…"
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, (str, list, dict)) and not value)
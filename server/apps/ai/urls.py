@@ -0,0 +1,14 @@
+"""
+URL Configuration for AI app
+"""
+from django.urls import path
+
+from . import views
+
+app_name = 'ai'
+
+urlpatterns = [
+    path('llm-usage/', views.llm_usage, name='llm-usage'),
+    path('request-timing/<str:timing_id>/', views.request_timing, name='request-timing'),
+    path('chat-sessions/<int:session_id>/', views.chat_session, name='chat-session'),
+]
@@ -0,0 +1,352 @@
+"""
+Token, latency and cost accounting for LLM calls
+
+Every pooled client (apps.ai.llm) carries usage_handler, a LangChain
+callback handler that times each chat model run and writes an LLMCallLog
+row when it ends, fails or is cancelled. The HTTP endpoint and user are
+taken from the call context bound by apps.ai.middleware (or by the task
+worker); call sites name their operation in the run metadata:
+
+    llm.invoke(prompt, config={"metadata": {"operation": "analyze_eligibility"}})
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.utils.functional import SimpleLazyObject, empty
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .cancellation import Cancelled
+from .timing import record_llm_call
+from .tokens import estimate_message_tokens
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------
+# Call context (endpoint and user of the current request or task)
+# ----------------------------------------------------------------------
+
+_call_context: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "llm_call_context", default=None
+)
+
+
+@contextmanager
+def llm_call_context(endpoint: str = "", user_id: int = None):
+    """Attribute the LLM calls made inside the block to an endpoint and user"""
+    token = _call_context.set({"endpoint": endpoint, "user_id": user_id})
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+
+def current_call_context() -> Tuple[str, Optional[int]]:
+    """(endpoint, user id) of the current request or task"""
+    context = _call_context.get()
+    if context is None:
+        return "", None
+
+    request = context.get("request")
+    if request is None:
+        return context["endpoint"], context["user_id"]
+    return request_identity(request)
+
+
+def request_identity(request) -> Tuple[str, Optional[int]]:
+    """(URL name, user id) of a request, without resolving a lazy user"""
+    match = getattr(request, "resolver_match", None)
+    endpoint = match.view_name if match else request.path
+    # Only read a user that is already resolved: resolving the session
+    # user would query the database, possibly from the event loop
+    user = request.__dict__.get("user")
+    if isinstance(user, SimpleLazyObject):
+        user = None if user._wrapped is empty else user._wrapped
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    return endpoint, user_id
+
+
+def bind_request(request):
+    """
+    Attribute the LLM calls made from now on in this context to a request
+
+    Used by LLMCallContextMiddleware. The endpoint and user are read when a
+    call starts, after URL resolution and authentication have happened.
+    """
+    _call_context.set({"request": request})
+
+
+# ----------------------------------------------------------------------
+# Token and cost helpers
+# ----------------------------------------------------------------------
+
+def operation_config(operation: str, **config) -> Dict[str, Any]:
+    """
+    Runnable config naming the operation a call is made for
+
+    Args:
+        operation: Operation name recorded on LLMCallLog
+        **config: Other RunnableConfig keys (such as max_concurrency)
+    """
+    return {**config, "metadata": {"operation": operation}}
+
+
+def total_tokens(message) -> int:
+    """Total tokens reported on a model response (0 if the provider sent none)"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("total_tokens", 0)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[Decimal]:
+    """
+    USD cost of a call from settings.LLM_PRICING (per million tokens)
+
+    Dated model versions ("gpt-4o-mini-2024-07-18") use the price of the
+    longest configured prefix. Returns None for unpriced models.
+    """
+    prefixes = [name for name in settings.LLM_PRICING if model.startswith(name)]
+    if not prefixes:
+        return None
+    price = settings.LLM_PRICING[max(prefixes, key=len)]
+    cost = (
+        Decimal(str(price["prompt"])) * prompt_tokens
+        + Decimal(str(price["completion"])) * completion_tokens
+    ) / 1_000_000
+    return cost.quantize(Decimal("0.000001"))
+
+
+def _usage_from_result(response) -> Tuple[int, int, int]:
+    """(prompt, completion, total) tokens of an LLMResult"""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage["input_tokens"], usage["output_tokens"], usage["total_tokens"]
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return (
+        usage.get("prompt_tokens", 0),
+        usage.get("completion_tokens", 0),
+        usage.get("total_tokens", 0),
+    )
+
+
+def _model_from_result(response) -> Optional[str]:
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            model = (getattr(message, "response_metadata", None) or {}).get("model_name")
+            if model:
+                return model
+    return (response.llm_output or {}).get("model_name")
+
+
+# ----------------------------------------------------------------------
+# Callback handler
+# ----------------------------------------------------------------------
+
+# Writes made from an event loop are handed to this thread
+_log_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-call-log")
+
+
+def _write_log(fields: Dict[str, Any]):
+    from .models import LLMCallLog
+    from .throttling import charge_llm_tokens
+
+    try:
+        LLMCallLog.objects.create(**fields)
+        charge_llm_tokens(fields["user_id"], fields.get("total_tokens", 0))
+    except Exception:
+        logger.exception("Could not record LLM call")
+
+
+class LLMUsageCallbackHandler(BaseCallbackHandler):
+    """
+    Records one LLMCallLog row per chat model run
+
+    Runs inline (also for async calls) so that per-token callbacks do not
+    hop to a thread; the database write is moved off the event loop.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._runs: Dict[Any, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        metadata = metadata or {}
+        endpoint, user_id = current_call_context()
+        with self._lock:
+            self._runs[run_id] = {
+                "started": time.monotonic(),
+                "first_token": None,
+                "endpoint": endpoint,
+                "user_id": user_id,
+                "operation": metadata.get("operation", ""),
+                "provider": metadata.get("ls_provider", ""),
+                "llm_model": metadata.get("ls_model_name", ""),
+                "streamed": bool((kwargs.get("invocation_params") or {}).get("stream")),
+                "estimated_prompt_tokens": sum(
+                    estimate_message_tokens(message)
+                    for batch in messages
+                    for message in batch
+                ),
+            }
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is not None and run["first_token"] is None:
+            run["first_token"] = time.monotonic()
+            run["streamed"] = True
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens, completion_tokens, tokens = _usage_from_result(response)
+        self._finish(
+            run_id,
+            outcome="SUCCESS",
+            llm_model=_model_from_result(response),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=tokens,
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        cancelled = isinstance(error, (GeneratorExit, asyncio.CancelledError, Cancelled))
+        self._finish(
+            run_id,
+            outcome="CANCELLED" if cancelled else "ERROR",
+            error="" if cancelled else f"{type(error).__name__}: {error}",
+        )
+
+    def _finish(self, run_id, outcome, llm_model=None, error="", **tokens):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+
+        finished = time.monotonic()
+        started, first_token = run.pop("started"), run.pop("first_token")
+        record_llm_call((finished - started) * 1000)
+        run["llm_model"] = llm_model or run["llm_model"]
+        fields = {
+            **run,
+            **tokens,
+            "outcome": outcome,
+            "error": error[:2000],
+            "wall_time_ms": int((finished - started) * 1000),
+            "time_to_first_token_ms": (
+                int((first_token - started) * 1000) if first_token is not None else None
+            ),
+            "estimated_cost": estimate_cost(
+                run["llm_model"],
+                tokens.get("prompt_tokens", 0),
+                tokens.get("completion_tokens", 0),
+            ),
+        }
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            _write_log(fields)
+        else:
+            _log_writer.submit(_write_log, fields)
+
+
+usage_handler = LLMUsageCallbackHandler()
+
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+
+ROLLUP_GROUPS = {
+    "endpoint": ("endpoint",),
+    "model": ("llm_model",),
+    "operation": ("operation",),
+    "endpoint_model": ("endpoint", "llm_model"),
+}
+
+
+def usage_rollup(since, group_by: str = "endpoint_model") -> List[Dict[str, Any]]:
+    """
+    Aggregate recorded LLM calls per endpoint and/or model
+
+    Args:
+        since: Only include calls made at or after this datetime
+        group_by: Key of ROLLUP_GROUPS
+
+    Returns:
+        One row per group, most expensive first: call, error and
+        cancellation counts, token and cost totals, and wall time /
+        time-to-first-token averages and percentiles (ms)
+    """
+    from .models import LLMCallLog
+
+    fields = ROLLUP_GROUPS[group_by]
+    calls = LLMCallLog.objects.filter(created_at__gte=since)
+    rows = list(
+        calls.values(*fields).annotate(
+            calls=Count("id"),
+            errors=Count("id", filter=Q(outcome=LLMCallLog.Outcome.ERROR)),
+            cancelled=Count("id", filter=Q(outcome=LLMCallLog.Outcome.CANCELLED)),
+            estimated_prompt_tokens=Sum("estimated_prompt_tokens"),
+            prompt_tokens=Sum("prompt_tokens"),
+            completion_tokens=Sum("completion_tokens"),
+            total_tokens=Sum("total_tokens"),
+            estimated_cost=Sum("estimated_cost"),
+            wall_time_avg=Avg("wall_time_ms"),
+            wall_time_max=Max("wall_time_ms"),
+            ttft_calls=Count("time_to_first_token_ms"),
+            ttft_avg=Avg("time_to_first_token_ms"),
+            ttft_max=Max("time_to_first_token_ms"),
+        ).order_by()
+    )
+
+    for row in rows:
+        group = calls.filter(**{field: row[field] for field in fields})
+        row["wall_time_ms"] = _latency_summary(
+            group, "wall_time_ms", row["calls"], row.pop("wall_time_avg"), row.pop("wall_time_max")
+        )
+        row["time_to_first_token_ms"] = _latency_summary(
+            group, "time_to_first_token_ms", row.pop("ttft_calls"), row.pop("ttft_avg"), row.pop("ttft_max")
+        )
+        row["estimated_cost"] = float(row["estimated_cost"] or 0)
+
+    rows.sort(key=lambda row: (row["estimated_cost"], row["total_tokens"]), reverse=True)
+    return rows
+
+
+def _latency_summary(calls, field: str, count: int, avg, maximum) -> Optional[Dict[str, float]]:
+    """
+    Average, percentiles and maximum of a latency column (ms)
+
+    Percentiles are not portable SQL aggregates. Each is interpolated
+    between the two values around its rank (as numpy does), which are
+    read with an ordered two-row slice, so no group is loaded in full.
+    """
+    if not count:
+        return None
+    values = (
+        calls.filter(**{f"{field}__isnull": False})
+        .order_by(field)
+        .values_list(field, flat=True)
+    )
+    summary = {"avg": round(float(avg), 1)}
+    for q in (50, 95, 99):
+        rank = (count - 1) * q / 100
+        low = int(rank)
+        # Calls logged since the aggregate was taken may shift the rank a little
+        pair = list(values[low:low + 2]) or [maximum]
+        summary[f"p{q}"] = round(float(pair[0] + (pair[-1] - pair[0]) * (rank - low)), 1)
+    summary["max"] = int(maximum)
+    return summary
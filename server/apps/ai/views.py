@@ -0,0 +1,135 @@
+"""
+Views for AI app
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+
+from .cancellation import abort_rollup
+from .models import ChatSession
+from .timing import get_breakdown
+from .usage import ROLLUP_GROUPS, usage_rollup
+
+
+@extend_schema(
+    tags=['AI Usage'],
+    summary='LLM usage rollup',
+    description='Tokens, estimated cost, latency percentiles and error rates of recorded '
+                'LLM calls, grouped per endpoint and/or model, and the requests aborted by '
+                'a client disconnect or deadline per endpoint. Admin only.',
+    parameters=[
+        OpenApiParameter(
+            'hours', OpenApiTypes.INT,
+            description='Look-back window in hours (default 24, max 744)',
+        ),
+        OpenApiParameter(
+            'group_by', OpenApiTypes.STR, enum=list(ROLLUP_GROUPS),
+            description='Grouping (default endpoint_model)',
+        ),
+    ],
+    responses={200: OpenApiTypes.OBJECT},
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def llm_usage(request):
+    """
+    Aggregate the LLM call log over a recent window
+    """
+    report = settings.LLM_USAGE_REPORT
+    try:
+        hours = int(request.query_params.get('hours', report['default_hours']))
+    except ValueError:
+        return Response(
+            {'error': 'hours must be an integer'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    hours = max(1, min(hours, report['max_hours']))
+
+    group_by = request.query_params.get('group_by', 'endpoint_model')
+    if group_by not in ROLLUP_GROUPS:
+        return Response(
+            {'error': f'group_by must be one of: {", ".join(ROLLUP_GROUPS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    since = timezone.now() - timedelta(hours=hours)
+    return Response({
+        'since': since,
+        'group_by': group_by,
+        'results': usage_rollup(since, group_by),
+        'aborts': abort_rollup(since),
+    })
+
+
+@extend_schema(
+    tags=['AI Usage'],
+    summary='Request timing breakdown',
+    description='Database, LLM and serialization time of a recent request with its slowest '
+                'SQL statements and their call sites. The id is the X-Request-Timing-Id '
+                'response header, sent while REQUEST_TIMING["debug"] is on. Admin only.',
+    responses={200: OpenApiTypes.OBJECT},
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def request_timing(request, timing_id):
+    """
+    Return the stored timing breakdown of a request
+    """
+    breakdown = get_breakdown(timing_id)
+    if breakdown is None:
+        return Response(
+            {'error': 'No timing breakdown stored for this id (debug off or expired)'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(breakdown)
+
+
+@extend_schema(
+    tags=['AI Chat'],
+    summary='Chat session history',
+    description='Messages of one of your advisor chat sessions (job analysis or profile chat) '
+                'with the running summary of turns no longer sent verbatim. DELETE ends the session.',
+    methods=['GET', 'DELETE'],
+    responses={200: OpenApiTypes.OBJECT, 204: None},
+)
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def chat_session(request, session_id):
+    """
+    Return or delete a chat session of the current user
+    """
+    session = ChatSession.objects.filter(pk=session_id, user=request.user).first()
+    if session is None:
+        return Response(
+            {'error': 'Chat session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if request.method == 'DELETE':
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    return Response({
+        'id': session.pk,
+        'kind': session.kind,
+        'subject_id': session.subject_id,
+        'summary': session.summary,
+        'messages': [
+            {
+                'role': message.role,
+                'content': message.content,
+                'summarized': message.summarized,
+                'created_at': message.created_at,
+            }
+            for message in session.messages.all()
+        ],
+        'created_at': session.created_at,
+        'updated_at': session.updated_at,
+    })
@@ -2,7 +2,7 @@
 Admin configuration for Jobs app
 """
 from django.contrib import admin
-from .models import Job, JobSkillRequirement, JobEligibilityAnalysis
+from .models import Job, JobSkillRequirement, JobEligibilityAnalysis, ParsedJobDescription
 
 
 class JobSkillRequirementInline(admin.TabularInline):
@@ -195,6 +195,7 @@ class JobEligibilityAnalysisAdmin(admin.ModelAdmin):
         'analyzed_at',
         'llm_model',
         'token_usage',
+        'context_fingerprint',
     ]
     fieldsets = (
         ('Basic Information', {
@@ -241,6 +242,7 @@ class JobEligibilityAnalysisAdmin(admin.ModelAdmin):
             'fields': (
                 'llm_model',
                 'token_usage',
+                'context_fingerprint',
             )
         }),
     )
@@ -254,3 +256,39 @@ class JobEligibilityAnalysisAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         """Analyses are read-only in admin"""
         return False
+
+
+@admin.register(ParsedJobDescription)
+class ParsedJobDescriptionAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the job description parse cache
+    """
+    list_display = [
+        'content_hash',
+        'llm_model',
+        'prompt_version',
+        'hit_count',
+        'created_at',
+        'last_used_at',
+    ]
+    list_filter = [
+        'llm_model',
+        'prompt_version',
+    ]
+    search_fields = [
+        'content_hash',
+    ]
+    readonly_fields = [
+        'content_hash',
+        'llm_model',
+        'prompt_version',
+        'parsed_data',
+        'hit_count',
+        'created_at',
+        'last_used_at',
+    ]
+    ordering = ['-last_used_at']
+
+    def has_add_permission(self, request):
+        """Cache entries are only created by the parser"""
+        return False
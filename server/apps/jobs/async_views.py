@@ -0,0 +1,508 @@
+"""
+Native async views for the AI-backed job analysis endpoints
+
+Mounted in place of the matching JobEligibilityAnalysisViewSet actions when
+settings.ASYNC_AI_VIEWS is on (the default under core.asgi), so a worker
+can keep many LLM calls in flight instead of blocking a thread per call.
+Request and response bodies match the DRF actions.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from rest_framework import status
+
+from apps.ai.chat import open_session
+from apps.ai.async_api import api_response, async_api_view, task_accepted_response
+from apps.ai.models import ChatSession
+from apps.tasks.services import enqueue, request_flag, wants_background
+from .models import Job, JobEligibilityAnalysis
+from .serializers import (
+    JobEligibilityAnalysisDetailSerializer,
+    AnalyzeJobEligibilitySerializer,
+    ReanalyzeJobEligibilitySerializer,
+    AnalyzeJobsBatchSerializer,
+)
+from .services import JobEligibilityAnalyzer, DreamJobParser, AnalysisChatService
+from .streaming_services import StreamingJobAnalyzer
+from .scoring import skill_match_preview
+
+
+def _validate(serializer_class, data):
+    """Run a DRF serializer's validation (may hit the DB)"""
+    serializer = serializer_class(data=data)
+    serializer.is_valid()
+    return serializer
+
+
+def _serialize_analysis(analysis):
+    return JobEligibilityAnalysisDetailSerializer(analysis).data
+
+
+def _analysis_data(analysis):
+    """Serialized analysis plus the deterministic skill match (see views._analysis_response)"""
+    data = _serialize_analysis(analysis)
+    data['skill_match_preview'] = skill_match_preview(analysis.user, analysis.job_id)
+    return data
+
+
+def _analysis_response(analysis, data):
+    """Async counterpart of views._analysis_response"""
+    return api_response(
+        data,
+        headers={'X-Analysis-Reused': 'true' if getattr(analysis, 'reused', False) else 'false'},
+    )
+
+
+@require_POST
+@async_api_view
+async def analyze(request):
+    """
+    Analyze user's eligibility for a job
+    """
+    serializer = await sync_to_async(_validate)(AnalyzeJobEligibilitySerializer, request.data)
+    if serializer.errors:
+        return api_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    job_id = serializer.validated_data['job_id']
+    additional_context = serializer.validated_data.get('additional_context', '')
+    force = serializer.validated_data.get('force', False)
+
+    if wants_background(request):
+        task = await sync_to_async(enqueue)('jobs.analyze', {
+            'user_id': request.user.id,
+            'job_id': job_id,
+            'additional_context': additional_context,
+            'force': force,
+        }, user=request.user)
+        preview = await sync_to_async(skill_match_preview)(request.user, job_id)
+        return task_accepted_response(task, skill_match_preview=preview)
+
+    try:
+        job = await Job.objects.aget(id=job_id)
+
+        analyzer = JobEligibilityAnalyzer(model_name="gpt-4")
+        analysis = await analyzer.aanalyze_eligibility(
+            user=request.user,
+            job=job,
+            additional_context=additional_context,
+            force=force,
+        )
+
+        data = await sync_to_async(_analysis_data)(analysis)
+        return _analysis_response(analysis, data)
+
+    except Job.DoesNotExist:
+        return api_response(
+            {'error': 'Job not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return api_response(
+            {'error': f'Analysis failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@require_POST
+@async_api_view
+async def analyze_batch(request):
+    """
+    Analyze user's eligibility for several jobs at once (Server-Sent Events)
+    """
+    serializer = await sync_to_async(_validate)(AnalyzeJobsBatchSerializer, request.data)
+    if serializer.errors:
+        return api_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    job_ids = serializer.validated_data['job_ids']
+    additional_context = serializer.validated_data.get('additional_context', '')
+    force = serializer.validated_data.get('force', False)
+
+    jobs_by_id = await Job.objects.ain_bulk(job_ids)
+    jobs = [jobs_by_id[job_id] for job_id in job_ids]
+
+    async def event_stream():
+        """Async generator for SSE events"""
+        try:
+            analyzer = JobEligibilityAnalyzer(model_name="gpt-4")
+            async for event in analyzer.aanalyze_batch(
+                user=request.user,
+                jobs=jobs,
+                additional_context=additional_context,
+                force=force,
+            ):
+                yield f"data: {json.dumps(event)}\n\n"
+
+        except Exception as e:
+            error_event = {
+                'type': 'error',
+                'error': str(e),
+                'message': f'Batch analysis failed: {str(e)}'
+            }
+            yield f"data: {json.dumps(error_event)}\n\n"
+
+    response = StreamingHttpResponse(
+        event_stream(),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _analysis_stream_response(events):
+    """
+    Server-Sent Events response forwarding StreamingJobAnalyzer events
+
+    The analyzer reports a failed model call as an error event itself;
+    failures before that (e.g. gathering context) get one here.
+    """
+    async def event_stream():
+        """Async generator for SSE events"""
+        last_type = None
+        try:
+            async for event in events:
+                last_type = event['type']
+                yield f"data: {json.dumps(event)}\n\n"
+
+        except Exception as e:
+            if last_type != 'error':
+                error_event = {
+                    'type': 'error',
+                    'error': str(e),
+                    'message': f'Analysis failed: {str(e)}'
+                }
+                yield f"data: {json.dumps(error_event)}\n\n"
+
+    response = StreamingHttpResponse(
+        event_stream(),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_POST
+@async_api_view
+async def stream_analyze(request):
+    """
+    Analyze user's eligibility for a job (Server-Sent Events)
+    """
+    serializer = await sync_to_async(_validate)(AnalyzeJobEligibilitySerializer, request.data)
+    if serializer.errors:
+        return api_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    job = await Job.objects.aget(id=serializer.validated_data['job_id'])
+
+    analyzer = StreamingJobAnalyzer(model_name="gpt-4")
+    return _analysis_stream_response(analyzer.astream_analyze_eligibility(
+        user=request.user,
+        job=job,
+        additional_context=serializer.validated_data.get('additional_context', ''),
+        force=serializer.validated_data.get('force', False),
+    ))
+
+
+@require_POST
+@async_api_view
+async def stream_analyze_eligibility(request, pk):
+    """
+    Analyze user's eligibility for this job (Server-Sent Events)
+    """
+    try:
+        job = await Job.objects.aget(pk=pk, status='ACTIVE')
+    except Job.DoesNotExist:
+        return api_response(
+            {'error': 'Job not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    serializer = await sync_to_async(_validate)(
+        AnalyzeJobEligibilitySerializer, {'job_id': job.id, **request.data}
+    )
+    if serializer.errors:
+        return api_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    analyzer = StreamingJobAnalyzer(model_name="gpt-4")
+    return _analysis_stream_response(analyzer.astream_analyze_eligibility(
+        user=request.user,
+        job=job,
+        additional_context=serializer.validated_data.get('additional_context', ''),
+        force=serializer.validated_data.get('force', False),
+    ))
+
+
+@require_POST
+@async_api_view
+async def reanalyze(request):
+    """
+    Re-analyze with additional context
+    """
+    serializer = await sync_to_async(_validate)(ReanalyzeJobEligibilitySerializer, request.data)
+    if serializer.errors:
+        return api_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    analysis_id = serializer.validated_data['analysis_id']
+    additional_context = serializer.validated_data['additional_context']
+    force = serializer.validated_data.get('force', False)
+
+    if wants_background(request):
+        if not await JobEligibilityAnalysis.objects.filter(id=analysis_id, user=request.user).aexists():
+            return api_response(
+                {'error': 'Analysis not found or you do not have permission to access it'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        task = await sync_to_async(enqueue)('jobs.reanalyze', {
+            'user_id': request.user.id,
+            'analysis_id': analysis_id,
+            'additional_context': additional_context,
+            'force': force,
+        }, user=request.user)
+        return task_accepted_response(task)
+
+    try:
+        previous_analysis = await JobEligibilityAnalysis.objects.select_related(
+            'user', 'job'
+        ).aget(id=analysis_id, user=request.user)
+
+        analyzer = JobEligibilityAnalyzer(model_name="gpt-4")
+        new_analysis = await analyzer.areanalyze_with_context(
+            analysis=previous_analysis,
+            additional_context=additional_context,
+            force=force,
+        )
+
+        data = await sync_to_async(_analysis_data)(new_analysis)
+        return _analysis_response(new_analysis, data)
+
+    except JobEligibilityAnalysis.DoesNotExist:
+        return api_response(
+            {'error': 'Analysis not found or you do not have permission to access it'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return api_response(
+            {'error': f'Re-analysis failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@require_POST
+@async_api_view
+async def stream_reanalyze(request):
+    """
+    Re-analyze with additional context (Server-Sent Events)
+    """
+    serializer = await sync_to_async(_validate)(ReanalyzeJobEligibilitySerializer, request.data)
+    if serializer.errors:
+        return api_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        previous_analysis = await JobEligibilityAnalysis.objects.select_related(
+            'user', 'job'
+        ).aget(id=serializer.validated_data['analysis_id'], user=request.user)
+    except JobEligibilityAnalysis.DoesNotExist:
+        return api_response(
+            {'error': 'Analysis not found or you do not have permission to access it'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    analyzer = StreamingJobAnalyzer(model_name="gpt-4")
+    return _analysis_stream_response(analyzer.astream_reanalyze_with_context(
+        analysis=previous_analysis,
+        additional_context=serializer.validated_data['additional_context'],
+        force=serializer.validated_data.get('force', False),
+    ))
+
+
+@require_POST
+@async_api_view
+async def chat(request):
+    """
+    Chat with AI about a specific job analysis
+    """
+    analysis_id = request.data.get('analysis_id')
+    message = request.data.get('message')
+
+    if not analysis_id or not message:
+        return api_response(
+            {'error': 'analysis_id and message are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        analysis = await JobEligibilityAnalysis.objects.select_related('job').aget(
+            id=analysis_id,
+            user=request.user
+        )
+
+        session = await sync_to_async(open_session)(
+            request.user, ChatSession.Kind.ANALYSIS, analysis.pk,
+            session_id=request.data.get('session_id')
+        )
+
+        chat_service = AnalysisChatService()
+        response = await chat_service.achat_about_analysis(
+            analysis=analysis,
+            message=message,
+            session=session
+        )
+
+        return api_response({
+            'session_id': session.pk,
+            'message': message,
+            'response': response,
+        })
+
+    except JobEligibilityAnalysis.DoesNotExist:
+        return api_response(
+            {'error': 'Analysis not found or you do not have permission to access it'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except ChatSession.DoesNotExist:
+        return api_response(
+            {'error': 'Chat session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return api_response(
+            {'error': f'Chat failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@require_POST
+@async_api_view
+async def stream_chat(request):
+    """
+    Chat with AI about a job analysis, streaming the answer (Server-Sent Events)
+
+    A client disconnect cancels the stream and with it the model call.
+    """
+    analysis_id = request.data.get('analysis_id')
+    message = request.data.get('message')
+
+    if not analysis_id or not message:
+        return api_response(
+            {'error': 'analysis_id and message are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        analysis = await JobEligibilityAnalysis.objects.select_related('job').aget(
+            id=analysis_id,
+            user=request.user
+        )
+        session = await sync_to_async(open_session)(
+            request.user, ChatSession.Kind.ANALYSIS, analysis.pk,
+            session_id=request.data.get('session_id')
+        )
+    except JobEligibilityAnalysis.DoesNotExist:
+        return api_response(
+            {'error': 'Analysis not found or you do not have permission to access it'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except ChatSession.DoesNotExist:
+        return api_response(
+            {'error': 'Chat session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    async def event_stream():
+        """Async generator for SSE events"""
+        try:
+            chat_service = AnalysisChatService()
+            async for event in chat_service.astream_chat_about_analysis(
+                analysis=analysis,
+                message=message,
+                session=session
+            ):
+                yield f"data: {json.dumps(event)}\n\n"
+
+        except Exception as e:
+            error_event = {
+                'type': 'error',
+                'error': str(e),
+                'message': f'Chat failed: {str(e)}'
+            }
+            yield f"data: {json.dumps(error_event)}\n\n"
+
+    response = StreamingHttpResponse(
+        event_stream(),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_POST
+@async_api_view
+async def analyze_dream_job(request):
+    """
+    Analyze user's eligibility for their dream job
+    """
+    job_description = request.data.get('job_description')
+    additional_context = request.data.get('additional_context', '')
+    save_job = request_flag(request, 'save_job')
+
+    if not job_description:
+        return api_response(
+            {'error': 'job_description is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if wants_background(request):
+        task = await sync_to_async(enqueue)('jobs.analyze_dream_job', {
+            'user_id': request.user.id,
+            'job_description': job_description,
+            'additional_context': additional_context,
+            'save_job': save_job,
+        }, user=request.user)
+        return task_accepted_response(task)
+
+    try:
+        # Step 1: Parse job description with AI
+        parser = DreamJobParser()
+        parsed_job_data = await parser.aparse_job_description(job_description)
+
+        # Step 2: Create job object (saved or temporary)
+        if save_job:
+            job = await sync_to_async(parser.create_saved_job)(parsed_job_data, request.user)
+        else:
+            job = parser.create_temporary_job(parsed_job_data)
+
+        # Step 3: Analyze eligibility
+        analyzer = JobEligibilityAnalyzer(model_name="gpt-4")
+        analysis = await analyzer.aanalyze_eligibility(
+            user=request.user,
+            job=job,
+            additional_context=additional_context
+        )
+
+        # Step 4: Return results
+        response_data = {
+            'message': 'Dream job analyzed successfully',
+            'parsed_job': parsed_job_data,
+            'job_saved': save_job,
+            'analysis': await sync_to_async(_serialize_analysis)(analysis),
+        }
+
+        if save_job:
+            response_data['job_id'] = job.id
+            response_data['job_url'] = f'/api/jobs/{job.id}/'
+
+        return api_response(response_data)
+
+    except ValueError as e:
+        return api_response(
+            {'error': str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return api_response(
+            {'error': f'Dream job analysis failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
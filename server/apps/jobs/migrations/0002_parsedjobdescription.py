@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-16 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParsedJobDescription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(help_text='SHA-256 of normalized description, model and prompt version', max_length=64, unique=True)),
+                ('llm_model', models.CharField(help_text='LLM model used for parsing', max_length=100)),
+                ('prompt_version', models.CharField(help_text='Version of the parsing prompt', max_length=20)),
+                ('parsed_data', models.JSONField(default=dict)),
+                ('hit_count', models.IntegerField(default=0, help_text='Times this parse was served from the database cache')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Parsed Job Description',
+                'verbose_name_plural': 'Parsed Job Descriptions',
+                'db_table': 'parsed_job_descriptions',
+                'ordering': ['-last_used_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-16 10:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_parsedjobdescription'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobeligibilityanalysis',
+            name='context_fingerprint',
+            field=models.CharField(blank=True, help_text='Hash of user/job context, additional context, model and prompt version', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='jobeligibilityanalysis',
+            index=models.Index(fields=['user', 'job', 'context_fingerprint'], name='job_eligibi_user_id_976f6c_idx'),
+        ),
+    ]
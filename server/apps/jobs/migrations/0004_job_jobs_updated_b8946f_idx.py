@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-16 23:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_jobeligibilityanalysis_context_fingerprint_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['updated_at'], name='jobs_updated_b8946f_idx'),
+        ),
+    ]
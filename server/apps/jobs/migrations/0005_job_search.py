@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-16 23:11
+
+import apps.jobs.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.jobs.search import install_search_index, uninstall_search_index
+
+
+def create_search_index(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_job_jobs_updated_b8946f_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSearchDocument',
+            fields=[
+                ('job', models.OneToOneField(db_column='id', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='jobs.job')),
+                ('document', apps.jobs.search.FullTextField(db_column='jobs_search')),
+            ],
+            options={
+                'verbose_name': 'Job Search Document',
+                'verbose_name_plural': 'Job Search Documents',
+                'db_table': 'jobs_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
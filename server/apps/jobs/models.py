@@ -5,6 +5,7 @@ Jobs models for SkillSetz platform
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from apps.users.models import User
+from .search import FullTextField
 
 
 class Job(models.Model):
@@ -131,6 +132,7 @@ class Job(models.Model):
             models.Index(fields=["title", "company_name"]),
             models.Index(fields=["status", "-created_at"]),
             models.Index(fields=["experience_level"]),
+            models.Index(fields=["updated_at"]),
         ]
 
     def __str__(self):
@@ -335,6 +337,11 @@ class JobEligibilityAnalysis(models.Model):
     token_usage = models.IntegerField(
         default=0, help_text="Tokens used for this analysis"
     )
+    context_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Hash of user/job context, additional context, model and prompt version",
+    )
 
     class Meta:
         db_table = "job_eligibility_analyses"
@@ -345,8 +352,69 @@ class JobEligibilityAnalysis(models.Model):
             models.Index(fields=["user", "-analyzed_at"]),
             models.Index(fields=["job", "-analyzed_at"]),
             models.Index(fields=["eligibility_level"]),
+            models.Index(fields=["user", "job", "context_fingerprint"]),
         ]
         unique_together = []  # Allow multiple analyses per user-job pair
 
     def __str__(self):
-        return f"{self.user.email} - {self.job.title} ({self.eligibility_level})"
\ No newline at end of file
+        return f"{self.user.email} - {self.job.title} ({self.eligibility_level})"
+
+class ParsedJobDescription(models.Model):
+    """
+    Cache of AI-parsed job descriptions keyed by a hash of the normalized text
+    """
+
+    content_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="SHA-256 of normalized description, model and prompt version",
+    )
+    llm_model = models.CharField(
+        max_length=100, help_text="LLM model used for parsing"
+    )
+    prompt_version = models.CharField(
+        max_length=20, help_text="Version of the parsing prompt"
+    )
+    parsed_data = models.JSONField(default=dict)
+
+    hit_count = models.IntegerField(
+        default=0, help_text="Times this parse was served from the database cache"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "parsed_job_descriptions"
+        verbose_name = _("Parsed Job Description")
+        verbose_name_plural = _("Parsed Job Descriptions")
+        ordering = ["-last_used_at"]
+
+    def __str__(self):
+        return f"{self.parsed_data.get('job_title', 'Unknown')} ({self.content_hash[:12]})"
+
+
+class JobSearchDocument(models.Model):
+    """
+    Full-text index entry of a job (read-only)
+
+    Maps the jobs_search table: an FTS5 virtual table on SQLite, a
+    tsvector table on PostgreSQL. It is created by migration and kept in
+    sync with jobs by database triggers; see apps.jobs.search.
+    """
+
+    job = models.OneToOneField(
+        Job,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="id",
+        db_constraint=False,
+        related_name="search_document",
+    )
+    document = FullTextField(db_column="jobs_search")
+
+    class Meta:
+        managed = False
+        db_table = "jobs_search"
+        verbose_name = _("Job Search Document")
+        verbose_name_plural = _("Job Search Documents")
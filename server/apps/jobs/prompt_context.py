@@ -0,0 +1,278 @@
+"""
+Compact, token-budgeted context for the eligibility analysis prompt
+
+The gathered user and job contexts are encoded as compact JSON: nulls and
+empty values are dropped, the parsed job requirements are merged with the
+fields they repeat, and long free text is capped. If the result is still
+over the token budget, the lowest-value content is trimmed first: the
+descriptions of old roles, then the old roles themselves, then long job
+text, until the context fits.
+"""
+
+import copy
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from apps.ai.tokens import compact, compact_json, estimate_tokens, truncate_text
+
+
+# parsed_requirements keys that repeat a job context field; dropped when
+# that field has a value
+PARSED_REQUIREMENT_DUPLICATES = {
+    "job_title": "title",
+    "company_name": "company_name",
+    "company_culture": "company_description",
+    "job_type": "job_type",
+    "experience_level": "experience_level",
+    "location": "location",
+    "is_remote": "is_remote",
+    "remote_policy": "remote_policy",
+    "description": "description",
+    "responsibilities": "responsibilities",
+    "min_salary": "salary_min",
+    "max_salary": "salary_max",
+    "salary_currency": "salary_currency",
+    "required_skills": "skills",
+    "preferred_skills": "skills",
+}
+
+JOB_TEXT_FIELDS = (
+    "description",
+    "company_description",
+    "responsibilities",
+    "requirements",
+    "nice_to_have",
+)
+ROLE_TEXT_FIELDS = ("description", "responsibilities", "achievements")
+
+# Roles kept in full detail while trimming (most recent first)
+RECENT_ROLES = 2
+# Roles never dropped while trimming
+MIN_ROLES = 3
+# Free text limit once the budget forces long text to be shortened
+TRIMMED_TEXT_CHARS = 300
+
+
+@dataclass
+class PromptContext:
+    """
+    Encoded prompt context and its size
+
+    Attributes:
+        candidate: Compact JSON of the user context
+        job: Compact JSON of the job context
+        tokens: Estimated tokens of candidate, job and additional context
+        untrimmed_tokens: Estimate before budget trimming
+        trimmed: Names of the trimming steps that were applied
+    """
+
+    candidate: str
+    job: str
+    tokens: int
+    untrimmed_tokens: int
+    trimmed: List[str] = field(default_factory=list)
+
+
+def build_prompt_context(
+    user_context: Dict[str, Any],
+    job_context: Dict[str, Any],
+    additional_context: str = "",
+    token_budget: Optional[int] = None,
+    max_text_chars: int = 1200,
+) -> PromptContext:
+    """
+    Encode the analysis contexts, trimming them to a token budget
+
+    Args:
+        user_context: Output of JobEligibilityAnalyzer._gather_user_context
+        job_context: Output of JobEligibilityAnalyzer._gather_job_context
+        additional_context: Additional context from the user (never trimmed)
+        token_budget: Maximum estimated tokens for all three; None for no limit
+        max_text_chars: Cap on every free-text field
+
+    Returns:
+        PromptContext
+    """
+    user = compact_user_context(user_context, max_text_chars)
+    job = compact_job_context(job_context, max_text_chars)
+    fixed_tokens = estimate_tokens(additional_context)
+
+    def size() -> int:
+        return estimate_tokens(compact_json(user)) + estimate_tokens(compact_json(job)) + fixed_tokens
+
+    tokens = untrimmed_tokens = size()
+    trimmed = []
+    if token_budget is not None:
+        for name, step in _trim_steps(user, job):
+            if tokens <= token_budget:
+                break
+            if step():
+                tokens = size()
+                if name not in trimmed:
+                    trimmed.append(name)
+
+    return PromptContext(
+        candidate=compact_json(user),
+        job=compact_json(job),
+        tokens=tokens,
+        untrimmed_tokens=untrimmed_tokens,
+        trimmed=trimmed,
+    )
+
+
+def compact_user_context(user_context: Dict[str, Any], max_text_chars: int) -> Dict[str, Any]:
+    """
+    Compact copy of a user context
+
+    The email address is dropped, roles are ordered most recent first and
+    their free text is capped at max_text_chars.
+    """
+    context = copy.deepcopy(user_context)
+    context.pop("email", None)
+
+    roles = sorted(
+        context.get("work_experience") or [],
+        key=lambda role: (bool(role.get("is_current")), role.get("start_date") or ""),
+        reverse=True,
+    )
+    for role in roles:
+        # end_date is already "Present" for current roles
+        role.pop("is_current", None)
+        for name in ROLE_TEXT_FIELDS:
+            role[name] = _truncate(role.get(name), max_text_chars)
+    context["work_experience"] = roles
+
+    for education in context.get("education") or []:
+        education.pop("is_current", None)
+
+    for skill in context.get("skills") or []:
+        if not skill.get("is_verified"):
+            skill.pop("verified_by", None)
+
+    if isinstance(context.get("profile"), dict):
+        profile = context["profile"]
+        profile["bio"] = truncate_text(profile.get("bio"), max_text_chars)
+
+    return compact(context)
+
+
+def compact_job_context(job_context: Dict[str, Any], max_text_chars: int) -> Dict[str, Any]:
+    """
+    Compact copy of a job context
+
+    Skill requirement rows and parsed skills are merged into one "skills"
+    list, and parsed_requirements keeps only what no other field says.
+    """
+    context = copy.deepcopy(job_context)
+    parsed_skills = context.pop("parsed_skills", None) or []
+    parsed_requirements = context.pop("parsed_requirements", None) or {}
+
+    context["skills"] = _merge_skills(context.pop("required_skills", None) or [], parsed_skills)
+    if _lists_only_skills(context.get("requirements"), context["skills"]):
+        # Dream jobs: requirements is the bulleted list of skill names
+        context.pop("requirements")
+    for name in JOB_TEXT_FIELDS:
+        context[name] = truncate_text(context.get(name), max_text_chars)
+
+    context = compact(context)
+    if isinstance(parsed_requirements, dict):
+        context["parsed_requirements"] = compact({
+            key: value
+            for key, value in parsed_requirements.items()
+            if PARSED_REQUIREMENT_DUPLICATES.get(key) not in context
+        })
+    return compact(context)
+
+
+def _merge_skills(required_skills: List[Dict[str, Any]], parsed_skills: List[Any]) -> List[Dict[str, Any]]:
+    """Skill requirement rows followed by parsed skills not already listed"""
+    skills, seen = [], set()
+    for requirement in required_skills:
+        entry = dict(requirement)
+        entry = {"name": entry.pop("skill_name", None) or entry.get("name"), **entry}
+        skills.append(entry)
+        seen.add(str(entry["name"]).casefold())
+
+    for parsed in parsed_skills:
+        entry = dict(parsed) if isinstance(parsed, dict) else {"name": parsed}
+        name = str(entry.get("name") or "").casefold()
+        if name and name not in seen:
+            skills.append(entry)
+            seen.add(name)
+    return skills
+
+
+def _lists_only_skills(text: Any, skills: List[Dict[str, Any]]) -> bool:
+    """Whether a requirements text is nothing but a bulleted list of the skills"""
+    if not isinstance(text, str) or not text.strip():
+        return False
+    names = {str(skill["name"]).casefold() for skill in skills}
+    lines = (line.strip().lstrip("•-* ").casefold() for line in text.splitlines())
+    return all(line in names for line in lines if line)
+
+
+def _truncate(text: Any, max_chars: int) -> Any:
+    """truncate_text() for strings and lists of strings (such as achievements)"""
+    if isinstance(text, list):
+        kept, used = [], 0
+        for item in text:
+            if used >= max_chars:
+                break
+            item = truncate_text(item, max_chars - used) if isinstance(item, str) else item
+            kept.append(item)
+            used += len(str(item))
+        return kept
+    return truncate_text(text, max_chars)
+
+
+def _trim_steps(user: Dict[str, Any], job: Dict[str, Any]):
+    """
+    Trimming steps, lowest-value content first
+
+    Yields (name, step) pairs; each step removes one piece of content and
+    returns whether it changed anything.
+    """
+    roles: List[Dict[str, Any]] = user.get("work_experience", [])
+
+    def drop_role_text(role: Dict[str, Any]) -> Callable[[], bool]:
+        def step():
+            removed = [role.pop(name) for name in ROLE_TEXT_FIELDS if name in role]
+            return bool(removed)
+        return step
+
+    def drop_key(container: Dict[str, Any], key: str) -> Callable[[], bool]:
+        def step():
+            return container.pop(key, None) is not None
+        return step
+
+    def drop_oldest_role() -> bool:
+        if len(roles) <= MIN_ROLES:
+            return False
+        roles.pop()
+        return True
+
+    def shorten(container: Dict[str, Any], names) -> Callable[[], bool]:
+        def step():
+            changed = False
+            for name in names:
+                if name in container:
+                    shortened = _truncate(container[name], TRIMMED_TEXT_CHARS)
+                    changed = changed or shortened != container[name]
+                    container[name] = shortened
+            return changed
+        return step
+
+    # Old roles (oldest first): their text, then the roles themselves
+    for role in reversed(roles[RECENT_ROLES:]):
+        yield "old_role_descriptions", drop_role_text(role)
+    for _ in range(max(len(roles) - MIN_ROLES, 0)):
+        yield "old_roles", drop_oldest_role
+
+    yield "job_text", shorten(job, JOB_TEXT_FIELDS)
+    profile = user.get("profile")
+    if isinstance(profile, dict):
+        yield "bio", shorten(profile, ("bio",))
+    for role in reversed(roles[:RECENT_ROLES]):
+        yield "recent_role_descriptions", shorten(role, ROLE_TEXT_FIELDS)
+    for certification in user.get("certifications", []):
+        yield "certification_skills", drop_key(certification, "skills_validated")
@@ -0,0 +1,339 @@
+"""
+Top-K job recommendations from an in-memory inverted skill index
+
+The index maps each Skill id to the active jobs requiring it (posting
+arrays of job position, weight, minimum proficiency and years). A
+recommendation only touches the postings of the user's own skills, so
+its cost grows with the number of matching requirements rather than with
+the number of jobs.
+
+Each process keeps its own index. Signals update it in place when jobs
+or their requirements change; changes made by other processes are pulled
+by re-indexing jobs whose updated_at moved since the last sync.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from apps.users.models import User
+from apps.profiles.models import Skill, UserSkill
+from .models import Job, JobSkillRequirement
+from .scoring import PROFICIENCY_ORDINALS, REQUIREMENT_TYPE_WEIGHTS, requirement_credit
+
+
+def _parsed_skill_requirements(parsed_skills, skill_ids_by_name: Dict[str, int]):
+    """
+    Requirements from a job's AI-parsed skills, as (skill_id, type, proficiency, years)
+
+    Names that do not match a Skill row yield a None skill id: they still
+    count towards the job's total weight but no user can match them.
+    """
+    for entry in parsed_skills or []:
+        if isinstance(entry, dict):
+            name = entry.get("name") or ""
+            yield (
+                skill_ids_by_name.get(name.strip().casefold()),
+                entry.get("requirement_type") or JobSkillRequirement.RequirementType.MUST_HAVE,
+                entry.get("minimum_proficiency") or "INTERMEDIATE",
+                entry.get("years_required") or 0,
+            )
+        elif isinstance(entry, str):
+            yield (
+                skill_ids_by_name.get(entry.strip().casefold()),
+                JobSkillRequirement.RequirementType.MUST_HAVE,
+                "INTERMEDIATE",
+                0,
+            )
+
+
+class SkillJobIndex:
+    """
+    Inverted index from Skill id to the active jobs that require it
+
+    Jobs are stored at integer positions; re-indexing a job retires its
+    old position and appends a new one, and the whole index is compacted
+    once retired positions pile up.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._synced_at = None
+        self._checked_at = 0.0
+        self._reset()
+
+    def _reset(self):
+        self._job_ids: List[int] = []
+        self._alive: List[bool] = []
+        self._total_weight: List[float] = []
+        self._position_of: Dict[int, int] = {}
+        self._retired = 0
+        # Array copies of _alive/_total_weight, rebuilt after changes
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        # skill_id -> (positions, weights, ordinals, years) arrays
+        self._postings: Dict[int, Tuple[np.ndarray, ...]] = {}
+        # skill_id -> postings appended since the arrays were last merged
+        self._pending: Dict[int, List[tuple]] = defaultdict(list)
+
+    # ------------------------------------------------------------------
+    # Building and incremental updates
+    # ------------------------------------------------------------------
+
+    def build(self):
+        """(Re)build the index from every active job"""
+        with self._lock:
+            started_at = timezone.now()
+            self._reset()
+
+            skill_ids_by_name = self._skill_ids_by_name()
+            requirements = defaultdict(list)
+            for job_id, skill_id, requirement_type, proficiency, years, weight in (
+                JobSkillRequirement.objects.filter(job__status=Job.JobStatus.ACTIVE)
+                .values_list(
+                    "job_id",
+                    "skill_id",
+                    "requirement_type",
+                    "minimum_proficiency",
+                    "years_required",
+                    "weight",
+                )
+                .iterator(chunk_size=5000)
+            ):
+                requirements[job_id].append((skill_id, requirement_type, proficiency, years, weight))
+
+            jobs = (
+                Job.objects.filter(status=Job.JobStatus.ACTIVE)
+                .values_list("id", "parsed_skills")
+                .iterator(chunk_size=2000)
+            )
+            for job_id, parsed_skills in jobs:
+                self._add(job_id, requirements.get(job_id, []), parsed_skills, skill_ids_by_name)
+
+            self._merge_pending()
+            self._built = True
+            self._synced_at = started_at
+            self._checked_at = time.monotonic()
+
+    def update_job(self, job_id: int, skill_ids_by_name: Dict[str, int] = None):
+        """Re-index one job (created, edited, closed or requirements changed)"""
+        with self._lock:
+            if not self._built:
+                return
+            job = Job.objects.filter(id=job_id).values("status", "parsed_skills").first()
+            if job is None or job["status"] != Job.JobStatus.ACTIVE:
+                self.remove_job(job_id)
+                return
+            requirements = list(
+                JobSkillRequirement.objects.filter(job_id=job_id).values_list(
+                    "skill_id",
+                    "requirement_type",
+                    "minimum_proficiency",
+                    "years_required",
+                    "weight",
+                )
+            )
+            self._retire(job_id)
+            self._add(
+                job_id,
+                requirements,
+                job["parsed_skills"],
+                skill_ids_by_name or self._skill_ids_by_name(),
+            )
+            self._maybe_compact()
+
+    def remove_job(self, job_id: int):
+        """Drop a job (closed or deleted) from the index"""
+        with self._lock:
+            self._retire(job_id)
+            self._maybe_compact()
+
+    def sync(self):
+        """Pull jobs changed by other processes since the last sync"""
+        with self._lock:
+            started_at = timezone.now()
+            changed = list(
+                Job.objects.filter(updated_at__gte=self._synced_at).values_list("id", flat=True)
+            )
+            if changed:
+                skill_ids_by_name = self._skill_ids_by_name()
+                for job_id in changed:
+                    self.update_job(job_id, skill_ids_by_name)
+            self._synced_at = started_at
+            self._checked_at = time.monotonic()
+
+    def ensure_ready(self):
+        """Build on first use, then sync at most every sync_interval seconds"""
+        with self._lock:
+            if not self._built:
+                self.build()
+            elif time.monotonic() - self._checked_at >= settings.JOB_RECOMMENDATIONS["sync_interval"]:
+                self.sync()
+
+    def _skill_ids_by_name(self) -> Dict[str, int]:
+        return {name.casefold(): skill_id for skill_id, name in Skill.objects.values_list("id", "name")}
+
+    def _add(self, job_id, requirements, parsed_skills, skill_ids_by_name):
+        """Append a job and its postings at a new position"""
+        position = len(self._job_ids)
+        self._job_ids.append(job_id)
+        self._alive.append(True)
+        self._position_of[job_id] = position
+        self._arrays = None
+
+        # Structured requirements win over parsed skills for the same skill
+        seen = set()
+        total_weight = 0.0
+        for skill_id, requirement_type, proficiency, years, weight in requirements:
+            seen.add(skill_id)
+            total_weight += self._post(position, skill_id, requirement_type, proficiency, years, weight)
+        for skill_id, requirement_type, proficiency, years in _parsed_skill_requirements(
+            parsed_skills, skill_ids_by_name
+        ):
+            if skill_id is not None:
+                if skill_id in seen:
+                    continue
+                seen.add(skill_id)
+            total_weight += self._post(position, skill_id, requirement_type, proficiency, years, 1)
+
+        self._total_weight.append(total_weight)
+
+    def _post(self, position, skill_id, requirement_type, proficiency, years, weight) -> float:
+        weight = max(float(weight or 0), 0.0) * REQUIREMENT_TYPE_WEIGHTS.get(requirement_type, 1.0)
+        try:
+            years = float(years or 0)
+        except (TypeError, ValueError):
+            years = 0.0
+        if skill_id is not None:
+            self._pending[skill_id].append(
+                (position, weight, PROFICIENCY_ORDINALS.get(proficiency, 2), years)
+            )
+        return weight
+
+    def _retire(self, job_id):
+        position = self._position_of.pop(job_id, None)
+        if position is not None:
+            self._alive[position] = False
+            self._retired += 1
+            self._arrays = None
+
+    def _maybe_compact(self):
+        """Rebuild once more than a quarter of the positions are retired"""
+        if self._retired > max(1000, len(self._job_ids) // 4):
+            self.build()
+
+    def _merge_pending(self):
+        for skill_id, postings in self._pending.items():
+            added = tuple(np.array(column, dtype=np.float64) for column in zip(*postings))
+            existing = self._postings.get(skill_id)
+            if existing is not None:
+                added = tuple(np.concatenate(pair) for pair in zip(existing, added))
+            self._postings[skill_id] = added
+        self._pending.clear()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def top_k(self, user_skills: Iterable[tuple], k: int) -> List[Dict[str, Any]]:
+        """
+        Best matching active jobs for a set of skills
+
+        Args:
+            user_skills: (skill_id, proficiency_level, years_of_experience) rows
+            k: Number of jobs to return
+
+        Returns:
+            Dicts with job_id, score (0-100) and matched_skills, best first
+        """
+        with self._lock:
+            self._merge_pending()
+            n_positions = len(self._job_ids)
+            if not n_positions:
+                return []
+
+            positions, earned = [], []
+            for skill_id, proficiency, years in user_skills:
+                postings = self._postings.get(skill_id)
+                if postings is None:
+                    continue
+                job_positions, weights, required_ordinals, required_years = postings
+                credit = requirement_credit(
+                    True,
+                    float(PROFICIENCY_ORDINALS.get(proficiency, 0)),
+                    float(years or 0),
+                    required_ordinals,
+                    required_years,
+                )
+                positions.append(job_positions)
+                earned.append(weights * credit)
+
+            if not positions:
+                return []
+
+            positions = np.concatenate(positions).astype(np.int64)
+            score = np.bincount(positions, weights=np.concatenate(earned), minlength=n_positions)
+            matched = np.bincount(positions, minlength=n_positions)
+            if self._arrays is None:
+                self._arrays = (
+                    np.array(self._alive, dtype=bool),
+                    np.array(self._total_weight, dtype=np.float64),
+                )
+            alive, total = self._arrays
+            score = np.divide(score, total, out=np.zeros(n_positions), where=total > 0)
+            score[~alive] = 0.0
+
+            candidates = np.flatnonzero(score > 0)
+            if candidates.size > k:
+                candidates = candidates[np.argpartition(-score[candidates], k - 1)[:k]]
+            candidates = candidates[np.lexsort((-matched[candidates], -score[candidates]))]
+
+            return [
+                {
+                    "job_id": self._job_ids[position],
+                    "score": int(round(score[position] * 100)),
+                    "matched_skills": int(matched[position]),
+                }
+                for position in candidates.tolist()
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "built": self._built,
+                "jobs": len(self._position_of),
+                "retired_positions": self._retired,
+                "skills": len(self._postings) + len(set(self._pending) - set(self._postings)),
+            }
+
+
+skill_job_index = SkillJobIndex()
+
+
+def recommend_jobs(user: User, k: int = None) -> List[Dict[str, Any]]:
+    """
+    Top-K active jobs for a user's skills
+
+    Args:
+        user: User to recommend jobs for
+        k: Number of jobs (default: settings.JOB_RECOMMENDATIONS["default_limit"])
+
+    Returns:
+        Dicts with job_id, score and matched_skills, best first
+    """
+    k = k or settings.JOB_RECOMMENDATIONS["default_limit"]
+    user_skills = list(
+        UserSkill.objects.filter(profile__user=user).values_list(
+            "skill_id", "proficiency_level", "years_of_experience"
+        )
+    )
+    if not user_skills:
+        return []
+
+    skill_job_index.ensure_ready()
+    return skill_job_index.top_k(user_skills, k)
@@ -0,0 +1,235 @@
+"""
+Deterministic skill match scoring
+
+Scores a user against any number of jobs from the UserSkill and
+JobSkillRequirement tables alone, without calling a model. Every
+requirement row of every candidate job becomes one element of a set of
+NumPy arrays, so scoring thousands of jobs costs one query and a handful
+of vectorised operations.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from apps.users.models import User
+from apps.profiles.models import Skill, UserSkill
+from .models import Job, JobSkillRequirement
+
+
+# Proficiency levels shared by UserSkill and JobSkillRequirement, as ordinals
+PROFICIENCY_ORDINALS = {
+    "BEGINNER": 1,
+    "INTERMEDIATE": 2,
+    "ADVANCED": 3,
+    "EXPERT": 4,
+}
+
+# How much each requirement type counts towards the overall match
+REQUIREMENT_TYPE_WEIGHTS = {
+    JobSkillRequirement.RequirementType.MUST_HAVE: 1.0,
+    JobSkillRequirement.RequirementType.PREFERRED: 0.6,
+    JobSkillRequirement.RequirementType.NICE_TO_HAVE: 0.4,
+}
+
+TECHNICAL_SKILL_TYPES = (
+    Skill.SkillType.TECHNICAL,
+    Skill.SkillType.LANGUAGE,
+    Skill.SkillType.TOOL,
+    Skill.SkillType.FRAMEWORK,
+)
+
+# Share of a requirement's credit earned by proficiency; the rest by years
+PROFICIENCY_SHARE = 0.75
+
+# Credit at or above which a requirement counts as met
+MET_THRESHOLD = 0.999
+
+
+def requirement_credit(
+    has_skill: np.ndarray,
+    user_ordinals: np.ndarray,
+    user_years: np.ndarray,
+    required_ordinals: np.ndarray,
+    required_years: np.ndarray,
+) -> np.ndarray:
+    """
+    Credit in [0, 1] the user earns on each requirement (element-wise)
+
+    The proficiency ratio and the years ratio (each capped at 1) are
+    blended by PROFICIENCY_SHARE; requirements for skills the user lacks
+    earn nothing.
+    """
+    proficiency_credit = np.minimum(user_ordinals / np.maximum(required_ordinals, 1), 1.0)
+    years_credit = np.where(
+        required_years > 0,
+        np.minimum(user_years / np.maximum(required_years, 1e-9), 1.0),
+        1.0,
+    )
+    return np.where(
+        has_skill,
+        PROFICIENCY_SHARE * proficiency_credit + (1 - PROFICIENCY_SHARE) * years_credit,
+        0.0,
+    )
+
+
+class SkillMatchEngine:
+    """
+    Weighted skill coverage of jobs by one user's skills
+
+    Each requirement earns requirement_credit(); a job's score is the
+    credit-weighted share of its requirement weights
+    (weight x REQUIREMENT_TYPE_WEIGHTS).
+    """
+
+    def __init__(self, user_skills: Iterable[tuple]):
+        """
+        Args:
+            user_skills: (skill_id, proficiency_level, years_of_experience) rows
+        """
+        rows = sorted(
+            (skill_id, PROFICIENCY_ORDINALS.get(level, 0), float(years or 0))
+            for skill_id, level, years in user_skills
+        )
+        self._skill_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self._ordinals = np.array([row[1] for row in rows], dtype=np.float64)
+        self._years = np.array([row[2] for row in rows], dtype=np.float64)
+
+    @classmethod
+    def for_user(cls, user: User) -> "SkillMatchEngine":
+        """Build an engine from the user's UserSkill rows"""
+        return cls(
+            UserSkill.objects.filter(profile__user=user).values_list(
+                "skill_id", "proficiency_level", "years_of_experience"
+            )
+        )
+
+    def score_jobs(
+        self, job_ids: Iterable[int] = None, details: Iterable[int] = ()
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Score jobs that have structured skill requirements
+
+        Args:
+            job_ids: List or queryset of jobs to score (default: every active job)
+            details: Job ids whose matched/partial/missing skill names to include
+
+        Returns:
+            Mapping of job id to its scores; jobs without requirements are absent
+        """
+        requirements = JobSkillRequirement.objects.all()
+        if job_ids is None:
+            requirements = requirements.filter(job__status=Job.JobStatus.ACTIVE)
+        else:
+            requirements = requirements.filter(job_id__in=job_ids)
+
+        rows = list(
+            requirements.values_list(
+                "job_id",
+                "skill_id",
+                "skill__name",
+                "skill__skill_type",
+                "requirement_type",
+                "minimum_proficiency",
+                "years_required",
+                "weight",
+            )
+        )
+        return self._score_rows(rows, set(details))
+
+    def _score_rows(self, rows: List[tuple], details: set) -> Dict[int, Dict[str, Any]]:
+        if not rows:
+            return {}
+
+        columns = list(zip(*rows))
+        job_ids, job_index = np.unique(np.array(columns[0], dtype=np.int64), return_inverse=True)
+        skill_ids = np.array(columns[1], dtype=np.int64)
+        skill_types = np.array(columns[3])
+        requirement_types = np.array(columns[4])
+        required_ordinals = np.array(
+            [PROFICIENCY_ORDINALS.get(level, 2) for level in columns[5]], dtype=np.float64
+        )
+        required_years = np.array(columns[6], dtype=np.float64)
+        weights = np.maximum(np.array(columns[7], dtype=np.float64), 0) * np.array(
+            [REQUIREMENT_TYPE_WEIGHTS.get(t, 1.0) for t in columns[4]]
+        )
+
+        # Look up the user's proficiency/years for every requirement
+        has_skill = np.zeros(len(rows), dtype=bool)
+        user_ordinals = np.zeros(len(rows))
+        user_years = np.zeros(len(rows))
+        if self._skill_ids.size:
+            positions = np.minimum(
+                np.searchsorted(self._skill_ids, skill_ids), self._skill_ids.size - 1
+            )
+            has_skill = self._skill_ids[positions] == skill_ids
+            user_ordinals = np.where(has_skill, self._ordinals[positions], 0.0)
+            user_years = np.where(has_skill, self._years[positions], 0.0)
+
+        credit = requirement_credit(
+            has_skill, user_ordinals, user_years, required_ordinals, required_years
+        )
+
+        n_jobs = job_ids.size
+
+        def coverage(mask):
+            total = np.bincount(job_index, weights=weights * mask, minlength=n_jobs)
+            earned = np.bincount(job_index, weights=weights * credit * mask, minlength=n_jobs)
+            return np.divide(earned, total, out=np.full(n_jobs, np.nan), where=total > 0)
+
+        is_must = requirement_types == JobSkillRequirement.RequirementType.MUST_HAVE
+        everything = np.ones(len(rows), dtype=bool)
+        scores = {
+            "skills_match_score": coverage(everything),
+            "must_have_coverage": coverage(is_must),
+            "optional_coverage": coverage(~is_must),
+            "technical_skills_score": coverage(np.isin(skill_types, TECHNICAL_SKILL_TYPES)),
+            "soft_skills_score": coverage(skill_types == Skill.SkillType.SOFT),
+            "domain_knowledge_score": coverage(skill_types == Skill.SkillType.DOMAIN),
+        }
+        must_total = np.bincount(job_index, weights=is_must, minlength=n_jobs)
+        must_met = np.bincount(
+            job_index, weights=is_must & (credit >= MET_THRESHOLD), minlength=n_jobs
+        )
+
+        results = {}
+        for i, job_id in enumerate(job_ids.tolist()):
+            result = {"job_id": job_id}
+            for name, values in scores.items():
+                result[name] = None if np.isnan(values[i]) else int(round(values[i] * 100))
+            result["must_have_met"] = int(must_met[i])
+            result["must_have_total"] = int(must_total[i])
+            results[job_id] = result
+
+        for job_id in details:
+            if job_id not in results:
+                continue
+            result = results[job_id]
+            result.update(matched_skills=[], partial_skills=[], missing_skills=[])
+            for row in np.flatnonzero(job_ids[job_index] == job_id):
+                entry = {"name": columns[2][row], "requirement_type": columns[4][row]}
+                if not has_skill[row]:
+                    result["missing_skills"].append(entry)
+                elif credit[row] >= MET_THRESHOLD:
+                    result["matched_skills"].append(entry)
+                else:
+                    entry["credit"] = round(float(credit[row]), 2)
+                    result["partial_skills"].append(entry)
+
+        return results
+
+
+def skill_match_preview(user: User, job_id: Optional[int]) -> Optional[Dict[str, Any]]:
+    """
+    Instant, model-free match of a user against one job, with skill names
+
+    Args:
+        user: User to score
+        job_id: Job to score (None for unsaved jobs)
+
+    Returns:
+        Scores, or None if the job has no structured skill requirements
+    """
+    if job_id is None:
+        return None
+    return SkillMatchEngine.for_user(user).score_jobs([job_id], details=[job_id]).get(job_id)
@@ -0,0 +1,352 @@
+"""
+Full-text job search
+
+Jobs are indexed in a `jobs_search` table kept in sync with `jobs` by
+database triggers, so every write path (save, bulk operations, deletes,
+other processes) updates it:
+
+- SQLite: an FTS5 virtual table over the jobs table, ranked with BM25
+- PostgreSQL: a table of weighted tsvectors with a GIN index, ranked
+  with ts_rank_cd
+
+The table is mapped by the unmanaged JobSearchDocument model, so a search
+is an ordinary join that composes with the other filters and pagination.
+Other database vendors fall back to DRF's icontains search.
+"""
+
+import re
+from html import escape
+from typing import List, Tuple
+
+from django.conf import settings
+from django.db import NotSupportedError, connection
+from django.db.models import F, FloatField, Func, Lookup, TextField, Value
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+
+SEARCH_TABLE = "jobs_search"
+
+# Indexed columns, in FTS5 column order, with their BM25 weights
+SEARCH_COLUMNS = (
+    ("title", 10.0),
+    ("company_name", 5.0),
+    ("description", 1.0),
+    ("requirements", 2.0),
+)
+
+POSTGRES_CONFIG = "english"
+
+# Private-use characters marking matches in snippets until they are
+# HTML-escaped and turned into <mark> tags
+SNIPPET_START = "\ue000"
+SNIPPET_END = "\ue001"
+
+
+# ----------------------------------------------------------------------
+# Schema
+# ----------------------------------------------------------------------
+
+def _sqlite_statements() -> List[str]:
+    # The job id is also exposed as an UNINDEXED column and jobs are joined
+    # on it rather than on rowid: FTS5 cannot use that join constraint, so
+    # SQLite always runs the MATCH once and looks jobs up by primary key,
+    # instead of probing the index once per job when other filters apply.
+    columns = ", ".join(name for name, _ in SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{name}" for name, _ in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{name}" for name, _ in SEARCH_COLUMNS)
+    delete_old = (
+        f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {columns}, id) "
+        f"VALUES ('delete', old.id, {old_values}, old.id);"
+    )
+    insert_new = (
+        f"INSERT INTO {SEARCH_TABLE}(rowid, {columns}, id) "
+        f"VALUES (new.id, {new_values}, new.id);"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        f"{columns}, id UNINDEXED, content='jobs', content_rowid='id', "
+        f"tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON jobs "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON jobs "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF {columns} ON jobs "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def _postgres_document(row: str) -> str:
+    weights = dict(title="A", company_name="B", requirements="C", description="D")
+    return " || ".join(
+        f"setweight(to_tsvector('{POSTGRES_CONFIG}', coalesce({row}.{name}, '')), '{weights[name]}')"
+        for name, _ in SEARCH_COLUMNS
+    )
+
+
+def _postgres_statements() -> List[str]:
+    columns = ", ".join(name for name, _ in SEARCH_COLUMNS)
+    return [
+        f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} "
+        f"(id bigint PRIMARY KEY, {SEARCH_TABLE} tsvector NOT NULL)",
+        f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_gin ON {SEARCH_TABLE} USING GIN ({SEARCH_TABLE})",
+        f"""
+        CREATE OR REPLACE FUNCTION {SEARCH_TABLE}_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM {SEARCH_TABLE} WHERE id = OLD.id;
+                RETURN OLD;
+            END IF;
+            INSERT INTO {SEARCH_TABLE} (id, {SEARCH_TABLE})
+            VALUES (NEW.id, {_postgres_document('NEW')})
+            ON CONFLICT (id) DO UPDATE SET {SEARCH_TABLE} = EXCLUDED.{SEARCH_TABLE};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_sync ON jobs",
+        f"CREATE TRIGGER {SEARCH_TABLE}_sync AFTER INSERT OR DELETE OR UPDATE OF {columns} "
+        f"ON jobs FOR EACH ROW EXECUTE FUNCTION {SEARCH_TABLE}_sync()",
+    ]
+
+
+def search_index_installed(conn=connection) -> bool:
+    with conn.cursor() as cursor:
+        return SEARCH_TABLE in conn.introspection.table_names(cursor)
+
+
+def install_search_index(conn=connection):
+    """
+    Create the search table and its triggers if missing (idempotent)
+
+    The index is (re)built from the jobs table when the search table had
+    to be created. On SQLite this also restores triggers dropped when a
+    migration rebuilds the jobs table.
+    """
+    if conn.vendor == "sqlite":
+        statements = _sqlite_statements()
+    elif conn.vendor == "postgresql":
+        statements = _postgres_statements()
+    else:
+        return
+
+    created = not search_index_installed(conn)
+    with conn.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+        if created:
+            rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn=connection):
+    """Re-index every job"""
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+        elif conn.vendor == "postgresql":
+            cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (id, {SEARCH_TABLE}) "
+                f"SELECT jobs.id, {_postgres_document('jobs')} FROM jobs"
+            )
+
+
+def uninstall_search_index(conn=connection):
+    """Drop the search table and its triggers"""
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            for suffix in ("insert", "delete", "update"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+        elif conn.vendor == "postgresql":
+            cursor.execute(f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_sync ON jobs")
+            cursor.execute(f"DROP FUNCTION IF EXISTS {SEARCH_TABLE}_sync()")
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+# ----------------------------------------------------------------------
+# Query parsing
+# ----------------------------------------------------------------------
+
+_TERM_RE = re.compile(r'"([^"]*)"?|(\S+)')
+_WORD_RE = re.compile(r"\w+")
+
+
+def parse_search_terms(search: str) -> List[Tuple[Tuple[str, ...], bool]]:
+    """
+    Split a search string into (words, is_prefix) terms
+
+    "Quoted text" is a phrase; any other word is a term of its own. Words
+    ending in * and the last bare word (search-as-you-type) match as
+    prefixes. Punctuation is dropped, so the result is safe to embed in
+    FTS5 and tsquery syntax.
+    """
+    terms = []
+    last_is_word = False
+    for match in _TERM_RE.finditer(search or ""):
+        phrase, word = match.groups()
+        words = tuple(_WORD_RE.findall(phrase if phrase is not None else word))
+        if words:
+            terms.append((words, phrase is None and word.endswith("*")))
+            last_is_word = phrase is None
+
+    if last_is_word:
+        terms[-1] = (terms[-1][0], True)
+    return terms
+
+
+def fts5_query(terms) -> str:
+    """FTS5 MATCH expression for parsed terms (implicit AND)"""
+    return " ".join(
+        '"{}"{}'.format(" ".join(words), "*" if prefix else "") for words, prefix in terms
+    )
+
+
+def tsquery(terms) -> str:
+    """to_tsquery() expression for parsed terms"""
+    return " & ".join(
+        "({}{})".format(" <-> ".join(words), ":*" if prefix else "") for words, prefix in terms
+    )
+
+
+def format_snippet(snippet: str) -> str:
+    """HTML-escape a raw snippet and wrap its matches in <mark> tags"""
+    return (
+        escape(snippet)
+        .replace(SNIPPET_START, "<mark>")
+        .replace(SNIPPET_END, "</mark>")
+    )
+
+
+# ----------------------------------------------------------------------
+# ORM integration
+# ----------------------------------------------------------------------
+
+class FullTextField(TextField):
+    """
+    The hidden column of the search table
+
+    On SQLite it is the FTS5 table column (named after the table) taken
+    by MATCH and the auxiliary functions; on PostgreSQL the tsvector.
+    """
+
+
+@FullTextField.register_lookup
+class FullTextMatch(Lookup):
+    """document__match=<compiled query>"""
+    lookup_name = "match"
+
+    def as_sql(self, compiler, conn):
+        raise NotSupportedError(f"Full-text search is not supported on {conn.vendor}")
+
+    def as_sqlite(self, compiler, conn):
+        lhs, lhs_params = self.process_lhs(compiler, conn)
+        rhs, rhs_params = self.process_rhs(compiler, conn)
+        return f"{lhs} MATCH {rhs}", (*lhs_params, *rhs_params)
+
+    def as_postgresql(self, compiler, conn):
+        lhs, lhs_params = self.process_lhs(compiler, conn)
+        rhs, rhs_params = self.process_rhs(compiler, conn)
+        return f"{lhs} @@ to_tsquery('{POSTGRES_CONFIG}', {rhs})", (*lhs_params, *rhs_params)
+
+
+class SearchRank(Func):
+    """Relevance of a matched job; lower is better on every backend"""
+    output_field = FloatField()
+
+    def __init__(self, document, query):
+        super().__init__(document, Value(query))
+
+    def as_sqlite(self, compiler, conn, **extra_context):
+        document, params = compiler.compile(self.source_expressions[0])
+        weights = ", ".join(str(weight) for _, weight in SEARCH_COLUMNS)
+        return f"bm25({document}, {weights}, 0.0)", params
+
+    def as_postgresql(self, compiler, conn, **extra_context):
+        document, document_params = compiler.compile(self.source_expressions[0])
+        query, query_params = compiler.compile(self.source_expressions[1])
+        return (
+            f"-ts_rank_cd({document}, to_tsquery('{POSTGRES_CONFIG}', {query}))",
+            (*document_params, *query_params),
+        )
+
+
+class SearchSnippet(Func):
+    """Fragment of a matched job around the matching words"""
+    output_field = TextField()
+
+    def __init__(self, document, query, text, tokens):
+        super().__init__(document, Value(query), text)
+        self.tokens = int(tokens)
+
+    def as_sqlite(self, compiler, conn, **extra_context):
+        # Column -1 lets FTS5 pick the best matching column
+        document, params = compiler.compile(self.source_expressions[0])
+        return (
+            f"snippet({document}, -1, %s, %s, %s, {self.tokens})",
+            (*params, SNIPPET_START, SNIPPET_END, "…"),
+        )
+
+    def as_postgresql(self, compiler, conn, **extra_context):
+        query, query_params = compiler.compile(self.source_expressions[1])
+        text, text_params = compiler.compile(self.source_expressions[2])
+        options = (
+            f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, "
+            f"MaxWords={self.tokens}, MinWords={max(self.tokens // 2, 1)}"
+        )
+        return (
+            f"ts_headline('{POSTGRES_CONFIG}', {text}, to_tsquery('{POSTGRES_CONFIG}', {query}), %s)",
+            (*text_params, *query_params, options),
+        )
+
+
+def full_text_search_enabled(conn=connection) -> bool:
+    return settings.JOB_SEARCH["backend"] == "fulltext" and conn.vendor in ("sqlite", "postgresql")
+
+
+def search_jobs(queryset, search: str, conn=connection):
+    """
+    Restrict a Job queryset to full-text matches of a search string
+
+    Matches are annotated with search_rank (lower is better) and
+    search_snippet (raw, see format_snippet()).
+    """
+    terms = parse_search_terms(search)
+    if not terms:
+        return queryset
+
+    query = fts5_query(terms) if conn.vendor == "sqlite" else tsquery(terms)
+    document = F("search_document__document")
+    return queryset.filter(search_document__document__match=query).annotate(
+        search_rank=SearchRank(document, query),
+        search_snippet=SearchSnippet(
+            document, query, F("description"), settings.JOB_SEARCH["snippet_tokens"]
+        ),
+    )
+
+
+class JobSearchFilter(filters.SearchFilter):
+    """
+    `search` query parameter backed by the full-text index
+
+    Results are ordered by relevance unless an explicit ordering was
+    requested, so this filter must run after OrderingFilter.
+    """
+    search_description = (
+        'Full-text search over title, company, description and requirements. '
+        '"Quoted phrases" and word* prefixes are supported; results are ordered '
+        'by relevance unless an ordering is given.'
+    )
+
+    def filter_queryset(self, request, queryset, view):
+        if not full_text_search_enabled():
+            return super().filter_queryset(request, queryset, view)
+
+        search = request.query_params.get(self.search_param, "")
+        if not parse_search_terms(search):
+            return queryset
+
+        queryset = search_jobs(queryset, search)
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        return queryset.order_by("search_rank", *queryset.query.order_by)
@@ -2,6 +2,7 @@
 Serializers for Jobs app
 """
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
 from .models import (
@@ -10,6 +11,7 @@ from .models import (
     JobEligibilityAnalysis,
 )
 from apps.profiles.models import Skill
+from .search import format_snippet
 
 User = get_user_model()
 
@@ -37,10 +39,26 @@ class JobSkillRequirementSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
+class SearchSnippetField(serializers.CharField):
+    """
+    Highlighted fragment of a full-text search match (<mark> tags, HTML-escaped)
+
+    Only present on jobs returned by a ?search= query.
+    """
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return format_snippet(value)
+
+
 class JobListSerializer(serializers.ModelSerializer):
     """
     List serializer for Job model (minimal fields)
     """
+    search_snippet = SearchSnippetField()
+
     class Meta:
         model = Job
         fields = [
@@ -58,6 +76,7 @@ class JobListSerializer(serializers.ModelSerializer):
             'status',
             'posted_date',
             'created_at',
+            'search_snippet',
         ]
 
 
@@ -223,6 +242,16 @@ class AnalyzeJobEligibilitySerializer(serializers.Serializer):
         allow_blank=True,
         help_text="Additional context about your background or specific aspects you'd like analyzed"
     )
+    force = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Run a fresh analysis even if nothing changed since the last one"
+    )
+    background = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Queue the analysis and return 202 with a task id instead of waiting"
+    )
 
     def validate_job_id(self, value):
         """Validate that job exists and is active"""
@@ -244,6 +273,16 @@ class ReanalyzeJobEligibilitySerializer(serializers.Serializer):
         required=True,
         help_text="Additional context to add to the analysis"
     )
+    force = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Run a fresh analysis even if nothing changed since the last one"
+    )
+    background = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Queue the analysis and return 202 with a task id instead of waiting"
+    )
 
     def validate_analysis_id(self, value):
         """Validate that analysis exists"""
@@ -252,3 +291,41 @@ class ReanalyzeJobEligibilitySerializer(serializers.Serializer):
             return value
         except JobEligibilityAnalysis.DoesNotExist:
             raise serializers.ValidationError("Analysis not found.")
+
+
+class AnalyzeJobsBatchSerializer(serializers.Serializer):
+    """
+    Serializer for analyzing eligibility for several jobs in one request
+    """
+    job_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        help_text="IDs of the active jobs to analyze"
+    )
+    additional_context = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text="Additional context applied to every analysis in the batch"
+    )
+    force = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Run fresh analyses even if nothing changed since the last ones"
+    )
+
+    def validate_job_ids(self, value):
+        """Validate the batch size and that every job exists and is active"""
+        max_jobs = settings.ANALYSIS_BATCH['max_jobs']
+        job_ids = list(dict.fromkeys(value))
+        if len(job_ids) > max_jobs:
+            raise serializers.ValidationError(f"At most {max_jobs} jobs can be analyzed at once.")
+
+        active_ids = set(
+            Job.objects.filter(id__in=job_ids, status='ACTIVE').values_list('id', flat=True)
+        )
+        missing = [job_id for job_id in job_ids if job_id not in active_ids]
+        if missing:
+            raise serializers.ValidationError(
+                f"Jobs not found or no longer active: {', '.join(map(str, missing))}"
+            )
+        return job_ids
@@ -2,16 +2,26 @@
 LangChain-powered service for job eligibility analysis
 """
 
+import copy
 import json
-import os
-from typing import Dict, Any, List, Optional
+import logging
+import uuid
+from typing import AsyncIterator, Dict, Any, Iterator, List, Optional
 from decimal import Decimal
 
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from apps.ai.cache import TieredCache, content_hash, normalize_text
+from apps.ai.cancellation import Cancelled, checkpoint, within_deadline
+from apps.ai.llm import registry as llm_registry, get_llm
+from apps.ai import chat, singleflight
+from apps.ai.models import ChatSession
+from apps.ai.routing import answered_by
+from apps.ai.usage import operation_config, total_tokens
 from apps.users.models import User
 from apps.profiles.models import (
     UserProfile,
@@ -22,7 +32,53 @@ from apps.profiles.models import (
     Skill,
     SkillCategory,
 )
-from .models import Job, JobEligibilityAnalysis
+from .models import Job, JobEligibilityAnalysis, ParsedJobDescription
+from .prompt_context import build_prompt_context
+
+logger = logging.getLogger(__name__)
+
+
+def _load_parsed_job(key: str) -> Optional[Dict[str, Any]]:
+    """Load a cached parse from the database and bump its hit counter"""
+    parsed_data = (
+        ParsedJobDescription.objects.filter(content_hash=key)
+        .values_list("parsed_data", flat=True)
+        .first()
+    )
+    if parsed_data is not None:
+        ParsedJobDescription.objects.filter(content_hash=key).update(
+            hit_count=F("hit_count") + 1, last_used_at=timezone.now()
+        )
+    return parsed_data
+
+
+def _store_parsed_job(key: str, parsed_data: Dict[str, Any]):
+    """Persist a fresh parse so other workers (and restarts) can reuse it"""
+    ParsedJobDescription.objects.update_or_create(
+        content_hash=key,
+        defaults={
+            "llm_model": llm_registry.spec_for("parser").model,
+            "prompt_version": DreamJobParser.PROMPT_VERSION,
+            "parsed_data": parsed_data,
+        },
+    )
+
+
+def _analysis_pk(analysis: JobEligibilityAnalysis) -> int:
+    return analysis.pk
+
+
+def _load_analysis(pk: int) -> JobEligibilityAnalysis:
+    """A coalesced request's copy of the analysis computed for it"""
+    return JobEligibilityAnalysis.objects.select_related("job").get(pk=pk)
+
+
+job_parse_cache = TieredCache(
+    max_entries=settings.JOB_PARSE_CACHE["max_entries"],
+    ttl=settings.JOB_PARSE_CACHE["ttl"],
+    load=_load_parsed_job,
+    store=_store_parsed_job,
+)
 
 
 class DreamJobParser:
@@ -30,39 +86,129 @@ class DreamJobParser:
     Service for parsing dream job descriptions using GPT-4
     """
 
+    # Bump whenever the parsing prompt changes so stale cache entries are ignored
+    PROMPT_VERSION = "1"
+
     def __init__(self):
-        """Initialize the dream job parser with GPT-4"""
-        model_provider = os.getenv("MODEL_PROVIDER")
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-
-        gemini_model = "gemini-3-flash-preview"
-        openai_model = "gpt-4o-mini"
-        print("model provider", model_provider)
-
-        if model_provider == "gemini":
-            gemini_api_key = os.getenv("GEMINI_API_KEY")
-            self.llm = ChatGoogleGenerativeAI(model=gemini_model, api_key=gemini_api_key)
-        else:
-            self.llm = ChatOpenAI(
-                model=openai_model,
-                temperature=0.1,  # Low temperature for consistent extraction
-                api_key=api_key,
-            )
+        """Initialize the dream job parser with the pooled parser client"""
+        spec = llm_registry.spec_for("parser")
+        self.model_name = spec.model
+        self.llm = llm_registry.get_for_spec(spec)
+
+    def cache_key(self, job_description: str) -> str:
+        """
+        Content hash of a job description for the parse cache
+
+        Whitespace and case differences are folded away, and the model and
+        prompt version are part of the key so a change to either misses.
+        """
+        return content_hash(
+            normalize_text(job_description), self.model_name, self.PROMPT_VERSION
+        )
 
     def parse_job_description(self, job_description: str) -> Dict[str, Any]:
         """
         Parse a job description (pasted from job board or described by user)
         using GPT-4 to extract structured requirements
 
+        Repeat descriptions are served from the content-addressed parse cache.
+
+        Args:
+            job_description: Raw job description text or user's dream job description
+
+        Returns:
+            Structured dictionary with job requirements
+        """
+        parsed_data = job_parse_cache.get_or_compute(
+            self.cache_key(job_description),
+            lambda: self._parse_with_llm(job_description),
+        )
+        # Callers may mutate the result; never hand out the cached object
+        return copy.deepcopy(parsed_data)
+
+    async def aparse_job_description(self, job_description: str) -> Dict[str, Any]:
+        """
+        Async parse_job_description() using the model's ainvoke
+
         Args:
             job_description: Raw job description text or user's dream job description
 
         Returns:
             Structured dictionary with job requirements
         """
-        prompt = ChatPromptTemplate.from_messages(
+        parsed_data = await job_parse_cache.aget_or_compute(
+            self.cache_key(job_description),
+            lambda: self._aparse_with_llm(job_description),
+        )
+        return copy.deepcopy(parsed_data)
+
+    def _parse_with_llm(self, job_description: str) -> Dict[str, Any]:
+        """
+        Run the LLM extraction for a job description
+
+        Args:
+            job_description: Raw job description text
+
+        Returns:
+            Structured dictionary with job requirements
+        """
+        try:
+            # Invoke GPT-4 to parse job description
+            chain = self._build_prompt() | self.llm
+            response = chain.invoke(
+                {"job_description": job_description},
+                config=operation_config("parse_job_description"),
+            )
+            checkpoint("parsing_job")
+            return self._parse_response(response)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse GPT-4 response as JSON: {str(e)}")
+        except Cancelled:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error parsing job description with GPT-4: {str(e)}")
+
+    async def _aparse_with_llm(self, job_description: str) -> Dict[str, Any]:
+        """Async _parse_with_llm()"""
+        try:
+            chain = self._build_prompt() | self.llm
+            response = await within_deadline(
+                chain.ainvoke(
+                    {"job_description": job_description},
+                    config=operation_config("parse_job_description"),
+                ),
+                "parsing_job",
+            )
+            return self._parse_response(response)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse GPT-4 response as JSON: {str(e)}")
+        except Cancelled:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error parsing job description with GPT-4: {str(e)}")
+
+    def _parse_response(self, response) -> Dict[str, Any]:
+        """
+        Extract the JSON payload from a model response
+
+        Raises:
+            json.JSONDecodeError: If the response is not valid JSON
+        """
+        content = response.content.strip()
+
+        # Remove markdown code blocks if present
+        if content.startswith("```json"):
+            content = content[7:]
+        if content.startswith("```"):
+            content = content[3:]
+        if content.endswith("```"):
+            content = content[:-3]
+
+        return json.loads(content.strip())
+
+    def _build_prompt(self) -> ChatPromptTemplate:
+        """Prompt template for job description extraction"""
+        return ChatPromptTemplate.from_messages(
             [
                 (
                     "system",
@@ -127,32 +273,6 @@ If information is ambiguous or missing, make reasonable inferences based on cont
             ]
         )
 
-        try:
-            # Invoke GPT-4 to parse job description
-            chain = prompt | self.llm
-            response = chain.invoke({"job_description": job_description})
-
-            # Extract JSON from response
-            content = response.content.strip()
-
-            # Remove markdown code blocks if present
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-
-            # Parse JSON
-            parsed_data = json.loads(content.strip())
-
-            return parsed_data
-
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse GPT-4 response as JSON: {str(e)}")
-        except Exception as e:
-            raise ValueError(f"Error parsing job description with GPT-4: {str(e)}")
-
     def create_temporary_job(self, parsed_data: Dict[str, Any]) -> Job:
         """
         Create a temporary (unsaved) Job object from parsed data for analysis
@@ -212,43 +332,47 @@ If information is ambiguous or missing, make reasonable inferences based on cont
         # This is intentional - it's a temporary object for analysis only
         return job
 
+    def create_saved_job(self, parsed_data: Dict[str, Any], user: User) -> Job:
+        """
+        Create and save a Job from parsed data (the "save_job" option)
+
+        Args:
+            parsed_data: Parsed job description data from parse_job_description
+            user: User who described the job
+
+        Returns:
+            Saved Job instance
+        """
+        job = self.create_temporary_job(parsed_data)
+        job.title = parsed_data.get("job_title", "Dream Job")
+        # Generate unique source URL for saved dream jobs
+        job.source_url = f"https://skillsetz.com/dream-jobs/{uuid.uuid4()}"
+        job.source_platform = "Dream Job (User Created)"
+        job.status = Job.JobStatus.ACTIVE
+        job.added_by = user
+        checkpoint("saving_job")
+        job.save()
+        return job
+
 
 class JobEligibilityAnalyzer:
     """
     LangChain-based service for analyzing user eligibility for job postings
     """
 
+    # Bump whenever _create_prompt changes so old analyses are not reused
+    PROMPT_VERSION = "2"
+
     def __init__(self, model_name: str = None):
         """
         Initialize the analyzer with specified LLM model
 
         Args:
-            model_name: Model to use (default: auto-detect based on MODEL_PROVIDER)
-        """
-        model_provider = os.getenv("MODEL_PROVIDER")
-
-        if model_provider == "gemini":
-            # Use Gemini
-            gemini_api_key = os.getenv("GEMINI_API_KEY")
-            if not gemini_api_key:
-                raise ValueError("GEMINI_API_KEY environment variable not set")
-            self.model_name = "gemini-3-flash-preview" or model_name 
-            self.llm = ChatGoogleGenerativeAI(
-                model=self.model_name,
-                temperature=0.3,
-                api_key=gemini_api_key,
-            )
-        else:
-            # Use OpenAI
-            openai_api_key = os.getenv("OPENAI_API_KEY")
-            if not openai_api_key:
-                raise ValueError("OPENAI_API_KEY environment variable not set")
-            self.model_name = model_name or "gpt-4o-mini"
-            self.llm = ChatOpenAI(
-                model=self.model_name,
-                temperature=0.3,  # Lower temperature for more consistent analysis
-                openai_api_key=openai_api_key,
-            )
+            model_name: Model to use (default: the "analyzer" role in settings.LLM_ROLES)
+        """
+        spec = llm_registry.spec_for("analyzer", model=model_name)
+        self.model_name = spec.model
+        self.llm = llm_registry.get_for_spec(spec)
 
     def _gather_user_context(self, user: User) -> Dict[str, Any]:
         """
@@ -438,6 +562,9 @@ class JobEligibilityAnalyzer:
         """
         Create the prompt for job eligibility analysis
 
+        The contexts are sent as compact JSON trimmed to
+        settings.ANALYSIS_PROMPT["context_token_budget"] (see prompt_context).
+
         Args:
             user_context: User profile and experience data
             job_context: Job posting details
@@ -446,6 +573,21 @@ class JobEligibilityAnalyzer:
         Returns:
             Prompt string for analysis
         """
+        config = settings.ANALYSIS_PROMPT
+        context = build_prompt_context(
+            user_context,
+            job_context,
+            additional_context,
+            token_budget=config["context_token_budget"],
+            max_text_chars=config["max_text_chars"],
+        )
+        logger.info(
+            "Analysis prompt context: ~%d tokens (%d before trimming%s)",
+            context.tokens,
+            context.untrimmed_tokens,
+            f"; trimmed {', '.join(context.trimmed)}" if context.trimmed else "",
+        )
+
         additional_section = ""
         if additional_context:
             additional_section = (
@@ -454,11 +596,13 @@ class JobEligibilityAnalyzer:
 
         prompt = f"""You are an expert career counselor and recruiter analyzing whether a candidate is eligible for a job position.
 
+Profile and posting are JSON; fields without a value are omitted.
+
 **CANDIDATE PROFILE:**
-{json.dumps(user_context, indent=2)}
+{context.candidate}
 
 **JOB POSTING:**
-{json.dumps(job_context, indent=2)}
+{context.job}
 {additional_section}
 
 **YOUR TASK:**
@@ -556,30 +700,203 @@ Return ONLY the JSON object, no additional text.
 """
         return prompt
 
+    def _fingerprint(
+        self,
+        user_context: Dict[str, Any],
+        job_context: Dict[str, Any],
+        additional_context: str = "",
+    ) -> str:
+        """
+        Stable hash of everything that feeds the analysis prompt
+
+        Args:
+            user_context: Output of _gather_user_context
+            job_context: Output of _gather_job_context
+            additional_context: Additional context from user
+
+        Returns:
+            SHA-256 hex digest
+        """
+        return content_hash(
+            json.dumps(user_context, sort_keys=True, default=str),
+            json.dumps(job_context, sort_keys=True, default=str),
+            additional_context or "",
+            self.model_name,
+            self.PROMPT_VERSION,
+            json.dumps(settings.ANALYSIS_PROMPT, sort_keys=True),
+        )
+
+    def find_reusable_analysis(
+        self, user: User, job: Job, fingerprint: str
+    ) -> Optional[JobEligibilityAnalysis]:
+        """
+        Latest analysis for this user/job pair produced from identical inputs
+
+        Args:
+            user: User being analyzed
+            job: Job being analyzed (must be saved)
+            fingerprint: Fingerprint from _fingerprint
+
+        Returns:
+            Matching JobEligibilityAnalysis, or None
+        """
+        if job.pk is None or not fingerprint:
+            return None
+        return (
+            JobEligibilityAnalysis.objects.filter(
+                user=user, job=job, context_fingerprint=fingerprint
+            )
+            .order_by("-analyzed_at")
+            .first()
+        )
+
     def analyze_eligibility(
-        self, user: User, job: Job, additional_context: str = ""
+        self, user: User, job: Job, additional_context: str = "", force: bool = False
     ) -> JobEligibilityAnalysis:
         """
         Perform comprehensive job eligibility analysis
 
+        If the user's profile, the job and the additional context are unchanged
+        since the last analysis of this pair, that analysis is returned instead
+        of calling the model again (unless force is set). Identical analyses
+        in flight share one model call; forced ones always make their own.
+
         Args:
             user: User to analyze
             job: Job to analyze for
             additional_context: Additional context provided by user
+            force: Always run a fresh analysis
 
         Returns:
             JobEligibilityAnalysis instance with analysis results
         """
+        existing, prompt, fingerprint = self._prepare_analysis(
+            user, job, additional_context, force
+        )
+        if existing is not None:
+            return existing
+
+        def compute():
+            response = self.llm.invoke(prompt, config=operation_config("analyze_eligibility"))
+            return self._save_analysis(user, job, additional_context, response, fingerprint)
+
+        if job.pk is None or force:
+            # A forced analysis must not get a duplicate's (or the last) result
+            return compute()
+
+        # Identical requests in flight share one model call
+        analysis, shared = singleflight.run(
+            singleflight.flight_key("analysis", user.pk, job.pk, fingerprint),
+            compute,
+            encode=_analysis_pk,
+            decode=_load_analysis,
+        )
+        analysis.reused = shared
+        return analysis
+
+    async def aanalyze_eligibility(
+        self, user: User, job: Job, additional_context: str = "", force: bool = False
+    ) -> JobEligibilityAnalysis:
+        """
+        Async analyze_eligibility()
+
+        The ORM work runs in two sync_to_async batches (context gathering and
+        saving) around a native ainvoke, so the event loop is free while the
+        model is generating.
+        """
+        existing, prompt, fingerprint = await sync_to_async(self._prepare_analysis)(
+            user, job, additional_context, force
+        )
+        if existing is not None:
+            return existing
+
+        async def compute():
+            response = await within_deadline(
+                self.llm.ainvoke(prompt, config=operation_config("analyze_eligibility")),
+                "analyze_eligibility",
+            )
+            return await sync_to_async(self._save_analysis)(
+                user, job, additional_context, response, fingerprint
+            )
+
+        if job.pk is None or force:
+            return await compute()
+
+        analysis, shared = await singleflight.arun(
+            singleflight.flight_key("analysis", user.pk, job.pk, fingerprint),
+            compute,
+            encode=_analysis_pk,
+            decode=_load_analysis,
+        )
+        analysis.reused = shared
+        return analysis
+
+    def _prepare_analysis(
+        self,
+        user: User,
+        job: Job,
+        additional_context: str = "",
+        force: bool = False,
+        user_context: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Gather context and look for a reusable analysis
+
+        Args:
+            user_context: Already gathered user context (batches gather it once)
+
+        Returns:
+            Tuple of (reusable analysis or None, prompt, fingerprint)
+        """
         # Gather context
-        user_context = self._gather_user_context(user)
+        if user_context is None:
+            user_context = self._gather_user_context(user)
         job_context = self._gather_job_context(job)
 
+        fingerprint = self._fingerprint(user_context, job_context, additional_context)
+        if not force:
+            existing = self.find_reusable_analysis(user, job, fingerprint)
+            if existing is not None:
+                existing.reused = True
+                return existing, None, fingerprint
+
         # Create prompt
         prompt = self._create_prompt(user_context, job_context, additional_context)
+        return None, prompt, fingerprint
+
+    def _save_analysis(
+        self, user: User, job: Job, additional_context: str, response, fingerprint: str
+    ) -> JobEligibilityAnalysis:
+        """
+        Parse a model response and persist it as a JobEligibilityAnalysis
 
-        # Run analysis
-        response = self.llm.invoke(prompt)
+        Args:
+            user: User analyzed
+            job: Job analyzed
+            additional_context: Additional context provided by user
+            response: Model response message
+            fingerprint: Input fingerprint from _prepare_analysis
 
+        Returns:
+            Saved JobEligibilityAnalysis instance
+        """
+        analysis = self._build_analysis(
+            user, job, additional_context, response, fingerprint
+        )
+        # A request abandoned while the model was answering stores nothing
+        checkpoint("saving_analysis")
+        analysis.save()
+        return analysis
+
+    def _build_analysis(
+        self, user: User, job: Job, additional_context: str, response, fingerprint: str
+    ) -> JobEligibilityAnalysis:
+        """
+        Parse a model response into an unsaved JobEligibilityAnalysis
+
+        Returns:
+            Unsaved JobEligibilityAnalysis instance
+        """
         # Extract content from response
         response_text = (
             response.content if hasattr(response, "content") else str(response)
@@ -596,20 +913,65 @@ Return ONLY the JSON object, no additional text.
             else:
                 raise ValueError("No JSON found in response")
         except Exception as e:
-            # Fallback: create a basic response
-            result = {
-                "eligibility_level": "FAIR",
-                "match_score": 50,
-                "analysis_summary": f"Analysis could not be parsed properly. Raw response available in full_analysis field.",
-                "strengths": [],
-                "gaps": [],
-                "recommendations": [],
-                "matching_skills": [],
-                "missing_skills": [],
-                "experience_match": "Unable to parse experience match",
-                "experience_gap_years": None,
-            }
+            result = self._fallback_result()
+            # Not fingerprinted, so the same inputs ask the model again
+            # instead of reusing the placeholder
+            fingerprint = ""
+
+        return self._analysis_from_result(
+            user,
+            job,
+            additional_context,
+            result,
+            response_text,
+            fingerprint,
+            token_usage=total_tokens(response),
+            llm_model=answered_by(response),
+        )
+
+    def _fallback_result(self) -> Dict[str, Any]:
+        """Basic result used when the model response is not valid JSON"""
+        return {
+            "eligibility_level": "FAIR",
+            "match_score": 50,
+            "analysis_summary": f"Analysis could not be parsed properly. Raw response available in full_analysis field.",
+            "strengths": [],
+            "gaps": [],
+            "recommendations": [],
+            "matching_skills": [],
+            "missing_skills": [],
+            "experience_match": "Unable to parse experience match",
+            "experience_gap_years": None,
+        }
 
+    def _analysis_from_result(
+        self,
+        user: User,
+        job: Job,
+        additional_context: str,
+        result: Dict[str, Any],
+        response_text: str,
+        fingerprint: str,
+        token_usage: int = 0,
+        llm_model: Optional[str] = None,
+    ) -> JobEligibilityAnalysis:
+        """
+        Map a parsed model result onto an unsaved JobEligibilityAnalysis
+
+        Args:
+            user: User analyzed
+            job: Job analyzed
+            additional_context: Additional context provided by user
+            result: Parsed JSON object returned by the model
+            response_text: Raw model response, kept in full_analysis
+            fingerprint: Input fingerprint from _prepare_analysis
+            token_usage: Total tokens the model reported for the call
+            llm_model: Model that answered, when it may differ from the
+                analyzer's (routed calls); defaults to self.model_name
+
+        Returns:
+            Unsaved JobEligibilityAnalysis instance
+        """
         # Helper function to safely convert to Decimal
         def to_decimal(value):
             if value and value != "null":
@@ -663,8 +1025,8 @@ Return ONLY the JSON object, no additional text.
         if confidence_level not in valid_confidence:
             confidence_level = "MEDIUM"
 
-        # Create analysis record with all new fields
-        analysis = JobEligibilityAnalysis.objects.create(
+        # Build analysis record with all new fields
+        analysis = JobEligibilityAnalysis(
             user=user,
             job=job,
             additional_context=additional_context,
@@ -705,14 +1067,15 @@ Return ONLY the JSON object, no additional text.
             learning_resources=ensure_list(result.get("learning_resources", [])),
             # Metadata
             full_analysis=response_text,
-            llm_model=self.model_name,
-            token_usage=0,  # Can be enhanced to track actual token usage
+            llm_model=llm_model or self.model_name,
+            token_usage=token_usage,
+            context_fingerprint=fingerprint,
         )
 
         return analysis
 
     def reanalyze_with_context(
-        self, analysis: JobEligibilityAnalysis, additional_context: str
+        self, analysis: JobEligibilityAnalysis, additional_context: str, force: bool = False
     ) -> JobEligibilityAnalysis:
         """
         Re-run analysis with additional context from user
@@ -720,20 +1083,211 @@ Return ONLY the JSON object, no additional text.
         Args:
             analysis: Previous analysis
             additional_context: New context to add
+            force: Always run a fresh analysis
 
         Returns:
             New JobEligibilityAnalysis instance
         """
-        combined_context = analysis.additional_context
-        if combined_context:
-            combined_context += "\n\n" + additional_context
-        else:
-            combined_context = additional_context
-
         return self.analyze_eligibility(
-            user=analysis.user, job=analysis.job, additional_context=combined_context
+            user=analysis.user,
+            job=analysis.job,
+            additional_context=self._combined_context(analysis, additional_context),
+            force=force,
+        )
+
+    async def areanalyze_with_context(
+        self, analysis: JobEligibilityAnalysis, additional_context: str, force: bool = False
+    ) -> JobEligibilityAnalysis:
+        """Async reanalyze_with_context(); analysis must have user and job loaded"""
+        return await self.aanalyze_eligibility(
+            user=analysis.user,
+            job=analysis.job,
+            additional_context=self._combined_context(analysis, additional_context),
+            force=force,
+        )
+
+    def _combined_context(self, analysis: JobEligibilityAnalysis, additional_context: str) -> str:
+        """A previous analysis's additional context followed by the new one"""
+        if analysis.additional_context:
+            return analysis.additional_context + "\n\n" + additional_context
+        return additional_context
+
+
+    def _prepare_batch(
+        self, user: User, jobs: List[Job], additional_context: str = "", force: bool = False
+    ):
+        """
+        Gather the user context once and prepare every job in a batch
+
+        Returns:
+            Tuple of (list of (job, reusable analysis), list of (job, prompt, fingerprint))
+        """
+        user_context = self._gather_user_context(user)
+
+        reused, pending = [], []
+        for job in jobs:
+            existing, prompt, fingerprint = self._prepare_analysis(
+                user, job, additional_context, force, user_context=user_context
+            )
+            if existing is not None:
+                reused.append((job, existing))
+            else:
+                pending.append((job, prompt, fingerprint))
+        return reused, pending
+
+    def _batch_result_event(
+        self, job: Job, analysis: JobEligibilityAnalysis = None, error: Exception = None
+    ) -> Dict[str, Any]:
+        """Per-job event emitted by analyze_batch as each analysis finishes"""
+        if error is not None:
+            return {
+                "type": "result",
+                "job_id": job.id,
+                "job_title": job.title,
+                "status": "failed",
+                "error": str(error),
+            }
+        return {
+            "type": "result",
+            "job_id": job.id,
+            "job_title": job.title,
+            "status": "reused" if getattr(analysis, "reused", False) else "analyzed",
+            "analysis_id": analysis.id,
+            "eligibility_level": analysis.eligibility_level,
+            "match_score": analysis.match_score,
+            "analysis_summary": analysis.analysis_summary,
+        }
+
+    def _batch_complete_event(
+        self, reused: List[tuple], created: List[JobEligibilityAnalysis], failed: int
+    ) -> Dict[str, Any]:
+        """Final analyze_batch event carrying the id of every stored analysis"""
+        analyses = [
+            {"job_id": job.id, "analysis_id": analysis.id, "reused": True}
+            for job, analysis in reused
+        ] + [
+            {"job_id": analysis.job_id, "analysis_id": analysis.id, "reused": False}
+            for analysis in created
+        ]
+        return {
+            "type": "complete",
+            "analyzed": len(created),
+            "reused": len(reused),
+            "failed": failed,
+            "analyses": analyses,
+        }
+
+    def analyze_batch(
+        self,
+        user: User,
+        jobs: List[Job],
+        additional_context: str = "",
+        force: bool = False,
+        max_concurrency: int = None,
+    ):
+        """
+        Analyze one user against several jobs, yielding results as they finish
+
+        The user context is gathered once and the model calls run
+        concurrently (at most max_concurrency in flight). Each new analysis
+        is stored as soon as its call returns, before its "result" event, so
+        an interrupted batch keeps every analysis already paid for. A failed
+        call only fails its own job.
+
+        Args:
+            user: User to analyze
+            jobs: Saved jobs to analyze for
+            additional_context: Additional context applied to every job
+            force: Always run fresh analyses
+            max_concurrency: Cap on in-flight model calls
+                (default: settings.ANALYSIS_BATCH["max_concurrency"])
+
+        Yields:
+            Event dicts: "status", one "result" per job, then "complete"
+        """
+        max_concurrency = max_concurrency or settings.ANALYSIS_BATCH["max_concurrency"]
+        reused, pending = self._prepare_batch(user, jobs, additional_context, force)
+
+        yield {
+            "type": "status",
+            "total": len(jobs),
+            "reused": len(reused),
+            "pending": len(pending),
+        }
+        for job, analysis in reused:
+            yield self._batch_result_event(job, analysis)
+
+        created, failed = [], 0
+        if pending:
+            results = self.llm.batch_as_completed(
+                [prompt for _, prompt, _ in pending],
+                config=operation_config(
+                    "analyze_eligibility", max_concurrency=max_concurrency
+                ),
+                return_exceptions=True,
+            )
+            for index, response in results:
+                job, _, fingerprint = pending[index]
+                if isinstance(response, Exception):
+                    failed += 1
+                    yield self._batch_result_event(job, error=response)
+                    continue
+                analysis = self._build_analysis(
+                    user, job, additional_context, response, fingerprint
+                )
+                analysis.save()
+                created.append(analysis)
+                yield self._batch_result_event(job, analysis)
+
+        yield self._batch_complete_event(reused, created, failed)
+
+    async def aanalyze_batch(
+        self,
+        user: User,
+        jobs: List[Job],
+        additional_context: str = "",
+        force: bool = False,
+        max_concurrency: int = None,
+    ):
+        """Async analyze_batch(), fanning out with abatch_as_completed"""
+        max_concurrency = max_concurrency or settings.ANALYSIS_BATCH["max_concurrency"]
+        reused, pending = await sync_to_async(self._prepare_batch)(
+            user, jobs, additional_context, force
         )
 
+        yield {
+            "type": "status",
+            "total": len(jobs),
+            "reused": len(reused),
+            "pending": len(pending),
+        }
+        for job, analysis in reused:
+            yield self._batch_result_event(job, analysis)
+
+        created, failed = [], 0
+        if pending:
+            results = self.llm.abatch_as_completed(
+                [prompt for _, prompt, _ in pending],
+                config=operation_config(
+                    "analyze_eligibility", max_concurrency=max_concurrency
+                ),
+                return_exceptions=True,
+            )
+            async for index, response in results:
+                job, _, fingerprint = pending[index]
+                if isinstance(response, Exception):
+                    failed += 1
+                    yield self._batch_result_event(job, error=response)
+                    continue
+                analysis = self._build_analysis(
+                    user, job, additional_context, response, fingerprint
+                )
+                await analysis.asave()
+                created.append(analysis)
+                yield self._batch_result_event(job, analysis)
+
+        yield self._batch_complete_event(reused, created, failed)
+
 
 class AnalysisChatService:
     """
@@ -741,24 +1295,8 @@ class AnalysisChatService:
     """
 
     def __init__(self):
-        """Initialize chat service with GPT-4"""
-        model_provider = os.getenv("MODEL_PROVIDER")
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-
-        gemini_model = "gemini-2.0-flash-exp"
-        openai_model = "gpt-4o"
-
-        if model_provider == "gemini":
-            gemini_api_key = os.getenv("GEMINI_API_KEY")
-            self.llm = ChatGoogleGenerativeAI(model=gemini_model, api_key=gemini_api_key)
-        else:
-            self.llm = ChatOpenAI(
-                model=openai_model,
-                temperature=0.7,  # Slightly higher for more conversational responses
-                api_key=api_key,
-            )
+        """Initialize chat service with the pooled chat client"""
+        self.llm = get_llm("chat")
 
     def _format_analysis_context(self, analysis: JobEligibilityAnalysis) -> str:
         """Format analysis data into context for AI"""
@@ -838,22 +1376,146 @@ class AnalysisChatService:
 
         return "\n".join(context_parts)
 
-    def chat_about_analysis(self, analysis: JobEligibilityAnalysis, message: str) -> str:
+    def chat_about_analysis(
+        self, analysis: JobEligibilityAnalysis, message: str, session: Optional[ChatSession] = None
+    ) -> str:
         """
         Generate AI response about a job analysis
 
         Args:
             analysis: JobEligibilityAnalysis object
             message: User's question/message
+            session: Chat session to continue (a new one if None); the
+                message and response are added to it
 
         Returns:
             AI-generated response
         """
-        # Format analysis context
-        analysis_context = self._format_analysis_context(analysis)
+        if session is None:
+            session = chat.open_session(analysis.user, ChatSession.Kind.ANALYSIS, analysis.pk)
+
+        # Format analysis context (cached on the session)
+        analysis_context = chat.session_context(
+            session, lambda: self._format_analysis_context(analysis)
+        )
+        history = chat.conversation(session, message, self.llm)
+
+        # Generate response
+        chain = self._build_prompt() | self.llm
+        result = chain.invoke({
+            "analysis_context": analysis_context,
+            "history": history,
+            "message": message,
+        }, config=operation_config("analysis_chat"))
+
+        chat.record_turn(session, message, result.content)
+        return result.content
 
-        # Create chat prompt
-        prompt = ChatPromptTemplate.from_messages([
+    async def achat_about_analysis(
+        self, analysis: JobEligibilityAnalysis, message: str, session: Optional[ChatSession] = None
+    ) -> str:
+        """Async chat_about_analysis() using the model's ainvoke"""
+        if session is None:
+            session = await sync_to_async(chat.open_session)(
+                analysis.user, ChatSession.Kind.ANALYSIS, analysis.pk
+            )
+
+        analysis_context = await sync_to_async(chat.session_context)(
+            session, lambda: self._format_analysis_context(analysis)
+        )
+        history = await chat.aconversation(session, message, self.llm)
+
+        chain = self._build_prompt() | self.llm
+        result = await chain.ainvoke({
+            "analysis_context": analysis_context,
+            "history": history,
+            "message": message,
+        }, config=operation_config("analysis_chat"))
+
+        await chat.arecord_turn(session, message, result.content)
+        return result.content
+
+    def stream_chat_about_analysis(
+        self, analysis: JobEligibilityAnalysis, message: str, session: Optional[ChatSession] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream an AI response about a job analysis
+
+        Turns over the history budget are folded into the summary after the
+        complete event (chat.streaming_history(), chat.compact()), so the
+        summary call delays neither the first token nor the answer. Closing
+        the generator (client disconnect) stops the generation; the turn is
+        only added to the session once the answer is complete.
+
+        Args:
+            analysis: JobEligibilityAnalysis object
+            message: User's question/message
+            session: Chat session to continue (a new one if None)
+
+        Yields:
+            session: The session id, first
+            token: Each piece of the answer as the model writes it
+            complete: The whole answer
+        """
+        if session is None:
+            session = chat.open_session(analysis.user, ChatSession.Kind.ANALYSIS, analysis.pk)
+        yield {"type": "session", "session_id": session.pk}
+
+        analysis_context = chat.session_context(
+            session, lambda: self._format_analysis_context(analysis)
+        )
+        history = chat.streaming_history(session, message, self.llm)
+
+        chain = self._build_prompt() | self.llm
+        parts = []
+        for chunk in chain.stream({
+            "analysis_context": analysis_context,
+            "history": history,
+            "message": message,
+        }, config=operation_config("analysis_chat")):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield {"type": "token", "content": chunk.content}
+
+        response = "".join(parts)
+        chat.record_turn(session, message, response)
+        yield {"type": "complete", "session_id": session.pk, "response": response}
+        chat.compact(session, self.llm)
+
+    async def astream_chat_about_analysis(
+        self, analysis: JobEligibilityAnalysis, message: str, session: Optional[ChatSession] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async stream_chat_about_analysis() using the model's astream"""
+        if session is None:
+            session = await sync_to_async(chat.open_session)(
+                analysis.user, ChatSession.Kind.ANALYSIS, analysis.pk
+            )
+        yield {"type": "session", "session_id": session.pk}
+
+        analysis_context = await sync_to_async(chat.session_context)(
+            session, lambda: self._format_analysis_context(analysis)
+        )
+        history = await chat.astreaming_history(session, message, self.llm)
+
+        chain = self._build_prompt() | self.llm
+        parts = []
+        async for chunk in chain.astream({
+            "analysis_context": analysis_context,
+            "history": history,
+            "message": message,
+        }, config=operation_config("analysis_chat")):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield {"type": "token", "content": chunk.content}
+
+        response = "".join(parts)
+        await chat.arecord_turn(session, message, response)
+        yield {"type": "complete", "session_id": session.pk, "response": response}
+        await chat.acompact(session, self.llm)
+
+    def _build_prompt(self) -> ChatPromptTemplate:
+        """Prompt template for the analysis advisor"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are a helpful career advisor for CareerCraft, specializing in job eligibility analysis.
 
 You help users understand their job analysis results and provide actionable career advice.
@@ -867,14 +1529,6 @@ If asked about skills, prioritize based on the gaps and recommendations in the a
 Analysis Context:
 {analysis_context}
 """),
+            MessagesPlaceholder("history"),
             ("human", "{message}"),
         ])
-
-        # Generate response
-        chain = prompt | self.llm
-        result = chain.invoke({
-            "analysis_context": analysis_context,
-            "message": message,
-        })
-
-        return result.content
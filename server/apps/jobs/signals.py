@@ -0,0 +1,84 @@
+"""
+Signal handlers for Jobs app
+"""
+from django.db import connections, transaction
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.ai.chat import invalidate_context
+from apps.ai.models import ChatSession
+from .models import Job, JobEligibilityAnalysis, JobSkillRequirement
+from .recommendations import skill_job_index
+from .search import install_search_index, search_index_installed
+
+# Job fields that affect the recommendation index
+INDEXED_JOB_FIELDS = {'status', 'parsed_skills'}
+
+# Job fields that the analysis chat context is built from
+CHAT_CONTEXT_JOB_FIELDS = {
+    'title', 'company_name', 'experience_level', 'description',
+    'requirements', 'responsibilities', 'parsed_skills', 'parsed_requirements',
+}
+
+
+@receiver(post_save, sender=Job)
+def reindex_saved_job(sender, instance, created, update_fields=None, **kwargs):
+    """Index new jobs and re-index edited ones (closing a job drops it)"""
+    if update_fields is not None and not INDEXED_JOB_FIELDS & set(update_fields):
+        return
+    job_id = instance.pk
+    transaction.on_commit(lambda: skill_job_index.update_job(job_id))
+
+
+@receiver(post_delete, sender=Job)
+def unindex_deleted_job(sender, instance, **kwargs):
+    job_id = instance.pk
+    transaction.on_commit(lambda: skill_job_index.remove_job(job_id))
+
+
+@receiver([post_save, post_delete], sender=JobSkillRequirement)
+def reindex_requirement_job(sender, instance, **kwargs):
+    """Re-index a job whose skill requirements changed"""
+    job_id = instance.job_id
+    # Touch the job so other processes pick the change up on their next sync
+    Job.objects.filter(pk=job_id).update(updated_at=timezone.now())
+    transaction.on_commit(lambda: skill_job_index.update_job(job_id))
+
+
+@receiver(post_save, sender=JobEligibilityAnalysis)
+def invalidate_analysis_chats(sender, instance, created, **kwargs):
+    """Rebuild the chat context of sessions about a re-run analysis"""
+    if not created:
+        invalidate_context(ChatSession.Kind.ANALYSIS, subject_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=JobEligibilityAnalysis)
+def delete_analysis_chats(sender, instance, **kwargs):
+    ChatSession.objects.filter(kind=ChatSession.Kind.ANALYSIS, subject_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Job)
+def invalidate_job_analysis_chats(sender, instance, created, update_fields=None, **kwargs):
+    """Rebuild the chat context of sessions about analyses of an edited job"""
+    if created:
+        return
+    # Bookkeeping saves such as the view count leave the context as it is
+    if update_fields is not None and not CHAT_CONTEXT_JOB_FIELDS & set(update_fields):
+        return
+    analyses = JobEligibilityAnalysis.objects.filter(job_id=instance.pk).values('pk')
+    invalidate_context(ChatSession.Kind.ANALYSIS, subject_ids=analyses)
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using='default', **kwargs):
+    """
+    Re-create search triggers lost when a migration rebuilt the jobs table
+
+    SQLite drops a table's triggers when Django remakes it to alter columns.
+    """
+    if sender.name != 'apps.jobs':
+        return
+    connection = connections[using]
+    if search_index_installed(connection):
+        install_search_index(connection)
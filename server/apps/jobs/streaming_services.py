@@ -2,18 +2,83 @@
 Streaming services for job analysis with real-time updates
 """
 
-import json
-import os
-from typing import Dict, Any, Generator, Optional
-from decimal import Decimal
+from typing import AsyncIterator, Dict, Any, Generator, List, Optional
 
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
+from asgiref.sync import sync_to_async
 
+from apps.ai.cancellation import checkpoint, iterate_within_deadline
+from apps.ai.json_stream import StreamingJSONParser, JSONStreamError
+from apps.ai.routing import answered_by
+from apps.ai.usage import operation_config, total_tokens
 from apps.users.models import User
 from .models import Job, JobEligibilityAnalysis
 from .services import JobEligibilityAnalyzer
+from .scoring import skill_match_preview
+
+
+# Integer scores of the analysis, reported as partial_metric events
+SCORE_FIELDS = (
+    'match_score',
+    'skills_match_score',
+    'experience_match_score',
+    'education_match_score',
+    'culture_fit_score',
+    'location_match_score',
+    'salary_match_score',
+    'technical_skills_score',
+    'soft_skills_score',
+    'domain_knowledge_score',
+    'readiness_percentage',
+)
+
+
+class _AnalysisStream:
+    """
+    State of one streamed analysis response
+
+    Collects the chunks and turns each into the events it completes.
+    """
+
+    def __init__(self, analyzer: "StreamingJobAnalyzer"):
+        self.analyzer = analyzer
+        self.chunks = []
+        self.parser = StreamingJSONParser()
+        self.metrics = {}
+        self.chunk_count = 0
+        self.accumulated_length = 0
+        self.token_usage = 0
+        self.llm_model = None
+
+    def feed(self, chunk) -> List[Dict[str, Any]]:
+        """Events for one model chunk"""
+        self.chunk_count += 1
+        self.token_usage += total_tokens(chunk)
+        self.llm_model = self.llm_model or answered_by(chunk)
+        content = chunk.content if hasattr(chunk, 'content') else str(chunk)
+        self.chunks.append(content)
+        self.accumulated_length += len(content)
+        progress = min(30 + (self.chunk_count // 10), 85)
+
+        events = []
+        # Emit partial content every 10 chunks
+        if self.chunk_count % 10 == 0:
+            events.append({
+                'type': 'partial_analysis',
+                'content': content,
+                'accumulated_length': self.accumulated_length,
+                'progress': progress
+            })
+
+        for path, value in self.parser.feed(content):
+            events.append(self.analyzer._field_event(path, value, self.metrics, progress))
+        return events
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """The model's parsed JSON, or None if it is invalid"""
+        try:
+            return self.parser.close()
+        except JSONStreamError:
+            return None
 
 
 class StreamingJobAnalyzer(JobEligibilityAnalyzer):
@@ -29,271 +94,297 @@ class StreamingJobAnalyzer(JobEligibilityAnalyzer):
         self,
         user: User,
         job: Job,
-        additional_context: str = ""
+        additional_context: str = "",
+        force: bool = False,
+        user_context: Optional[Dict[str, Any]] = None,
     ) -> Generator[Dict[str, Any], None, JobEligibilityAnalysis]:
         """
         Perform streaming job eligibility analysis with progressive updates
 
+        Like analyze_eligibility(), an unchanged profile/job/context pair
+        reuses the last analysis instead of calling the model (unless force
+        is set); the stream then ends with its metrics and id right away.
+
         Args:
             user: User to analyze
             job: Job to analyze for
             additional_context: Additional context provided by user
+            force: Always run a fresh analysis
+            user_context: Already gathered user context (the dream-job
+                pipeline gathers it while the job is parsed)
 
         Yields:
             Dict containing progress updates:
-            - type: 'status', 'partial_metric', 'partial_analysis', 'complete'
+            - type: 'status', 'skill_match_preview', 'partial_analysis', 'partial_metric',
+              'field', 'field_item', 'metrics_complete', 'complete'
             - data: relevant data for each type
 
+            Each field of the model's JSON is reported as soon as its value
+            closes (scores as partial_metric, list entries as field_item).
+            The complete event carries the stored analysis_id and whether
+            the analysis was reused.
+
         Returns:
             Final JobEligibilityAnalysis instance
         """
         # Step 1: Emit gathering context status
-        yield {
+        if user_context is None:
+            yield self._gathering_event()
+
+        user_context, existing, prompt, fingerprint, skill_match = self._prepare_stream(
+            user, job, additional_context, force, user_context
+        )
+        yield from self._prepared_events(user_context, skill_match)
+        if existing is not None:
+            yield from self._result_events(existing)
+            return existing
+
+        # Step 3: Stream LLM response, parsing the JSON as it arrives
+        stream = _AnalysisStream(self)
+        try:
+            config = operation_config('analyze_eligibility')
+            for chunk in self.llm.stream(prompt, config=config):
+                yield from stream.feed(chunk)
+
+            # Step 4: Process complete response
+            yield self._processing_event()
+            analysis = self._stream_analysis(stream, user, job, additional_context, fingerprint)
+
+            # Step 5: Save to database (unless the request was abandoned meanwhile)
+            checkpoint("saving_analysis")
+            analysis.save()
+
+            # Step 6: Emit metrics and completion
+            yield from self._result_events(analysis)
+            return analysis
+
+        except Exception as e:
+            yield self._error_event(e)
+            raise
+
+    async def astream_analyze_eligibility(
+        self,
+        user: User,
+        job: Job,
+        additional_context: str = "",
+        force: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async stream_analyze_eligibility() using the model's astream
+
+        The ORM work runs in sync_to_async batches before and after the
+        model call. Failures are reported as an error event and re-raised.
+        """
+        yield self._gathering_event()
+
+        user_context, existing, prompt, fingerprint, skill_match = await sync_to_async(
+            self._prepare_stream
+        )(user, job, additional_context, force)
+        for event in self._prepared_events(user_context, skill_match):
+            yield event
+        if existing is not None:
+            for event in self._result_events(existing):
+                yield event
+            return
+
+        stream = _AnalysisStream(self)
+        try:
+            config = operation_config('analyze_eligibility')
+            chunks = iterate_within_deadline(self.llm.astream(prompt, config=config), "llm_stream")
+            async for chunk in chunks:
+                for event in stream.feed(chunk):
+                    yield event
+
+            yield self._processing_event()
+            analysis = self._stream_analysis(stream, user, job, additional_context, fingerprint)
+            checkpoint("saving_analysis")
+            await sync_to_async(analysis.save)()
+
+            for event in self._result_events(analysis):
+                yield event
+
+        except Exception as e:
+            yield self._error_event(e)
+            raise
+
+    def stream_reanalyze_with_context(
+        self, analysis: JobEligibilityAnalysis, additional_context: str, force: bool = False
+    ) -> Generator[Dict[str, Any], None, JobEligibilityAnalysis]:
+        """
+        Streaming reanalyze_with_context()
+
+        Args:
+            analysis: Previous analysis
+            additional_context: New context to add
+            force: Always run a fresh analysis
+
+        Yields:
+            The events of stream_analyze_eligibility()
+        """
+        return (yield from self.stream_analyze_eligibility(
+            user=analysis.user,
+            job=analysis.job,
+            additional_context=self._combined_context(analysis, additional_context),
+            force=force,
+        ))
+
+    async def astream_reanalyze_with_context(
+        self, analysis: JobEligibilityAnalysis, additional_context: str, force: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async stream_reanalyze_with_context(); analysis must have user and job loaded"""
+        async for event in self.astream_analyze_eligibility(
+            user=analysis.user,
+            job=analysis.job,
+            additional_context=self._combined_context(analysis, additional_context),
+            force=force,
+        ):
+            yield event
+
+    def _prepare_stream(
+        self,
+        user: User,
+        job: Job,
+        additional_context: str,
+        force: bool,
+        user_context: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Gather context (unless given), look for a reusable analysis and
+        build the prompt
+
+        Returns:
+            Tuple of (user context, reusable analysis or None, prompt,
+            fingerprint, skill match preview or None)
+        """
+        if user_context is None:
+            user_context = self._gather_user_context(user)
+        existing, prompt, fingerprint = self._prepare_analysis(
+            user, job, additional_context, force, user_context=user_context
+        )
+        # Instant, model-free skill match while the AI works
+        skill_match = skill_match_preview(user, job.pk) if existing is None else None
+        return user_context, existing, prompt, fingerprint, skill_match
+
+    def _stream_analysis(
+        self, stream: _AnalysisStream, user: User, job: Job, additional_context: str, fingerprint: str
+    ) -> JobEligibilityAnalysis:
+        """Unsaved analysis from a completed stream"""
+        result = stream.result()
+        if result is None:
+            # Not fingerprinted, so the same inputs ask the model again
+            # instead of reusing the placeholder
+            result, fingerprint = self._fallback_result(), ''
+        return self._analysis_from_result(
+            user,
+            job,
+            additional_context,
+            result,
+            ''.join(stream.chunks),
+            fingerprint,
+            token_usage=stream.token_usage,
+            llm_model=stream.llm_model,
+        )
+
+    def _gathering_event(self) -> Dict[str, Any]:
+        return {
             'type': 'status',
             'step': 'gathering_context',
             'message': 'Gathering your profile information...',
             'progress': 10
         }
 
-        # Gather context
-        user_context = self._gather_user_context(user)
-        job_context = self._gather_job_context(job)
-
-        yield {
+    def _prepared_events(self, user_context: Dict[str, Any], skill_match) -> List[Dict[str, Any]]:
+        """Events once the context is gathered (Step 2)"""
+        events = [{
             'type': 'status',
             'step': 'context_gathered',
             'message': f'Analyzed {len(user_context.get("skills", []))} skills and {len(user_context.get("work_experience", []))} work experiences',
             'progress': 20
-        }
-
-        # Step 2: Create prompt
-        yield {
+        }]
+        if skill_match is not None:
+            events.append({
+                'type': 'skill_match_preview',
+                'data': skill_match,
+            })
+        events.append({
             'type': 'status',
             'step': 'analyzing',
             'message': 'AI is analyzing your fit for this role...',
             'progress': 30
-        }
-
-        prompt = self._create_prompt(user_context, job_context, additional_context)
+        })
+        return events
 
-        # Step 3: Stream LLM response
-        accumulated_content = ""
-        chunk_count = 0
-
-        try:
-            # Use streaming invoke
-            for chunk in self.llm.stream(prompt):
-                chunk_count += 1
-                content = chunk.content if hasattr(chunk, 'content') else str(chunk)
-                accumulated_content += content
-
-                # Emit partial content every 10 chunks
-                if chunk_count % 10 == 0:
-                    progress = min(30 + (chunk_count // 10), 80)
-                    yield {
-                        'type': 'partial_analysis',
-                        'content': content,
-                        'accumulated_length': len(accumulated_content),
-                        'progress': progress
-                    }
-
-                # Try to parse partial JSON for metrics
-                if chunk_count % 20 == 0:
-                    try:
-                        partial_metrics = self._extract_partial_metrics(accumulated_content)
-                        if partial_metrics:
-                            yield {
-                                'type': 'partial_metric',
-                                'metrics': partial_metrics,
-                                'progress': min(40 + (chunk_count // 20) * 5, 85)
-                            }
-                    except:
-                        pass
-
-            # Step 4: Process complete response
-            yield {
-                'type': 'status',
-                'step': 'processing',
-                'message': 'Processing analysis results...',
-                'progress': 90
-            }
+    def _processing_event(self) -> Dict[str, Any]:
+        return {
+            'type': 'status',
+            'step': 'processing',
+            'message': 'Processing analysis results...',
+            'progress': 90
+        }
 
-            # Parse final JSON response
-            try:
-                start_idx = accumulated_content.find("{")
-                end_idx = accumulated_content.rfind("}") + 1
-                if start_idx != -1 and end_idx > start_idx:
-                    json_str = accumulated_content[start_idx:end_idx]
-                    result = json.loads(json_str)
-                else:
-                    raise ValueError("No JSON found in response")
-            except Exception as e:
-                result = {
-                    "eligibility_level": "FAIR",
-                    "match_score": 50,
-                    "analysis_summary": f"Analysis could not be parsed properly.",
-                    "strengths": [],
-                    "gaps": [],
-                    "recommendations": [],
-                    "matching_skills": [],
-                    "missing_skills": [],
-                    "experience_match": "Unable to parse experience match",
-                }
-
-            # Helper functions (reused from parent class)
-            def to_decimal(value):
-                if value and value != "null":
-                    try:
-                        return Decimal(str(value))
-                    except:
-                        return None
-                return None
-
-            def to_int(value, default=0):
-                if value is not None and value != "null":
-                    try:
-                        return int(value)
-                    except:
-                        return default
-                return default
-
-            def ensure_list(value):
-                if isinstance(value, list):
-                    return value
-                elif isinstance(value, str):
-                    try:
-                        parsed = json.loads(value)
-                        return parsed if isinstance(parsed, list) else [value]
-                    except:
-                        return [value] if value else []
-                return []
-
-            # Extract all metrics
-            exp_gap = to_decimal(result.get("experience_gap_years"))
-            years_required = to_decimal(result.get("years_of_experience_required"))
-            years_user = to_decimal(result.get("years_of_experience_user"))
-
-            skills_match_score = to_int(result.get("skills_match_score"), 0)
-            experience_match_score = to_int(result.get("experience_match_score"), 0)
-            education_match_score = to_int(result.get("education_match_score"), 0)
-            culture_fit_score = to_int(result.get("culture_fit_score"), 0)
-            location_match_score = to_int(result.get("location_match_score"), 0)
-            salary_match_score = to_int(result.get("salary_match_score"), 0)
-            technical_skills_score = to_int(result.get("technical_skills_score"), 0)
-            soft_skills_score = to_int(result.get("soft_skills_score"), 0)
-            domain_knowledge_score = to_int(result.get("domain_knowledge_score"), 0)
-            readiness_percentage = to_int(result.get("readiness_percentage"), 0)
-
-            confidence_level = result.get("confidence_level", "MEDIUM")
-            valid_confidence = ["VERY_HIGH", "HIGH", "MEDIUM", "LOW", "VERY_LOW"]
-            if confidence_level not in valid_confidence:
-                confidence_level = "MEDIUM"
-
-            # Emit complete metrics
-            yield {
+    def _result_events(self, analysis: JobEligibilityAnalysis) -> List[Dict[str, Any]]:
+        """metrics_complete and complete events of a stored analysis"""
+        reused = getattr(analysis, 'reused', False)
+        return [
+            {
                 'type': 'metrics_complete',
                 'metrics': {
-                    'match_score': int(result.get("match_score", 50)),
-                    'skills_match_score': skills_match_score,
-                    'experience_match_score': experience_match_score,
-                    'education_match_score': education_match_score,
-                    'culture_fit_score': culture_fit_score,
-                    'location_match_score': location_match_score,
-                    'salary_match_score': salary_match_score,
-                    'technical_skills_score': technical_skills_score,
-                    'soft_skills_score': soft_skills_score,
-                    'domain_knowledge_score': domain_knowledge_score,
-                    'readiness_percentage': readiness_percentage,
-                    'eligibility_level': result.get("eligibility_level", "FAIR"),
+                    **{field: getattr(analysis, field) for field in SCORE_FIELDS},
+                    'eligibility_level': analysis.eligibility_level,
                 },
                 'progress': 95
-            }
-
-            # Step 5: Save to database
-            analysis = JobEligibilityAnalysis.objects.create(
-                user=user,
-                job=job,
-                additional_context=additional_context,
-                eligibility_level=result.get("eligibility_level", "FAIR"),
-                match_score=int(result.get("match_score", 50)),
-                analysis_summary=result.get("analysis_summary", ""),
-                strengths=ensure_list(result.get("strengths", [])),
-                gaps=ensure_list(result.get("gaps", [])),
-                recommendations=ensure_list(result.get("recommendations", [])),
-                matching_skills=ensure_list(result.get("matching_skills", [])),
-                missing_skills=ensure_list(result.get("missing_skills", [])),
-                skill_gaps=ensure_list(result.get("skill_gaps", [])),
-                skills_match_score=skills_match_score,
-                experience_match_score=experience_match_score,
-                education_match_score=education_match_score,
-                culture_fit_score=culture_fit_score,
-                location_match_score=location_match_score,
-                salary_match_score=salary_match_score,
-                technical_skills_score=technical_skills_score,
-                soft_skills_score=soft_skills_score,
-                domain_knowledge_score=domain_knowledge_score,
-                experience_match=result.get("experience_match", ""),
-                experience_gap_years=exp_gap,
-                years_of_experience_required=years_required,
-                years_of_experience_user=years_user,
-                readiness_percentage=readiness_percentage,
-                estimated_preparation_time=result.get("estimated_preparation_time", ""),
-                confidence_level=confidence_level,
-                next_steps=ensure_list(result.get("next_steps", [])),
-                priority_improvements=ensure_list(result.get("priority_improvements", [])),
-                learning_resources=ensure_list(result.get("learning_resources", [])),
-                full_analysis=accumulated_content,
-                llm_model=self.model_name,
-                token_usage=0,
-            )
-
-            # Step 6: Emit completion
-            yield {
+            },
+            {
                 'type': 'complete',
                 'analysis_id': analysis.id,
-                'message': 'Analysis complete!',
+                'reused': reused,
+                'message': 'Reused your previous analysis (nothing changed)' if reused else 'Analysis complete!',
                 'progress': 100
-            }
-
-            return analysis
-
-        except Exception as e:
-            yield {
-                'type': 'error',
-                'error': str(e),
-                'message': f'Analysis failed: {str(e)}'
-            }
-            raise
+            },
+        ]
+
+    def _error_event(self, error: Exception) -> Dict[str, Any]:
+        return {
+            'type': 'error',
+            'error': str(error),
+            'message': f'Analysis failed: {str(error)}'
+        }
 
-    def _extract_partial_metrics(self, content: str) -> Optional[Dict[str, int]]:
+    def _field_event(self, path, value, metrics: Dict[str, Any], progress: int) -> Dict[str, Any]:
         """
-        Extract partial metrics from incomplete JSON response
+        SSE event for a value of the model's JSON that just closed
 
         Args:
-            content: Partial JSON content
+            path: Path of the value: (field,) or (field, index) for list items
+            value: Parsed value
+            metrics: Scores seen so far, updated in place
+            progress: Current progress percentage
 
         Returns:
-            Dictionary of metrics if found, None otherwise
+            A 'partial_metric' event for scores, 'field_item' for items of
+            list fields (such as each skill_gaps entry), 'field' otherwise
         """
-        try:
-            # Try to find and parse score fields
-            metrics = {}
-            score_fields = [
-                'match_score',
-                'skills_match_score',
-                'experience_match_score',
-                'technical_skills_score',
-                'readiness_percentage'
-            ]
-
-            for field in score_fields:
-                # Look for patterns like "field_name": 85
-                import re
-                pattern = f'"{field}"\\s*:\\s*(\\d+)'
-                match = re.search(pattern, content)
-                if match:
-                    metrics[field] = int(match.group(1))
-
-            return metrics if metrics else None
-        except:
-            return None
+        field = path[0]
+        if len(path) > 1:
+            return {
+                'type': 'field_item',
+                'field': field,
+                'index': path[1],
+                'value': value,
+                'progress': progress
+            }
+        if field in SCORE_FIELDS:
+            metrics[field] = value
+            return {
+                'type': 'partial_metric',
+                'field': field,
+                'value': value,
+                'metrics': dict(metrics),
+                'progress': progress
+            }
+        return {
+            'type': 'field',
+            'field': field,
+            'value': value,
+            'progress': progress
+        }
@@ -0,0 +1,87 @@
+"""
+Background task handlers for the Jobs app
+
+Each handler returns the same body the blocking endpoint would have sent.
+"""
+from apps.tasks.services import task_handler, report_progress
+from apps.users.models import User
+from .models import Job, JobEligibilityAnalysis
+from .serializers import JobEligibilityAnalysisDetailSerializer
+from .services import JobEligibilityAnalyzer, DreamJobParser
+
+
+@task_handler('jobs.analyze')
+def analyze(task, user_id, job_id, additional_context='', force=False):
+    """Background version of JobEligibilityAnalysisViewSet.analyze"""
+    user = User.objects.get(id=user_id)
+    job = Job.objects.get(id=job_id)
+
+    report_progress(task, 10, 'Analyzing eligibility with AI...')
+    analyzer = JobEligibilityAnalyzer(model_name="gpt-4")
+    analysis = analyzer.analyze_eligibility(
+        user=user,
+        job=job,
+        additional_context=additional_context,
+        force=force,
+    )
+
+    return JobEligibilityAnalysisDetailSerializer(analysis).data
+
+
+@task_handler('jobs.reanalyze')
+def reanalyze(task, user_id, analysis_id, additional_context, force=False):
+    """Background version of JobEligibilityAnalysisViewSet.reanalyze"""
+    previous_analysis = JobEligibilityAnalysis.objects.select_related('user', 'job').get(
+        id=analysis_id,
+        user_id=user_id
+    )
+
+    report_progress(task, 10, 'Re-analyzing with additional context...')
+    analyzer = JobEligibilityAnalyzer(model_name="gpt-4")
+    new_analysis = analyzer.reanalyze_with_context(
+        analysis=previous_analysis,
+        additional_context=additional_context,
+        force=force,
+    )
+
+    return JobEligibilityAnalysisDetailSerializer(new_analysis).data
+
+
+@task_handler('jobs.analyze_dream_job')
+def analyze_dream_job(task, user_id, job_description, additional_context='', save_job=False):
+    """Background version of JobEligibilityAnalysisViewSet.analyze_dream_job"""
+    user = User.objects.get(id=user_id)
+
+    # Step 1: Parse job description with AI
+    report_progress(task, 5, 'Parsing job description with AI...')
+    parser = DreamJobParser()
+    parsed_job_data = parser.parse_job_description(job_description)
+
+    # Step 2: Create job object (saved or temporary)
+    if save_job:
+        job = parser.create_saved_job(parsed_job_data, user)
+    else:
+        job = parser.create_temporary_job(parsed_job_data)
+
+    # Step 3: Analyze eligibility
+    report_progress(task, 40, 'Analyzing eligibility with AI...')
+    analyzer = JobEligibilityAnalyzer(model_name="gpt-4")
+    analysis = analyzer.analyze_eligibility(
+        user=user,
+        job=job,
+        additional_context=additional_context
+    )
+
+    # Step 4: Return results
+    response_data = {
+        'message': 'Dream job analyzed successfully',
+        'parsed_job': parsed_job_data,
+        'job_saved': save_job,
+        'analysis': JobEligibilityAnalysisDetailSerializer(analysis).data,
+    }
+
+    if save_job:
+        response_data['job_id'] = job.id
+        response_data['job_url'] = f'/api/jobs/{job.id}/'
+
+    return response_data
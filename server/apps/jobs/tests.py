@@ -1,3 +1,179 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from apps.ai import chat
+from apps.ai.llm import registry as llm_registry
+from apps.ai.models import ChatMessage, ChatSession, LLMCallLog
+from apps.users.models import User
+from .models import Job, JobEligibilityAnalysis, ParsedJobDescription
+from .services import AnalysisChatService, DreamJobParser, JobEligibilityAnalyzer, job_parse_cache
+
+# Offline stand-in model answering at once
+fake_model = override_settings(
+    MODEL_PROVIDER="fake",
+    LLM_ROUTING={**settings.LLM_ROUTING, "enabled": False},
+    LLM_STAND_IN={**settings.LLM_STAND_IN, "simulate_latency": False},
+)
+
+
+class AnalysisFixtures:
+    def setUp(self):
+        llm_registry.clear()
+        self.addCleanup(llm_registry.clear)
+        self.user = User.objects.create_user(
+            username="candidate", email="candidate@example.com", password="secret"
+        )
+        self.job = self.create_job(1, "Backend Engineer", "Python, Django and PostgreSQL")
+
+    def create_job(self, number: int, title: str, description: str) -> Job:
+        return Job.objects.create(
+            title=title,
+            company_name="Example Corp",
+            company_description="Builds things",
+            description=description,
+            location="Remote",
+            source_url=f"https://example.com/jobs/{number}",
+        )
+
+
+@fake_model
+class AnalyzeEligibilityTests(AnalysisFixtures, TestCase):
+    def test_unchanged_inputs_reuse_analysis(self):
+        analyzer = JobEligibilityAnalyzer()
+        first = analyzer.analyze_eligibility(self.user, self.job)
+        second = analyzer.analyze_eligibility(self.user, self.job)
+
+        self.assertEqual(second.pk, first.pk)
+        self.assertTrue(second.reused)
+        self.assertEqual(LLMCallLog.objects.count(), 1)
+
+    def test_force_runs_fresh_analysis_right_after_previous(self):
+        # Within SINGLE_FLIGHT["result_ttl"] of the first analysis, whose
+        # completed flight must not be handed to a forced request
+        analyzer = JobEligibilityAnalyzer()
+        first = analyzer.analyze_eligibility(self.user, self.job)
+        forced = analyzer.analyze_eligibility(self.user, self.job, force=True)
+
+        self.assertNotEqual(forced.pk, first.pk)
+        self.assertFalse(getattr(forced, "reused", False))
+        self.assertEqual(LLMCallLog.objects.count(), 2)
+
+    # Past SINGLE_FLIGHT["result_ttl"], which shares any result with duplicates
+    @override_settings(SINGLE_FLIGHT={**settings.SINGLE_FLIGHT, "result_ttl": 0})
+    def test_unparsable_response_is_not_reused(self):
+        analyzer = JobEligibilityAnalyzer()
+        with mock.patch("apps.ai.stand_in.canned_response", return_value="Sorry, no JSON today."):
+            fallback = analyzer.analyze_eligibility(self.user, self.job)
+        self.assertEqual(fallback.context_fingerprint, "")
+
+        # The same inputs ask the model again instead of reusing the placeholder
+        analysis = analyzer.analyze_eligibility(self.user, self.job)
+        self.assertNotEqual(analysis.pk, fallback.pk)
+        self.assertFalse(getattr(analysis, "reused", False))
+        self.assertEqual(LLMCallLog.objects.count(), 2)
+
+    @override_settings(CHAT_SESSIONS={**settings.CHAT_SESSIONS, "history_token_budget": 100})
+    def test_streamed_chat_keeps_history_within_budget_and_folds_after_answer(self):
+        analysis = JobEligibilityAnalyzer().analyze_eligibility(self.user, self.job)
+        session = chat.open_session(self.user, ChatSession.Kind.ANALYSIS, analysis.pk)
+        for role, content, tokens in (
+            (ChatMessage.Role.USER, "U1", 30),
+            (ChatMessage.Role.ASSISTANT, "A1", 30),
+            (ChatMessage.Role.USER, "U2", 20),
+            (ChatMessage.Role.ASSISTANT, "A2", 40),
+        ):
+            ChatMessage.objects.create(session=session, role=role, content=content, tokens=tokens)
+
+        events, folds = [], []
+        fold = chat.fold
+
+        def record_fold(session, turns, llm):
+            folds.append(([turn.content for turn in turns], [event["type"] for event in events]))
+            fold(session, turns, llm)
+
+        with mock.patch.object(chat, "fold", side_effect=record_fold), \
+                mock.patch.object(chat, "history_messages", wraps=chat.history_messages) as history:
+            for event in AnalysisChatService().stream_chat_about_analysis(analysis, "And then?", session):
+                events.append(event)
+
+        # Only the turn beyond the budget is folded before answering ...
+        self.assertEqual(folds[0], (["U1"], ["session"]))
+        # ... the others the split would fold are still sent verbatim ...
+        sent = [turn.content for turn in history.call_args.args[1]]
+        self.assertEqual(sent, ["A1", "U2", "A2"])
+        # ... and folded once the answer is complete
+        self.assertEqual(len(folds), 2)
+        self.assertEqual(folds[1][0][:2], ["A1", "U2"])
+        self.assertEqual(folds[1][1][-1], "complete")
+        self.assertFalse(
+            ChatMessage.objects.filter(session=session, content__in=["U1", "A1", "U2"], summarized=False).exists()
+        )
+
+    def test_view_count_save_keeps_chat_context(self):
+        analysis = JobEligibilityAnalyzer().analyze_eligibility(self.user, self.job)
+        session = chat.open_session(self.user, ChatSession.Kind.ANALYSIS, analysis.pk)
+        chat.session_context(session, lambda: "Job Title: Backend Engineer")
+
+        self.job.view_count += 1
+        self.job.save(update_fields=["view_count"])
+        session.refresh_from_db()
+        self.assertEqual(session.context, "Job Title: Backend Engineer")
+
+        self.job.title = "Senior Backend Engineer"
+        self.job.save(update_fields=["title", "updated_at"])
+        session.refresh_from_db()
+        self.assertEqual(session.context, "")
+
+
+@fake_model
+class DreamJobParseCacheTests(TestCase):
+    def setUp(self):
+        llm_registry.clear()
+        self.addCleanup(llm_registry.clear)
+        job_parse_cache.invalidate()
+        self.addCleanup(job_parse_cache.invalidate)
+
+    def test_hit_and_miss_paths(self):
+        parser = DreamJobParser()
+        parsed = parser.parse_job_description("Senior  Python engineer, remote")
+        self.assertEqual(LLMCallLog.objects.count(), 1)
+
+        # Whitespace and case differences share the entry in memory
+        again = parser.parse_job_description("senior python engineer,\nREMOTE")
+        self.assertEqual(again, parsed)
+        self.assertEqual(LLMCallLog.objects.count(), 1)
+
+        # Callers get copies of the cached parse
+        again["title"] = "Changed"
+        self.assertEqual(parser.parse_job_description("Senior Python engineer, remote"), parsed)
+
+        # A worker without it in memory loads the stored parse
+        job_parse_cache.invalidate()
+        self.assertEqual(parser.parse_job_description("Senior Python engineer, remote"), parsed)
+        self.assertEqual(LLMCallLog.objects.count(), 1)
+        self.assertEqual(ParsedJobDescription.objects.get().hit_count, 1)
+
+        parser.parse_job_description("Staff Go engineer")
+        self.assertEqual(LLMCallLog.objects.count(), 2)
+        self.assertEqual(ParsedJobDescription.objects.count(), 2)
+
+
+# The batch's model calls run in worker threads, which write to the database
+@fake_model
+class AnalyzeBatchTests(AnalysisFixtures, TransactionTestCase):
+    def test_batch_stores_each_analysis_before_its_result_event(self):
+        other = self.create_job(2, "Data Engineer", "Python and Spark")
+        events = JobEligibilityAnalyzer().analyze_batch(self.user, [self.job, other])
+
+        result = next(event for event in events if event["type"] == "result")
+        # The client goes away after the first result
+        events.close()
+
+        self.assertEqual(result["status"], "analyzed")
+        self.assertTrue(
+            JobEligibilityAnalysis.objects.filter(
+                pk=result["analysis_id"], job_id=result["job_id"]
+            ).exists()
+        )
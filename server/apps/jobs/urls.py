@@ -1,9 +1,11 @@
 """
 URL Configuration for jobs app
 """
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
 from .views import (
     JobViewSet,
     JobEligibilityAnalysisViewSet,
@@ -23,3 +25,41 @@ urlpatterns = [
     path('analyses/', include(analyses_router.urls)),
     path('', include(jobs_router.urls)),
 ]
+
+# Native async versions of the AI actions shadow the DRF ones under ASGI
+if settings.ASYNC_AI_VIEWS:
+    urlpatterns = [
+        path('analyses/analyze/', async_views.analyze, name='analysis-analyze-async'),
+        path(
+            'analyses/analyze_batch/',
+            async_views.analyze_batch,
+            name='analysis-analyze-batch-async',
+        ),
+        path(
+            'analyses/stream_analyze/',
+            async_views.stream_analyze,
+            name='analysis-stream-analyze-async',
+        ),
+        path('analyses/reanalyze/', async_views.reanalyze, name='analysis-reanalyze-async'),
+        path(
+            'analyses/stream_reanalyze/',
+            async_views.stream_reanalyze,
+            name='analysis-stream-reanalyze-async',
+        ),
+        path('analyses/chat/', async_views.chat, name='analysis-chat-async'),
+        path(
+            'analyses/stream_chat/',
+            async_views.stream_chat,
+            name='analysis-stream-chat-async',
+        ),
+        path(
+            'analyses/analyze_dream_job/',
+            async_views.analyze_dream_job,
+            name='analysis-analyze-dream-job-async',
+        ),
+        path(
+            '<int:pk>/stream_analyze_eligibility/',
+            async_views.stream_analyze_eligibility,
+            name='job-stream-analyze-eligibility-async',
+        ),
+    ] + urlpatterns
@@ -2,13 +2,15 @@
 Views for Jobs app
 """
 import json
+from django.conf import settings
 from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiResponse
 
 from .models import Job, JobEligibilityAnalysis
 from .serializers import (
@@ -18,9 +20,74 @@ from .serializers import (
     JobEligibilityAnalysisDetailSerializer,
     AnalyzeJobEligibilitySerializer,
     ReanalyzeJobEligibilitySerializer,
+    AnalyzeJobsBatchSerializer,
 )
 from .services import JobEligibilityAnalyzer, DreamJobParser, AnalysisChatService
 from .streaming_services import StreamingJobAnalyzer
+from .scoring import SkillMatchEngine, skill_match_preview
+from .recommendations import recommend_jobs
+from .search import JobSearchFilter
+from apps.ai import chat, singleflight
+from apps.ai.models import ChatSession
+from apps.ai.pipeline import StageGraph, StageTiming
+from apps.ai.cache import normalize_text
+from apps.ai.throttling import LLMThrottle
+from apps.tasks.services import enqueue, request_flag, wants_background
+from apps.tasks.views import task_accepted_response
+
+
+# Status events of the stages of stream_analyze_dream_job, which may finish
+# in any order; their progress shares take the stream from 5 to 20
+DREAM_JOB_STAGES = {
+    'parse': {'step': 'parsed', 'message': 'Job description parsed successfully', 'progress': 8},
+    'user_context': {'step': 'profile_loaded', 'message': 'Loaded your profile', 'progress': 4},
+    'job': {'step': 'job_created', 'message': 'Job created from the description', 'progress': 3},
+}
+
+
+def _analysis_response(analysis, data):
+    """
+    200 response for an analysis, flagging results reused from an earlier run
+
+    The deterministic skill match is added next to the AI scores.
+    """
+    data['skill_match_preview'] = skill_match_preview(analysis.user, analysis.job_id)
+    response = Response(data, status=status.HTTP_200_OK)
+    response['X-Analysis-Reused'] = 'true' if getattr(analysis, 'reused', False) else 'false'
+    return response
+
+
+def _analysis_stream_response(events):
+    """
+    Server-Sent Events response forwarding StreamingJobAnalyzer events
+
+    The analyzer reports a failed model call as an error event itself;
+    failures before that (e.g. gathering context) get one here.
+    """
+    def event_stream():
+        """Generator for SSE events"""
+        last_type = None
+        try:
+            for event in events:
+                last_type = event['type']
+                yield f"data: {json.dumps(event)}\n\n"
+
+        except Exception as e:
+            if last_type != 'error':
+                error_event = {
+                    'type': 'error',
+                    'error': str(e),
+                    'message': f'Analysis failed: {str(e)}'
+                }
+                yield f"data: {json.dumps(error_event)}\n\n"
+
+    response = StreamingHttpResponse(
+        event_stream(),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @extend_schema_view(
@@ -43,7 +110,8 @@ class JobViewSet(viewsets.ReadOnlyModelViewSet):
         'added_by'
     ).prefetch_related('skill_requirements__skill')
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # JobSearchFilter orders by relevance, so it runs after OrderingFilter
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, JobSearchFilter]
     filterset_fields = ['job_type', 'experience_level', 'is_remote', 'remote_policy']
     search_fields = ['title', 'company_name', 'description', 'requirements']
     ordering_fields = ['created_at', 'posted_date', 'title', 'salary_min']
@@ -113,14 +181,116 @@ class JobViewSet(viewsets.ReadOnlyModelViewSet):
 
         return Response(data)
 
+    @extend_schema(
+        tags=['Jobs'],
+        summary='Recommended jobs',
+        description='Top active jobs for the current user\'s skills, from an inverted skill index '
+                    '(no AI call). Use ?limit= to choose how many (default 20, max 100).',
+    )
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def recommended(self, request):
+        """
+        Get the active jobs that best fit the current user's skills
+        """
+        try:
+            limit = int(request.query_params.get('limit', settings.JOB_RECOMMENDATIONS['default_limit']))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, settings.JOB_RECOMMENDATIONS['max_limit']))
+
+        recommendations = recommend_jobs(request.user, limit)
+
+        # The index may lag other processes by a few seconds: re-check status
+        jobs = Job.objects.filter(
+            id__in=[rec['job_id'] for rec in recommendations],
+            status='ACTIVE',
+        ).in_bulk()
+
+        recommendations = [rec for rec in recommendations if rec['job_id'] in jobs]
+        data = JobListSerializer([jobs[rec['job_id']] for rec in recommendations], many=True).data
+        for job_data, rec in zip(data, recommendations):
+            job_data['recommendation'] = {
+                'score': rec['score'],
+                'matched_skills': rec['matched_skills'],
+            }
+
+        return Response(data)
+
+    @extend_schema(
+        tags=['Jobs'],
+        summary='Rank jobs by skill match',
+        description='Score the current user against every job matching the usual filters using '
+                    'only the structured skill requirements (no AI call), best matches first',
+    )
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def skill_matches(self, request):
+        """
+        Rank jobs by deterministic skill match
+
+        Jobs without structured skill requirements are left out.
+        """
+        engine = SkillMatchEngine.for_user(request.user)
+        job_ids = self.filter_queryset(self.get_queryset()).values_list('id', flat=True)
+        scores = engine.score_jobs(job_ids)
+
+        ranked = sorted(
+            scores.values(),
+            key=lambda score: (score['skills_match_score'] or 0, score['must_have_met']),
+            reverse=True,
+        )
+
+        page = self.paginate_queryset(ranked)
+        ranked = page if page is not None else ranked
+
+        # Skill names only for the jobs actually returned
+        shown_ids = [score['job_id'] for score in ranked]
+        detailed = engine.score_jobs(shown_ids, details=shown_ids)
+        jobs = Job.objects.in_bulk(shown_ids)
+
+        data = []
+        for job_id in shown_ids:
+            job_data = JobListSerializer(jobs[job_id]).data
+            job_data['skill_match'] = detailed[job_id]
+            data.append(job_data)
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    @extend_schema(
+        tags=['Jobs'],
+        summary='Get skill match for a job',
+        description='Instant, model-free skill match of the current user against this job',
+    )
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def skill_match(self, request, pk=None):
+        """
+        Deterministic skill match of the current user against this job
+        """
+        job = self.get_object()
+        score = skill_match_preview(request.user, job.id)
+
+        if score is None:
+            return Response(
+                {'error': 'This job has no structured skill requirements to match against'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(score)
+
     @extend_schema(
         tags=['Jobs'],
         summary='Analyze job eligibility',
         description='Analyze how well the current user matches this job using AI',
         request=AnalyzeJobEligibilitySerializer,
-        responses={200: JobEligibilityAnalysisDetailSerializer},
+        responses={
+            200: JobEligibilityAnalysisDetailSerializer,
+            202: OpenApiResponse(description='Queued as a background task (background=true)'),
+        },
     )
-    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated], throttle_classes=[LLMThrottle])
     def analyze_eligibility(self, request, pk=None):
         """
         Analyze user's eligibility for this job using LangChain AI
@@ -130,21 +300,34 @@ class JobViewSet(viewsets.ReadOnlyModelViewSet):
         serializer.is_valid(raise_exception=True)
 
         additional_context = serializer.validated_data.get('additional_context', '')
+        force = serializer.validated_data.get('force', False)
+
+        if wants_background(request):
+            task = enqueue('jobs.analyze', {
+                'user_id': request.user.id,
+                'job_id': job.id,
+                'additional_context': additional_context,
+                'force': force,
+            }, user=request.user)
+            return task_accepted_response(
+                task, skill_match_preview=skill_match_preview(request.user, job.id)
+            )
 
         try:
             # Initialize analyzer
             analyzer = JobEligibilityAnalyzer(model_name="gpt-4")
 
-            # Perform analysis
+            # Perform analysis (reuses the last result if nothing changed)
             analysis = analyzer.analyze_eligibility(
                 user=request.user,
                 job=job,
-                additional_context=additional_context
+                additional_context=additional_context,
+                force=force,
             )
 
             # Return analysis
             response_serializer = JobEligibilityAnalysisDetailSerializer(analysis)
-            return Response(response_serializer.data, status=status.HTTP_200_OK)
+            return _analysis_response(analysis, response_serializer.data)
 
         except Exception as e:
             return Response(
@@ -153,6 +336,42 @@ class JobViewSet(viewsets.ReadOnlyModelViewSet):
             )
 
 
+    @extend_schema(
+        tags=['Jobs'],
+        summary='Stream analyze job eligibility (SSE)',
+        description='Analyze how well the current user matches this job using AI, streaming '
+                    'progressive metrics and the stored analysis id as Server-Sent Events',
+        request=AnalyzeJobEligibilitySerializer,
+        responses={200: {'type': 'string', 'description': 'text/event-stream'}},
+    )
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated], throttle_classes=[LLMThrottle])
+    def stream_analyze_eligibility(self, request, pk=None):
+        """
+        Stream the analysis of user's eligibility for this job
+
+        Returns a stream of events:
+        - status: Progress updates
+        - skill_match_preview: Instant, model-free skill match
+        - partial_metric: Each score as soon as the model has written it
+        - field / field_item: Other fields of the analysis as soon as they close
+        - metrics_complete: All metrics calculated
+        - complete: Id of the stored analysis (reused: true if nothing changed
+          since the last analysis)
+        - error: Error occurred
+        """
+        job = self.get_object()
+        serializer = AnalyzeJobEligibilitySerializer(data={'job_id': job.id, **request.data})
+        serializer.is_valid(raise_exception=True)
+
+        analyzer = StreamingJobAnalyzer(model_name="gpt-4")
+        return _analysis_stream_response(analyzer.stream_analyze_eligibility(
+            user=request.user,
+            job=job,
+            additional_context=serializer.validated_data.get('additional_context', ''),
+            force=serializer.validated_data.get('force', False),
+        ))
+
+
 @extend_schema_view(
     list=extend_schema(
         tags=['Job Analysis'],
@@ -240,9 +459,12 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
         summary='Analyze job eligibility',
         description='Analyze eligibility for a job with optional additional context',
         request=AnalyzeJobEligibilitySerializer,
-        responses={200: JobEligibilityAnalysisDetailSerializer},
+        responses={
+            200: JobEligibilityAnalysisDetailSerializer,
+            202: OpenApiResponse(description='Queued as a background task (background=true)'),
+        },
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
     def analyze(self, request):
         """
         Analyze user's eligibility for a job
@@ -252,6 +474,18 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
 
         job_id = serializer.validated_data['job_id']
         additional_context = serializer.validated_data.get('additional_context', '')
+        force = serializer.validated_data.get('force', False)
+
+        if wants_background(request):
+            task = enqueue('jobs.analyze', {
+                'user_id': request.user.id,
+                'job_id': job_id,
+                'additional_context': additional_context,
+                'force': force,
+            }, user=request.user)
+            return task_accepted_response(
+                task, skill_match_preview=skill_match_preview(request.user, job_id)
+            )
 
         try:
             job = Job.objects.get(id=job_id)
@@ -259,16 +493,17 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
             # Initialize analyzer
             analyzer = JobEligibilityAnalyzer(model_name="gpt-4")
 
-            # Perform analysis
+            # Perform analysis (reuses the last result if nothing changed)
             analysis = analyzer.analyze_eligibility(
                 user=request.user,
                 job=job,
-                additional_context=additional_context
+                additional_context=additional_context,
+                force=force,
             )
 
             # Return analysis
             response_serializer = JobEligibilityAnalysisDetailSerializer(analysis)
-            return Response(response_serializer.data, status=status.HTTP_200_OK)
+            return _analysis_response(analysis, response_serializer.data)
 
         except Job.DoesNotExist:
             return Response(
@@ -281,14 +516,110 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @extend_schema(
+        tags=['Job Analysis'],
+        summary='Stream analyze job eligibility (SSE)',
+        description='Analyze eligibility for a job, streaming progressive metrics and the '
+                    'stored analysis id as Server-Sent Events',
+        request=AnalyzeJobEligibilitySerializer,
+        responses={200: {'type': 'string', 'description': 'text/event-stream'}},
+    )
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
+    def stream_analyze(self, request):
+        """
+        Stream the analysis of user's eligibility for a job
+
+        Returns a stream of events:
+        - status: Progress updates
+        - skill_match_preview: Instant, model-free skill match
+        - partial_metric: Each score as soon as the model has written it
+        - field / field_item: Other fields of the analysis as soon as they close
+        - metrics_complete: All metrics calculated
+        - complete: Id of the stored analysis (reused: true if nothing changed
+          since the last analysis)
+        - error: Error occurred
+        """
+        serializer = AnalyzeJobEligibilitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        job = Job.objects.get(id=serializer.validated_data['job_id'])
+
+        analyzer = StreamingJobAnalyzer(model_name="gpt-4")
+        return _analysis_stream_response(analyzer.stream_analyze_eligibility(
+            user=request.user,
+            job=job,
+            additional_context=serializer.validated_data.get('additional_context', ''),
+            force=serializer.validated_data.get('force', False),
+        ))
+
+    @extend_schema(
+        tags=['Job Analysis'],
+        summary='Analyze eligibility for several jobs',
+        description='Analyze eligibility for a list of jobs concurrently, streaming each '
+                    'result as Server-Sent Events as soon as it is ready',
+        request=AnalyzeJobsBatchSerializer,
+        responses={200: {'type': 'string', 'description': 'text/event-stream'}},
+    )
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
+    def analyze_batch(self, request):
+        """
+        Analyze user's eligibility for several jobs at once
+
+        Returns a stream of events:
+        - status: Batch size and how many analyses were reused
+        - result: One per job, with its stored analysis id, as each analysis finishes (or fails)
+        - complete: Analysis ids for the whole batch
+        - error: Error occurred
+        """
+        serializer = AnalyzeJobsBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        job_ids = serializer.validated_data['job_ids']
+        additional_context = serializer.validated_data.get('additional_context', '')
+        force = serializer.validated_data.get('force', False)
+
+        jobs_by_id = Job.objects.in_bulk(job_ids)
+        jobs = [jobs_by_id[job_id] for job_id in job_ids]
+
+        def event_stream():
+            """Generator for SSE events"""
+            try:
+                analyzer = JobEligibilityAnalyzer(model_name="gpt-4")
+                for event in analyzer.analyze_batch(
+                    user=request.user,
+                    jobs=jobs,
+                    additional_context=additional_context,
+                    force=force,
+                ):
+                    yield f"data: {json.dumps(event)}\n\n"
+
+            except Exception as e:
+                error_event = {
+                    'type': 'error',
+                    'error': str(e),
+                    'message': f'Batch analysis failed: {str(e)}'
+                }
+                yield f"data: {json.dumps(error_event)}\n\n"
+
+        response = StreamingHttpResponse(
+            event_stream(),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
     @extend_schema(
         tags=['Job Analysis'],
         summary='Re-analyze with additional context',
         description='Re-run analysis with additional context from user',
         request=ReanalyzeJobEligibilitySerializer,
-        responses={200: JobEligibilityAnalysisDetailSerializer},
+        responses={
+            200: JobEligibilityAnalysisDetailSerializer,
+            202: OpenApiResponse(description='Queued as a background task (background=true)'),
+        },
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
     def reanalyze(self, request):
         """
         Re-analyze with additional context
@@ -298,6 +629,21 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
 
         analysis_id = serializer.validated_data['analysis_id']
         additional_context = serializer.validated_data['additional_context']
+        force = serializer.validated_data.get('force', False)
+
+        if wants_background(request):
+            if not JobEligibilityAnalysis.objects.filter(id=analysis_id, user=request.user).exists():
+                return Response(
+                    {'error': 'Analysis not found or you do not have permission to access it'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            task = enqueue('jobs.reanalyze', {
+                'user_id': request.user.id,
+                'analysis_id': analysis_id,
+                'additional_context': additional_context,
+                'force': force,
+            }, user=request.user)
+            return task_accepted_response(task)
 
         try:
             # Get previous analysis
@@ -312,12 +658,13 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
             # Re-analyze
             new_analysis = analyzer.reanalyze_with_context(
                 analysis=previous_analysis,
-                additional_context=additional_context
+                additional_context=additional_context,
+                force=force,
             )
 
             # Return analysis
             response_serializer = JobEligibilityAnalysisDetailSerializer(new_analysis)
-            return Response(response_serializer.data, status=status.HTTP_200_OK)
+            return _analysis_response(new_analysis, response_serializer.data)
 
         except JobEligibilityAnalysis.DoesNotExist:
             return Response(
@@ -330,6 +677,50 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @extend_schema(
+        tags=['Job Analysis'],
+        summary='Stream re-analyze with additional context (SSE)',
+        description='Re-run analysis with additional context from user, streaming progressive '
+                    'metrics and the stored analysis id as Server-Sent Events',
+        request=ReanalyzeJobEligibilitySerializer,
+        responses={200: {'type': 'string', 'description': 'text/event-stream'}},
+    )
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
+    def stream_reanalyze(self, request):
+        """
+        Stream a re-analysis with additional context
+
+        Returns a stream of events:
+        - status: Progress updates
+        - skill_match_preview: Instant, model-free skill match
+        - partial_metric: Each score as soon as the model has written it
+        - field / field_item: Other fields of the analysis as soon as they close
+        - metrics_complete: All metrics calculated
+        - complete: Id of the stored analysis (reused: true if nothing changed
+          since the last analysis)
+        - error: Error occurred
+        """
+        serializer = ReanalyzeJobEligibilitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            previous_analysis = JobEligibilityAnalysis.objects.select_related('user', 'job').get(
+                id=serializer.validated_data['analysis_id'],
+                user=request.user
+            )
+        except JobEligibilityAnalysis.DoesNotExist:
+            return Response(
+                {'error': 'Analysis not found or you do not have permission to access it'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        analyzer = StreamingJobAnalyzer(model_name="gpt-4")
+        return _analysis_stream_response(analyzer.stream_reanalyze_with_context(
+            analysis=previous_analysis,
+            additional_context=serializer.validated_data['additional_context'],
+            force=serializer.validated_data.get('force', False),
+        ))
+
     @extend_schema(
         tags=['Job Analysis'],
         summary='Get analysis statistics',
@@ -380,12 +771,16 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
                         'type': 'string',
                         'description': 'User question about the analysis',
                     },
+                    'session_id': {
+                        'type': 'integer',
+                        'description': 'Chat session to continue (omit to start a new one)',
+                    },
                 },
                 'required': ['analysis_id', 'message'],
             }
         },
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
     def chat(self, request):
         """
         Chat with AI about a specific job analysis
@@ -407,21 +802,29 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
 
         try:
             # Get analysis
-            analysis = JobEligibilityAnalysis.objects.get(
+            analysis = JobEligibilityAnalysis.objects.select_related('job').get(
                 id=analysis_id,
                 user=request.user
             )
 
+            # Continue the client's chat session, or start one
+            session = chat.open_session(
+                request.user, ChatSession.Kind.ANALYSIS, analysis.pk,
+                session_id=request.data.get('session_id')
+            )
+
             # Initialize chat service
             chat_service = AnalysisChatService()
 
             # Get response from AI
             response = chat_service.chat_about_analysis(
                 analysis=analysis,
-                message=message
+                message=message,
+                session=session
             )
 
             return Response({
+                'session_id': session.pk,
                 'message': message,
                 'response': response,
             }, status=status.HTTP_200_OK)
@@ -431,12 +834,113 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
                 {'error': 'Analysis not found or you do not have permission to access it'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except ChatSession.DoesNotExist:
+            return Response(
+                {'error': 'Chat session not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as e:
             return Response(
                 {'error': f'Chat failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @extend_schema(
+        tags=['Job Analysis'],
+        summary='Stream chat about analysis (SSE)',
+        description='Chat about a job analysis with the answer streamed token by token '
+                    'as Server-Sent Events',
+        request={
+            'application/json': {
+                'type': 'object',
+                'properties': {
+                    'analysis_id': {
+                        'type': 'integer',
+                        'description': 'ID of the job analysis to chat about',
+                    },
+                    'message': {
+                        'type': 'string',
+                        'description': 'User question about the analysis',
+                    },
+                    'session_id': {
+                        'type': 'integer',
+                        'description': 'Chat session to continue (omit to start a new one)',
+                    },
+                },
+                'required': ['analysis_id', 'message'],
+            }
+        },
+        responses={200: {'type': 'string', 'description': 'text/event-stream'}},
+    )
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
+    def stream_chat(self, request):
+        """
+        Chat with AI about a job analysis, streaming the answer
+
+        Returns a stream of events:
+        - session: Chat session id (send it back to continue the chat)
+        - token: Next piece of the answer
+        - complete: Full answer, once it is stored in the session
+        - error: Error occurred
+
+        Generation stops when the client disconnects.
+        """
+        analysis_id = request.data.get('analysis_id')
+        message = request.data.get('message')
+
+        if not analysis_id or not message:
+            return Response(
+                {'error': 'analysis_id and message are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            analysis = JobEligibilityAnalysis.objects.select_related('job').get(
+                id=analysis_id,
+                user=request.user
+            )
+            session = chat.open_session(
+                request.user, ChatSession.Kind.ANALYSIS, analysis.pk,
+                session_id=request.data.get('session_id')
+            )
+        except JobEligibilityAnalysis.DoesNotExist:
+            return Response(
+                {'error': 'Analysis not found or you do not have permission to access it'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except ChatSession.DoesNotExist:
+            return Response(
+                {'error': 'Chat session not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        def event_stream():
+            """Generator for SSE events"""
+            try:
+                chat_service = AnalysisChatService()
+                for event in chat_service.stream_chat_about_analysis(
+                    analysis=analysis,
+                    message=message,
+                    session=session
+                ):
+                    yield f"data: {json.dumps(event)}\n\n"
+
+            except Exception as e:
+                error_event = {
+                    'type': 'error',
+                    'error': str(e),
+                    'message': f'Chat failed: {str(e)}'
+                }
+                yield f"data: {json.dumps(error_event)}\n\n"
+
+        response = StreamingHttpResponse(
+            event_stream(),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
     @extend_schema(
         tags=['Job Analysis'],
         summary='Analyze dream job',
@@ -458,13 +962,21 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
                         'description': 'Whether to save the parsed job to database (default: false)',
                         'default': False,
                     },
+                    'background': {
+                        'type': 'boolean',
+                        'description': 'Queue the analysis and return 202 with a task id (default: false)',
+                        'default': False,
+                    },
                 },
                 'required': ['job_description'],
             }
         },
-        responses={200: JobEligibilityAnalysisDetailSerializer},
+        responses={
+            200: JobEligibilityAnalysisDetailSerializer,
+            202: OpenApiResponse(description='Queued as a background task (background=true)'),
+        },
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
     def analyze_dream_job(self, request):
         """
         Analyze user's eligibility for their dream job
@@ -481,7 +993,7 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
         """
         job_description = request.data.get('job_description')
         additional_context = request.data.get('additional_context', '')
-        save_job = request.data.get('save_job', False)
+        save_job = request_flag(request, 'save_job')
 
         if not job_description:
             return Response(
@@ -489,6 +1001,15 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        if wants_background(request):
+            task = enqueue('jobs.analyze_dream_job', {
+                'user_id': request.user.id,
+                'job_description': job_description,
+                'additional_context': additional_context,
+                'save_job': save_job,
+            }, user=request.user)
+            return task_accepted_response(task)
+
         try:
             # Step 1: Parse job description with AI
             parser = DreamJobParser()
@@ -496,52 +1017,7 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
 
             # Step 2: Create job object (saved or temporary)
             if save_job:
-                # Map remote policy to correct values
-                remote_policy = parsed_job_data.get("remote_policy", "REMOTE")
-                if remote_policy == "FULLY_REMOTE":
-                    remote_policy = "REMOTE"
-                elif remote_policy == "ON_SITE":
-                    remote_policy = "ONSITE"
-
-                # Generate unique source URL for saved dream jobs
-                import uuid
-                source_url = f"https://skillsetz.com/dream-jobs/{uuid.uuid4()}"
-
-                # Build job kwargs, only include salary_currency if provided
-                job_kwargs = {
-                    "title": parsed_job_data.get("job_title", "Dream Job"),
-                    "company_name": parsed_job_data.get("company_name", "Dream Company"),
-                    "company_description": parsed_job_data.get("company_culture", ""),
-                    "job_type": parsed_job_data.get("job_type", "FULL_TIME"),
-                    "experience_level": parsed_job_data.get("experience_level", "MID"),
-                    "location": parsed_job_data.get("location", "Remote"),
-                    "is_remote": parsed_job_data.get("is_remote", True),
-                    "remote_policy": remote_policy,
-                    "description": parsed_job_data.get("description", ""),
-                    "responsibilities": "\n".join(
-                        [f"• {resp}" for resp in parsed_job_data.get("responsibilities", [])]
-                    ) if isinstance(parsed_job_data.get("responsibilities"), list) else str(parsed_job_data.get("responsibilities", "")),
-                    "requirements": "\n".join(
-                        [f"• {req.get('name', req) if isinstance(req, dict) else req}"
-                         for req in parsed_job_data.get("required_skills", [])]
-                    ),
-                    "salary_min": parsed_job_data.get("min_salary"),
-                    "salary_max": parsed_job_data.get("max_salary"),
-                    "source_url": source_url,
-                    "source_platform": "Dream Job (User Created)",
-                    "parsed_skills": parsed_job_data.get("required_skills", [])
-                    + parsed_job_data.get("preferred_skills", []),
-                    "parsed_requirements": parsed_job_data,
-                    "status": 'ACTIVE',
-                    "added_by": request.user,
-                }
-
-                # Only add salary_currency if provided (let model default handle it otherwise)
-                if parsed_job_data.get("salary_currency"):
-                    job_kwargs["salary_currency"] = parsed_job_data.get("salary_currency")
-
-                # Save to database
-                job = Job.objects.create(**job_kwargs)
+                job = parser.create_saved_job(parsed_job_data, request.user)
             else:
                 # Create temporary job (not saved)
                 job = parser.create_temporary_job(parsed_job_data)
@@ -582,7 +1058,14 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
     @extend_schema(
         tags=['Job Analysis'],
         summary='Stream analyze dream job (SSE)',
-        description='Stream job analysis with real-time updates using Server-Sent Events',
+        description='Stream job analysis with real-time updates using Server-Sent Events. '
+                    'Events carry ids; reconnecting with Last-Event-ID resumes the same run.',
+        parameters=[
+            OpenApiParameter(
+                'Last-Event-ID', OpenApiTypes.STR, location=OpenApiParameter.HEADER,
+                description='Id of the last event received, to resume an interrupted stream',
+            ),
+        ],
         request={
             'application/json': {
                 'type': 'object',
@@ -605,21 +1088,37 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
             }
         },
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
     def stream_analyze_dream_job(self, request):
         """
         Stream job analysis with real-time updates using Server-Sent Events
 
+        Parsing the description (an LLM call) and gathering the user's
+        profile run concurrently; the status event of each such stage
+        carries its timing, and the final event all stage timings.
+
         Returns a stream of events:
         - status: Progress updates
-        - partial_metric: Metrics as they're calculated
+        - partial_metric: Each score as soon as the model has written it
+        - field / field_item: Other fields of the analysis, and each entry of
+          list fields (strengths, skill_gaps, ...), as soon as they close
         - metrics_complete: All metrics calculated
         - complete: Analysis finished
         - error: Error occurred
+
+        Each event has an SSE id. A client that lost the connection sends
+        the last id it received as the Last-Event-ID header and gets the
+        rest of the same run instead of a new one.
         """
+        last_event_id = request.headers.get('Last-Event-ID')
+        if last_event_id:
+            resumed = singleflight.resume(last_event_id, request.user.id)
+            if resumed is not None:
+                return self._event_stream_response(resumed)
+
         job_description = request.data.get('job_description')
         additional_context = request.data.get('additional_context', '')
-        save_job = request.data.get('save_job', False)
+        save_job = request_flag(request, 'save_job')
 
         if not job_description:
             return Response(
@@ -630,71 +1129,51 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
         def event_stream():
             """Generator for SSE events"""
             try:
-                # Step 1: Parse job description
                 yield f"data: {json.dumps({'type': 'status', 'step': 'parsing', 'message': 'Parsing job description with AI...', 'progress': 5})}\n\n"
 
+                # Steps 1-2: parse the description and build the job while
+                # the user's profile snapshot is gathered alongside
                 parser = DreamJobParser()
-                parsed_job_data = parser.parse_job_description(job_description)
-
-                yield f"data: {json.dumps({'type': 'status', 'step': 'parsed', 'message': 'Job description parsed successfully', 'progress': 15})}\n\n"
-
-                # Step 2: Create job object
-                if save_job:
-                    remote_policy = parsed_job_data.get("remote_policy", "REMOTE")
-                    if remote_policy == "FULLY_REMOTE":
-                        remote_policy = "REMOTE"
-                    elif remote_policy == "ON_SITE":
-                        remote_policy = "ONSITE"
-
-                    import uuid
-                    source_url = f"https://skillsetz.com/dream-jobs/{uuid.uuid4()}"
-
-                    job_kwargs = {
-                        "title": parsed_job_data.get("job_title", "Dream Job"),
-                        "company_name": parsed_job_data.get("company_name", "Dream Company"),
-                        "company_description": parsed_job_data.get("company_culture", ""),
-                        "job_type": parsed_job_data.get("job_type", "FULL_TIME"),
-                        "experience_level": parsed_job_data.get("experience_level", "MID"),
-                        "location": parsed_job_data.get("location", "Remote"),
-                        "is_remote": parsed_job_data.get("is_remote", True),
-                        "remote_policy": remote_policy,
-                        "description": parsed_job_data.get("description", ""),
-                        "responsibilities": "\n".join(
-                            [f"• {resp}" for resp in parsed_job_data.get("responsibilities", [])]
-                        ) if isinstance(parsed_job_data.get("responsibilities"), list) else str(parsed_job_data.get("responsibilities", "")),
-                        "requirements": "\n".join(
-                            [f"• {req.get('name', req) if isinstance(req, dict) else req}"
-                             for req in parsed_job_data.get("required_skills", [])]
-                        ),
-                        "salary_min": parsed_job_data.get("min_salary"),
-                        "salary_max": parsed_job_data.get("max_salary"),
-                        "source_url": source_url,
-                        "source_platform": "Dream Job (User Created)",
-                        "parsed_skills": parsed_job_data.get("required_skills", []) + parsed_job_data.get("preferred_skills", []),
-                        "parsed_requirements": parsed_job_data,
-                        "status": 'ACTIVE',
-                        "added_by": request.user,
+                analyzer = StreamingJobAnalyzer()
+                graph = StageGraph()
+                graph.add('parse', lambda: parser.parse_job_description(job_description))
+                graph.add('user_context', lambda: analyzer._gather_user_context(request.user))
+                graph.add(
+                    'job',
+                    lambda parse: (
+                        parser.create_saved_job(parse, request.user)
+                        if save_job else parser.create_temporary_job(parse)
+                    ),
+                    after=['parse'],
+                )
+                progress = 5
+                for timing in graph.run():
+                    stage = DREAM_JOB_STAGES[timing.name]
+                    progress += stage['progress']
+                    status_event = {
+                        'type': 'status',
+                        'step': stage['step'],
+                        'message': stage['message'],
+                        'progress': progress,
+                        'timing': timing.as_dict(),
                     }
+                    yield f"data: {json.dumps(status_event)}\n\n"
 
-                    if parsed_job_data.get("salary_currency"):
-                        job_kwargs["salary_currency"] = parsed_job_data.get("salary_currency")
-
-                    job = Job.objects.create(**job_kwargs)
-                    job_id = job.id
-                else:
-                    job = parser.create_temporary_job(parsed_job_data)
-                    job_id = None
+                parsed_job_data = graph.results['parse']
+                job = graph.results['job']
+                job_id = job.id if save_job else None
 
                 # Step 3: Stream analysis
-                analyzer = StreamingJobAnalyzer()
-
+                analysis_started = graph.elapsed_ms()
                 for event in analyzer.stream_analyze_eligibility(
                     user=request.user,
                     job=job,
-                    additional_context=additional_context
+                    additional_context=additional_context,
+                    user_context=graph.results['user_context'],
                 ):
                     # Forward all events to client
                     yield f"data: {json.dumps(event)}\n\n"
+                analysis_timing = StageTiming('analysis', analysis_started, graph.elapsed_ms() - analysis_started)
 
                 # Step 4: Send final data with job info
                 final_event = {
@@ -703,6 +1182,8 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
                     'job_saved': save_job,
                     'job_id': job_id,
                     'job_url': f'/api/jobs/{job_id}/' if job_id else None,
+                    'timings': [timing.as_dict() for timing in graph.timings + [analysis_timing]],
+                    'total_ms': round(graph.elapsed_ms(), 1),
                 }
                 yield f"data: {json.dumps(final_event)}\n\n"
 
@@ -714,10 +1195,30 @@ class JobEligibilityAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
                 }
                 yield f"data: {json.dumps(error_event)}\n\n"
 
-        response = StreamingHttpResponse(
-            event_stream(),
-            content_type='text/event-stream'
+        # Duplicate requests (double-clicks, retries) join the stream in flight
+        key = singleflight.flight_key(
+            'stream_analyze_dream_job',
+            request.user.id,
+            normalize_text(job_description),
+            additional_context,
+            save_job,
         )
+        waiting_event = {
+            'type': 'status',
+            'step': 'waiting',
+            'message': 'An identical analysis is already running, waiting for it...',
+            'progress': 5,
+        }
+        return self._event_stream_response(singleflight.stream(
+            key,
+            event_stream,
+            f"data: {json.dumps(waiting_event)}\n\n",
+            user_id=request.user.id,
+        ))
+
+    def _event_stream_response(self, events):
+        """SSE response for a resumable single-flight stream"""
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
         response['Cache-Control'] = 'no-cache'
         response['X-Accel-Buffering'] = 'no'
         return response
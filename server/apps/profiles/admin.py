@@ -11,6 +11,7 @@ from .models import (
     Skill,
     SkillCategory,
     UserSkill,
+    ParsedResume,
 )
 
 
@@ -316,3 +317,42 @@ class UserSkillAdmin(admin.ModelAdmin):
     def get_user(self, obj):
         return obj.profile.user.email
     get_user.short_description = 'User'
+
+
+@admin.register(ParsedResume)
+class ParsedResumeAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the resume parse cache
+    """
+    list_display = [
+        'file_sha256',
+        'llm_model',
+        'prompt_version',
+        'hit_count',
+        'created_at',
+        'last_used_at',
+    ]
+    list_filter = [
+        'llm_model',
+        'prompt_version',
+    ]
+    search_fields = [
+        'file_sha256',
+        'cache_key',
+    ]
+    readonly_fields = [
+        'cache_key',
+        'file_sha256',
+        'llm_model',
+        'prompt_version',
+        'resume_text',
+        'parsed_data',
+        'hit_count',
+        'created_at',
+        'last_used_at',
+    ]
+    ordering = ['-last_used_at']
+
+    def has_add_permission(self, request):
+        """Cache entries are only created by the resume parser"""
+        return False
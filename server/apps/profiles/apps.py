@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ProfilesConfig(AppConfig):
     name = 'apps.profiles'
+
+    def ready(self):
+        from . import signals  # noqa: F401
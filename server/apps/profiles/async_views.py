@@ -0,0 +1,177 @@
+"""
+Native async views for the AI-backed profile endpoints
+
+Mounted in place of the matching UserProfileViewSet actions when
+settings.ASYNC_AI_VIEWS is on (the default under core.asgi).
+Request and response bodies match the DRF actions.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from rest_framework import status
+
+from apps.ai.chat import open_session
+from apps.ai.async_api import api_response, async_api_view, task_accepted_response
+from apps.ai.models import ChatSession
+from apps.tasks.services import enqueue, wants_background, save_task_upload
+from .models import UserProfile
+from .services import ResumeParserService, ProfileChatService
+from .views import build_onboarding_response
+
+
+@require_POST
+@async_api_view
+async def onboard(request):
+    """
+    Complete onboarding flow in one request:
+    1. Upload resume
+    2. Parse with GPT-4
+    3. Build complete profile
+    """
+    resume_file = request.FILES.get('resume')
+
+    if not resume_file:
+        return api_response(
+            {'error': 'No resume file provided'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if wants_background(request):
+        resume_path = await sync_to_async(save_task_upload)(resume_file)
+        task = await sync_to_async(enqueue)('profiles.onboard', {
+            'user_id': request.user.id,
+            'resume_path': resume_path,
+        }, user=request.user)
+        return task_accepted_response(task)
+
+    try:
+        # Step 1 & 2: Parse resume
+        parser = ResumeParserService()
+        parse_result = await parser.aparse_resume_file(resume_file)
+
+        # Step 3: Build profile (resume_file is left rewound by the parser)
+        response_data = await sync_to_async(build_onboarding_response)(
+            request.user,
+            parse_result['parsed_data'],
+            resume_file,
+            parse_result['resume_text'],
+        )
+
+        return api_response(response_data, status=status.HTTP_201_CREATED)
+
+    except ValueError as e:
+        return api_response(
+            {'error': str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return api_response(
+            {'error': f'Onboarding failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@require_POST
+@async_api_view
+async def chat(request):
+    """
+    Chat with AI about your profile and resume
+    """
+    message = request.data.get('message')
+
+    if not message:
+        return api_response(
+            {'error': 'message is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        profile, created = await UserProfile.objects.aget_or_create(user=request.user)
+        session = await sync_to_async(open_session)(
+            request.user, ChatSession.Kind.PROFILE, profile.pk,
+            session_id=request.data.get('session_id')
+        )
+
+        chat_service = ProfileChatService()
+        response = await chat_service.achat_about_profile(
+            user=request.user,
+            profile=profile,
+            message=message,
+            session=session
+        )
+
+        return api_response({
+            'session_id': session.pk,
+            'message': message,
+            'response': response,
+        })
+
+    except ChatSession.DoesNotExist:
+        return api_response(
+            {'error': 'Chat session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return api_response(
+            {'error': f'Chat failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@require_POST
+@async_api_view
+async def stream_chat(request):
+    """
+    Chat with AI about your profile, streaming the answer (Server-Sent Events)
+
+    A client disconnect cancels the stream and with it the model call.
+    """
+    message = request.data.get('message')
+
+    if not message:
+        return api_response(
+            {'error': 'message is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    profile, created = await UserProfile.objects.aget_or_create(user=request.user)
+    try:
+        session = await sync_to_async(open_session)(
+            request.user, ChatSession.Kind.PROFILE, profile.pk,
+            session_id=request.data.get('session_id')
+        )
+    except ChatSession.DoesNotExist:
+        return api_response(
+            {'error': 'Chat session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    async def event_stream():
+        """Async generator for SSE events"""
+        try:
+            chat_service = ProfileChatService()
+            async for event in chat_service.astream_chat_about_profile(
+                user=request.user,
+                profile=profile,
+                message=message,
+                session=session
+            ):
+                yield f"data: {json.dumps(event)}\n\n"
+
+        except Exception as e:
+            error_event = {
+                'type': 'error',
+                'error': str(e),
+                'message': f'Chat failed: {str(e)}'
+            }
+            yield f"data: {json.dumps(error_event)}\n\n"
+
+    response = StreamingHttpResponse(
+        event_stream(),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
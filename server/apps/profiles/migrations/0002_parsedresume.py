@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-16 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParsedResume',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cache_key', models.CharField(help_text='SHA-256 of file digest, model and prompt version', max_length=64, unique=True)),
+                ('file_sha256', models.CharField(db_index=True, help_text='SHA-256 of the uploaded file bytes', max_length=64)),
+                ('llm_model', models.CharField(help_text='LLM model used for parsing', max_length=100)),
+                ('prompt_version', models.CharField(help_text='Version of the parsing prompt', max_length=20)),
+                ('resume_text', models.TextField(help_text='Text extracted from the file')),
+                ('parsed_data', models.JSONField(default=dict)),
+                ('hit_count', models.IntegerField(default=0, help_text='Times this parse was served from the database cache')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Parsed Resume',
+                'verbose_name_plural': 'Parsed Resumes',
+                'db_table': 'parsed_resumes',
+                'ordering': ['-last_used_at'],
+            },
+        ),
+    ]
@@ -334,3 +334,39 @@ class UserSkill(models.Model):
 
     def __str__(self):
         return f"{self.skill.name} ({self.proficiency_level})"
+
+
+class ParsedResume(models.Model):
+    """
+    Cache of extracted and AI-parsed resumes keyed by uploaded file digest
+    """
+
+    cache_key = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="SHA-256 of file digest, model and prompt version",
+    )
+    file_sha256 = models.CharField(
+        max_length=64, db_index=True, help_text="SHA-256 of the uploaded file bytes"
+    )
+    llm_model = models.CharField(max_length=100, help_text="LLM model used for parsing")
+    prompt_version = models.CharField(max_length=20, help_text="Version of the parsing prompt")
+
+    resume_text = models.TextField(help_text="Text extracted from the file")
+    parsed_data = models.JSONField(default=dict)
+
+    hit_count = models.IntegerField(
+        default=0, help_text="Times this parse was served from the database cache"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "parsed_resumes"
+        verbose_name = _("Parsed Resume")
+        verbose_name_plural = _("Parsed Resumes")
+        ordering = ["-last_used_at"]
+
+    def __str__(self):
+        return f"Resume {self.file_sha256[:12]} ({self.llm_model})"
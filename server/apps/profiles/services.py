@@ -2,15 +2,65 @@
 AI-powered services for profile management
 """
 
+import copy
+import hashlib
+import io
 import json
-import os
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Iterator, Optional
 import PyPDF2
 from docx import Document
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
-from langchain_google_genai import ChatGoogleGenerativeAI
+from django.db.models import F
+from django.utils import timezone
+
+from apps.ai import chat
+from apps.ai.cache import TieredCache, content_hash
+from apps.ai.llm import registry as llm_registry, get_llm
+from apps.ai.models import ChatSession
+from apps.ai.usage import operation_config
+
+
+def _load_parsed_resume(key: str) -> Optional[Dict[str, Any]]:
+    """Load a cached resume parse from the database and bump its hit counter"""
+    from apps.profiles.models import ParsedResume
+
+    entry = (
+        ParsedResume.objects.filter(cache_key=key)
+        .values("resume_text", "parsed_data")
+        .first()
+    )
+    if entry is not None:
+        ParsedResume.objects.filter(cache_key=key).update(
+            hit_count=F("hit_count") + 1, last_used_at=timezone.now()
+        )
+    return entry
+
+
+def _store_parsed_resume(key: str, value: Dict[str, Any]):
+    """Persist a fresh resume parse so other workers (and restarts) can reuse it"""
+    from apps.profiles.models import ParsedResume
+
+    ParsedResume.objects.update_or_create(
+        cache_key=key,
+        defaults={
+            "file_sha256": value["file_sha256"],
+            "llm_model": value["llm_model"],
+            "prompt_version": value["prompt_version"],
+            "resume_text": value["resume_text"],
+            "parsed_data": value["parsed_data"],
+        },
+    )
+
+
+resume_parse_cache = TieredCache(
+    max_entries=settings.RESUME_PARSE_CACHE["max_entries"],
+    ttl=settings.RESUME_PARSE_CACHE["ttl"],
+    load=_load_parsed_resume,
+    store=_store_parsed_resume,
+)
 
 
 class ResumeParserService:
@@ -18,25 +68,14 @@ class ResumeParserService:
     Service for parsing resumes using GPT-4 to extract structured data
     """
 
+    # Bump whenever the parsing prompt changes so stale cache entries are ignored
+    PROMPT_VERSION = "1"
+
     def __init__(self):
-        """Initialize the dream job parser with GPT-4"""
-        model_provider = os.getenv("MODEL_PROVIDER")
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-
-        gemini_model = "gemini-3-flash-preview"
-        openai_model = "gpt-4o-mini"
-
-        if model_provider == "gemini":
-            gemini_api_key = os.getenv("GEMINI_API_KEY")
-            self.llm = ChatGoogleGenerativeAI(model=gemini_model, api_key=gemini_api_key)
-        else:
-            self.llm = ChatOpenAI(
-                model=openai_model,
-                temperature=0.1,  # Low temperature for consistent extraction
-                api_key=api_key,
-            )
+        """Initialize the resume parser with the pooled parser client"""
+        spec = llm_registry.spec_for("parser")
+        self.model_name = spec.model
+        self.llm = llm_registry.get_for_spec(spec)
 
     def extract_text_from_pdf(self, file: UploadedFile) -> str:
         """
@@ -74,17 +113,18 @@ class ResumeParserService:
         except Exception as e:
             raise ValueError(f"Error extracting text from DOCX: {str(e)}")
 
-    def extract_text(self, file: UploadedFile) -> str:
+    def extract_text(self, file: UploadedFile, file_name: str = None) -> str:
         """
         Extract text from resume file (PDF or DOCX)
 
         Args:
-            file: Uploaded resume file
+            file: Uploaded resume file (or an in-memory copy of it)
+            file_name: Original file name, if file does not carry one
 
         Returns:
             Extracted text content
         """
-        file_extension = file.name.lower().split(".")[-1]
+        file_extension = (file_name or file.name).lower().split(".")[-1]
 
         if file_extension == "pdf":
             return self.extract_text_from_pdf(file)
@@ -106,7 +146,53 @@ class ResumeParserService:
         Returns:
             Structured dictionary with parsed resume data
         """
-        prompt = ChatPromptTemplate.from_messages(
+        try:
+            # Invoke GPT-4 to parse resume
+            chain = self._build_prompt() | self.llm
+            response = chain.invoke(
+                {"resume_text": resume_text}, config=operation_config("parse_resume")
+            )
+            return self._parse_response(response)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse GPT-4 response as JSON: {str(e)}")
+        except Exception as e:
+            raise ValueError(f"Error parsing resume with GPT-4: {str(e)}")
+
+    async def aparse_resume(self, resume_text: str) -> Dict[str, Any]:
+        """Async parse_resume() using the model's ainvoke"""
+        try:
+            chain = self._build_prompt() | self.llm
+            response = await chain.ainvoke(
+                {"resume_text": resume_text}, config=operation_config("parse_resume")
+            )
+            return self._parse_response(response)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse GPT-4 response as JSON: {str(e)}")
+        except Exception as e:
+            raise ValueError(f"Error parsing resume with GPT-4: {str(e)}")
+
+    def _parse_response(self, response) -> Dict[str, Any]:
+        """
+        Extract the JSON payload from a model response
+
+        Raises:
+            json.JSONDecodeError: If the response is not valid JSON
+        """
+        content = response.content.strip()
+
+        # Remove markdown code blocks if present
+        if content.startswith("```json"):
+            content = content[7:]  # Remove ```json
+        if content.startswith("```"):
+            content = content[3:]  # Remove ```
+        if content.endswith("```"):
+            content = content[:-3]  # Remove ```
+
+        return json.loads(content.strip())
+
+    def _build_prompt(self) -> ChatPromptTemplate:
+        """Prompt template for resume extraction"""
+        return ChatPromptTemplate.from_messages(
             [
                 (
                     "system",
@@ -212,36 +298,37 @@ If information is ambiguous or missing, make reasonable inferences based on cont
             ]
         )
 
-        try:
-            # Invoke GPT-4 to parse resume
-            chain = prompt | self.llm
-            response = chain.invoke({"resume_text": resume_text})
-
-            # Extract JSON from response
-            content = response.content.strip()
-
-            # Remove markdown code blocks if present
-            if content.startswith("```json"):
-                content = content[7:]  # Remove ```json
-            if content.startswith("```"):
-                content = content[3:]  # Remove ```
-            if content.endswith("```"):
-                content = content[:-3]  # Remove ```
-
-            # Parse JSON
-            parsed_data = json.loads(content.strip())
+    def read_file(self, file: UploadedFile):
+        """
+        Read an uploaded file once, hashing the bytes as they stream in
 
-            return parsed_data
+        Args:
+            file: Uploaded resume file
 
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse GPT-4 response as JSON: {str(e)}")
-        except Exception as e:
-            raise ValueError(f"Error parsing resume with GPT-4: {str(e)}")
+        Returns:
+            Tuple of (SHA-256 hex digest, in-memory copy of the file)
+        """
+        digest = hashlib.sha256()
+        buffer = io.BytesIO()
+        for chunk in file.chunks():
+            digest.update(chunk)
+            buffer.write(chunk)
+        buffer.seek(0)
+        # Leave the upload rewound so callers can still save it
+        file.seek(0)
+        return digest.hexdigest(), buffer
+
+    def cache_key(self, file_sha256: str) -> str:
+        """Parse cache key; changes whenever the model or prompt version does"""
+        return content_hash(file_sha256, self.model_name, self.PROMPT_VERSION)
 
     def parse_resume_file(self, file: UploadedFile) -> Dict[str, Any]:
         """
         Complete resume parsing pipeline: extract text + parse with GPT-4
 
+        Re-uploads of the same file are served from the parse cache, skipping
+        both text extraction and the LLM call.
+
         Args:
             file: Uploaded resume file (PDF or DOCX)
 
@@ -250,23 +337,87 @@ If information is ambiguous or missing, make reasonable inferences based on cont
                 - resume_text: Extracted text
                 - parsed_data: Structured data from GPT-4
         """
-        # Step 1: Extract text
-        resume_text = self.extract_text(file)
+        file_sha256, buffer = self.read_file(file)
+        key = self.cache_key(file_sha256)
 
-        if not resume_text or len(resume_text.strip()) < 50:
-            raise ValueError(
-                "Resume appears to be empty or too short. "
-                "Please ensure the file contains readable text."
+        cached = resume_parse_cache.get(key)
+        if cached is None:
+            # Step 1: Extract text
+            resume_text = self._extract_resume_text(file, file_sha256, buffer)
+
+            # Step 2: Parse with GPT-4
+            parsed_data = self.parse_resume(resume_text)
+
+            cached = self._cache_entry(file_sha256, resume_text, parsed_data)
+            resume_parse_cache.set(key, cached)
+
+        return {
+            "resume_text": cached["resume_text"],
+            "parsed_data": copy.deepcopy(cached["parsed_data"]),
+        }
+
+    async def aparse_resume_file(self, file: UploadedFile) -> Dict[str, Any]:
+        """
+        Async parse_resume_file()
+
+        File reading, cache lookups and PDF/DOCX extraction run in a worker
+        thread; the LLM call itself is a native ainvoke.
+        """
+        file_sha256, buffer = await sync_to_async(self.read_file)(file)
+        key = self.cache_key(file_sha256)
+
+        cached = await resume_parse_cache.aget(key)
+        if cached is None:
+            resume_text = await sync_to_async(self._extract_resume_text)(
+                file, file_sha256, buffer
             )
+            parsed_data = await self.aparse_resume(resume_text)
+            cached = self._cache_entry(file_sha256, resume_text, parsed_data)
+            await resume_parse_cache.aset(key, cached)
 
-        # Step 2: Parse with GPT-4
-        parsed_data = self.parse_resume(resume_text)
+        return {
+            "resume_text": cached["resume_text"],
+            "parsed_data": copy.deepcopy(cached["parsed_data"]),
+        }
 
+    def _cache_entry(self, file_sha256: str, resume_text: str, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a resume_parse_cache entry"""
         return {
+            "file_sha256": file_sha256,
+            "llm_model": self.model_name,
+            "prompt_version": self.PROMPT_VERSION,
             "resume_text": resume_text,
             "parsed_data": parsed_data,
         }
 
+    def _extract_resume_text(self, file: UploadedFile, file_sha256: str, buffer) -> str:
+        """
+        Extract text from the in-memory copy, reusing an earlier extraction
+
+        Raises:
+            ValueError: If the file has no usable text
+        """
+        from apps.profiles.models import ParsedResume
+
+        # Text extraction does not depend on the prompt, so any earlier parse
+        # of the same bytes can donate its text
+        resume_text = (
+            ParsedResume.objects.filter(file_sha256=file_sha256)
+            .values_list("resume_text", flat=True)
+            .first()
+        )
+
+        if resume_text is None:
+            resume_text = self.extract_text(buffer, file_name=file.name)
+
+        if not resume_text or len(resume_text.strip()) < 50:
+            raise ValueError(
+                "Resume appears to be empty or too short. "
+                "Please ensure the file contains readable text."
+            )
+
+        return resume_text
+
 
 class ProfileBuilderService:
     """
@@ -699,24 +850,8 @@ class ProfileChatService:
     """
 
     def __init__(self):
-        """Initialize chat service with GPT-4"""
-        model_provider = os.getenv("MODEL_PROVIDER")
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-
-        gemini_model = "gemini-2.0-flash-exp"
-        openai_model = "gpt-4o"
-
-        if model_provider == "gemini":
-            gemini_api_key = os.getenv("GEMINI_API_KEY")
-            self.llm = ChatGoogleGenerativeAI(model=gemini_model, api_key=gemini_api_key)
-        else:
-            self.llm = ChatOpenAI(
-                model=openai_model,
-                temperature=0.7,  # Slightly higher for more conversational responses
-                api_key=api_key,
-            )
+        """Initialize chat service with the pooled chat client"""
+        self.llm = get_llm("chat")
 
     def _format_profile_context(self, user, profile) -> str:
         """Format user profile data into context for AI"""
@@ -791,7 +926,7 @@ class ProfileChatService:
 
         return "\n".join(context_parts)
 
-    def chat_about_profile(self, user, profile, message: str) -> str:
+    def chat_about_profile(self, user, profile, message: str, session: Optional[ChatSession] = None) -> str:
         """
         Generate AI response about user's profile
 
@@ -799,15 +934,129 @@ class ProfileChatService:
             user: Django User object
             profile: UserProfile object
             message: User's question/message
+            session: Chat session to continue (a new one if None); the
+                message and response are added to it
 
         Returns:
             AI-generated response
         """
-        # Format profile context
-        profile_context = self._format_profile_context(user, profile)
+        if session is None:
+            session = chat.open_session(user, ChatSession.Kind.PROFILE, profile.pk)
+
+        # Format profile context (cached on the session)
+        profile_context = chat.session_context(
+            session, lambda: self._format_profile_context(user, profile)
+        )
+        history = chat.conversation(session, message, self.llm)
 
-        # Create chat prompt
-        prompt = ChatPromptTemplate.from_messages([
+        # Generate response
+        chain = self._build_prompt() | self.llm
+        result = chain.invoke({
+            "profile_context": profile_context,
+            "history": history,
+            "message": message,
+        }, config=operation_config("profile_chat"))
+
+        chat.record_turn(session, message, result.content)
+        return result.content
+
+    async def achat_about_profile(
+        self, user, profile, message: str, session: Optional[ChatSession] = None
+    ) -> str:
+        """Async chat_about_profile() using the model's ainvoke"""
+        if session is None:
+            session = await sync_to_async(chat.open_session)(user, ChatSession.Kind.PROFILE, profile.pk)
+
+        profile_context = await sync_to_async(chat.session_context)(
+            session, lambda: self._format_profile_context(user, profile)
+        )
+        history = await chat.aconversation(session, message, self.llm)
+
+        chain = self._build_prompt() | self.llm
+        result = await chain.ainvoke({
+            "profile_context": profile_context,
+            "history": history,
+            "message": message,
+        }, config=operation_config("profile_chat"))
+
+        await chat.arecord_turn(session, message, result.content)
+        return result.content
+
+    def stream_chat_about_profile(
+        self, user, profile, message: str, session: Optional[ChatSession] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream an AI response about user's profile
+
+        Same events and disconnect handling as
+        AnalysisChatService.stream_chat_about_analysis().
+
+        Args:
+            user: Django User object
+            profile: UserProfile object
+            message: User's question/message
+            session: Chat session to continue (a new one if None)
+
+        Yields:
+            session, token and complete events
+        """
+        if session is None:
+            session = chat.open_session(user, ChatSession.Kind.PROFILE, profile.pk)
+        yield {"type": "session", "session_id": session.pk}
+
+        profile_context = chat.session_context(
+            session, lambda: self._format_profile_context(user, profile)
+        )
+        history = chat.streaming_history(session, message, self.llm)
+
+        chain = self._build_prompt() | self.llm
+        parts = []
+        for chunk in chain.stream({
+            "profile_context": profile_context,
+            "history": history,
+            "message": message,
+        }, config=operation_config("profile_chat")):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield {"type": "token", "content": chunk.content}
+
+        response = "".join(parts)
+        chat.record_turn(session, message, response)
+        yield {"type": "complete", "session_id": session.pk, "response": response}
+        chat.compact(session, self.llm)
+
+    async def astream_chat_about_profile(
+        self, user, profile, message: str, session: Optional[ChatSession] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async stream_chat_about_profile() using the model's astream"""
+        if session is None:
+            session = await sync_to_async(chat.open_session)(user, ChatSession.Kind.PROFILE, profile.pk)
+        yield {"type": "session", "session_id": session.pk}
+
+        profile_context = await sync_to_async(chat.session_context)(
+            session, lambda: self._format_profile_context(user, profile)
+        )
+        history = await chat.astreaming_history(session, message, self.llm)
+
+        chain = self._build_prompt() | self.llm
+        parts = []
+        async for chunk in chain.astream({
+            "profile_context": profile_context,
+            "history": history,
+            "message": message,
+        }, config=operation_config("profile_chat")):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield {"type": "token", "content": chunk.content}
+
+        response = "".join(parts)
+        await chat.arecord_turn(session, message, response)
+        yield {"type": "complete", "session_id": session.pk, "response": response}
+        await chat.acompact(session, self.llm)
+
+    def _build_prompt(self) -> ChatPromptTemplate:
+        """Prompt template for the profile advisor"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are a helpful career advisor and resume expert for CareerCraft.
 You help users understand their profile, improve their resume, and make career decisions.
 
@@ -818,14 +1067,6 @@ If the user's profile is incomplete, gently suggest what they should add to stre
 User Profile Data:
 {profile_context}
 """),
+            MessagesPlaceholder("history"),
             ("human", "{message}"),
         ])
-
-        # Generate response
-        chain = prompt | self.llm
-        result = chain.invoke({
-            "profile_context": profile_context,
-            "message": message,
-        })
-
-        return result.content
@@ -0,0 +1,42 @@
+"""
+Signal handlers for Profiles app
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.ai.chat import invalidate_context
+from apps.ai.models import ChatSession
+from apps.users.models import User
+from .models import UserProfile, Education, WorkExperience, Project, Certification, UserSkill
+
+# User fields shown in the profile chat context
+CHAT_CONTEXT_USER_FIELDS = {'first_name', 'last_name', 'email'}
+
+
+@receiver([post_save, post_delete], sender=Education)
+@receiver([post_save, post_delete], sender=WorkExperience)
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Certification)
+@receiver([post_save, post_delete], sender=UserSkill)
+def invalidate_profile_record_chats(sender, instance, **kwargs):
+    """Rebuild the chat context of sessions about a profile whose records changed"""
+    invalidate_context(ChatSession.Kind.PROFILE, subject_ids=[instance.profile_id])
+
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_profile_chats(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_context(ChatSession.Kind.PROFILE, subject_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=UserProfile)
+def delete_profile_chats(sender, instance, **kwargs):
+    ChatSession.objects.filter(kind=ChatSession.Kind.PROFILE, subject_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_chats(sender, instance, created, update_fields=None, **kwargs):
+    """Rebuild the profile chat context when the user's name or email changes"""
+    if created or (update_fields is not None and not CHAT_CONTEXT_USER_FIELDS & set(update_fields)):
+        return
+    invalidate_context(ChatSession.Kind.PROFILE, user_id=instance.pk)
@@ -0,0 +1,42 @@
+"""
+Background task handlers for the Profiles app
+"""
+from apps.tasks.services import (
+    task_handler,
+    report_progress,
+    open_task_upload,
+    delete_task_upload,
+)
+from apps.users.models import User
+from .services import ResumeParserService
+from .views import build_onboarding_response
+
+
+@task_handler('profiles.onboard')
+def onboard(task, user_id, resume_path):
+    """Background version of UserProfileViewSet.onboard"""
+    user = User.objects.get(id=user_id)
+
+    with open_task_upload(resume_path) as resume_file:
+        # Step 1 & 2: Parse resume
+        report_progress(task, 10, 'Parsing resume with AI...')
+        parser = ResumeParserService()
+        try:
+            parse_result = parser.parse_resume_file(resume_file)
+        except ValueError:
+            # Unreadable resume: no retry will need the upload
+            resume_file.close()
+            delete_task_upload(resume_path)
+            raise
+
+        # Step 3: Build profile
+        report_progress(task, 70, 'Building your profile...')
+        response_data = build_onboarding_response(
+            user,
+            parse_result['parsed_data'],
+            resume_file,
+            parse_result['resume_text'],
+        )
+
+    delete_task_upload(resume_path)
+    return response_data
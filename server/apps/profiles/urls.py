@@ -1,9 +1,11 @@
 """
 URL Configuration for profiles app
 """
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
 from .views import (
     UserProfileViewSet,
     EducationViewSet,
@@ -24,3 +26,15 @@ router.register(r'certifications', CertificationViewSet, basename='certification
 urlpatterns = [
     path('', include(router.urls)),
 ]
+
+# Native async versions of the AI actions shadow the DRF ones under ASGI
+if settings.ASYNC_AI_VIEWS:
+    urlpatterns = [
+        path('profile/onboard/', async_views.onboard, name='profile-onboard-async'),
+        path('profile/chat/', async_views.chat, name='profile-chat-async'),
+        path(
+            'profile/stream_chat/',
+            async_views.stream_chat,
+            name='profile-stream-chat-async',
+        ),
+    ] + urlpatterns
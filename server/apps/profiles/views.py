@@ -1,12 +1,14 @@
 """
 Views for Profiles app
 """
+import json
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiResponse
 
 from .models import (
     UserProfile,
@@ -24,6 +26,45 @@ from .serializers import (
     CompleteProfileSerializer,
 )
 from .services import ResumeParserService, ProfileBuilderService, ProfileChatService
+from apps.ai import chat
+from apps.ai.models import ChatSession
+from apps.ai.throttling import LLMThrottle
+from apps.tasks.services import enqueue, wants_background, save_task_upload
+from apps.tasks.views import task_accepted_response
+
+
+def build_onboarding_response(user, parsed_data, resume_file, resume_text):
+    """
+    Build the profile from a parsed resume and render the onboarding response body
+
+    Shared by the blocking, async and background versions of onboarding.
+    """
+    builder = ProfileBuilderService(user, parsed_data)
+    build_result = builder.build_complete_profile(
+        resume_file=resume_file,
+        resume_text=resume_text
+    )
+
+    # Get complete profile data
+    profile = build_result['profile']
+    serializer = CompleteProfileSerializer(profile)
+
+    return {
+        'message': 'Onboarding completed successfully',
+        'onboarding_summary': {
+            'time_to_complete': '~2 minutes',
+            'records_created': {
+                'education': len(build_result['education_records']),
+                'work_experience': len(build_result['work_records']),
+                'projects': len(build_result['projects']),
+                'certifications': len(build_result['certifications']),
+                'skills': len(build_result['user_skills']),
+                'total': build_result['total_records_created'],
+            },
+            'profile_completion': UserProfileViewSet()._calculate_completion(profile),
+        },
+        'profile': serializer.data,
+    }
 
 
 @extend_schema_view(
@@ -131,7 +172,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             }
         },
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
     def upload_resume(self, request):
         """
         Upload and parse resume using GPT-4
@@ -175,7 +216,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         summary='Build profile from parsed resume',
         description='Create complete user profile from AI-parsed resume data',
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
     def build_from_resume(self, request):
         """
         Build complete profile from parsed resume data
@@ -242,13 +283,22 @@ class UserProfileViewSet(viewsets.ModelViewSet):
                         'type': 'string',
                         'format': 'binary',
                         'description': 'Resume file (PDF or DOCX)',
-                    }
+                    },
+                    'background': {
+                        'type': 'boolean',
+                        'description': 'Queue onboarding and return 202 with a task id (default: false)',
+                        'default': False,
+                    },
                 },
                 'required': ['resume'],
             }
         },
+        responses={
+            201: CompleteProfileSerializer,
+            202: OpenApiResponse(description='Queued as a background task (background=true)'),
+        },
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
     def onboard(self, request):
         """
         Complete onboarding flow in one request:
@@ -266,43 +316,28 @@ class UserProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        if wants_background(request):
+            resume_path = save_task_upload(resume_file)
+            task = enqueue('profiles.onboard', {
+                'user_id': request.user.id,
+                'resume_path': resume_path,
+            }, user=request.user)
+            return task_accepted_response(task)
+
         try:
             # Step 1 & 2: Parse resume
             parser = ResumeParserService()
             parse_result = parser.parse_resume_file(resume_file)
 
-            # Step 3: Build profile
-            builder = ProfileBuilderService(request.user, parse_result['parsed_data'])
-
-            # Save the resume file
-            # Reset file pointer after parsing
-            resume_file.seek(0)
-
-            build_result = builder.build_complete_profile(
-                resume_file=resume_file,
-                resume_text=parse_result['resume_text']
+            # Step 3: Build profile (resume_file is left rewound by the parser)
+            response_data = build_onboarding_response(
+                request.user,
+                parse_result['parsed_data'],
+                resume_file,
+                parse_result['resume_text'],
             )
 
-            # Get complete profile data
-            profile = build_result['profile']
-            serializer = CompleteProfileSerializer(profile)
-
-            return Response({
-                'message': 'Onboarding completed successfully',
-                'onboarding_summary': {
-                    'time_to_complete': '~2 minutes',
-                    'records_created': {
-                        'education': len(build_result['education_records']),
-                        'work_experience': len(build_result['work_records']),
-                        'projects': len(build_result['projects']),
-                        'certifications': len(build_result['certifications']),
-                        'skills': len(build_result['user_skills']),
-                        'total': build_result['total_records_created'],
-                    },
-                    'profile_completion': self._calculate_completion(profile),
-                },
-                'profile': serializer.data,
-            }, status=status.HTTP_201_CREATED)
+            return Response(response_data, status=status.HTTP_201_CREATED)
 
         except ValueError as e:
             return Response(
@@ -327,12 +362,16 @@ class UserProfileViewSet(viewsets.ModelViewSet):
                         'type': 'string',
                         'description': 'User message/question about their profile',
                     },
+                    'session_id': {
+                        'type': 'integer',
+                        'description': 'Chat session to continue (omit to start a new one)',
+                    },
                 },
                 'required': ['message'],
             }
         },
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
     def chat(self, request):
         """
         Chat with AI about your profile and resume
@@ -355,6 +394,12 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             # Get or create user profile
             profile, created = UserProfile.objects.get_or_create(user=request.user)
 
+            # Continue the client's chat session, or start one
+            session = chat.open_session(
+                request.user, ChatSession.Kind.PROFILE, profile.pk,
+                session_id=request.data.get('session_id')
+            )
+
             # Initialize chat service
             chat_service = ProfileChatService()
 
@@ -362,20 +407,111 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             response = chat_service.chat_about_profile(
                 user=request.user,
                 profile=profile,
-                message=message
+                message=message,
+                session=session
             )
 
             return Response({
+                'session_id': session.pk,
                 'message': message,
                 'response': response,
             }, status=status.HTTP_200_OK)
 
+        except ChatSession.DoesNotExist:
+            return Response(
+                {'error': 'Chat session not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as e:
             return Response(
                 {'error': f'Chat failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @extend_schema(
+        tags=['Profile'],
+        summary='Stream chat about profile (SSE)',
+        description='Chat about your profile with the answer streamed token by token '
+                    'as Server-Sent Events',
+        request={
+            'application/json': {
+                'type': 'object',
+                'properties': {
+                    'message': {
+                        'type': 'string',
+                        'description': 'User message/question about their profile',
+                    },
+                    'session_id': {
+                        'type': 'integer',
+                        'description': 'Chat session to continue (omit to start a new one)',
+                    },
+                },
+                'required': ['message'],
+            }
+        },
+        responses={200: {'type': 'string', 'description': 'text/event-stream'}},
+    )
+    @action(detail=False, methods=['post'], throttle_classes=[LLMThrottle])
+    def stream_chat(self, request):
+        """
+        Chat with AI about your profile, streaming the answer
+
+        Returns a stream of events:
+        - session: Chat session id (send it back to continue the chat)
+        - token: Next piece of the answer
+        - complete: Full answer, once it is stored in the session
+        - error: Error occurred
+
+        Generation stops when the client disconnects.
+        """
+        message = request.data.get('message')
+
+        if not message:
+            return Response(
+                {'error': 'message is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        profile, created = UserProfile.objects.get_or_create(user=request.user)
+        try:
+            session = chat.open_session(
+                request.user, ChatSession.Kind.PROFILE, profile.pk,
+                session_id=request.data.get('session_id')
+            )
+        except ChatSession.DoesNotExist:
+            return Response(
+                {'error': 'Chat session not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        def event_stream():
+            """Generator for SSE events"""
+            try:
+                chat_service = ProfileChatService()
+                for event in chat_service.stream_chat_about_profile(
+                    user=request.user,
+                    profile=profile,
+                    message=message,
+                    session=session
+                ):
+                    yield f"data: {json.dumps(event)}\n\n"
+
+            except Exception as e:
+                error_event = {
+                    'type': 'error',
+                    'error': str(e),
+                    'message': f'Chat failed: {str(e)}'
+                }
+                yield f"data: {json.dumps(error_event)}\n\n"
+
+        response = StreamingHttpResponse(
+            event_stream(),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
     def _calculate_completion(self, profile):
         """Helper to calculate profile completion percentage"""
         completion_fields = [
@@ -0,0 +1,52 @@
+"""
+Admin configuration for Tasks app
+"""
+from django.contrib import admin
+from .models import BackgroundTask
+
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the background task queue
+    """
+    list_display = [
+        'id',
+        'task_type',
+        'user',
+        'status',
+        'progress',
+        'attempts',
+        'created_at',
+        'finished_at',
+    ]
+    list_filter = [
+        'status',
+        'task_type',
+        'created_at',
+    ]
+    search_fields = [
+        'id',
+        'user__email',
+        'error',
+    ]
+    readonly_fields = [
+        'id',
+        'user',
+        'task_type',
+        'payload',
+        'result',
+        'error',
+        'attempts',
+        'locked_by',
+        'locked_until',
+        'created_at',
+        'updated_at',
+        'started_at',
+        'finished_at',
+    ]
+    ordering = ['-created_at']
+
+    def has_add_permission(self, request):
+        """Tasks are only created by enqueue()"""
+        return False
@@ -0,0 +1,83 @@
+"""
+Management command that processes the background task queue
+"""
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.tasks.services import claim_next_task, default_worker_id, run_task
+
+
+class Command(BaseCommand):
+    help = 'Run a worker that processes queued background tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.TASK_QUEUE['poll_interval'],
+            help='Seconds to wait before polling again when the queue is empty',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once the queue is empty instead of waiting for new tasks',
+        )
+        parser.add_argument(
+            '--max-tasks',
+            type=int,
+            default=0,
+            help='Exit after processing this many tasks (0 = no limit)',
+        )
+        parser.add_argument(
+            '--worker-id',
+            type=str,
+            default=default_worker_id(),
+            help='Name recorded on the tasks this worker claims',
+        )
+
+    def handle(self, *args, **options):
+        poll_interval = options['poll_interval']
+        burst = options['burst']
+        max_tasks = options['max_tasks']
+        worker_id = options['worker_id']
+
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f'Task worker {worker_id} started')
+        processed = 0
+
+        while not self._stopping:
+            close_old_connections()
+            task = claim_next_task(worker_id)
+
+            if task is None:
+                if burst:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            self.stdout.write(f'Running {task.task_type} {task.id} (attempt {task.attempts})')
+            started = time.monotonic()
+            outcome = run_task(task)
+            self.stdout.write(
+                f'{task.task_type} {task.id} -> {outcome} in {time.monotonic() - started:.2f}s'
+            )
+
+            processed += 1
+            if max_tasks and processed >= max_tasks:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'Task worker {worker_id} stopped after {processed} task(s)'))
+
+    def _stop(self, signum, frame):
+        """Finish the current task, then exit"""
+        if self._stopping:
+            raise KeyboardInterrupt
+        self.stdout.write('Stopping after the current task...')
+        self._stopping = True
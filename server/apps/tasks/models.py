@@ -0,0 +1,90 @@
+"""
+Background task models
+"""
+
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from apps.users.models import User
+
+
+class BackgroundTask(models.Model):
+    """
+    A unit of work in the database-backed task queue
+
+    Workers claim a task by leasing it until locked_until; a task whose
+    lease expires (worker crashed or was restarted) becomes visible again
+    and is retried until max_attempts is reached.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", _("Pending")
+        RUNNING = "RUNNING", _("Running")
+        SUCCEEDED = "SUCCEEDED", _("Succeeded")
+        FAILED = "FAILED", _("Failed")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="background_tasks",
+        null=True,
+        blank=True,
+    )
+
+    task_type = models.CharField(
+        max_length=100, db_index=True, help_text="Registered handler name"
+    )
+    payload = models.JSONField(
+        default=dict, encoder=DjangoJSONEncoder, help_text="Handler keyword arguments"
+    )
+
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    progress = models.PositiveSmallIntegerField(default=0, help_text="0-100")
+    progress_message = models.CharField(max_length=255, blank=True)
+
+    result = models.JSONField(
+        null=True,
+        blank=True,
+        encoder=DjangoJSONEncoder,
+        help_text="Response body produced by the handler",
+    )
+    error = models.TextField(blank=True, help_text="Last error raised by the handler")
+
+    # Retry / visibility timeout
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(
+        default=timezone.now, help_text="Not claimed before this time (retry backoff)"
+    )
+    locked_until = models.DateTimeField(
+        null=True, blank=True, help_text="Lease expiry of the worker running the task"
+    )
+    locked_by = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "background_tasks"
+        verbose_name = _("Background Task")
+        verbose_name_plural = _("Background Tasks")
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+            models.Index(fields=["user", "-created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.task_type} {self.id} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
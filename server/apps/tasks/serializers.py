@@ -0,0 +1,29 @@
+"""
+Serializers for Tasks app
+"""
+from rest_framework import serializers
+
+from .models import BackgroundTask
+
+
+class BackgroundTaskSerializer(serializers.ModelSerializer):
+    """
+    Serializer for BackgroundTask status
+    """
+    class Meta:
+        model = BackgroundTask
+        fields = [
+            'id',
+            'task_type',
+            'status',
+            'progress',
+            'progress_message',
+            'result',
+            'error',
+            'attempts',
+            'max_attempts',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,267 @@
+"""
+Database-backed task queue
+
+Handlers are plain functions registered with @task_handler in an app's
+tasks.py. Web processes enqueue() rows; `manage.py run_task_worker`
+processes claim them with a lease (visibility timeout), run the handler
+and record the result, retrying failures with exponential backoff.
+"""
+
+import logging
+import os
+import socket
+import uuid
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.ai.usage import llm_call_context
+from .models import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+
+_handlers: Dict[str, Callable[..., Any]] = {}
+
+# Errors caused by the input rather than the environment; retrying won't help
+PERMANENT_ERRORS = (ValueError, ObjectDoesNotExist)
+
+
+def task_handler(name: str):
+    """
+    Register a function as the handler for a task type
+
+    The handler is called as handler(task, **payload) and returns the
+    JSON-serializable result stored on the task.
+    """
+
+    def decorator(func):
+        _handlers[name] = func
+        return func
+
+    return decorator
+
+
+def get_handler(name: str) -> Optional[Callable[..., Any]]:
+    return _handlers.get(name)
+
+
+def enqueue(
+    task_type: str,
+    payload: Dict[str, Any] = None,
+    user=None,
+    max_attempts: int = None,
+) -> BackgroundTask:
+    """
+    Queue a task for the workers
+
+    Args:
+        task_type: Registered handler name
+        payload: Keyword arguments for the handler (JSON-serializable)
+        user: Owner allowed to read the task status
+        max_attempts: Override settings.TASK_QUEUE["max_attempts"]
+
+    Returns:
+        The pending BackgroundTask
+    """
+    if task_type not in _handlers:
+        raise ValueError(f"Unknown task type: {task_type}")
+
+    return BackgroundTask.objects.create(
+        user=user,
+        task_type=task_type,
+        payload=payload or {},
+        max_attempts=max_attempts or settings.TASK_QUEUE["max_attempts"],
+    )
+
+
+def request_flag(request, field: str) -> bool:
+    """
+    A boolean field of the request body
+
+    Form and multipart bodies send strings, so "false" or "0" is False
+    rather than a truthy string.
+    """
+    value = request.data.get(field, False)
+    if isinstance(value, str):
+        value = value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def wants_background(request) -> bool:
+    """
+    Whether the client asked for 202 + task id instead of a blocking response
+
+    Either a truthy "background" field in the body or a
+    "Prefer: respond-async" header (RFC 7240).
+    """
+    return request_flag(request, "background") or "respond-async" in request.headers.get("Prefer", "")
+
+
+def accepted_body(task: BackgroundTask, **extra) -> Dict[str, Any]:
+    """Body of the 202 Accepted response returned for a queued task"""
+    status_url = f"/api/tasks/{task.id}/"
+    return {
+        "task_id": str(task.id),
+        "task_type": task.task_type,
+        "status": task.status,
+        "status_url": status_url,
+        "events_url": f"{status_url}events/",
+        **extra,
+    }
+
+
+def save_task_upload(file) -> str:
+    """
+    Stage an uploaded file in default storage so a worker can read it
+
+    Returns:
+        Storage path to pass in the task payload
+    """
+    file.seek(0)
+    return default_storage.save(f"task_uploads/{uuid.uuid4()}/{file.name}", file)
+
+
+def open_task_upload(path: str) -> File:
+    """Open a file staged by save_task_upload (named like the original upload)"""
+    return File(default_storage.open(path, "rb"), name=os.path.basename(path))
+
+
+def delete_task_upload(path: str):
+    default_storage.delete(path)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _visible_tasks(now) -> Q:
+    """Pending tasks that are due, plus running tasks whose lease has expired"""
+    return Q(status=BackgroundTask.Status.PENDING, run_after__lte=now) | Q(
+        status=BackgroundTask.Status.RUNNING, locked_until__lt=now
+    )
+
+
+def claim_next_task(worker_id: str) -> Optional[BackgroundTask]:
+    """
+    Lease the next visible task to this worker
+
+    The claim is a conditional UPDATE, so concurrent workers (threads or
+    processes, on SQLite or PostgreSQL) never run the same attempt twice.
+
+    Returns:
+        The claimed task, or None if the queue is empty
+    """
+    now = timezone.now()
+    visible = _visible_tasks(now)
+    lease = now + timedelta(seconds=settings.TASK_QUEUE["visibility_timeout"])
+
+    candidates = (
+        BackgroundTask.objects.filter(visible)
+        .order_by("run_after", "created_at")
+        .values_list("id", flat=True)[:10]
+    )
+    for task_id in candidates:
+        claimed = (
+            BackgroundTask.objects.filter(visible, id=task_id).update(
+                status=BackgroundTask.Status.RUNNING,
+                locked_by=worker_id,
+                locked_until=lease,
+                attempts=F("attempts") + 1,
+                started_at=now,
+                updated_at=now,
+            )
+        )
+        if claimed:
+            return BackgroundTask.objects.get(id=task_id)
+    return None
+
+
+def report_progress(task: BackgroundTask, progress: int, message: str = ""):
+    """
+    Record handler progress and extend the worker's lease
+
+    Long handlers should call this between steps so the task is not
+    considered abandoned while it is still being worked on.
+    """
+    now = timezone.now()
+    task.progress = progress
+    task.progress_message = message
+    BackgroundTask.objects.filter(id=task.id, locked_by=task.locked_by).update(
+        progress=progress,
+        progress_message=message[:255],
+        locked_until=now + timedelta(seconds=settings.TASK_QUEUE["visibility_timeout"]),
+        updated_at=now,
+    )
+
+
+def _finish(task: BackgroundTask, **fields):
+    """Update a claimed task, unless its lease was lost to another worker"""
+    fields["updated_at"] = timezone.now()
+    BackgroundTask.objects.filter(id=task.id, locked_by=task.locked_by).update(**fields)
+
+
+def run_task(task: BackgroundTask) -> str:
+    """
+    Run a claimed task's handler and record the outcome
+
+    Returns:
+        The task's new status
+    """
+    now = timezone.now()
+    handler = get_handler(task.task_type)
+
+    if handler is None:
+        error = f"Unknown task type: {task.task_type}"
+    elif task.attempts > task.max_attempts:
+        # Lease expired on the final attempt (worker died mid-task)
+        error = task.error or "Task timed out"
+    else:
+        try:
+            with llm_call_context(f"task:{task.task_type}", task.user_id):
+                result = handler(task, **task.payload)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if not isinstance(e, PERMANENT_ERRORS) and task.attempts < task.max_attempts:
+                backoff = settings.TASK_QUEUE["retry_backoff"] * 2 ** (task.attempts - 1)
+                _finish(
+                    task,
+                    status=BackgroundTask.Status.PENDING,
+                    run_after=now + timedelta(seconds=backoff),
+                    locked_until=None,
+                    locked_by="",
+                    error=error,
+                )
+                logger.warning(
+                    "Task %s failed (attempt %s), retrying in %ss",
+                    task.id, task.attempts, backoff, exc_info=True,
+                )
+                return BackgroundTask.Status.PENDING
+            logger.exception("Task %s failed (attempt %s)", task.id, task.attempts)
+        else:
+            _finish(
+                task,
+                status=BackgroundTask.Status.SUCCEEDED,
+                result=result,
+                error="",
+                progress=100,
+                progress_message="Completed",
+                locked_until=None,
+                finished_at=timezone.now(),
+            )
+            return BackgroundTask.Status.SUCCEEDED
+
+    _finish(
+        task,
+        status=BackgroundTask.Status.FAILED,
+        error=error,
+        locked_until=None,
+        finished_at=timezone.now(),
+    )
+    return BackgroundTask.Status.FAILED
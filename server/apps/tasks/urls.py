@@ -0,0 +1,16 @@
+"""
+URL Configuration for tasks app
+"""
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+
+from .views import BackgroundTaskViewSet
+
+app_name = 'tasks'
+
+router = DefaultRouter()
+router.register(r'', BackgroundTaskViewSet, basename='task')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
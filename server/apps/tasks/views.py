@@ -0,0 +1,107 @@
+"""
+Views for Tasks app
+"""
+import json
+import time
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, extend_schema_view
+
+from .models import BackgroundTask
+from .serializers import BackgroundTaskSerializer
+from .services import accepted_body
+
+
+def task_accepted_response(task, **extra):
+    """
+    202 response pointing the client at a queued task's status and event feed
+
+    Extra keyword arguments are added to the body.
+    """
+    data = accepted_body(task, **extra)
+    return Response(
+        data,
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': data['status_url']},
+    )
+
+
+@extend_schema_view(
+    list=extend_schema(
+        tags=['Background Tasks'],
+        summary='List my background tasks',
+        description='Get your queued, running and finished background tasks',
+    ),
+    retrieve=extend_schema(
+        tags=['Background Tasks'],
+        summary='Get task status',
+        description='Poll the status, progress and result of a background task',
+    ),
+)
+class BackgroundTaskViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for polling background tasks started with a 202 response
+    """
+    serializer_class = BackgroundTaskSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return BackgroundTask.objects.filter(user=self.request.user)
+
+    @extend_schema(
+        tags=['Background Tasks'],
+        summary='Stream task progress',
+        description='Server-Sent Events feed of a task\'s progress until it finishes',
+        responses={200: {'type': 'string', 'description': 'text/event-stream'}},
+    )
+    @action(detail=True, methods=['get'])
+    def events(self, request, pk=None):
+        """
+        Stream task progress using Server-Sent Events
+
+        Returns a stream of events:
+        - progress: Status or progress changed
+        - complete: Task succeeded (carries the result)
+        - error: Task failed
+        - timeout: Task still running when the feed closed; reconnect to keep following
+        """
+        task = self.get_object()
+        poll_interval = settings.TASK_QUEUE['events_poll_interval']
+        deadline = time.monotonic() + settings.TASK_QUEUE['events_timeout']
+
+        def event_stream():
+            """Generator for SSE events"""
+            last_seen = None
+            current = task
+
+            while True:
+                state = (current.status, current.progress, current.progress_message)
+                if state != last_seen:
+                    last_seen = state
+                    yield f"data: {json.dumps({'type': 'progress', 'status': current.status, 'progress': current.progress, 'message': current.progress_message})}\n\n"
+
+                if current.status == BackgroundTask.Status.SUCCEEDED:
+                    yield f"data: {json.dumps({'type': 'complete', 'task_id': str(current.id), 'result': current.result})}\n\n"
+                    return
+                if current.status == BackgroundTask.Status.FAILED:
+                    yield f"data: {json.dumps({'type': 'error', 'task_id': str(current.id), 'error': current.error})}\n\n"
+                    return
+                if time.monotonic() > deadline:
+                    yield f"data: {json.dumps({'type': 'timeout', 'task_id': str(current.id)})}\n\n"
+                    return
+
+                time.sleep(poll_interval)
+                current = BackgroundTask.objects.get(id=task.id)
+
+        response = StreamingHttpResponse(
+            event_stream(),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -12,5 +12,20 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# AI endpoints switch to their native async views when served over ASGI
+os.environ.setdefault('ASYNC_AI_VIEWS', 'true')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.DEBUG:
+    # Serve static files in development, as runserver did before uvicorn
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler  # noqa: E402
+
+    application = ASGIStaticFilesHandler(application)
+
+# Build the pooled LLM clients before the first request hits this worker
+from apps.ai.llm import warm_up_llm_clients  # noqa: E402
+
+warm_up_llm_clients()
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,9 +51,14 @@ INSTALLED_APPS = [
     "apps.users",
     "apps.profiles",
     "apps.jobs",
+    "apps.ai",
+    "apps.tasks",
 ]
 
 MIDDLEWARE = [
+    "apps.ai.middleware.RequestTimingMiddleware",  # first: its total covers the whole stack
+    "apps.ai.middleware.ConcurrencyLeaseMiddleware",
+    "apps.ai.middleware.RequestCancellationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -61,6 +67,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "apps.ai.middleware.LLMCallContextMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -145,7 +152,7 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "apps.ai.timing.TimedJSONRenderer",
     ],
     "DEFAULT_PARSER_CLASSES": [
         "rest_framework.parsers.JSONParser",
@@ -182,6 +189,17 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_ALLOW_HEADERS = (
+    *default_headers,
+    "last-event-id",
+    "x-request-timeout",
+)
+
+CORS_EXPOSE_HEADERS = [
+    "Server-Timing",
+    "X-Request-Timing-Id",
+]
+
 # drf-spectacular Settings
 SPECTACULAR_SETTINGS = {
     "TITLE": "CareerCraft API",
@@ -209,4 +227,210 @@ SPECTACULAR_SETTINGS = {
         {"name": "User Profile", "description": "User profile management endpoints"},
         {"name": "User Preferences", "description": "User preferences and settings"},
     ],
-}
\ No newline at end of file
+}
+
+# LLM clients
+# Model configuration for every AI role lives here. Services ask the pooled
+# registry in apps.ai.llm for a client by role instead of building their own.
+# MODEL_PROVIDER: openai, gemini, or the offline stand-ins fake and replay
+# (see LLM_STAND_IN)
+MODEL_PROVIDER = os.getenv("MODEL_PROVIDER", "openai")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+LLM_ROLES = {
+    # Structured extraction (job descriptions, resumes)
+    "parser": {
+        "openai": {"model": "gpt-4o-mini", "temperature": 0.1},
+        "gemini": {"model": "gemini-3-flash-preview", "temperature": None},
+    },
+    # Job eligibility analysis
+    "analyzer": {
+        "openai": {"model": "gpt-4o-mini", "temperature": 0.3},
+        "gemini": {"model": "gemini-3-flash-preview", "temperature": 0.3},
+    },
+    # Conversational advisors
+    "chat": {
+        "openai": {"model": "gpt-4o", "temperature": 0.7},
+        "gemini": {"model": "gemini-2.0-flash-exp", "temperature": None},
+    },
+}
+
+# Serve the AI endpoints from native async views (core.asgi turns this on)
+ASYNC_AI_VIEWS = os.getenv("ASYNC_AI_VIEWS", "false").lower() == "true"
+
+# Hedging and failover between OpenAI and Gemini (apps.ai.routing). Only
+# used when both API keys are set; MODEL_PROVIDER is tried first.
+LLM_ROUTING = {
+    "enabled": os.getenv("LLM_ROUTING", "true").lower() == "true",
+    # Send the request to the other provider too once a call runs past the
+    # hedge_percentile of the provider's recent latencies
+    "hedge": os.getenv("LLM_HEDGING", "true").lower() == "true",
+    "hedge_percentile": 95,
+    "latency_window": 200,  # recent successful calls kept per client
+    "min_samples": 20,  # below this, default_hedge_delay is used
+    "default_hedge_delay": 20.0,  # seconds
+    "min_hedge_delay": 1.0,  # seconds
+    # Circuit breaker: skip a provider for cooldown seconds after
+    # failure_threshold consecutive failures
+    "failure_threshold": 3,
+    "cooldown": 30.0,
+}
+
+# Roles whose clients are built when a worker starts
+LLM_WARM_ROLES = ["parser", "analyzer", "chat"]
+
+# Keep-alive HTTP pool shared by all OpenAI clients in a process
+LLM_HTTP_POOL = {
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry": 60.0,
+    "timeout": 120.0,
+}
+
+# In-process LRU in front of the ParsedJobDescription table
+JOB_PARSE_CACHE = {
+    "max_entries": 512,
+    "ttl": 60 * 60,  # seconds
+}
+
+# In-process LRU in front of the ParsedResume table
+RESUME_PARSE_CACHE = {
+    "max_entries": 128,
+    "ttl": 60 * 60,  # seconds
+}
+
+# Batch eligibility analysis (POST /api/jobs/analyses/analyze_batch/)
+ANALYSIS_BATCH = {
+    "max_jobs": 25,
+    "max_concurrency": int(os.getenv("ANALYSIS_BATCH_CONCURRENCY", "5")),
+}
+
+# Database-backed background task queue (python manage.py run_task_worker)
+TASK_QUEUE = {
+    "visibility_timeout": 5 * 60,  # seconds a claimed task stays leased
+    "max_attempts": 3,
+    "retry_backoff": 10,  # seconds, doubled after every failed attempt
+    "poll_interval": 1.0,  # seconds between polls of an empty queue
+    "events_poll_interval": 0.5,  # seconds between SSE progress checks
+    "events_timeout": 10 * 60,  # seconds before an SSE feed closes
+}
+
+# GET /api/jobs/recommended/ (in-memory inverted skill index per process)
+JOB_RECOMMENDATIONS = {
+    "default_limit": 20,
+    "max_limit": 100,
+    "sync_interval": 5.0,  # seconds between pulls of jobs changed elsewhere
+}
+
+# ?search= on /api/jobs/: "fulltext" (FTS5 on SQLite, tsvector on PostgreSQL)
+# or "basic" (DRF icontains scans)
+JOB_SEARCH = {
+    "backend": os.getenv("JOB_SEARCH_BACKEND", "fulltext"),
+    "snippet_tokens": 16,  # words per search_snippet
+}
+
+# USD per million tokens, used for LLMCallLog.estimated_cost. Dated model
+# versions match the longest listed prefix; unlisted models are not priced.
+LLM_PRICING = {
+    "gpt-4o": {"prompt": 2.50, "completion": 10.00},
+    "gpt-4o-mini": {"prompt": 0.15, "completion": 0.60},
+    "gpt-4.1": {"prompt": 2.00, "completion": 8.00},
+    "gpt-4.1-mini": {"prompt": 0.40, "completion": 1.60},
+    "gemini-2.0-flash": {"prompt": 0.10, "completion": 0.40},
+    "gemini-2.5-flash": {"prompt": 0.30, "completion": 2.50},
+    "gemini-2.5-pro": {"prompt": 1.25, "completion": 10.00},
+}
+
+# GET /api/ai/llm-usage/
+LLM_USAGE_REPORT = {
+    "default_hours": 24,
+    "max_hours": 24 * 31,
+}
+
+# Context sent with each eligibility analysis (JobEligibilityAnalyzer._create_prompt)
+ANALYSIS_PROMPT = {
+    # Estimated tokens for the candidate and job JSON; the lowest-value
+    # content (old roles, long descriptions) is trimmed first to fit
+    "context_token_budget": int(os.getenv("ANALYSIS_PROMPT_TOKEN_BUDGET", "3000")),
+    "max_text_chars": 1200,  # per free-text field, before any trimming
+}
+
+# Offline stand-in for the model APIs, for load tests, benchmarks and CI
+# (apps.ai.stand_in). MODEL_PROVIDER=fake answers with canned responses;
+# MODEL_PROVIDER=replay serves responses recorded from a real provider with
+# LLM_RECORD=true, keyed by prompt hash.
+LLM_STAND_IN = {
+    # Wait like a real model; off, responses return immediately
+    "simulate_latency": os.getenv("LLM_STAND_IN_LATENCY", "true").lower() == "true",
+    "time_to_first_token_ms": {"median": 400, "p95": 1500},  # log-normal
+    "tokens_per_second": {"mean": 80, "stddev": 20, "min": 5},  # normal
+    "seed": os.getenv("LLM_STAND_IN_SEED"),  # fixes the latency draws
+    "recordings_dir": os.getenv("LLM_RECORDINGS_DIR", str(BASE_DIR / "llm_recordings")),
+    "record": os.getenv("LLM_RECORD", "false").lower() == "true",
+    # On a replay miss: "fake" (canned response) or "error"
+    "replay_miss": os.getenv("LLM_REPLAY_MISS", "fake"),
+}
+
+# Server-Timing header on every response (apps.ai.middleware.RequestTimingMiddleware).
+# With debug on, each request's slowest SQL statements and their call sites
+# are kept for debug_ttl seconds at /api/ai/request-timing/<id>/ (admin only);
+# recording call sites slows every query down, so leave it off in production.
+REQUEST_TIMING = {
+    "enabled": os.getenv("REQUEST_TIMING", "true").lower() == "true",
+    "debug": os.getenv("REQUEST_TIMING_DEBUG", "false").lower() == "true",
+    "slow_statements": 10,  # statements listed per request
+    "call_site_depth": 3,  # application frames kept per statement
+    "debug_ttl": 10 * 60,
+}
+
+# Admission control for the endpoints that call the LLM (apps.ai.throttling),
+# shared by all worker processes through the database. Requests that cannot
+# get in within max_queue_wait seconds get 429 with Retry-After.
+LLM_THROTTLE = {
+    "enabled": os.getenv("LLM_THROTTLE", "true").lower() == "true",
+    "requests": {"capacity": 10, "per_minute": 6},  # per user: burst and refill
+    "tokens": {"capacity": 200_000, "per_minute": 5_000},  # per user LLM tokens
+    "user_concurrency": 2,  # in-flight LLM requests per user
+    "global_concurrency": int(os.getenv("LLM_GLOBAL_CONCURRENCY", "16")),
+    "max_queue_wait": 3.0,  # seconds
+    "poll_interval": 0.25,  # seconds between admission attempts while queued
+    "lease_ttl": 10 * 60,  # seconds before a slot of a crashed worker frees up
+}
+
+# Coalescing of identical in-flight AI requests (apps.ai.singleflight)
+SINGLE_FLIGHT = {
+    "lease_ttl": 5 * 60,  # seconds before the claim of a crashed worker lapses
+    "result_ttl": 15,  # seconds a finished result still serves duplicates
+    "poll_interval": 0.25,  # seconds between checks of another worker's flight
+    "retention": 60 * 60,  # seconds before finished lease rows are deleted
+}
+
+# Advisor chat sessions (apps.ai.chat)
+CHAT_SESSIONS = {
+    # Tokens of summary, earlier turns and new message; older turns are
+    # folded into the summary beyond this
+    "history_token_budget": int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2000")),
+    "summary_max_tokens": 400,
+}
+
+# Per-request deadline of AI work (apps.ai.cancellation). Clients may ask
+# for a shorter one (or a longer one up to max) in seconds with the header;
+# work still running at the deadline is abandoned and nothing is stored.
+REQUEST_DEADLINE = {
+    "default": float(os.getenv("REQUEST_DEADLINE", "120")),  # seconds
+    "max": 300,  # seconds
+    "header": "X-Request-Timeout",
+}
+
+# Resumable SSE streams (apps.ai.replay): events of streamed runs are
+# buffered in the database so a client reconnecting with Last-Event-ID
+# resumes the run, from any worker process, instead of starting over.
+SSE_REPLAY = {
+    "max_events": 500,  # newest events kept per stream
+    "flush_interval": 0.2,  # seconds events may wait before being written
+    "reconnect_grace": 15,  # seconds a run keeps going with no client attached
+    "poll_interval": 0.25,  # seconds between reads of another process's stream
+    "stale_after": 120,  # seconds without events before its producer counts as dead
+    "retention": 10 * 60,  # seconds a stream stays resumable after its last event
+}
@@ -38,6 +38,8 @@ urlpatterns = [
     # Skills are now part of profiles app
     # path('api/skills/', include('apps.skills.urls')),
     path('api/jobs/', include('apps.jobs.urls')),
+    path('api/tasks/', include('apps.tasks.urls')),
+    path('api/ai/', include('apps.ai.urls')),
 ]
 
 # Serve static files in development
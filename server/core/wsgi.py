@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Build the pooled LLM clients before the first request hits this worker
+from apps.ai.llm import warm_up_llm_clients  # noqa: E402
+
+warm_up_llm_clients()
@@ -10,4 +10,4 @@ echo "Collecting static files..."
 python manage.py collectstatic --noinput || true
 
 echo "Starting server..."
-exec python manage.py runserver 0.0.0.0:8000
+exec uvicorn core.asgi:application --host 0.0.0.0 --port 8000